@@ -5,37 +5,177 @@ from __future__ import annotations
 
 # standard libraries
 import asyncio
+import collections
 import copy
 import gettext
 import logging
 import os
+import queue
 import sys
+import threading
 import typing
 import weakref
 
 # local libraries
-from nion.ui import Declarative
+from nion.ui import Startup
 from nion.ui import UserInterface
 from nion.ui import Window
+from nion.utils import Event
 from nion.utils import Process
 
+# declarative is only needed to show dialogs or run declarative windows.
+Declarative = Startup.lazy_import("nion.ui.Declarative")
+
 _ = gettext.gettext
 
 
-class LoggingHandler(logging.StreamHandler):
+class LoggingHandler(logging.Handler):
+    """Keep recent log records and write them to a stream on a background thread.
+
+    emit never blocks on the stream: records are put on a queue of at most queue_size records, which a writer thread
+    formats and writes to the stream (by default the standard error stream at the time the handler is made). The most
+    recent max_records records are kept for take_records.
+
+    Records below rate_limit_level from each logger are limited to rate_limit records per second (averaged over one
+    second). Records dropped by the rate limit or because the queue is full are counted per logger; the writer notes
+    the counts in the stream.
+
+    Records are prepared when emitted, as in logging.handlers.QueueHandler: the message is merged with its arguments
+    and exception information is formatted to text, so that records do not hold references to mutable arguments or
+    tracebacks while queued or kept.
+
+    record_event fires with each record on the writer thread; use Window.listen_log_records to display records in a
+    window.
+    """
+
+    terminator = "\n"
 
-    def __init__(self):
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None, *, max_records: int = 10000,
+                 queue_size: int = 10000, rate_limit: typing.Optional[float] = 100.0,
+                 rate_limit_level: int = logging.ERROR):
         super().__init__()
-        self.__records = list()
+        self.stream = stream if stream is not None else sys.stderr
+        self.rate_limit = rate_limit
+        self.rate_limit_level = rate_limit_level
+        self.record_event = Event.Event()
+        self.__records: typing.Deque[logging.LogRecord] = collections.deque(maxlen=max_records)
+        self.__records_lock = threading.RLock()
+        self.__queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.__rate_buckets: typing.Dict[str, typing.List[float]] = dict()  # logger name -> [tokens, time]
+        self.__dropped_counts: typing.Dict[str, int] = dict()
+        self.__reported_dropped_count = 0
+        self.__thread: typing.Optional[threading.Thread] = None
+        self.__closed = False
 
-    def emit(self, record):
-        super().emit(record)
-        if self.__records is not None:
-            self.__records.append(record)
+    @property
+    def dropped_counts(self) -> typing.Dict[str, int]:
+        """Return the number of records dropped from each logger."""
+        with self.__records_lock:
+            return dict(self.__dropped_counts)
 
-    def take_records(self):
-        records = self.__records
-        self.__records = None
+    @property
+    def dropped_count(self) -> int:
+        with self.__records_lock:
+            return sum(self.__dropped_counts.values())
+
+    def __drop(self, record: logging.LogRecord) -> None:
+        with self.__records_lock:
+            self.__dropped_counts[record.name] = self.__dropped_counts.get(record.name, 0) + 1
+
+    def __is_rate_limited(self, record: logging.LogRecord) -> bool:
+        if not self.rate_limit or record.levelno >= self.rate_limit_level:
+            return False
+        with self.__records_lock:
+            bucket = self.__rate_buckets.setdefault(record.name, [self.rate_limit, record.created])
+            bucket[0] = min(bucket[0] + (record.created - bucket[1]) * self.rate_limit, self.rate_limit)
+            bucket[1] = record.created
+            if bucket[0] < 1.0:
+                return True
+            bucket[0] -= 1.0
+            return False
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Return a copy of the record with its message merged and its exception information formatted to text."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.__is_rate_limited(record):
+            self.__drop(record)
+            return
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.__records_lock:
+            self.__records.append(record)
+            if self.__closed:
+                return
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__write_records, name="LoggingHandler", daemon=True)
+                self.__thread.start()
+        try:
+            self.__queue.put_nowait(record)
+        except queue.Full:
+            self.__drop(record)
+
+    def __write_records(self) -> None:
+        while True:
+            record = self.__queue.get()
+            try:
+                if record is None:
+                    return
+                self.__write_record(record)
+                self.record_event.fire(record)
+            except Exception:
+                self.handleError(record)
+            finally:
+                self.__queue.task_done()
+
+    def __write_record(self, record: logging.LogRecord) -> None:
+        stream = self.stream
+        if stream:
+            dropped_count = self.dropped_count
+            if dropped_count != self.__reported_dropped_count:
+                stream.write(f"{dropped_count - self.__reported_dropped_count} log records dropped{self.terminator}")
+                self.__reported_dropped_count = dropped_count
+            stream.write(self.format(record) + self.terminator)
+            stream.flush()
+
+    def flush(self) -> None:
+        """Wait until the queued records are written.
+
+        Does not wait when called on the writer thread (for instance from a record_event listener), which would never
+        finish writing.
+        """
+        with self.__records_lock:
+            thread = self.__thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            self.__queue.join()
+
+    def close(self) -> None:
+        with self.__records_lock:
+            thread = self.__thread
+            self.__closed = True
+        if thread and thread.is_alive():
+            self.__queue.put(None)
+            thread.join()
+        with self.__records_lock:
+            self.__thread = None
+        super().close()
+
+    def take_records(self) -> typing.List[logging.LogRecord]:
+        """Return the recent records and clear them."""
+        with self.__records_lock:
+            records = list(self.__records)
+            self.__records.clear()
         return records
 
 
@@ -127,6 +267,8 @@ class BaseApplication:
 
     def periodic(self):
         """The periodic method can be overridden to implement periodic behavior."""
+        if self.ui:
+            self.ui.periodic()
         if self.__event_loop:  # special for shutdown
             self.__event_loop.stop()
             self.__event_loop.run_forever()
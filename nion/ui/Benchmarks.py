@@ -0,0 +1,496 @@
+"""
+Headless benchmarks of canvas items, drawing, declarative construction and item models, run on the test user interface.
+
+Run the benchmarks with:
+
+    python -m nion.ui.Benchmarks --baseline benchmarks.json
+
+Each benchmark reports the best time per iteration over several repeats. Baselines are stored per machine in a json
+file, since times are only comparable on the same machine; pass --update-baseline to store the results of this run as
+the baseline of this machine. When a baseline is available, each benchmark is compared with it and the exit status is
+1 if any benchmark is slower than its baseline by more than --threshold.
+
+Benchmarks are functions which set up the benchmark and return the function to time; register them with the
+benchmark decorator. The drawing benchmarks replay the drawing of a canvas with the drawing context backends; pass
+--recording with command streams recorded with NIONUI_RECORD_DRAWING to time their replay with each --backend
+instead (see DrawingBenchmark).
+"""
+
+# standard libraries
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import CanvasItem
+from nion.ui import Declarative
+from nion.ui import DrawingBenchmark
+from nion.ui import DrawingContext
+from nion.ui import GridCanvasItem
+from nion.ui import ListCanvasItem
+from nion.ui import QtUserInterface
+from nion.ui import TestUI
+from nion.ui import TreeCanvasItem
+from nion.utils import Geometry
+from nion.utils import Selection
+
+
+BenchmarkFunction = typing.Callable[[], typing.Callable[[], None]]
+
+benchmarks = dict()  # type: typing.Dict[str, BenchmarkFunction]
+
+# the fractional slowdown counted as a regression; times of headless benchmarks vary by several percent between runs.
+default_threshold = 0.25
+
+
+def benchmark(name: str) -> typing.Callable[[BenchmarkFunction], BenchmarkFunction]:
+    """Register a benchmark function under name."""
+    def register(fn: BenchmarkFunction) -> BenchmarkFunction:
+        benchmarks[name] = fn
+        return fn
+    return register
+
+
+class BenchmarkResult:
+    """The result of one benchmark. elapsed is the best time per iteration over the repeats."""
+
+    def __init__(self, name: str, iterations: int = 0, elapsed: float = 0.0):
+        self.name = name
+        self.iterations = iterations
+        self.elapsed = elapsed
+
+    def to_dict(self) -> typing.Dict:
+        return {"name": self.name, "iterations": self.iterations, "elapsed": self.elapsed}
+
+    @classmethod
+    def from_dict(cls, d: typing.Mapping) -> "BenchmarkResult":
+        return cls(d["name"], d["iterations"], d["elapsed"])
+
+
+def run_benchmark(name: str, fn: BenchmarkFunction, *, repeat: int = 5, min_time: float = 0.05) -> BenchmarkResult:
+    """Set up the benchmark with fn and time the function it returns.
+
+    The number of iterations per repeat is chosen so that a repeat takes at least min_time.
+    """
+    benchmark_fn = fn()
+    benchmark_fn()  # warm up caches and lazy initialization
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            benchmark_fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2
+    best = elapsed
+    for _ in range(max(repeat, 1) - 1):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            benchmark_fn()
+        best = min(best, time.perf_counter() - start)
+    return BenchmarkResult(name, iterations, best / iterations)
+
+
+def run_benchmarks(names: typing.Optional[typing.Sequence[str]] = None, *, repeat: int = 5, min_time: float = 0.05,
+                   file: typing.TextIO = None) -> typing.List[BenchmarkResult]:
+    """Run the named benchmarks (all by default), reporting each to file (stdout by default) as it finishes."""
+    file = file if file is not None else sys.stdout
+    results = list()
+    for name in names if names is not None else sorted(benchmarks):
+        result = run_benchmark(name, benchmarks[name], repeat=repeat, min_time=min_time)
+        print(f"{name:32} {result.elapsed * 1000:10.3f} ms ({result.iterations} iterations)", file=file)
+        results.append(result)
+    return results
+
+
+def get_machine_name() -> str:
+    return platform.node() or "unknown"
+
+
+def get_nionui_version() -> typing.Optional[str]:
+    try:
+        import importlib.metadata as importlib_metadata  # python 3.8 and later
+    except ImportError:
+        return None
+    try:
+        return importlib_metadata.version("nionui")
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+def make_results(results: typing.Sequence[BenchmarkResult]) -> typing.Dict:
+    return {"nionui_version": get_nionui_version(), "python_version": platform.python_version(),
+            "machine": platform.machine(), "benchmarks": [result.to_dict() for result in results]}
+
+
+def compare_results(results: typing.Sequence[BenchmarkResult], baseline: typing.Mapping, file: typing.TextIO = None,
+                    *, threshold: float = default_threshold) -> bool:
+    """Report the change in time relative to the baseline results; return whether any benchmark regressed.
+
+    A benchmark regresses if its time grew by more than threshold (a fraction) relative to the baseline.
+    """
+    file = file if file is not None else sys.stdout
+    baseline_results = {d["name"]: BenchmarkResult.from_dict(d) for d in baseline.get("benchmarks", list())}
+    print(f"baseline nionui {baseline.get('nionui_version')} python {baseline.get('python_version')}", file=file)
+    regressed = False
+    for result in results:
+        old_result = baseline_results.get(result.name)
+        if not old_result or not old_result.elapsed:
+            print(f"{result.name:32} no baseline", file=file)
+            continue
+        change = result.elapsed / old_result.elapsed - 1.0
+        result_regressed = change > threshold
+        regressed = regressed or result_regressed
+        print(f"{result.name:32} {old_result.elapsed * 1000:10.3f} -> {result.elapsed * 1000:10.3f} ms "
+              f"({change * 100:+.1f}%){' REGRESSION' if result_regressed else ''}", file=file)
+    return regressed
+
+
+def load_baselines(file_path: str) -> typing.Dict[str, typing.Dict]:
+    """Load the baselines file, a json object mapping machine names to results."""
+    if not os.path.exists(file_path):
+        return dict()
+    with open(file_path) as f:
+        return json.load(f).get("machines", dict())
+
+
+def save_baselines(file_path: str, baselines: typing.Mapping[str, typing.Mapping]) -> None:
+    with open(file_path, "w") as f:
+        json.dump({"machines": baselines}, f, indent=2, sort_keys=True)
+
+
+# benchmarks
+
+def make_grid_composition(row_count: int, column_count: int) -> CanvasItem.CanvasItemComposition:
+    composition = CanvasItem.CanvasItemComposition()
+    composition.layout = CanvasItem.CanvasItemGridLayout(Geometry.IntSize(height=row_count, width=column_count))
+    for row in range(row_count):
+        for column in range(column_count):
+            cell = CanvasItem.CanvasItemComposition()
+            cell.border_color = "#888"
+            cell.add_canvas_item(CanvasItem.BackgroundCanvasItem("#CCC" if (row + column) % 2 else "#EEE"))
+            cell.add_canvas_item(CanvasItem.StaticTextCanvasItem(f"{row}, {column}"))
+            composition.add_canvas_item(cell, Geometry.IntPoint(x=column, y=row))
+    return composition
+
+
+@benchmark("layout_deep_tree")
+def benchmark_layout_deep_tree() -> typing.Callable[[], None]:
+    root = CanvasItem.CanvasItemComposition()
+    parent = root
+    for i in range(100):
+        child = CanvasItem.CanvasItemComposition()
+        child.layout = CanvasItem.CanvasItemRowLayout() if i % 2 else CanvasItem.CanvasItemColumnLayout()
+        child.add_canvas_item(CanvasItem.BackgroundCanvasItem())
+        parent.add_canvas_item(child)
+        parent = child
+    sizes = [Geometry.IntSize(height=480, width=640), Geometry.IntSize(height=481, width=641)]
+
+    def fn():
+        sizes.reverse()
+        root.update_layout(Geometry.IntPoint(), sizes[0], immediate=True)
+
+    return fn
+
+
+@benchmark("layout_wide_tree")
+def benchmark_layout_wide_tree() -> typing.Callable[[], None]:
+    root = CanvasItem.CanvasItemComposition()
+    root.layout = CanvasItem.CanvasItemColumnLayout()
+    for i in range(2000):
+        canvas_item = CanvasItem.StaticTextCanvasItem(str(i))
+        canvas_item.update_sizing(canvas_item.sizing.with_fixed_height(16))
+        root.add_canvas_item(canvas_item)
+    sizes = [Geometry.IntSize(height=32000, width=640), Geometry.IntSize(height=32000, width=641)]
+
+    def fn():
+        sizes.reverse()
+        root.update_layout(Geometry.IntPoint(), sizes[0], immediate=True)
+
+    return fn
+
+
+@benchmark("repaint_record")
+def benchmark_repaint_record() -> typing.Callable[[], None]:
+    root = make_grid_composition(30, 30)
+    canvas_size = Geometry.IntSize(height=600, width=900)
+    root.update_layout(Geometry.IntPoint(), canvas_size, immediate=True)
+
+    def fn():
+        drawing_context = DrawingContext.DrawingContext()
+        root.repaint_immediate(drawing_context, canvas_size)
+
+    return fn
+
+
+@benchmark("hit_testing")
+def benchmark_hit_testing() -> typing.Callable[[], None]:
+    root = make_grid_composition(30, 30)
+    root.update_layout(Geometry.IntPoint(), Geometry.IntSize(height=600, width=900), immediate=True)
+    points = [((i * 37) % 900, (i * 53) % 600) for i in range(50)]
+
+    def fn():
+        for x, y in points:
+            root.canvas_items_at_point(x, y)
+
+    return fn
+
+
+def make_grid_command_streams() -> typing.List[DrawingContext.CommandStream]:
+    root = make_grid_composition(30, 30)
+    canvas_size = Geometry.IntSize(height=600, width=900)
+    root.update_layout(Geometry.IntPoint(), canvas_size, immediate=True)
+    drawing_context = DrawingContext.DrawingContext()
+    root.repaint_immediate(drawing_context, canvas_size)
+    return [DrawingContext.CommandStream(canvas_size.width, canvas_size.height, drawing_context.commands)]
+
+
+@benchmark("draw_svg")
+def benchmark_draw_svg() -> typing.Callable[[], None]:
+    return DrawingBenchmark.make_replay_benchmark(DrawingBenchmark.make_svg_backend, make_grid_command_streams())
+
+
+@benchmark("draw_js")
+def benchmark_draw_js() -> typing.Callable[[], None]:
+    return DrawingBenchmark.make_replay_benchmark(DrawingBenchmark.make_js_backend, make_grid_command_streams())
+
+
+def register_replay_benchmarks(command_streams: typing.Sequence[DrawingContext.CommandStream],
+                               backend_names: typing.Sequence[str]) -> typing.List[str]:
+    """Register a benchmark replaying the command streams with each backend; return the benchmark names."""
+    names = list()
+    for backend_name in backend_names:
+        name = f"replay_{backend_name}"
+        # bind the backend name now; the backend is made when the benchmark is set up.
+        benchmarks[name] = lambda backend_name=backend_name: DrawingBenchmark.make_replay_benchmark(
+            DrawingBenchmark.get_backend_factory(backend_name), command_streams)
+        names.append(name)
+    return names
+
+
+class ItemsDelegate:
+
+    def __init__(self, item_count: int):
+        self.items = [f"Item {i}" for i in range(item_count)]
+
+    @property
+    def item_count(self) -> int:
+        return len(self.items)
+
+    def paint_item(self, drawing_context: DrawingContext.DrawingContext, item: str, rect: Geometry.IntRect,
+                   is_selected: bool) -> None:
+        with drawing_context.saver():
+            drawing_context.begin_path()
+            drawing_context.rect(rect.left + 2, rect.top + 2, rect.width - 4, rect.height - 4)
+            drawing_context.stroke_style = "#888"
+            drawing_context.stroke()
+            drawing_context.fill_style = "#000"
+            drawing_context.fill_text(item, rect.left + 4, rect.top + 16)
+
+
+def make_scroll_benchmark(content: CanvasItem.AbstractCanvasItem) -> typing.Callable[[], None]:
+    scroll_area = CanvasItem.ScrollAreaCanvasItem(content)
+    canvas_size = Geometry.IntSize(height=480, width=320)
+    scroll_area.update_layout(Geometry.IntPoint(), canvas_size, immediate=True)
+    content_height = content.canvas_size.height
+
+    def fn():
+        # scroll through the content a page at a time, painting each page.
+        for y in range(0, max(content_height - canvas_size.height, 0), canvas_size.height * 4):
+            content._set_canvas_origin(Geometry.IntPoint(y=-y, x=0))
+            scroll_area._repaint(DrawingContext.DrawingContext())
+
+    return fn
+
+
+@benchmark("list_scrolling")
+def benchmark_list_scrolling() -> typing.Callable[[], None]:
+    delegate = ItemsDelegate(10000)
+    return make_scroll_benchmark(ListCanvasItem.ListCanvasItem(delegate, Selection.IndexedSelection(), item_height=24))
+
+
+@benchmark("grid_scrolling")
+def benchmark_grid_scrolling() -> typing.Callable[[], None]:
+    delegate = ItemsDelegate(10000)
+    return make_scroll_benchmark(GridCanvasItem.GridCanvasItem(delegate, Selection.IndexedSelection()))
+
+
+class TreeDelegate:
+
+    def __init__(self, parent_count: int, child_count: int):
+        self.parent_count = parent_count
+        self.child_count = child_count
+
+    def toggle_is_expanded(self, value_path) -> None:
+        pass
+
+    def build_items(self, get_font_metrics_fn, item_width):
+        for i in range(self.parent_count):
+            yield CanvasItem.StaticTextCanvasItem(f"Parent {i}"), "parent", True, [i]
+            for j in range(self.child_count):
+                yield CanvasItem.StaticTextCanvasItem(f"Child {j}"), "child", False, [i, j]
+
+
+@benchmark("tree_reconstruct")
+def benchmark_tree_reconstruct() -> typing.Callable[[], None]:
+    ui = TestUI.UserInterface()
+    tree_canvas_item = TreeCanvasItem.TreeCanvasItem(ui.get_font_metrics, TreeDelegate(20, 20))
+    tree_canvas_item.update_layout(Geometry.IntPoint(), Geometry.IntSize(height=480, width=320), immediate=True)
+    return tree_canvas_item.reconstruct
+
+
+class DeclarativeHandler:
+
+    def __init__(self, ui_view):
+        self.ui_view = ui_view
+        self.resources = dict()
+        self.value = "abc"
+
+
+def make_declarative_construct_benchmark(compile_plan: bool) -> typing.Callable[[], None]:
+    ui = TestUI.UserInterface()
+    u = Declarative.DeclarativeUI()
+    rows = [u.create_row(u.create_label(text=f"Label {i}"), u.create_line_edit(text="@binding(value)"),
+                         u.create_push_button(text="Apply"), u.create_stretch()) for i in range(200)]
+    ui_view = u.create_column(*rows)
+    if compile_plan:
+        ui_view = Declarative.compile_description(ui_view)
+
+    def fn():
+        widget = Declarative.DeclarativeWidget(ui, None, DeclarativeHandler(ui_view))
+        widget.close()
+
+    return fn
+
+
+@benchmark("declarative_construct")
+def benchmark_declarative_construct() -> typing.Callable[[], None]:
+    return make_declarative_construct_benchmark(False)
+
+
+@benchmark("declarative_construct_plan")
+def benchmark_declarative_construct_plan() -> typing.Callable[[], None]:
+    # the same description constructed from a plan compiled in advance; compare with declarative_construct.
+    return make_declarative_construct_benchmark(True)
+
+
+class ItemModelProxy:
+    """A stub for the parts of the Qt proxy used by QtItemModelController."""
+
+    def ItemModel_create(self):
+        return object()
+
+    def ItemModel_connect(self, py_item_model, controller) -> None:
+        pass
+
+    def ItemModel_destroy(self, py_item_model) -> None:
+        pass
+
+    def ItemModel_beginInsertRows(self, py_item_model, first_row, last_row, parent_row, parent_id) -> None:
+        pass
+
+    def ItemModel_endInsertRow(self, py_item_model) -> None:
+        pass
+
+    def ItemModel_beginRemoveRows(self, py_item_model, first_row, last_row, parent_row, parent_id) -> None:
+        pass
+
+    def ItemModel_endRemoveRow(self, py_item_model) -> None:
+        pass
+
+    def ItemModel_dataChanged(self, py_item_model, row, parent_row, parent_id) -> None:
+        pass
+
+
+@benchmark("item_model_controller")
+def benchmark_item_model_controller() -> typing.Callable[[], None]:
+    item_model_controller = QtUserInterface.QtItemModelController(ItemModelProxy(), ["display"])
+    root = item_model_controller.root
+    for i in range(20):
+        parent = item_model_controller.create_item({"display": f"Parent {i}"})
+        root.append_child(parent)
+        for j in range(20):
+            parent.append_child(item_model_controller.create_item({"display": f"Child {j}"}))
+
+    def fn():
+        # the calls Qt makes to display the model, then an insert and remove.
+        for row in range(item_model_controller.itemCount(root.id)):
+            parent_id = item_model_controller.itemId(row, root.id)
+            item_model_controller.itemValue("display", row, parent_id)
+            for child_row in range(item_model_controller.itemCount(parent_id)):
+                item_id = item_model_controller.itemId(child_row, parent_id)
+                item_model_controller.itemParent(child_row, item_id)
+                item_model_controller.itemValue("display", child_row, item_id)
+        parent = root.children[0]
+        item = item_model_controller.create_item({"display": "New"})
+        item_model_controller.begin_insert(0, 0, parent.row, parent.id)
+        parent.insert_child(0, item)
+        item_model_controller.end_insert()
+        item_model_controller.begin_remove(0, 0, parent.row, parent.id)
+        parent.remove_child(item)
+        item_model_controller.end_remove()
+
+    return fn
+
+
+def main(argv: typing.Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run headless user interface benchmarks.")
+    parser.add_argument("name", nargs="*", help="benchmarks to run (default all); see --list")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repeats; the best is reported")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum time of each repeat in seconds")
+    parser.add_argument("--output", help="write the results as json to this file")
+    parser.add_argument("--baseline", help="baselines file to compare against, with a baseline for each machine")
+    parser.add_argument("--machine", default=get_machine_name(), help="machine name in the baselines file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the baseline of this machine")
+    parser.add_argument("--threshold", type=float, default=default_threshold, help="fractional slowdown counted as a regression")
+    parser.add_argument("--recording", help="time the replay of command streams recorded with NIONUI_RECORD_DRAWING")
+    parser.add_argument("--backend", action="append", choices=DrawingBenchmark.backend_names,
+                        help="backend to replay the recording with; may be repeated (default svg and js)")
+    args = parser.parse_args(argv)
+
+    names = args.name
+    if args.recording:
+        command_streams = DrawingContext.load_command_streams(args.recording)
+        replay_names = register_replay_benchmarks(command_streams, args.backend or ["svg", "js"])
+        names = names or replay_names
+
+    if args.list:
+        for name in sorted(benchmarks):
+            print(name)
+        return 0
+
+    unknown_names = [name for name in names if name not in benchmarks]
+    if unknown_names:
+        parser.error(f"unknown benchmarks: {', '.join(unknown_names)}")
+
+    results = run_benchmarks(names or None, repeat=args.repeat, min_time=args.min_time)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(make_results(results), f, indent=2)
+
+    regressed = False
+    if args.baseline:
+        baselines = load_baselines(args.baseline)
+        baseline = baselines.get(args.machine)
+        if baseline is not None:
+            regressed = compare_results(results, baseline, threshold=args.threshold)
+        else:
+            print(f"no baseline for machine {args.machine}")
+        if args.update_baseline:
+            baselines[args.machine] = make_results(results)
+            save_baselines(args.baseline, baselines)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
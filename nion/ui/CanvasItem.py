@@ -9,11 +9,12 @@ import contextlib
 import copy
 import enum
 import functools
-import imageio
 import logging
+import math
 import operator
 import sys
 import threading
+import time
 import typing
 import warnings
 import weakref
@@ -23,12 +24,19 @@ import numpy
 
 # local libraries
 from nion.ui import DrawingContext
+from nion.ui import FramePacing
+from nion.ui import ImagePyramid
+from nion.ui import Instrumentation
+from nion.ui import Startup
 from nion.utils import Event
 from nion.utils import Geometry
 
 if typing.TYPE_CHECKING:
     from nion.ui import UserInterface
 
+# imageio is slow to import and only used to read images.
+imageio = Startup.lazy_import("imageio")
+
 
 MAX_VALUE = sys.maxsize
 
@@ -39,20 +47,20 @@ class Orientation(enum.Enum):
 MenuItemState = collections.namedtuple("MenuItemState", ["title", "enabled", "checked"])
 
 
-class Constraint:
+class Constraint(collections.namedtuple("Constraint", ["minimum", "maximum", "preferred"], defaults=(None, None, None))):
 
-    """ A constraint on an item in a layout. Preferred is only used when free sizing. """
+    """ A constraint on an item in a layout. Preferred is only used when free sizing. Immutable. """
 
-    def __init__(self):
-        self.minimum = None
-        self.maximum = None
-        self.preferred = None
+    __slots__ = ()
 
     def __repr__(self):
         return "Constraint (min={0}, max={1}, pref={2})".format(self.minimum, self.maximum, self.preferred)
 
 
 class SolverItem:
+
+    __slots__ = ("constraint", "size", "is_constrained")
+
     def __init__(self, constraint):
         self.constraint = constraint
         self.size = None
@@ -186,7 +194,13 @@ def constraint_solve(canvas_origin, canvas_size, canvas_item_constraints, spacin
     return origins, sizes
 
 
-class Sizing:
+_sizing_fields = ["preferred_width", "preferred_height", "preferred_aspect_ratio",
+                  "minimum_width", "minimum_height", "minimum_aspect_ratio",
+                  "maximum_width", "maximum_height", "maximum_aspect_ratio",
+                  "collapsible"]
+
+
+class Sizing(collections.namedtuple("Sizing", _sizing_fields, defaults=(None,) * 9 + (False,))):
 
     """
         Describes the sizing for a particular canvas item.
@@ -199,19 +213,12 @@ class Sizing:
         Preferred values are only used when free sizing.
 
         Collapsible items collapse to fixed size of 0 if they don't have children.
+
+        Sizing is immutable and hashable. Use the with_ methods to derive a modified sizing and pass it to the
+        canvas item using update_sizing.
     """
 
-    def __init__(self):
-        self.preferred_width = None
-        self.preferred_height = None
-        self.preferred_aspect_ratio = None
-        self.minimum_width = None
-        self.minimum_height = None
-        self.minimum_aspect_ratio = None
-        self.maximum_width = None
-        self.maximum_height = None
-        self.maximum_aspect_ratio = None
-        self.collapsible = False
+    __slots__ = ()
 
     def __repr__(self):
         format_str = "Sizing (min_w={0}, max_w={1}, pref_w={2}, min_h={3}, max_h={4}, pref_h={5}, min_a={6}, max_a={7}, pref_a={8}, collapsible={9})"
@@ -220,123 +227,108 @@ class Sizing:
                                  self.minimum_aspect_ratio, self.maximum_aspect_ratio, self.preferred_aspect_ratio,
                                  self.collapsible)
 
-    def __eq__(self, other):
-        if self.preferred_width != other.preferred_width:
-            return False
-        if self.preferred_height != other.preferred_height:
-            return False
-        if self.preferred_aspect_ratio != other.preferred_aspect_ratio:
-            return False
-        if self.minimum_width != other.minimum_width:
-            return False
-        if self.minimum_height != other.minimum_height:
-            return False
-        if self.minimum_aspect_ratio != other.minimum_aspect_ratio:
-            return False
-        if self.maximum_width != other.maximum_width:
-            return False
-        if self.maximum_height != other.maximum_height:
-            return False
-        if self.maximum_aspect_ratio != other.maximum_aspect_ratio:
-            return False
-        if self.collapsible != other.collapsible:
-            return False
-        return True
+    def __copy__(self):
+        return self
 
     def __deepcopy__(self, memo):
-        deepcopy = Sizing()
-        deepcopy.copy_from(self)
-        memo[id(self)] = deepcopy
-        return deepcopy
-
-    def copy_from(self, other):
-        self.preferred_width = other.preferred_width
-        self.preferred_height = other.preferred_height
-        self.preferred_aspect_ratio = other.preferred_aspect_ratio
-        self.minimum_width = other.minimum_width
-        self.minimum_height = other.minimum_height
-        self.minimum_aspect_ratio = other.minimum_aspect_ratio
-        self.maximum_width = other.maximum_width
-        self.maximum_height = other.maximum_height
-        self.maximum_aspect_ratio = other.maximum_aspect_ratio
-        self.collapsible = other.collapsible
-
-    def clear_height_constraint(self):
-        self.preferred_height = None
-        self.minimum_height = None
-        self.maximum_height = None
-
-    def clear_width_constraint(self):
-        self.preferred_width = None
-        self.minimum_width = None
-        self.maximum_width = None
-
-    def set_fixed_height(self, height):
-        self.preferred_height = height
-        self.minimum_height = height
-        self.maximum_height = height
-
-    def set_fixed_width(self, width):
-        self.preferred_width = width
-        self.minimum_width = width
-        self.maximum_width = width
-
-    def set_fixed_size(self, size):
+        return self
+
+    def with_preferred_width(self, width) -> "Sizing":
+        return self._replace(preferred_width=width)
+
+    def with_preferred_height(self, height) -> "Sizing":
+        return self._replace(preferred_height=height)
+
+    def with_preferred_aspect_ratio(self, aspect_ratio) -> "Sizing":
+        return self._replace(preferred_aspect_ratio=aspect_ratio)
+
+    def with_minimum_width(self, width) -> "Sizing":
+        return self._replace(minimum_width=width)
+
+    def with_minimum_height(self, height) -> "Sizing":
+        return self._replace(minimum_height=height)
+
+    def with_minimum_aspect_ratio(self, aspect_ratio) -> "Sizing":
+        return self._replace(minimum_aspect_ratio=aspect_ratio)
+
+    def with_maximum_width(self, width) -> "Sizing":
+        return self._replace(maximum_width=width)
+
+    def with_maximum_height(self, height) -> "Sizing":
+        return self._replace(maximum_height=height)
+
+    def with_maximum_aspect_ratio(self, aspect_ratio) -> "Sizing":
+        return self._replace(maximum_aspect_ratio=aspect_ratio)
+
+    def with_collapsible(self, collapsible: bool) -> "Sizing":
+        return self._replace(collapsible=collapsible)
+
+    def with_unconstrained_height(self) -> "Sizing":
+        return self._replace(preferred_height=None, minimum_height=None, maximum_height=None)
+
+    def with_unconstrained_width(self) -> "Sizing":
+        return self._replace(preferred_width=None, minimum_width=None, maximum_width=None)
+
+    def with_fixed_height(self, height) -> "Sizing":
+        return self._replace(preferred_height=height, minimum_height=height, maximum_height=height)
+
+    def with_fixed_width(self, width) -> "Sizing":
+        return self._replace(preferred_width=width, minimum_width=width, maximum_width=width)
+
+    def with_fixed_size(self, size) -> "Sizing":
         size = Geometry.IntSize.make(size)
-        self.set_fixed_height(size.height)
-        self.set_fixed_width(size.width)
+        return self._replace(preferred_height=size.height, minimum_height=size.height, maximum_height=size.height,
+                             preferred_width=size.width, minimum_width=size.width, maximum_width=size.width)
 
     def get_width_constraint(self, width):
-        """ Create and return a new width Constraint object made from this sizing object. """
-        constraint = Constraint()
+        """ Return a width Constraint object made from this sizing object. """
         if self.minimum_width is not None:
             if isinstance(self.minimum_width, float) and self.minimum_width <= 1.0:
-                constraint.minimum = int(width * self.minimum_width)
+                minimum = int(width * self.minimum_width)
             else:
-                constraint.minimum = self.minimum_width
+                minimum = self.minimum_width
         else:
-            constraint.minimum = 0
+            minimum = 0
         if self.maximum_width is not None:
             if isinstance(self.maximum_width, float) and self.maximum_width <= 1.0:
-                constraint.maximum = int(width * self.maximum_width)
+                maximum = int(width * self.maximum_width)
             else:
-                constraint.maximum = self.maximum_width
+                maximum = self.maximum_width
         else:
-            constraint.maximum = MAX_VALUE
+            maximum = MAX_VALUE
         if self.preferred_width is not None:
             if isinstance(self.preferred_width, float) and self.preferred_width <= 1.0:
-                constraint.preferred = int(width * self.preferred_width)
+                preferred = int(width * self.preferred_width)
             else:
-                constraint.preferred = self.preferred_width
+                preferred = self.preferred_width
         else:
-            constraint.preferred = None
-        return constraint
+            preferred = None
+        return Constraint(minimum, maximum, preferred)
 
     def get_height_constraint(self, height):
-        """ Create and return a new height Constraint object made from this sizing object. """
-        constraint = Constraint()
+        """ Return a height Constraint object made from this sizing object. """
         if self.minimum_height is not None:
             if isinstance(self.minimum_height, float) and self.minimum_height <= 1.0:
-                constraint.minimum = height * self.minimum_height
+                minimum = height * self.minimum_height
             else:
-                constraint.minimum = self.minimum_height
+                minimum = self.minimum_height
         else:
-            constraint.minimum = 0
+            minimum = 0
         if self.maximum_height is not None:
             if isinstance(self.maximum_height, float) and self.maximum_height <= 1.0:
-                constraint.maximum = height * self.maximum_height
+                maximum = height * self.maximum_height
             else:
-                constraint.maximum = self.maximum_height
+                maximum = self.maximum_height
         else:
-            constraint.maximum = MAX_VALUE
+            maximum = MAX_VALUE
         if self.preferred_height is not None:
             if isinstance(self.preferred_height, float) and self.preferred_height <= 1.0:
-                constraint.preferred = int(height * self.preferred_height)
+                preferred = int(height * self.preferred_height)
             else:
-                constraint.preferred = self.preferred_height
+                preferred = self.preferred_height
         else:
-            constraint.preferred = None
-        return constraint
+            preferred = None
+        return Constraint(minimum, maximum, preferred)
 
     def get_unrestrained_width(self, maximum_width):
         if self.maximum_width is not None:
@@ -353,6 +345,55 @@ class Sizing:
         return maximum_height
 
 
+class MutableSizing:
+
+    """
+        Deprecated mutable sizing returned by copy_sizing for compatibility with code written before Sizing was
+        immutable. Pass it to update_sizing, which converts it using to_sizing.
+
+        New code should derive a sizing with the Sizing.with_ methods instead.
+    """
+
+    def __init__(self, sizing: Sizing = None):
+        self.copy_from(sizing if sizing is not None else Sizing())
+
+    def __repr__(self):
+        return repr(self.to_sizing())
+
+    def __eq__(self, other):
+        if isinstance(other, MutableSizing):
+            other = other.to_sizing()
+        return self.to_sizing() == other
+
+    def to_sizing(self) -> Sizing:
+        return Sizing(**{field: getattr(self, field) for field in _sizing_fields})
+
+    def copy_from(self, other) -> None:
+        for field in _sizing_fields:
+            setattr(self, field, getattr(other, field))
+
+    def clear_height_constraint(self) -> None:
+        self.copy_from(self.to_sizing().with_unconstrained_height())
+
+    def clear_width_constraint(self) -> None:
+        self.copy_from(self.to_sizing().with_unconstrained_width())
+
+    def set_fixed_height(self, height) -> None:
+        self.copy_from(self.to_sizing().with_fixed_height(height))
+
+    def set_fixed_width(self, width) -> None:
+        self.copy_from(self.to_sizing().with_fixed_width(width))
+
+    def set_fixed_size(self, size) -> None:
+        self.copy_from(self.to_sizing().with_fixed_size(size))
+
+    def get_width_constraint(self, width) -> Constraint:
+        return self.to_sizing().get_width_constraint(width)
+
+    def get_height_constraint(self, height) -> Constraint:
+        return self.to_sizing().get_height_constraint(height)
+
+
 class KeyboardModifiers:
     def __init__(self, shift=False, control=False, alt=False, meta=False, keypad=False):
         self.__shift = shift
@@ -448,6 +489,12 @@ class AbstractCanvasItem:
     Unpredictable layout may occur if an unconstrained item is placed into an unrestrained container. Be sure to
     either restrain (implicitly or explicitly) the content or the container.
 
+    The ``sizing`` object is immutable; change it by passing a derived sizing to ``update_sizing``.
+
+    Composite canvas items cache their ``layout_sizing``. The cache is invalidated for the item and each of its
+    containers when ``update_sizing`` is called, when visibility changes, when children are inserted or removed, when
+    the layout or its margins or spacing change, and when ``refresh_layout`` is called.
+
     Layout occurs when the structure of the item hierarchy changes, such as when a new canvas item is added to a
     container. Clients can also call ``refresh_layout`` explicitly as needed.
 
@@ -484,6 +531,8 @@ class AbstractCanvasItem:
         # stats for testing
         self._update_count = 0
         self._repaint_count = 0
+        # time of the first update request since the last section was drawn; only tracked while instrumented.
+        self._update_request_time = None
         self.is_root_opaque = False
 
     def close(self):
@@ -649,21 +698,32 @@ class AbstractCanvasItem:
     def map_to_canvas_item(self, p, canvas_item):
         """ Map the point to the local coordinates of canvas_item. """
         p = Geometry.IntPoint.make(p)
-        o1 = self.map_to_root_container(Geometry.IntPoint())
-        o2 = canvas_item.map_to_root_container(Geometry.IntPoint())
-        return p + o1 - o2
+        x1, y1 = self._get_root_container_offset()
+        x2, y2 = canvas_item._get_root_container_offset()
+        return Geometry.IntPoint(y=p.y + y1 - y2, x=p.x + x1 - x2)
 
     def map_to_root_container(self, p):
         """ Map the point to the coordinates of the root container. """
+        x, y = self._get_root_container_offset()
+        return p + Geometry.IntPoint(y=y, x=x)
+
+    def _get_root_container_offset(self) -> typing.Tuple[int, int]:
+        """Return the x, y offset of this canvas item within the root container as ints.
+
+        Sums the origins without making intermediate points, so that mapping input events does not allocate.
+        """
+        x = y = 0
         canvas_item = self
         while canvas_item:  # handle case where last canvas item was root
-            canvas_item_origin = canvas_item.canvas_origin
+            container = canvas_item.container
+            canvas_item_origin = container._get_child_canvas_origin(canvas_item) if container else canvas_item.canvas_origin
             if canvas_item_origin is not None:  # handle case where canvas item is not root but has no parent
-                p = p + Geometry.IntPoint.make(canvas_item_origin)
-                canvas_item = canvas_item.container
+                y += canvas_item_origin[0]
+                x += canvas_item_origin[1]
+                canvas_item = container
             else:
                 break
-        return p
+        return x, y
 
     def map_to_container(self, p):
         """ Map the point to the coordinates of the container. """
@@ -708,6 +768,17 @@ class AbstractCanvasItem:
         if self.on_layout_updated:
             self.on_layout_updated(self.canvas_origin, self.canvas_size, immediate=immediate)
         self._has_layout = self.canvas_origin is not None and self.canvas_size is not None
+        container = self.__container
+        if container:
+            container._child_geometry_changed(self)
+
+    def _child_geometry_changed(self, canvas_item: "AbstractCanvasItem") -> None:
+        """Called when the layout or visibility of a child canvas item changes. Subclasses may override."""
+        pass
+
+    def _get_child_canvas_origin(self, canvas_item: "AbstractCanvasItem") -> typing.Optional[Geometry.IntPoint]:
+        """Return the origin of the child canvas item to use for mapping points. Subclasses may override."""
+        return canvas_item.canvas_origin
 
     def refresh_layout_immediate(self):
         """Immediate re-layout the item."""
@@ -719,6 +790,7 @@ class AbstractCanvasItem:
 
         Items get layout from their container, so the default implementation asks the container to layout.
         """
+        self._invalidate_layout_sizing()
         if self.__container:
             self.__container._needs_layout(self)
 
@@ -727,6 +799,13 @@ class AbstractCanvasItem:
         if self.__container:
             self.__container._needs_layout(canvas_item)
 
+    def _invalidate_layout_sizing(self) -> None:
+        # the layout sizing of each container depends on this item; invalidate it all the way up the chain. unlike
+        # _needs_layout, this must pass through layers since their containers also cache their layout sizing.
+        container = self.__container
+        if container:
+            container._invalidate_layout_sizing()
+
     @property
     def visible(self) -> bool:
         return self.__visible
@@ -736,6 +815,7 @@ class AbstractCanvasItem:
         if self.__visible != value:
             self.__visible = value
             if self.__container:
+                self.__container._child_geometry_changed(self)
                 self.__container.refresh_layout()
 
     @property
@@ -743,8 +823,7 @@ class AbstractCanvasItem:
         """
             Return sizing information for this canvas item.
 
-            The sizing property is read only, but the object itself
-            can be modified.
+            The sizing object is immutable. Use update_sizing to change it.
         """
         return self.__sizing
 
@@ -758,14 +837,16 @@ class AbstractCanvasItem:
         """
         return self.sizing
 
-    def copy_sizing(self):
-        new_sizing = Sizing()
-        new_sizing.copy_from(self.sizing)
-        return new_sizing
+    def copy_sizing(self) -> MutableSizing:
+        """Deprecated. Return a mutable copy of the sizing. Use sizing and the Sizing.with_ methods instead."""
+        warnings.warn("copy_sizing is deprecated; use update_sizing(sizing.with_...) instead", DeprecationWarning, stacklevel=2)
+        return MutableSizing(self.sizing)
 
     def update_sizing(self, new_sizing):
+        if isinstance(new_sizing, MutableSizing):
+            new_sizing = new_sizing.to_sizing()
         if new_sizing != self.sizing:
-            self.sizing.copy_from(new_sizing)
+            self.__sizing = new_sizing
             self.refresh_layout()
 
     def update(self) -> None:
@@ -777,6 +858,8 @@ class AbstractCanvasItem:
 
     def _update_with_items(self, canvas_items: typing.Sequence["AbstractCanvasItem"] = None) -> None:
         self._update_count += 1
+        if Instrumentation.enabled and self._update_request_time is None:
+            self._update_request_time = time.perf_counter()
         self._updated(canvas_items)
 
     def _updated(self, canvas_items: typing.Sequence["AbstractCanvasItem"] = None) -> None:
@@ -827,7 +910,12 @@ class AbstractCanvasItem:
         pending_update, self.__pending_update = self.__pending_update, False
         if pending_update:
             repaint_drawing_context = DrawingContext.DrawingContext()
-            self._repaint_template(repaint_drawing_context, immediate)
+            if Instrumentation.enabled:
+                start = time.perf_counter()
+                self._repaint_template(repaint_drawing_context, immediate)
+                Instrumentation.emit_canvas_item_event("record", self, start, len(repaint_drawing_context.commands))
+            else:
+                self._repaint_template(repaint_drawing_context, immediate)
             self.__repaint_drawing_context = repaint_drawing_context
         if self.__repaint_drawing_context:
             drawing_context.add(self.__repaint_drawing_context)
@@ -884,8 +972,9 @@ class AbstractCanvasItem:
 
     def canvas_items_at_point(self, x, y):
         """ Return the canvas item at the point. May return None. """
-        canvas_bounds = self.canvas_bounds
-        if canvas_bounds and canvas_bounds.contains_point(Geometry.IntPoint(x=x, y=y)):
+        x, y = int(x), int(y)
+        canvas_size = self.canvas_size
+        if canvas_size and 0 <= x < canvas_size.width and 0 <= y < canvas_size.height:
             return [self]
         return []
 
@@ -1020,8 +1109,29 @@ class CanvasItemAbstractLayout:
     """
 
     def __init__(self, margins=None, spacing=None):
-        self.margins = margins if margins is not None else Geometry.Margins(0, 0, 0, 0)
-        self.spacing = spacing if spacing else 0
+        self.layout_changed_event = Event.Event()
+        self.__margins = margins if margins is not None else Geometry.Margins(0, 0, 0, 0)
+        self.__spacing = spacing if spacing else 0
+
+    @property
+    def margins(self) -> Geometry.Margins:
+        return self.__margins
+
+    @margins.setter
+    def margins(self, margins: Geometry.Margins) -> None:
+        if margins != self.__margins:
+            self.__margins = margins
+            self.layout_changed_event.fire()
+
+    @property
+    def spacing(self) -> int:
+        return self.__spacing
+
+    @spacing.setter
+    def spacing(self, spacing: int) -> None:
+        if spacing != self.__spacing:
+            self.__spacing = spacing
+            self.layout_changed_event.fire()
 
     def calculate_row_layout(self, canvas_origin, canvas_size, canvas_items):
         """ Use constraint_solve to return the positions of canvas items as if they are in a row. """
@@ -1066,27 +1176,27 @@ class CanvasItemAbstractLayout:
                 self.update_canvas_item_layout(canvas_item_origin, canvas_item_size, canvas_item, immediate=immediate)
 
     def _combine_sizing_property(self, sizing, canvas_item_sizing, property, combiner, clear_if_missing=False):
-        """ Utility method for updating the property of the sizing object using the combiner function and the canvas_item_sizing. """
+        """ Utility method for updating the property of the sizing dict using the combiner function and the canvas_item_sizing. """
         canvas_item_value = getattr(canvas_item_sizing, property)
-        value = getattr(sizing, property)
+        value = sizing[property]
         if canvas_item_value is not None:
             if clear_if_missing:
-                setattr(sizing, property, combiner(value, canvas_item_value) if value is not None else None)
+                sizing[property] = combiner(value, canvas_item_value) if value is not None else None
             else:
-                setattr(sizing, property, combiner(value, canvas_item_value) if value is not None else canvas_item_value)
+                sizing[property] = combiner(value, canvas_item_value) if value is not None else canvas_item_value
         elif clear_if_missing:
-            setattr(sizing, property, None)
+            sizing[property] = None
 
     def _get_overlap_sizing(self, canvas_items):
         """
             A commonly used sizing method to determine the preferred/min/max assuming everything is stacked/overlapping.
             Does not include spacing or margins.
         """
-        sizing = Sizing()
-        sizing.maximum_width = 0
-        sizing.maximum_height = 0
-        sizing.preferred_width = 0
-        sizing.preferred_height = 0
+        sizing = Sizing()._asdict()
+        sizing["maximum_width"] = 0
+        sizing["maximum_height"] = 0
+        sizing["preferred_width"] = 0
+        sizing["preferred_height"] = 0
         for canvas_item in canvas_items:
             if canvas_item is not None:
                 canvas_item_sizing = canvas_item.layout_sizing
@@ -1096,25 +1206,25 @@ class CanvasItemAbstractLayout:
                 self._combine_sizing_property(sizing, canvas_item_sizing, "minimum_height", max)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_width", max, True)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_height", max, True)
-        if sizing.maximum_width == 0 or len(canvas_items) == 0:
-            sizing.maximum_width = None
-        if sizing.maximum_height == 0 or len(canvas_items) == 0:
-            sizing.maximum_height = None
-        if sizing.preferred_width == 0 or len(canvas_items) == 0:
-            sizing.preferred_width = None
-        if sizing.preferred_height == 0 or len(canvas_items) == 0:
-            sizing.preferred_height = None
-        return sizing
+        if sizing["maximum_width"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_width"] = None
+        if sizing["maximum_height"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_height"] = None
+        if sizing["preferred_width"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_width"] = None
+        if sizing["preferred_height"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_height"] = None
+        return Sizing(**sizing)
 
     def _get_column_sizing(self, canvas_items):
         """
             A commonly used sizing method to determine the preferred/min/max assuming everything is a column.
             Does not include spacing or margins.
         """
-        sizing = Sizing()
-        sizing.maximum_width = 0
-        sizing.maximum_height = 0
-        sizing.preferred_width = 0
+        sizing = Sizing()._asdict()
+        sizing["maximum_width"] = 0
+        sizing["maximum_height"] = 0
+        sizing["preferred_width"] = 0
         for canvas_item in canvas_items:
             if canvas_item is not None:
                 canvas_item_sizing = canvas_item.layout_sizing
@@ -1124,23 +1234,23 @@ class CanvasItemAbstractLayout:
                 self._combine_sizing_property(sizing, canvas_item_sizing, "minimum_height", operator.add)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_width", max, True)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_height", operator.add, True)
-        if sizing.maximum_width == 0 or len(canvas_items) == 0:
-            sizing.maximum_width = None
-        if sizing.preferred_width == 0 or len(canvas_items) == 0:
-            sizing.preferred_width = None
-        if sizing.maximum_height == MAX_VALUE or len(canvas_items) == 0:
-            sizing.maximum_height = None
-        return sizing
+        if sizing["maximum_width"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_width"] = None
+        if sizing["preferred_width"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_width"] = None
+        if sizing["maximum_height"] == MAX_VALUE or len(canvas_items) == 0:
+            sizing["maximum_height"] = None
+        return Sizing(**sizing)
 
     def _get_row_sizing(self, canvas_items):
         """
             A commonly used sizing method to determine the preferred/min/max assuming everything is a column.
             Does not include spacing or margins.
         """
-        sizing = Sizing()
-        sizing.maximum_width = 0
-        sizing.maximum_height = 0
-        sizing.preferred_height = 0
+        sizing = Sizing()._asdict()
+        sizing["maximum_width"] = 0
+        sizing["maximum_height"] = 0
+        sizing["preferred_height"] = 0
         for canvas_item in canvas_items:
             if canvas_item is not None:
                 canvas_item_sizing = canvas_item.layout_sizing
@@ -1150,28 +1260,24 @@ class CanvasItemAbstractLayout:
                 self._combine_sizing_property(sizing, canvas_item_sizing, "minimum_height", max)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_width", operator.add, True)
                 self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_height", max, True)
-        if sizing.maximum_width == MAX_VALUE or len(canvas_items) == 0:
-            sizing.maximum_width = None
-        if sizing.maximum_height == 0 or len(canvas_items) == 0:
-            sizing.maximum_height = None
-        if sizing.preferred_height == 0 or len(canvas_items) == 0:
-            sizing.preferred_height = None
-        return sizing
+        if sizing["maximum_width"] == MAX_VALUE or len(canvas_items) == 0:
+            sizing["maximum_width"] = None
+        if sizing["maximum_height"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_height"] = None
+        if sizing["preferred_height"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_height"] = None
+        return Sizing(**sizing)
 
     def _adjust_sizing(self, sizing, x_spacing, y_spacing):
-        """ Adjust the sizing object by adding margins and spacing. Spacing is total, not per item. """
-        if sizing.minimum_width is not None:
-            sizing.minimum_width += self.margins.left + self.margins.right + x_spacing
-        if sizing.maximum_width is not None:
-            sizing.maximum_width += self.margins.left + self.margins.right + x_spacing
-        if sizing.preferred_width is not None:
-            sizing.preferred_width += self.margins.left + self.margins.right + x_spacing
-        if sizing.minimum_height is not None:
-            sizing.minimum_height += self.margins.top + self.margins.bottom + y_spacing
-        if sizing.maximum_height is not None:
-            sizing.maximum_height += self.margins.top + self.margins.bottom + y_spacing
-        if sizing.preferred_height is not None:
-            sizing.preferred_height += self.margins.top + self.margins.bottom + y_spacing
+        """ Return the sizing object adjusted by adding margins and spacing. Spacing is total, not per item. """
+        dx = self.margins.left + self.margins.right + x_spacing
+        dy = self.margins.top + self.margins.bottom + y_spacing
+        return sizing._replace(minimum_width=sizing.minimum_width + dx if sizing.minimum_width is not None else None,
+                               maximum_width=sizing.maximum_width + dx if sizing.maximum_width is not None else None,
+                               preferred_width=sizing.preferred_width + dx if sizing.preferred_width is not None else None,
+                               minimum_height=sizing.minimum_height + dy if sizing.minimum_height is not None else None,
+                               maximum_height=sizing.maximum_height + dy if sizing.maximum_height is not None else None,
+                               preferred_height=sizing.preferred_height + dy if sizing.preferred_height is not None else None)
 
     def insert_canvas_item(self, before_index, canvas_item, pos):
         """
@@ -1229,9 +1335,7 @@ class CanvasItemLayout(CanvasItemAbstractLayout):
             self.update_canvas_item_layout(canvas_origin, canvas_size, canvas_item, immediate=immediate)
 
     def get_sizing(self, canvas_items):
-        sizing = self._get_overlap_sizing(canvas_items)
-        self._adjust_sizing(sizing, 0, 0)
-        return sizing
+        return self._adjust_sizing(self._get_overlap_sizing(canvas_items), 0, 0)
 
     def create_spacing_item(self, spacing):
         raise NotImplementedError()
@@ -1266,19 +1370,16 @@ class CanvasItemColumnLayout(CanvasItemAbstractLayout):
         self.layout_canvas_items(x_positions, y_positions, widths, heights, canvas_items, immediate=immediate)
 
     def get_sizing(self, canvas_items):
-        sizing = self._get_column_sizing(canvas_items)
-        self._adjust_sizing(sizing, 0, self.spacing * (len(canvas_items) - 1))
-        return sizing
+        return self._adjust_sizing(self._get_column_sizing(canvas_items), 0, self.spacing * (len(canvas_items) - 1))
 
     def create_spacing_item(self, spacing):
         spacing_item = EmptyCanvasItem()
-        spacing_item.sizing.set_fixed_height(spacing)
-        spacing_item.sizing.set_fixed_width(0)
+        spacing_item.update_sizing(spacing_item.sizing.with_fixed_height(spacing).with_fixed_width(0))
         return spacing_item
 
     def create_stretch_item(self):
         spacing_item = EmptyCanvasItem()
-        spacing_item.sizing.set_fixed_width(0)
+        spacing_item.update_sizing(spacing_item.sizing.with_fixed_width(0))
         return spacing_item
 
 
@@ -1308,19 +1409,16 @@ class CanvasItemRowLayout(CanvasItemAbstractLayout):
         self.layout_canvas_items(x_positions, y_positions, widths, heights, canvas_items, immediate=immediate)
 
     def get_sizing(self, canvas_items):
-        sizing = self._get_row_sizing(canvas_items)
-        self._adjust_sizing(sizing, self.spacing * (len(canvas_items) - 1), 0)
-        return sizing
+        return self._adjust_sizing(self._get_row_sizing(canvas_items), self.spacing * (len(canvas_items) - 1), 0)
 
     def create_spacing_item(self, spacing):
         spacing_item = EmptyCanvasItem()
-        spacing_item.sizing.set_fixed_width(spacing)
-        spacing_item.sizing.set_fixed_height(0)
+        spacing_item.update_sizing(spacing_item.sizing.with_fixed_width(spacing).with_fixed_height(0))
         return spacing_item
 
     def create_stretch_item(self):
         spacing_item = EmptyCanvasItem()
-        spacing_item.sizing.set_fixed_height(0)
+        spacing_item.update_sizing(spacing_item.sizing.with_fixed_height(0))
         return spacing_item
 
 
@@ -1402,10 +1500,10 @@ class CanvasItemGridLayout(CanvasItemAbstractLayout):
 
             Override from abstract layout.
         """
-        sizing = Sizing()
-        sizing.maximum_width = 0
-        sizing.maximum_height = 0
-        sizing.preferred_height = 0
+        sizing = Sizing()._asdict()
+        sizing["maximum_width"] = 0
+        sizing["maximum_height"] = 0
+        sizing["preferred_height"] = 0
         # the widths
         canvas_item_sizings = list()
         for x in range(self.__size.width):
@@ -1424,20 +1522,19 @@ class CanvasItemGridLayout(CanvasItemAbstractLayout):
             self._combine_sizing_property(sizing, canvas_item_sizing, "preferred_height", operator.add)
             self._combine_sizing_property(sizing, canvas_item_sizing, "minimum_height", operator.add)
             self._combine_sizing_property(sizing, canvas_item_sizing, "maximum_height", operator.add, True)
-        if sizing.maximum_width == MAX_VALUE or len(canvas_items) == 0:
-            sizing.maximum_width = None
-        if sizing.maximum_height == MAX_VALUE or len(canvas_items) == 0:
-            sizing.maximum_height = None
-        if sizing.maximum_width == 0 or len(canvas_items) == 0:
-            sizing.maximum_width = None
-        if sizing.preferred_width == 0 or len(canvas_items) == 0:
-            sizing.preferred_width = None
-        if sizing.maximum_height == 0 or len(canvas_items) == 0:
-            sizing.maximum_height = None
-        if sizing.preferred_height == 0 or len(canvas_items) == 0:
-            sizing.preferred_height = None
-        self._adjust_sizing(sizing, self.spacing * (self.__size.width - 1), self.spacing * (self.__size.height - 1))
-        return sizing
+        if sizing["maximum_width"] == MAX_VALUE or len(canvas_items) == 0:
+            sizing["maximum_width"] = None
+        if sizing["maximum_height"] == MAX_VALUE or len(canvas_items) == 0:
+            sizing["maximum_height"] = None
+        if sizing["maximum_width"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_width"] = None
+        if sizing["preferred_width"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_width"] = None
+        if sizing["maximum_height"] == 0 or len(canvas_items) == 0:
+            sizing["maximum_height"] = None
+        if sizing["preferred_height"] == 0 or len(canvas_items) == 0:
+            sizing["preferred_height"] = None
+        return self._adjust_sizing(Sizing(**sizing), self.spacing * (self.__size.width - 1), self.spacing * (self.__size.height - 1))
 
 
 class CompositionLayoutRenderTrait:
@@ -1465,6 +1562,10 @@ class CompositionLayoutRenderTrait:
     def is_layer_container(self) -> bool:
         return False
 
+    @property
+    def frame_pacer(self) -> typing.Optional[FramePacing.FramePacer]:
+        return None
+
     def register_prepare_canvas_item(self, canvas_item: AbstractCanvasItem) -> None:
         pass
 
@@ -1496,6 +1597,10 @@ class CompositionLayoutRenderTrait:
         return False
 
 
+# the visible children of a composition and their canvas rects, published after each layout pass.
+LayoutGeometry = collections.namedtuple("LayoutGeometry", ["canvas_items", "canvas_rects", "canvas_rect_map"])
+
+
 class CanvasItemComposition(AbstractCanvasItem):
     """A composite canvas item comprised of other canvas items.
 
@@ -1509,13 +1614,21 @@ class CanvasItemComposition(AbstractCanvasItem):
     def __init__(self, layout_render_trait: CompositionLayoutRenderTrait = None):
         super().__init__()
         self.__canvas_items = []
-        self.layout = CanvasItemLayout()
+        self.__layout = CanvasItemLayout()
+        # the cached layout sizing depends on the margins and spacing of the layout.
+        self.__layout_changed_event_listener = self.__layout.layout_changed_event.listen(self._invalidate_layout_sizing)
+        self.__layout_sizing = None
+        self.__layout_sizing_generation = 0
         self.__layout_lock = threading.RLock()
+        self.__layout_pass_count = 0
+        self.__layout_geometry = LayoutGeometry(tuple(), tuple(), dict())
         self.__layout_render_trait = layout_render_trait or CompositionLayoutRenderTrait(self)
 
     def close(self):
         self.__layout_render_trait.close()
         self.__layout_render_trait = None
+        self.__layout_changed_event_listener.close()
+        self.__layout_changed_event_listener = None
         with self.__layout_lock:
             canvas_items = self.canvas_items
             self.__canvas_items = None
@@ -1534,12 +1647,28 @@ class CanvasItemComposition(AbstractCanvasItem):
     def layer_container(self) -> "LayerCanvasItem":
         return self if self.__layout_render_trait.is_layer_container else super().layer_container
 
+    @property
+    def frame_pacer(self) -> typing.Optional[FramePacing.FramePacer]:
+        """Return the frame pacer of this composition if it renders on a thread; use it to set max_fps or get statistics."""
+        return self.__layout_render_trait.frame_pacer if self.__layout_render_trait else None
+
     def register_prepare_canvas_item(self, canvas_item: AbstractCanvasItem) -> None:
         self.__layout_render_trait.register_prepare_canvas_item(canvas_item)
 
     def unregister_prepare_canvas_item(self, canvas_item: AbstractCanvasItem) -> None:
         self.__layout_render_trait.unregister_prepare_canvas_item(canvas_item)
 
+    @property
+    def layout(self) -> CanvasItemAbstractLayout:
+        return self.__layout
+
+    @layout.setter
+    def layout(self, layout: CanvasItemAbstractLayout) -> None:
+        self.__layout_changed_event_listener.close()
+        self.__layout = layout
+        self.__layout_changed_event_listener = self.__layout.layout_changed_event.listen(self._invalidate_layout_sizing)
+        self._invalidate_layout_sizing()
+
     @property
     def canvas_items_count(self) -> int:
         """Return count of canvas items managed by this composition."""
@@ -1592,44 +1721,75 @@ class CanvasItemComposition(AbstractCanvasItem):
             if self.__canvas_items is not None:
                 assert canvas_size is not None
                 canvas_size = Geometry.IntSize.make(canvas_size)
-                self.layout.layout(Geometry.IntPoint(), canvas_size, self.visible_canvas_items, immediate=immediate)
+                # children laid out during the pass are published together when it finishes.
+                self.__layout_pass_count += 1
+                try:
+                    if Instrumentation.enabled:
+                        start = time.perf_counter()
+                        self.layout.layout(Geometry.IntPoint(), canvas_size, self.visible_canvas_items, immediate=immediate)
+                        Instrumentation.emit_canvas_item_event("layout", self, start)
+                    else:
+                        self.layout.layout(Geometry.IntPoint(), canvas_size, self.visible_canvas_items, immediate=immediate)
+                finally:
+                    self.__layout_pass_count -= 1
+                self._publish_layout_geometry()
+
+    @property
+    def layout_geometry(self) -> "LayoutGeometry":
+        """Return the geometry of the visible children published after the last layout pass.
+
+        The geometry is immutable and replaced as a whole, so it can be read without locking while the next layout
+        runs on a thread.
+        """
+        return self.__layout_geometry
+
+    def _publish_layout_geometry(self) -> None:
+        canvas_items = tuple(self.__canvas_items or tuple())
+        canvas_items = tuple(canvas_item for canvas_item in canvas_items if canvas_item and canvas_item.visible)
+        canvas_rects = tuple(canvas_item.canvas_rect for canvas_item in canvas_items)
+        self.__layout_geometry = LayoutGeometry(canvas_items, canvas_rects, dict(zip(canvas_items, canvas_rects)))
+
+    def _child_geometry_changed(self, canvas_item: AbstractCanvasItem) -> None:
+        # children laid out outside of a layout pass of this item, such as by their own layout render trait or when
+        # visibility changes, are published immediately.
+        if not self.__layout_pass_count:
+            self._publish_layout_geometry()
+
+    def _get_child_canvas_origin(self, canvas_item: AbstractCanvasItem) -> typing.Optional[Geometry.IntPoint]:
+        canvas_rect = self.__layout_geometry.canvas_rect_map.get(canvas_item)
+        return canvas_rect.origin if canvas_rect is not None else canvas_item.canvas_origin
 
     def _needs_layout(self, canvas_item):
         # extra check for behavior during closing
         if self.__layout_render_trait and not self.__layout_render_trait._try_needs_layout(canvas_item):
             super()._needs_layout(canvas_item)
 
+    def _invalidate_layout_sizing(self) -> None:
+        self.__layout_sizing_generation += 1
+        self.__layout_sizing = None
+        super()._invalidate_layout_sizing()
+
     # override sizing information. let layout provide it.
     @property
     def layout_sizing(self):
+        # the computed layout sizing is cached until this item or one of its descendants invalidates it. the
+        # generation guards against storing a sizing computed on the layout thread while it was being invalidated.
+        layout_sizing = self.__layout_sizing
+        if layout_sizing is None:
+            generation = self.__layout_sizing_generation
+            layout_sizing = self._calculate_layout_sizing()
+            if generation == self.__layout_sizing_generation:
+                self.__layout_sizing = layout_sizing
+        return layout_sizing
+
+    def _calculate_layout_sizing(self):
         sizing = self.sizing
         layout_sizing = self.layout.get_sizing(self.visible_canvas_items)
-        if sizing.minimum_width is not None:
-            layout_sizing.minimum_width = sizing.minimum_width
-        if sizing.maximum_width is not None:
-            layout_sizing.maximum_width = sizing.maximum_width
-        if sizing.preferred_width is not None:
-            layout_sizing.preferred_width = sizing.preferred_width
-        if sizing.minimum_height is not None:
-            layout_sizing.minimum_height = sizing.minimum_height
-        if sizing.maximum_height is not None:
-            layout_sizing.maximum_height = sizing.maximum_height
-        if sizing.preferred_height is not None:
-            layout_sizing.preferred_height = sizing.preferred_height
-        if sizing.minimum_aspect_ratio is not None:
-            layout_sizing.minimum_aspect_ratio = sizing.minimum_aspect_ratio
-        if sizing.maximum_aspect_ratio is not None:
-            layout_sizing.maximum_aspect_ratio = sizing.maximum_aspect_ratio
-        if sizing.preferred_aspect_ratio is not None:
-            layout_sizing.preferred_aspect_ratio = sizing.preferred_aspect_ratio
+        # values specified explicitly in this item's sizing override the values from the layout.
+        overrides = {field: value for field, value in zip(Sizing._fields[:-1], sizing[:-1]) if value is not None}
         if len(self.visible_canvas_items) == 0 and sizing.collapsible:
-            layout_sizing.minimum_width = 0
-            layout_sizing.preferred_width = 0
-            layout_sizing.maximum_width = 0
-            layout_sizing.minimum_height = 0
-            layout_sizing.preferred_height = 0
-            layout_sizing.maximum_height = 0
-        return layout_sizing
+            overrides.update(minimum_width=0, preferred_width=0, maximum_width=0, minimum_height=0, preferred_height=0, maximum_height=0)
+        return layout_sizing._replace(**overrides) if overrides else layout_sizing
 
     def canvas_item_layout_sizing_changed(self, canvas_item):
         """ Contained canvas items call this when their layout_sizing changes. """
@@ -1644,6 +1804,7 @@ class CanvasItemComposition(AbstractCanvasItem):
         canvas_item.container = self
         canvas_item._inserted(self)
         self.layout.add_canvas_item(canvas_item, pos)
+        self._publish_layout_geometry()
         self.refresh_layout()
         self.update()
         return canvas_item
@@ -1668,6 +1829,8 @@ class CanvasItemComposition(AbstractCanvasItem):
 
     def _remove_canvas_item_direct(self, canvas_item):
         self.__canvas_items.remove(canvas_item)
+        self._publish_layout_geometry()
+        self._invalidate_layout_sizing()
 
     def _remove_canvas_item(self, canvas_item):
         canvas_item._removed(self)
@@ -1675,6 +1838,7 @@ class CanvasItemComposition(AbstractCanvasItem):
         self.layout.remove_canvas_item(canvas_item)
         canvas_item.container = None
         self.__canvas_items.remove(canvas_item)
+        self._publish_layout_geometry()
         self.refresh_layout()
         self.update()
 
@@ -1712,6 +1876,8 @@ class CanvasItemComposition(AbstractCanvasItem):
             canvas_item_container._set_canvas_origin(canvas_origin)
             canvas_item_container._set_canvas_size(canvas_size)
             canvas_item._set_canvas_origin(Geometry.IntPoint())
+            canvas_item_container._publish_layout_geometry()
+            self._publish_layout_geometry()
         self.refresh_layout()
 
     def unwrap_canvas_item(self, canvas_item):
@@ -1757,23 +1923,32 @@ class CanvasItemComposition(AbstractCanvasItem):
                     canvas_item._repaint_if_needed(drawing_context, immediate=immediate)
         self._draw_border(drawing_context)
 
-    def _canvas_items_at_point(self, visible_canvas_items, x, y):
-        """Returns list of canvas items under x, y, ordered from back to front."""
+    def _canvas_items_at_point(self, visible_canvas_items, x, y, canvas_rects=None):
+        """Returns list of canvas items under x, y, ordered from back to front.
+
+        canvas_rects are the rects of the visible canvas items; by default their current canvas rects.
+        """
         canvas_items = []
-        point = Geometry.IntPoint(x=x, y=y)
-        for canvas_item in reversed(visible_canvas_items):
-            # the visible items can be changed while this method is running from the layout thread.
-            # and yet we don't want to allow this to occur; maybe the layout thread should have some
-            # sort of pending system, where once methods like this exit, they're allowed to update...?
-            if canvas_item.canvas_rect.contains_point(point):
-                canvas_point = point - Geometry.IntPoint.make(canvas_item.canvas_origin)
-                canvas_items.extend(canvas_item.canvas_items_at_point(canvas_point.x, canvas_point.y))
+        x, y = int(x), int(y)
+        if canvas_rects is None:
+            canvas_rects = [canvas_item.canvas_rect for canvas_item in visible_canvas_items]
+        for index in range(len(visible_canvas_items) - 1, -1, -1):
+            canvas_rect = canvas_rects[index]
+            # compare ints rather than making points; this runs for each container on each mouse move.
+            if canvas_rect is not None:
+                left, top = canvas_rect.left, canvas_rect.top
+                if left <= x < canvas_rect.right and top <= y < canvas_rect.bottom:
+                    canvas_items.extend(visible_canvas_items[index].canvas_items_at_point(x - left, y - top))
         canvas_items.extend(super().canvas_items_at_point(x, y))
         return canvas_items
 
     def canvas_items_at_point(self, x, y):
-        """Returns list of canvas items under x, y, ordered from back to front."""
-        return self._canvas_items_at_point(self.visible_canvas_items, x, y)
+        """Returns list of canvas items under x, y, ordered from back to front.
+
+        Uses the published layout geometry, so that it does not wait for or see a partial layout on a thread.
+        """
+        layout_geometry = self.__layout_geometry
+        return self._canvas_items_at_point(layout_geometry.canvas_items, x, y, layout_geometry.canvas_rects)
 
     def get_root_opaque_canvas_items(self) -> typing.List["AbstractCanvasItem"]:
         if self.is_root_opaque:
@@ -1792,6 +1967,42 @@ class CanvasItemComposition(AbstractCanvasItem):
 
 _threaded_rendering_enabled = True
 
+# a layer is drawn in fragments: the background of the composition, each child, and the border and _repaint drawing of
+# the composition. the fragments of successive frames are compared to find the region of the layer which changed.
+LayerFragment = collections.namedtuple("LayerFragment", ["canvas_item", "canvas_rect", "drawing_context"])
+LayerFrame = collections.namedtuple("LayerFrame", ["canvas_size", "head", "fragments", "tail"])
+LayerUpdate = collections.namedtuple("LayerUpdate", ["base_seed", "update_rect", "drawing_context"])
+
+
+def get_layer_update_rect(previous_frame: typing.Optional[LayerFrame], frame: LayerFrame, *, margin: int = 2,
+                          max_fraction: float = 0.5) -> typing.Tuple[bool, typing.Optional[Geometry.IntRect]]:
+    """Return whether the layer frame changed from the previous frame, and the rect of the change.
+
+    Changed children contribute their old and new rects, enlarged by margin for antialiasing. The rect is None if the
+    whole layer must be redrawn: if there is no previous frame, if the size, the composition drawing or the children
+    changed, or if the rect is larger than max_fraction of the layer.
+    """
+    if previous_frame is None or previous_frame.canvas_size != frame.canvas_size:
+        return True, None
+    if previous_frame.head.binary_commands != frame.head.binary_commands or previous_frame.tail.binary_commands != frame.tail.binary_commands:
+        return True, None
+    if len(previous_frame.fragments) != len(frame.fragments):
+        return True, None
+    update_rect = None
+    for previous_fragment, fragment in zip(previous_frame.fragments, frame.fragments):
+        if previous_fragment.canvas_item is not fragment.canvas_item:
+            return True, None
+        if previous_fragment.canvas_rect != fragment.canvas_rect or previous_fragment.drawing_context.binary_commands != fragment.drawing_context.binary_commands:
+            for canvas_rect in (previous_fragment.canvas_rect, fragment.canvas_rect):
+                update_rect = update_rect.union(canvas_rect) if update_rect else canvas_rect
+    if update_rect is None:
+        return False, None
+    layer_rect = Geometry.IntRect(Geometry.IntPoint(), frame.canvas_size)
+    update_rect = update_rect.inset(-margin, -margin).intersect(layer_rect)
+    if update_rect.width * update_rect.height > max_fraction * layer_rect.width * layer_rect.height:
+        return True, None
+    return True, update_rect
+
 
 class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
 
@@ -1806,6 +2017,8 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
         self.__layer_lock = threading.RLock()
         self.__layer_drawing_context = None
         self.__layer_seed = 0
+        self.__layer_frame = None  # type: typing.Optional[LayerFrame]
+        self.__layer_update = None  # type: typing.Optional[LayerUpdate]
         self.__executing = False
         self.__cancel = False
         self.__needs_layout = False
@@ -1814,13 +2027,21 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
         self._layer_thread_suppress = not _threaded_rendering_enabled  # for testing
         self.__layer_thread_condition = threading.Condition()
         self.__repaint_lock = threading.RLock()
-
+        # updates are merged into frames which start at most max_fps times per second.
+        self.__frame_pacer = FramePacing.FramePacer(lambda: LayerLayoutRenderTrait._executor.submit(self.__repaint_one))
 
     def _stop_render_behavior(self) -> None:
         with self.__repaint_lock:
             pass
         self.__cancel = True
+        self.__frame_pacer.close()
         self.__layer_drawing_context = None
+        self.__layer_frame = None
+        self.__layer_update = None
+
+    @property
+    def frame_pacer(self) -> typing.Optional[FramePacing.FramePacer]:
+        return self.__frame_pacer
 
     @property
     def _needs_layout_for_testing(self) -> bool:
@@ -1852,7 +2073,7 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
         with self.__layer_thread_condition:
             self.__needs_repaint = True
             if not self._layer_thread_suppress:
-                LayerLayoutRenderTrait._executor.submit(self.__repaint_one)
+                self.__frame_pacer.request_frame()
         # normally, this method would mark a pending update and forward the update to the container;
         # however with the layer, since drawing occurs on a thread, this must occur after the thread
         # is finished. if the thread is suppressed (typically during testing), use the regular flow.
@@ -1868,8 +2089,14 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
             with self.__layer_lock:
                 layer_drawing_context = self.__layer_drawing_context
                 layer_seed = self.__layer_seed
+                layer_update = self.__layer_update
             canvas_rect = self._canvas_item_composition.canvas_rect
             drawing_context.begin_layer(self.__layer_id, layer_seed, *tuple(canvas_rect.origin), *tuple(canvas_rect.size))
+            if layer_update:
+                update_rect = layer_update.update_rect
+                drawing_context.begin_layer_update(self.__layer_id, layer_update.base_seed, *tuple(update_rect.origin), *tuple(update_rect.size))
+                drawing_context.add(layer_update.drawing_context)
+                drawing_context.end_layer_update(self.__layer_id, layer_update.base_seed, *tuple(update_rect.origin), *tuple(update_rect.size))
             if layer_drawing_context:
                 drawing_context.add(layer_drawing_context)
             drawing_context.end_layer(self.__layer_id, layer_seed, *tuple(canvas_rect.origin), *tuple(canvas_rect.size))
@@ -1923,7 +2150,7 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
             with self.__layer_thread_condition:
                 self.__executing = False
                 if self.__needs_layout or self.__needs_repaint:
-                    LayerLayoutRenderTrait._executor.submit(self.__repaint_one)
+                    self.__frame_pacer.request_frame()
 
     def __repaint_layer(self):
         with self.__layer_thread_condition:
@@ -1946,12 +2173,32 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
                         assert self._canvas_item_composition.canvas_size is not None
                         self._canvas_item_composition._update_child_layouts(
                             self._canvas_item_composition.canvas_size)
+                    start = time.perf_counter() if Instrumentation.enabled else None
+                    frame = self.__record_frame()
                     drawing_context = DrawingContext.DrawingContext()
-                    self._canvas_item_composition._repaint_children(drawing_context)
-                    self._canvas_item_composition._repaint(drawing_context)
-                    with self.__layer_lock:
-                        self.__layer_seed += 1
-                        self.__layer_drawing_context = drawing_context
+                    drawing_context.add(frame.head)
+                    for fragment in frame.fragments:
+                        drawing_context.add(fragment.drawing_context)
+                    drawing_context.add(frame.tail)
+                    if start is not None:
+                        Instrumentation.emit_canvas_item_event("record", self._canvas_item_composition, start, len(drawing_context.commands))
+                    changed, update_rect = get_layer_update_rect(self.__layer_frame, frame)
+                    self.__layer_frame = frame
+                    if changed:
+                        with self.__layer_lock:
+                            layer_update = None
+                            if update_rect:
+                                # the update draws the fragments intersecting the update rect; the backend clips it.
+                                update_drawing_context = DrawingContext.DrawingContext()
+                                update_drawing_context.add(frame.head)
+                                for fragment in frame.fragments:
+                                    if fragment.canvas_rect.intersects_rect(update_rect):
+                                        update_drawing_context.add(fragment.drawing_context)
+                                update_drawing_context.add(frame.tail)
+                                layer_update = LayerUpdate(self.__layer_seed, update_rect, update_drawing_context)
+                            self.__layer_seed += 1
+                            self.__layer_drawing_context = drawing_context
+                            self.__layer_update = layer_update
                     self._canvas_item_composition._repaint_finished(self.__layer_drawing_context)
                 except Exception as e:
                     import traceback
@@ -1959,11 +2206,30 @@ class LayerLayoutRenderTrait(CompositionLayoutRenderTrait):
                     traceback.print_exc()
                     traceback.print_stack()
 
+    def __record_frame(self) -> LayerFrame:
+        # equivalent to _repaint_children followed by _repaint, with each child recorded separately.
+        canvas_item_composition = self._canvas_item_composition
+        head = DrawingContext.DrawingContext()
+        canvas_item_composition._draw_background(head)
+        fragments = list()
+        for canvas_item in canvas_item_composition.visible_canvas_items:
+            if canvas_item._has_layout:
+                fragment_drawing_context = DrawingContext.DrawingContext()
+                canvas_item_rect = canvas_item.canvas_rect
+                with fragment_drawing_context.saver():
+                    fragment_drawing_context.translate(canvas_item_rect.left, canvas_item_rect.top)
+                    canvas_item._repaint_if_needed(fragment_drawing_context)
+                fragments.append(LayerFragment(canvas_item, canvas_item_rect, fragment_drawing_context))
+        tail = DrawingContext.DrawingContext()
+        canvas_item_composition._draw_border(tail)
+        canvas_item_composition._repaint(tail)
+        return LayerFrame(canvas_item_composition.canvas_size, head, fragments, tail)
+
     def __trigger_layout(self):
         with self.__layer_thread_condition:
             self.__needs_layout = True
             if not self._layer_thread_suppress:
-                LayerLayoutRenderTrait._executor.submit(self.__repaint_one)
+                self.__frame_pacer.request_frame()
 
 
 class LayerCanvasItem(CanvasItemComposition):
@@ -2088,10 +2354,13 @@ class ScrollAreaCanvasItem(AbstractCanvasItem):
 
     def canvas_items_at_point(self, x, y):
         canvas_items = []
-        point = Geometry.IntPoint(x=x, y=y)
-        if self.__content.canvas_rect.contains_point(point):
-            canvas_point = point - Geometry.IntPoint.make(self.__content.canvas_origin)
-            canvas_items.extend(self.__content.canvas_items_at_point(canvas_point.x, canvas_point.y))
+        x, y = int(x), int(y)
+        content_origin = self.__content.canvas_origin
+        content_size = self.__content.canvas_size
+        if content_origin is not None and content_size is not None:
+            left, top = content_origin.x, content_origin.y
+            if left <= x < left + content_size.width and top <= y < top + content_size.height:
+                canvas_items.extend(self.__content.canvas_items_at_point(x - left, y - top))
         canvas_items.extend(super().canvas_items_at_point(x, y))
         return canvas_items
 
@@ -2115,6 +2384,13 @@ class SplitterCanvasItem(CanvasItemComposition):
         self.__canvas_items = []
         self.__actual_sizings = []
         self.__tracking = False
+        self.__tracking_sizings = None
+        self.__tracking_origin = None
+        self.__tracking_layout_time = 0.0
+        # while dragging a split, the children are laid out at most once per drag_layout_interval seconds, or only
+        # when the drag ends if defer_drag_layout is set; a split indicator follows the mouse in the meantime.
+        self.drag_layout_interval = 1.0 / FramePacing.default_max_fps if FramePacing.default_max_fps else 0.0
+        self.defer_drag_layout = False
         self.on_splits_will_change = None
         self.on_splits_changed = None
 
@@ -2138,7 +2414,7 @@ class SplitterCanvasItem(CanvasItemComposition):
             else:
                 content_size = Geometry.IntSize.make(self.canvas_size).width
             with self.__lock:
-                sizings = copy.deepcopy(self.__sizings)
+                sizings = list(self.__sizings)
             _, sizes = self.__calculate_layout(self.canvas_size, sizings)
             return [float(size) / content_size for size in sizes]
         return None
@@ -2146,13 +2422,12 @@ class SplitterCanvasItem(CanvasItemComposition):
     @splits.setter
     def splits(self, splits):
         with self.__lock:
-            sizings = copy.deepcopy(self.__sizings)
+            sizings = list(self.__sizings)
         assert len(splits) == len(sizings)
-        for split, sizing in zip(splits, sizings):
-            if self.orientation == "horizontal":
-                sizing.preferred_height = split
-            else:
-                sizing.preferred_width = split
+        if self.orientation == "horizontal":
+            sizings = [sizing.with_preferred_height(split) for split, sizing in zip(splits, sizings)]
+        else:
+            sizings = [sizing.with_preferred_width(split) for split, sizing in zip(splits, sizings)]
         with self.__lock:
             self.__sizings = sizings
         self.refresh_layout()
@@ -2161,15 +2436,15 @@ class SplitterCanvasItem(CanvasItemComposition):
         super().insert_canvas_item(before_index, canvas_item)
 
     def insert_canvas_item(self, before_index, canvas_item, sizing=None):
-        sizing = copy.copy(sizing) if sizing else Sizing()
+        sizing = sizing if sizing else Sizing()
         if self.orientation == "horizontal":
-            sizing.preferred_height = None
+            sizing = sizing.with_preferred_height(None)
             if sizing.minimum_height is None:
-                sizing.minimum_height = 0.1
+                sizing = sizing.with_minimum_height(0.1)
         else:
-            sizing.preferred_width = None
+            sizing = sizing.with_preferred_width(None)
             if sizing.minimum_width is None:
-                sizing.minimum_width = 0.1
+                sizing = sizing.with_minimum_width(0.1)
         with self.__lock:
             self.__sizings.insert(before_index, sizing)
         super().insert_canvas_item(before_index, canvas_item)
@@ -2182,7 +2457,7 @@ class SplitterCanvasItem(CanvasItemComposition):
     def update_layout(self, canvas_origin, canvas_size, *, immediate=False):
         with self.__lock:
             canvas_items = copy.copy(self.canvas_items)
-            sizings = copy.deepcopy(self.__sizings)
+            sizings = list(self.__sizings)
         assert len(canvas_items) == len(sizings)
         origins, sizes = self.__calculate_layout(canvas_size, sizings)
         if self.orientation == "horizontal":
@@ -2191,16 +2466,14 @@ class SplitterCanvasItem(CanvasItemComposition):
                 canvas_item_size = Geometry.IntSize(height=size, width=canvas_size.width)
                 canvas_item.update_layout(canvas_item_origin, canvas_item_size, immediate=immediate)
                 assert canvas_item._has_layout
-            for sizing, size in zip(sizings, sizes):
-                sizing.preferred_height = size
+            sizings = [sizing.with_preferred_height(size) for sizing, size in zip(sizings, sizes)]
         else:
             for canvas_item, (origin, size) in zip(canvas_items, zip(origins, sizes)):
                 canvas_item_origin = Geometry.IntPoint(y=0, x=origin)  # origin within the splitter
                 canvas_item_size = Geometry.IntSize(height=canvas_size.height, width=size)
                 canvas_item.update_layout(canvas_item_origin, canvas_item_size, immediate=immediate)
                 assert canvas_item._has_layout
-            for sizing, size in zip(sizings, sizes):
-                sizing.preferred_width = size
+            sizings = [sizing.with_preferred_width(size) for sizing, size in zip(sizings, sizes)]
         for canvas_item in canvas_items:
             assert canvas_item._has_layout
         with self.__lock:
@@ -2218,7 +2491,7 @@ class SplitterCanvasItem(CanvasItemComposition):
         assert self.canvas_origin is not None and self.canvas_size is not None
         with self.__lock:
             canvas_items = copy.copy(self.__canvas_items)
-            sizings = copy.deepcopy(self.__actual_sizings)
+            sizings = list(self.__actual_sizings)
         origins, _ = self.__calculate_layout(self.canvas_size, sizings)
         if self.orientation == "horizontal":
             for origin in origins[1:]:  # don't check the '0' origin
@@ -2234,7 +2507,7 @@ class SplitterCanvasItem(CanvasItemComposition):
         super()._repaint(drawing_context)
         assert self.canvas_origin is not None and self.canvas_size is not None
         with self.__lock:
-            sizings = copy.deepcopy(self.__actual_sizings)
+            sizings = list(self.__actual_sizings)
         origins, _ = self.__calculate_layout(self.canvas_size, sizings)
         with drawing_context.saver():
             drawing_context.begin_path()
@@ -2248,10 +2521,23 @@ class SplitterCanvasItem(CanvasItemComposition):
             drawing_context.line_width = 0.5
             drawing_context.stroke_style = "#666"
             drawing_context.stroke()
+        tracking_origin = self.__tracking_origin
+        if tracking_origin is not None:
+            with drawing_context.saver():
+                drawing_context.begin_path()
+                if self.orientation == "horizontal":
+                    drawing_context.move_to(self.canvas_bounds.left, tracking_origin)
+                    drawing_context.line_to(self.canvas_bounds.right, tracking_origin)
+                else:
+                    drawing_context.move_to(tracking_origin, self.canvas_bounds.top)
+                    drawing_context.line_to(tracking_origin, self.canvas_bounds.bottom)
+                drawing_context.line_width = 2.0
+                drawing_context.stroke_style = "rgba(64, 128, 255, 0.6)"
+                drawing_context.stroke()
 
     def __hit_test(self, x, y, modifiers):
         with self.__lock:
-            sizings = copy.deepcopy(self.__actual_sizings)
+            sizings = list(self.__actual_sizings)
         origins, _ = self.__calculate_layout(self.canvas_size, sizings)
         if self.orientation == "horizontal":
             for index, origin in enumerate(origins[1:]):  # don't check the '0' origin
@@ -2266,7 +2552,7 @@ class SplitterCanvasItem(CanvasItemComposition):
     def mouse_pressed(self, x, y, modifiers):
         assert self.canvas_origin is not None and self.canvas_size is not None
         with self.__lock:
-            sizings = copy.deepcopy(self.__actual_sizings)
+            sizings = list(self.__actual_sizings)
         origins, _ = self.__calculate_layout(self.canvas_size, sizings)
         if self.orientation == "horizontal":
             for index, origin in enumerate(origins[1:]):  # don't check the '0' origin
@@ -2295,16 +2581,44 @@ class SplitterCanvasItem(CanvasItemComposition):
         return super().mouse_pressed(x, y, modifiers)
 
     def mouse_released(self, x, y, modifiers):
+        if self.__tracking:
+            with self.__lock:
+                tracking_sizings = self.__tracking_sizings
+                self.__tracking_sizings = None
+            self.__tracking_origin = None
+            if tracking_sizings:
+                self.__layout_tracking_sizings(tracking_sizings)
+            self.refresh_layout()
+            self.update()
         self.__tracking = False
         if callable(self.on_splits_changed):
             self.on_splits_changed()
         return True
 
+    def __layout_tracking_sizings(self, temp_sizings) -> None:
+        # lay out with the sizing of all children fixed except for the two in question, then restore the freedom of
+        # the others.
+        with self.__lock:
+            old_sizings = self.__sizings
+            self.__sizings = temp_sizings
+        self.__tracking_layout_time = time.perf_counter()
+        self.update_layout(self.canvas_origin, self.canvas_size)
+        new_sizings = list()
+        for index, (old_sizing, temp_sizing) in enumerate(zip(old_sizings, temp_sizings)):
+            sizing = old_sizing
+            if index == self.__tracking_start_index or index == self.__tracking_start_index + 1:
+                if self.orientation == "horizontal":
+                    sizing = sizing.with_preferred_height(temp_sizing.preferred_height)
+                else:
+                    sizing = sizing.with_preferred_width(temp_sizing.preferred_width)
+            new_sizings.append(sizing)
+        with self.__lock:
+            self.__sizings = new_sizings
+
     def mouse_position_changed(self, x, y, modifiers):
         if self.__tracking:
             with self.__lock:
-                old_sizings = copy.deepcopy(self.__sizings)
-                temp_sizings = copy.deepcopy(self.__actual_sizings)
+                temp_sizings = list(self.__actual_sizings)
             if self.orientation == "horizontal":
                 offset = y - self.__tracking_start_pos.y
                 if not modifiers.shift:
@@ -2316,8 +2630,8 @@ class SplitterCanvasItem(CanvasItemComposition):
                         if abs(offset - snap) < 12:
                             offset = snap
                             break
-                temp_sizings[self.__tracking_start_index].preferred_height = self.__tracking_start_preferred + offset
-                temp_sizings[self.__tracking_start_index + 1].preferred_height = self.__tracking_start_preferred_next - offset
+                temp_sizings[self.__tracking_start_index] = temp_sizings[self.__tracking_start_index].with_preferred_height(self.__tracking_start_preferred + offset)
+                temp_sizings[self.__tracking_start_index + 1] = temp_sizings[self.__tracking_start_index + 1].with_preferred_height(self.__tracking_start_preferred_next - offset)
             else:
                 offset = x - self.__tracking_start_pos.x
                 if not modifiers.shift:
@@ -2329,33 +2643,26 @@ class SplitterCanvasItem(CanvasItemComposition):
                         if abs(offset - snap) < 12:
                             offset = snap
                             break
-                temp_sizings[self.__tracking_start_index].preferred_width = self.__tracking_start_preferred + offset
-                temp_sizings[self.__tracking_start_index + 1].preferred_width = self.__tracking_start_preferred_next - offset
+                temp_sizings[self.__tracking_start_index] = temp_sizings[self.__tracking_start_index].with_preferred_width(self.__tracking_start_preferred + offset)
+                temp_sizings[self.__tracking_start_index + 1] = temp_sizings[self.__tracking_start_index + 1].with_preferred_width(self.__tracking_start_preferred_next - offset)
             # fix the size of all children except for the two in question
             for index, sizing in enumerate(temp_sizings):
                 if index != self.__tracking_start_index and index != self.__tracking_start_index + 1:
                     if self.orientation == "horizontal":
-                        sizing.set_fixed_height(sizing.preferred_height)
+                        temp_sizings[index] = sizing.with_fixed_height(sizing.preferred_height)
                     else:
-                        sizing.set_fixed_width(sizing.preferred_width)
-            # update the layout
-            with self.__lock:
-                self.__sizings = temp_sizings
-            self.refresh_layout()
-            self.update_layout(self.canvas_origin, self.canvas_size, immediate=True)
-            # restore the freedom of the others
-            new_sizings = list()
-            for index, (old_sizing, temp_sizing) in enumerate(zip(old_sizings, temp_sizings)):
-                sizing = Sizing()
-                sizing.copy_from(old_sizing)
-                if index == self.__tracking_start_index or index == self.__tracking_start_index + 1:
-                    if self.orientation == "horizontal":
-                        sizing.preferred_height = temp_sizing.preferred_height
-                    else:
-                        sizing.preferred_width = temp_sizing.preferred_width
-                new_sizings.append(sizing)
-            with self.__lock:
-                self.__sizings = new_sizings
+                        temp_sizings[index] = sizing.with_fixed_width(sizing.preferred_width)
+            # move the split indicator; lay out the children if enough time has passed since the last layout.
+            origins, _ = self.__calculate_layout(self.canvas_size, temp_sizings)
+            self.__tracking_origin = origins[self.__tracking_start_index + 1]
+            if not self.defer_drag_layout and time.perf_counter() - self.__tracking_layout_time >= self.drag_layout_interval:
+                with self.__lock:
+                    self.__tracking_sizings = None
+                self.__layout_tracking_sizings(temp_sizings)
+            else:
+                with self.__lock:
+                    self.__tracking_sizings = temp_sizings
+                self.update()
             return True
         else:
             control = self.__hit_test(x, y, modifiers)
@@ -2384,9 +2691,9 @@ class ScrollBarCanvasItem(AbstractCanvasItem):
         self.__tracking = False
         self.__orientation = orientation
         if self.__orientation == Orientation.Vertical:
-            self.sizing.set_fixed_width(16)
+            self.update_sizing(self.sizing.with_fixed_width(16))
         else:
-            self.sizing.set_fixed_height(16)
+            self.update_sizing(self.sizing.with_fixed_height(16))
 
     def close(self):
         self.__scroll_area_canvas_item_content_updated_listener.close()
@@ -2630,7 +2937,11 @@ class RootLayoutRenderTrait(CompositionLayoutRenderTrait):
                             RootLayoutRenderTrait.next_section_id += 1
                             section_id = RootLayoutRenderTrait.next_section_id
                             self.__section_map[canvas_item] = section_id
-                    self._canvas_item_composition.canvas_widget.draw_section(section_id, drawing_context, canvas_rect)
+                    canvas_widget = self._canvas_item_composition.canvas_widget
+                    if Instrumentation.enabled:
+                        request_time, canvas_item._update_request_time = canvas_item._update_request_time, None
+                        Instrumentation.section_submitted(canvas_widget, section_id, canvas_item, request_time, len(drawing_context.commands))
+                    canvas_widget.draw_section(section_id, drawing_context, canvas_rect)
                     break
         self.__cull_unused_sections()
         return True
@@ -2701,6 +3012,7 @@ class RootCanvasItem(CanvasItemComposition):
         self.__drag_tracking = False
         self.__drag_tracking_canvas_item = None
         self.__grab_canvas_item = None
+        self.__display_scaling = None  # type: typing.Optional[float]
         self._set_canvas_origin(Geometry.IntPoint())
 
     def close(self):
@@ -2736,9 +3048,14 @@ class RootCanvasItem(CanvasItemComposition):
         self.__canvas_widget = None
 
     def _repaint_finished(self, drawing_context):
+        if Instrumentation.enabled:
+            # the whole canvas is drawn as section 0.
+            request_time, self._update_request_time = self._update_request_time, None
+            Instrumentation.section_submitted(self.__canvas_widget, 0, self, request_time, len(drawing_context.commands))
         self.__canvas_widget.draw(drawing_context)
 
     def refresh_layout(self):
+        self._invalidate_layout_sizing()
         self._needs_layout(self)
 
     @property
@@ -2763,9 +3080,28 @@ class RootCanvasItem(CanvasItemComposition):
         """ Set whether the canvas widget is focusable. """
         self.canvas_widget.focusable = focusable
 
+    @property
+    def display_scaling(self) -> typing.Optional[float]:
+        """Return the display scaling of the window of the canvas widget, or None if it is not known.
+
+        The display scaling is read from the window when the size changes, on the ui thread, so that canvas items can
+        use it while painting on the render thread.
+        """
+        return self.__display_scaling
+
+    def __get_window_display_scaling(self) -> typing.Optional[float]:
+        window = self.__canvas_widget.root_container if self.__canvas_widget else None
+        if window:
+            try:
+                return window.display_scaling
+            except NotImplementedError:
+                pass
+        return None
+
     def size_changed(self, width, height):
         """ Called when size changes. """
         # logging.debug("{} {} x {}".format(id(self), width, height))
+        self.__display_scaling = self.__get_window_display_scaling()
         if width > 0 and height > 0:
             self._set_canvas_origin(Geometry.IntPoint())
             self._set_canvas_size(Geometry.IntSize(height=height, width=width))
@@ -2825,8 +3161,8 @@ class RootCanvasItem(CanvasItemComposition):
         canvas_items = self.canvas_items_at_point(x, y)
         for canvas_item in reversed(canvas_items):
             if canvas_item != self:
-                canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), canvas_item)
-                if canvas_item.wheel_changed(canvas_item_point.x, canvas_item_point.y, dx, dy, is_horizontal):
+                canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, canvas_item)
+                if canvas_item.wheel_changed(canvas_item_x, canvas_item_y, dx, dy, is_horizontal):
                     return True
         return False
 
@@ -2834,8 +3170,8 @@ class RootCanvasItem(CanvasItemComposition):
         canvas_items = self.canvas_items_at_point(x, y)
         for canvas_item in reversed(canvas_items):
             if canvas_item != self:
-                canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), canvas_item)
-                if canvas_item.handle_tool_tip(canvas_item_point.x, canvas_item_point.y, gx, gy):
+                canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, canvas_item)
+                if canvas_item.handle_tool_tip(canvas_item_x, canvas_item_y, gx, gy):
                     return True
         return False
 
@@ -2880,6 +3216,12 @@ class RootCanvasItem(CanvasItemComposition):
         self.__canvas_widget.set_cursor_shape(None)
         self.__canvas_widget.tool_tip = None
 
+    def __map_to_canvas_item_xy(self, x, y, canvas_item) -> typing.Tuple[int, int]:
+        # map root coordinates to the local coordinates of canvas_item as ints, without making points.
+        x1, y1 = self._get_root_container_offset()
+        x2, y2 = canvas_item._get_root_container_offset()
+        return int(x) + x1 - x2, int(y) + y1 - y2
+
     def __mouse_canvas_item_at_point(self, x, y):
         if self.__mouse_canvas_item:
             return self.__mouse_canvas_item
@@ -2899,15 +3241,15 @@ class RootCanvasItem(CanvasItemComposition):
     def __mouse_clicked(self, x, y, modifiers):
         canvas_item = self.__mouse_canvas_item_at_point(x, y)
         if canvas_item:
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), canvas_item)
-            return canvas_item.mouse_clicked(canvas_item_point.x, canvas_item_point.y, modifiers)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, canvas_item)
+            return canvas_item.mouse_clicked(canvas_item_x, canvas_item_y, modifiers)
 
     def __mouse_double_clicked(self, x, y, modifiers):
         canvas_item = self.__mouse_canvas_item_at_point(x, y)
         if canvas_item:
             self.__request_focus(canvas_item)
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), canvas_item)
-            return canvas_item.mouse_double_clicked(canvas_item_point.x, canvas_item_point.y, modifiers)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, canvas_item)
+            return canvas_item.mouse_double_clicked(canvas_item_x, canvas_item_y, modifiers)
 
     def __mouse_pressed(self, x, y, modifiers):
         self.__mouse_position_changed(x, y, modifiers)
@@ -2919,9 +3261,9 @@ class RootCanvasItem(CanvasItemComposition):
                 self.__canvas_widget.tool_tip = self.__mouse_tracking_canvas_item.tool_tip
         if self.__mouse_tracking_canvas_item:
             self.__mouse_canvas_item = self.__mouse_tracking_canvas_item
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), self.__mouse_canvas_item)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, self.__mouse_canvas_item)
             self.__request_focus_canvas_item = self.__mouse_canvas_item
-            return self.__mouse_canvas_item.mouse_pressed(canvas_item_point.x, canvas_item_point.y, modifiers)
+            return self.__mouse_canvas_item.mouse_pressed(canvas_item_x, canvas_item_y, modifiers)
         return False
 
     def __mouse_released(self, x, y, modifiers):
@@ -2929,8 +3271,8 @@ class RootCanvasItem(CanvasItemComposition):
             if self.__request_focus_canvas_item:
                 self.__request_focus(self.__request_focus_canvas_item)
                 self.__request_focus_canvas_item = None
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), self.__mouse_canvas_item)
-            result = self.__mouse_canvas_item.mouse_released(canvas_item_point.x, canvas_item_point.y, modifiers)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, self.__mouse_canvas_item)
+            result = self.__mouse_canvas_item.mouse_released(canvas_item_x, canvas_item_y, modifiers)
             self.__mouse_canvas_item = None
             self.__mouse_position_changed(x, y, modifiers)
             return result
@@ -2972,8 +3314,8 @@ class RootCanvasItem(CanvasItemComposition):
         # finally, send out the actual position changed message to the (possibly new) current mouse tracking canvas
         # item. also make note of the last time the cursor changed for tool tip tracking.
         if self.__mouse_tracking_canvas_item:
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), self.__mouse_tracking_canvas_item)
-            self.__mouse_tracking_canvas_item.mouse_position_changed(canvas_item_point.x, canvas_item_point.y, modifiers)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, self.__mouse_tracking_canvas_item)
+            self.__mouse_tracking_canvas_item.mouse_position_changed(canvas_item_x, canvas_item_y, modifiers)
 
     def __grabbed_mouse_position_changed(self, dx, dy, modifiers):
         if self.__grab_canvas_item:
@@ -2982,8 +3324,8 @@ class RootCanvasItem(CanvasItemComposition):
     def __context_menu_event(self, x, y, gx, gy):
         canvas_items = self.canvas_items_at_point(x, y)
         for canvas_item in canvas_items:
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), canvas_item)
-            if canvas_item.context_menu_event(canvas_item_point.x, canvas_item_point.y, gx, gy):
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, canvas_item)
+            if canvas_item.context_menu_event(canvas_item_x, canvas_item_y, gx, gy):
                 return True
         return False
 
@@ -3029,15 +3371,15 @@ class RootCanvasItem(CanvasItemComposition):
             if self.__drag_tracking_canvas_item:
                 self.__drag_tracking_canvas_item.drag_enter(mime_data)
         if self.__drag_tracking_canvas_item:
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), self.__drag_tracking_canvas_item)
-            response = self.__drag_tracking_canvas_item.drag_move(mime_data, canvas_item_point.x, canvas_item_point.y)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, self.__drag_tracking_canvas_item)
+            response = self.__drag_tracking_canvas_item.drag_move(mime_data, canvas_item_x, canvas_item_y)
         return response
 
     def __drop(self, mime_data: "UserInterface.MimeData", x: int, y: int) -> str:
         response = "ignore"
         if self.__drag_tracking_canvas_item:
-            canvas_item_point = self.map_to_canvas_item(Geometry.IntPoint(y=y, x=x), self.__drag_tracking_canvas_item)
-            response = self.__drag_tracking_canvas_item.drop(mime_data, canvas_item_point.x, canvas_item_point.y)
+            canvas_item_x, canvas_item_y = self.__map_to_canvas_item_xy(x, y, self.__drag_tracking_canvas_item)
+            response = self.__drag_tracking_canvas_item.drop(mime_data, canvas_item_x, canvas_item_y)
         self.__drag_leave()
         return response
 
@@ -3280,6 +3622,17 @@ class TwistDownCanvasItem(CellCanvasItem):
         return True
 
 
+# the display scaling used to choose image levels when the display scaling of the window is not known.
+DefaultDisplayScaling = 2.0
+
+
+def get_display_scaling(canvas_item: AbstractCanvasItem) -> float:
+    """Return the display scaling of the window of the root canvas item, or DefaultDisplayScaling if not known."""
+    root_container = canvas_item.root_container
+    display_scaling = root_container.display_scaling if root_container else None
+    return display_scaling or DefaultDisplayScaling
+
+
 class BitmapCell:
 
     def __init__(self, rgba_bitmap_data=None, background_color=None, border_color=None):
@@ -3290,10 +3643,35 @@ class BitmapCell:
         self.__color_map_data = None
         self.__background_color = background_color
         self.__border_color = border_color
+        self.__image_pyramid = None
+        self.__image_drawn = False
+        # large images are drawn from a smaller level of an image pyramid when enabled. the level is chosen to be at
+        # least display_scaling times the displayed size, so that it stays sharp on high resolution displays. the
+        # pyramid is only built once an image is drawn a second time, so that live data, which is usually drawn once,
+        # is not downsampled on the render thread.
+        self.image_pyramid_enabled = True
+        self.display_scaling = DefaultDisplayScaling
+        # the arrays drawn by this cell are registered as image buffers until the bitmap or data changes, so that the
+        # backend can reuse the images it made from them.
+        self.__image_buffers = list()
         self.update_event = Event.Event()
 
+    def __register_image_buffer(self, array) -> None:
+        image_buffers = self.__image_buffers
+        if not any(image_buffer is array for image_buffer in image_buffers):
+            DrawingContext.image_buffers.register(array)
+            image_buffers.append(array)
+
+    def __release_image_buffers(self) -> None:
+        image_buffers, self.__image_buffers = self.__image_buffers, list()
+        for image_buffer in image_buffers:
+            DrawingContext.image_buffers.release(image_buffer)
+
     def set_rgba_bitmap_data(self, rgba_bitmap_data, trigger_update=True):
         self.__rgba_bitmap_data = rgba_bitmap_data
+        self.__image_pyramid = None
+        self.__image_drawn = False
+        self.__release_image_buffers()
         self.__data = None
         self.__display_limits = None
         self.__color_map_data = None
@@ -3302,6 +3680,9 @@ class BitmapCell:
 
     def set_data(self, data, display_limits, color_map_data, trigger_update=True):
         self.__rgba_bitmap_data = None
+        self.__image_pyramid = None
+        self.__image_drawn = False
+        self.__release_image_buffers()
         self.__data = data
         self.__display_limits = display_limits
         self.__color_map_data = color_map_data
@@ -3338,6 +3719,20 @@ class BitmapCell:
         self.__border_color = border_color
         self.update_event.fire()
 
+    def __get_display_image(self, image, display_rect):
+        """Return the smallest level of the image pyramid which still covers the display rect at display scaling."""
+        if not self.image_pyramid_enabled:
+            return image
+        image_pyramid = self.__image_pyramid
+        if image_pyramid is None or image_pyramid.image is not image:
+            if not self.__image_drawn:
+                self.__image_drawn = True
+                return image
+            image_pyramid = ImagePyramid.ImagePyramid(image)
+            self.__image_pyramid = image_pyramid
+        return image_pyramid.get_level_for_size(display_rect.height * self.display_scaling,
+                                                display_rect.width * self.display_scaling)
+
     def paint_cell(self, drawing_context, rect, style):
         # set up the defaults
         background_color = self.__background_color
@@ -3378,6 +3773,8 @@ class BitmapCell:
                 if display_rect and display_width > 0 and display_height > 0:
                     display_top = display_rect.top
                     display_left = display_rect.left
+                    bitmap_data = self.__get_display_image(bitmap_data, display_rect)
+                    self.__register_image_buffer(bitmap_data)
                     drawing_context.draw_image(bitmap_data, display_left, display_top, display_width, display_height)
         if raw_data is not None:
             image_size = raw_data.shape
@@ -3388,6 +3785,10 @@ class BitmapCell:
                 if display_rect and display_width > 0 and display_height > 0:
                     display_top = display_rect.top
                     display_left = display_rect.left
+                    raw_data = self.__get_display_image(raw_data, display_rect)
+                    self.__register_image_buffer(raw_data)
+                    if self.__color_map_data is not None:
+                        self.__register_image_buffer(self.__color_map_data)
                     drawing_context.draw_data(raw_data, display_left, display_top, display_width, display_height, self.__display_limits[0], self.__display_limits[1], self.__color_map_data)
         # draw the overlay style
         if overlay_color:
@@ -3410,6 +3811,11 @@ class BitmapCanvasItem(CellCanvasItem):
     def __init__(self, rgba_bitmap_data=None, background_color=None, border_color=None):
         super().__init__()
         self.cell = BitmapCell(rgba_bitmap_data, background_color, border_color)
+        self.__display_scaling = None  # type: typing.Optional[float]
+
+    def _repaint(self, drawing_context):
+        self.cell.display_scaling = self.display_scaling
+        super()._repaint(drawing_context)
 
     def set_rgba_bitmap_data(self, rgba_bitmap_data, trigger_update=True):
         self.cell.set_rgba_bitmap_data(rgba_bitmap_data, trigger_update)
@@ -3429,6 +3835,25 @@ class BitmapCanvasItem(CellCanvasItem):
     def rgba_bitmap_data(self, rgb_bitmap_data):
         self.cell.rgba_bitmap_data = rgb_bitmap_data
 
+    @property
+    def image_pyramid_enabled(self) -> bool:
+        return self.cell.image_pyramid_enabled
+
+    @image_pyramid_enabled.setter
+    def image_pyramid_enabled(self, value: bool) -> None:
+        self.cell.image_pyramid_enabled = value
+        self.update()
+
+    @property
+    def display_scaling(self) -> float:
+        """Return the display scaling set on this item or, if None, the display scaling of its window."""
+        return self.__display_scaling or get_display_scaling(self)
+
+    @display_scaling.setter
+    def display_scaling(self, value: typing.Optional[float]) -> None:
+        self.__display_scaling = value
+        self.update()
+
     @property
     def background_color(self):
         return self.cell.background_cell
@@ -3478,6 +3903,95 @@ class BitmapButtonCanvasItem(BitmapCanvasItem):
         return True
 
 
+class TiledImageCanvasItem(AbstractCanvasItem):
+
+    """ Canvas item to draw the visible part of a large image from the tiles of a tiled image source.
+
+    The whole image is drawn into image_rect (canvas coordinates), which may extend beyond the canvas to zoom and pan;
+    if image_rect is None, the image is fit to the canvas. Only tiles intersecting the canvas are drawn, from the level
+    with at least display_scaling image pixels per displayed pixel.
+
+    Packed uint32 (BGRA) sources are drawn as bitmaps; other sources are drawn as data using display_limits and
+    color_map_data.
+    """
+
+    def __init__(self, image_source: typing.Optional[ImagePyramid.TiledImageSource] = None):
+        super().__init__()
+        self.__image_source = image_source
+        self.__image_rect = None  # type: typing.Optional[Geometry.FloatRect]
+        self.__display_limits = (0.0, 1.0)
+        self.__color_map_data = None
+        self.__display_scaling = None  # type: typing.Optional[float]
+
+    def set_image_source(self, image_source: typing.Optional[ImagePyramid.TiledImageSource], display_limits=None,
+                         color_map_data=None, trigger_update=True) -> None:
+        self.__image_source = image_source
+        self.__display_limits = display_limits if display_limits is not None else (0.0, 1.0)
+        self.__color_map_data = color_map_data
+        if trigger_update:
+            self.update()
+
+    @property
+    def image_source(self) -> typing.Optional[ImagePyramid.TiledImageSource]:
+        return self.__image_source
+
+    @property
+    def image_rect(self) -> typing.Optional[Geometry.FloatRect]:
+        return self.__image_rect
+
+    @property
+    def display_scaling(self) -> float:
+        """Return the display scaling set on this item or, if None, the display scaling of its window."""
+        return self.__display_scaling or get_display_scaling(self)
+
+    @display_scaling.setter
+    def display_scaling(self, value: typing.Optional[float]) -> None:
+        self.__display_scaling = value
+        self.update()
+
+    @image_rect.setter
+    def image_rect(self, value: typing.Optional[Geometry.FloatRect]) -> None:
+        self.__image_rect = Geometry.FloatRect.make(value) if value is not None else None
+        self.update()
+
+    def _repaint(self, drawing_context):
+        image_source = self.__image_source
+        canvas_size = self.canvas_size
+        if image_source is None or not canvas_size:
+            return
+        image_height, image_width = image_source.shape
+        if image_height <= 0 or image_width <= 0:
+            return
+        canvas_rect = Geometry.FloatRect.from_tlhw(0, 0, canvas_size[0], canvas_size[1])
+        image_rect = self.__image_rect or Geometry.fit_to_size(canvas_rect, image_source.shape)
+        if image_rect.height <= 0 or image_rect.width <= 0:
+            return
+        y_scale = image_rect.height / image_height
+        x_scale = image_rect.width / image_width
+        visible_rect = canvas_rect.intersect(image_rect)
+        if visible_rect.height <= 0 or visible_rect.width <= 0:
+            return
+        visible_image_rect = Geometry.IntRect.from_tlbr(int(math.floor((visible_rect.top - image_rect.top) / y_scale)),
+                                                        int(math.floor((visible_rect.left - image_rect.left) / x_scale)),
+                                                        int(math.ceil((visible_rect.bottom - image_rect.top) / y_scale)),
+                                                        int(math.ceil((visible_rect.right - image_rect.left) / x_scale)))
+        scale = max(y_scale, x_scale) / self.display_scaling
+        with drawing_context.saver():
+            clip_left, clip_top = int(math.floor(visible_rect.left)), int(math.floor(visible_rect.top))
+            drawing_context.clip_rect(clip_left, clip_top, int(math.ceil(visible_rect.right)) - clip_left,
+                                      int(math.ceil(visible_rect.bottom)) - clip_top)
+            for tile_rect, tile in image_source.get_tiles(visible_image_rect, scale):
+                left = image_rect.left + tile_rect.left * x_scale
+                top = image_rect.top + tile_rect.top * y_scale
+                width = tile_rect.width * x_scale
+                height = tile_rect.height * y_scale
+                if tile.dtype == numpy.uint32:
+                    drawing_context.draw_image(tile, left, top, width, height)
+                else:
+                    drawing_context.draw_data(tile, left, top, width, height, self.__display_limits[0],
+                                              self.__display_limits[1], self.__color_map_data)
+
+
 class StaticTextCanvasItem(AbstractCanvasItem):
 
     def __init__(self, text=None):
@@ -3545,9 +4059,7 @@ class StaticTextCanvasItem(AbstractCanvasItem):
         if vertical_padding is None:
             vertical_padding = 4
         font_metrics = get_font_metrics_fn(self.__font, self.__text)
-        new_sizing = self.copy_sizing()
-        new_sizing.set_fixed_width(font_metrics.width + 2 * horizontal_padding)
-        new_sizing.set_fixed_height(font_metrics.height + 2 * vertical_padding)
+        new_sizing = self.sizing.with_fixed_width(font_metrics.width + 2 * horizontal_padding).with_fixed_height(font_metrics.height + 2 * vertical_padding)
         self.update_sizing(new_sizing)
 
     def _repaint(self, drawing_context):
@@ -3772,9 +4284,7 @@ class CheckBoxCanvasItem(AbstractCanvasItem):
         horizontal_padding = 4
         vertical_padding = 3
         font_metrics = get_font_metrics_fn(self.__font, self.__text)
-        new_sizing = self.copy_sizing()
-        new_sizing.set_fixed_width(font_metrics.width + 2 * horizontal_padding + 14 + 4)
-        new_sizing.set_fixed_height(font_metrics.height + 2 * vertical_padding)
+        new_sizing = self.sizing.with_fixed_width(font_metrics.width + 2 * horizontal_padding + 14 + 4).with_fixed_height(font_metrics.height + 2 * vertical_padding)
         self.update_sizing(new_sizing)
 
     def _repaint(self, drawing_context):
@@ -3871,7 +4381,7 @@ class ProgressBarCanvasItem(AbstractCanvasItem):
         super().__init__()
         self.__enabled = True
         self.__progress = 0.0  # 0.0 to 1.0
-        self.sizing.set_fixed_height(4)
+        self.update_sizing(self.sizing.with_fixed_height(4))
 
     @property
     def enabled(self) -> bool:
@@ -3948,6 +4458,33 @@ class TimestampCanvasItem(AbstractCanvasItem):
         super()._repaint(drawing_context)
 
 
+class RenderStatisticsCanvasItem(AbstractCanvasItem):
+    """Overlay the render statistics collected by an overlay sink, for instance over the top of a canvas.
+
+    The canvas item adds the sink to the instrumentation while it exists and repaints whenever the sink changes.
+    """
+
+    def __init__(self, overlay_sink: Instrumentation.OverlaySink = None, max_count: int = 8):
+        super().__init__()
+        self.__overlay_sink = overlay_sink or Instrumentation.OverlaySink()
+        self.__max_count = max_count
+        self.__overlay_sink.on_changed = self.update
+        Instrumentation.add_sink(self.__overlay_sink)
+
+    def close(self):
+        Instrumentation.remove_sink(self.__overlay_sink)
+        self.__overlay_sink.on_changed = None
+        super().close()
+
+    @property
+    def overlay_sink(self) -> Instrumentation.OverlaySink:
+        return self.__overlay_sink
+
+    def _repaint(self, drawing_context):
+        super()._repaint(drawing_context)
+        self.__overlay_sink.draw(drawing_context, Geometry.IntRect(Geometry.IntPoint(), self.canvas_size), self.__max_count)
+
+
 def load_rgba_data_from_bytes(b: typing.ByteString, format: str = None) -> numpy.ndarray:
     old_level = logging.getLogger().level
     image_rgba = None
@@ -0,0 +1,491 @@
+"""
+A compact binary protocol to stream canvas drawing to remote clients, with a reference server and client.
+
+The stream is a sequence of messages. Each message is a header (four character code, flags, payload length; little
+endian 32 bit unsigned integers after the code) followed by the payload. If bit 0 of flags is set, the payload is
+compressed with zlib.
+
+Server to client messages:
+    IMAG - image_id, width, height, dtype code (b"u4  " packed BGRA or b"f4  " float data), then the pixel data.
+    FRAM - section_id, left, top, width, height, then the binary drawing commands of the section.
+    DLTA - section_id, left, top, width, height, prefix length, suffix length, then the replacement for the middle of
+           the previous commands of the section: the commands are the first prefix length bytes of the previous
+           commands, the replacement, then the last suffix length bytes of the previous commands.
+    RMSC - section_id; the section is removed.
+    FREE - image ids no longer referenced by any section.
+
+Client to server messages:
+    EVNT - an input event as a JSON object, for example {"type": "mouse_down", "x": 10, "y": 20}.
+
+The drawing commands are DrawingContext.binary_commands, which refer to images by id; each image is sent once, before
+the first frame which uses it, and freed when no section uses it any more. Images drawn repeatedly keep their id
+across frames when registered with DrawingContext.image_buffers.
+
+CanvasStreamServer accepts connections on a local port and implements the draw and get_font_metrics methods expected
+of the server passed to CanvasUI.CanvasUserInterface, so it can be used as the "server" bootstrap argument. Each
+connection has its own encoder and sending thread; when a connection is slower than the drawing, intermediate frames
+of a section are skipped.
+"""
+
+# standard libraries
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import struct
+import threading
+import typing
+import zlib
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.ui import DrawingContext
+from nion.ui import UserInterface
+from nion.utils import Geometry
+
+
+_header = struct.Struct("<4sII")
+_image_header = struct.Struct("<iii4s")
+_frame_header = struct.Struct("<iiiii")
+_delta_header = struct.Struct("<iiiiiII")
+_section_header = struct.Struct("<i")
+
+_compressed_flag = 1
+
+_image_dtypes = {numpy.dtype(numpy.uint32): b"u4  ", numpy.dtype(numpy.float32): b"f4  "}
+_image_dtypes_by_code = {code: dtype for dtype, code in _image_dtypes.items()}
+
+
+def encode_message(code: bytes, payload: bytes, *, compress: bool = False, compress_level: int = 1) -> bytes:
+    """Return the message with code and payload, compressing the payload if asked to and if it gets smaller."""
+    flags = 0
+    if compress:
+        compressed_payload = zlib.compress(payload, compress_level)
+        if len(compressed_payload) < len(payload):
+            payload = compressed_payload
+            flags |= _compressed_flag
+    return _header.pack(code, flags, len(payload)) + payload
+
+
+def decode_messages(buffer: bytearray) -> typing.List[typing.Tuple[bytes, bytes]]:
+    """Remove the complete messages from the start of buffer and return them as (code, payload) tuples."""
+    messages = list()
+    offset = 0
+    while len(buffer) - offset >= _header.size:
+        code, flags, length = _header.unpack_from(buffer, offset)
+        if len(buffer) - offset - _header.size < length:
+            break
+        start = offset + _header.size
+        payload = bytes(buffer[start:start + length])
+        if flags & _compressed_flag:
+            payload = zlib.decompress(payload)
+        messages.append((code, payload))
+        offset = start + length
+    del buffer[:offset]
+    return messages
+
+
+class CanvasStreamStatistics:
+
+    def __init__(self):
+        self.frame_count = 0
+        self.delta_frame_count = 0
+        self.unchanged_frame_count = 0
+        self.image_count = 0
+        self.byte_count = 0
+
+
+class CanvasStreamEncoder:
+    """Encode section drawing for one client, tracking the commands and images the client already has.
+
+    If compress is set, payloads larger than min_compress_size are compressed when that makes them smaller.
+    """
+
+    def __init__(self, *, compress: bool = False, compress_level: int = 1, min_compress_size: int = 256):
+        self.compress = compress
+        self.compress_level = compress_level
+        self.min_compress_size = min_compress_size
+        self.statistics = CanvasStreamStatistics()
+        self.__section_commands = dict()  # type: typing.Dict[int, bytes]
+        self.__section_rects = dict()  # type: typing.Dict[int, typing.Tuple[int, int, int, int]]
+        self.__section_image_ids = dict()  # type: typing.Dict[int, typing.Set[int]]
+        self.__sent_image_ids = set()  # type: typing.Set[int]
+
+    def __message(self, code: bytes, payload: bytes) -> bytes:
+        compress = self.compress and len(payload) > self.min_compress_size
+        message = encode_message(code, payload, compress=compress, compress_level=self.compress_level)
+        self.statistics.byte_count += len(message)
+        return message
+
+    def encode_section(self, section_id: int, drawing_context: DrawingContext.DrawingContext,
+                       canvas_rect: Geometry.IntRect) -> bytes:
+        """Return the messages to bring the section on the client up to date with the drawing context.
+
+        Returns empty bytes if the section is unchanged.
+        """
+        messages = list()
+        image_ids = set()
+        for image_id_str, image in drawing_context.images.items():
+            image_id = int(image_id_str)
+            image_ids.add(image_id)
+            if image_id not in self.__sent_image_ids:
+                image = numpy.ascontiguousarray(image)
+                dtype_code = _image_dtypes.get(image.dtype)
+                if dtype_code is None:
+                    image = image.astype(numpy.float32)
+                    dtype_code = _image_dtypes[image.dtype]
+                if image.ndim == 1:  # color tables are sent as single row images
+                    image = image.reshape(1, -1)
+                height, width = image.shape[:2]
+                image_bytes = image.astype(image.dtype.newbyteorder("<"), copy=False).tobytes()
+                payload = _image_header.pack(image_id, width, height, dtype_code) + image_bytes
+                messages.append(self.__message(b"IMAG", payload))
+                self.__sent_image_ids.add(image_id)
+                self.statistics.image_count += 1
+        commands = bytes(drawing_context.binary_commands)
+        rect_values = (canvas_rect.left, canvas_rect.top, canvas_rect.width, canvas_rect.height)
+        previous_commands = self.__section_commands.get(section_id)
+        if previous_commands is None:
+            messages.append(self.__message(b"FRAM", _frame_header.pack(section_id, *rect_values) + commands))
+            self.statistics.frame_count += 1
+        elif previous_commands == commands and self.__section_rects.get(section_id) == rect_values:
+            self.statistics.unchanged_frame_count += 1
+        else:
+            prefix, suffix = get_common_prefix_and_suffix(previous_commands, commands)
+            middle = commands[prefix:len(commands) - suffix]
+            messages.append(self.__message(b"DLTA", _delta_header.pack(section_id, *rect_values, prefix, suffix) + middle))
+            self.statistics.frame_count += 1
+            self.statistics.delta_frame_count += 1
+        self.__section_commands[section_id] = commands
+        self.__section_rects[section_id] = rect_values
+        self.__section_image_ids[section_id] = image_ids
+        messages.append(self.__free_unused_images())
+        return b"".join(messages)
+
+    def remove_section(self, section_id: int) -> bytes:
+        if section_id not in self.__section_commands:
+            return bytes()
+        self.__section_commands.pop(section_id, None)
+        self.__section_image_ids.pop(section_id, None)
+        self.__section_rects.pop(section_id, None)
+        return self.__message(b"RMSC", _section_header.pack(section_id)) + self.__free_unused_images()
+
+    def __free_unused_images(self) -> bytes:
+        used_image_ids = set().union(*self.__section_image_ids.values()) if self.__section_image_ids else set()
+        unused_image_ids = self.__sent_image_ids - used_image_ids
+        if not unused_image_ids:
+            return bytes()
+        self.__sent_image_ids -= unused_image_ids
+        return self.__message(b"FREE", struct.pack(f"<{len(unused_image_ids)}i", *sorted(unused_image_ids)))
+
+
+def get_common_prefix_and_suffix(a: bytes, b: bytes) -> typing.Tuple[int, int]:
+    """Return the lengths of the common prefix and suffix of a and b, which do not overlap in either."""
+    limit = min(len(a), len(b))
+    prefix = 0
+    # compare in large blocks first, then bytes; commands usually differ in a small region.
+    block = 4096
+    while prefix + block <= limit and a[prefix:prefix + block] == b[prefix:prefix + block]:
+        prefix += block
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    limit -= prefix
+    suffix = 0
+    while suffix + block <= limit and a[len(a) - suffix - block:len(a) - suffix] == b[len(b) - suffix - block:len(b) - suffix]:
+        suffix += block
+    while suffix < limit and a[len(a) - suffix - 1] == b[len(b) - suffix - 1]:
+        suffix += 1
+    return prefix, suffix
+
+
+class CanvasStreamSection:
+
+    def __init__(self, section_id: int, canvas_rect: Geometry.IntRect, binary_commands: bytes):
+        self.section_id = section_id
+        self.canvas_rect = canvas_rect
+        self.binary_commands = binary_commands
+
+
+class CanvasStreamDecoder:
+    """Decode a server stream into sections and images, as a client would."""
+
+    def __init__(self):
+        self.__buffer = bytearray()
+        self.sections = dict()  # type: typing.Dict[int, CanvasStreamSection]
+        self.images = dict()  # type: typing.Dict[int, numpy.ndarray]
+
+    def feed(self, data: bytes) -> typing.List[int]:
+        """Decode the complete messages in data (with any data left from earlier) and return the updated section ids."""
+        self.__buffer.extend(data)
+        updated_section_ids = list()
+        for code, payload in decode_messages(self.__buffer):
+            if code == b"IMAG":
+                image_id, width, height, dtype_code = _image_header.unpack_from(payload)
+                dtype = _image_dtypes_by_code[dtype_code].newbyteorder("<")
+                image = numpy.frombuffer(payload, dtype=dtype, offset=_image_header.size).reshape(height, width)
+                self.images[image_id] = image
+            elif code == b"FRAM":
+                section_id, left, top, width, height = _frame_header.unpack_from(payload)
+                canvas_rect = Geometry.IntRect.from_tlhw(top, left, height, width)
+                self.sections[section_id] = CanvasStreamSection(section_id, canvas_rect, payload[_frame_header.size:])
+                updated_section_ids.append(section_id)
+            elif code == b"DLTA":
+                section_id, left, top, width, height, prefix, suffix = _delta_header.unpack_from(payload)
+                previous_commands = self.sections[section_id].binary_commands
+                commands = previous_commands[:prefix] + payload[_delta_header.size:] + previous_commands[len(previous_commands) - suffix:]
+                canvas_rect = Geometry.IntRect.from_tlhw(top, left, height, width)
+                self.sections[section_id] = CanvasStreamSection(section_id, canvas_rect, commands)
+                updated_section_ids.append(section_id)
+            elif code == b"RMSC":
+                section_id = _section_header.unpack_from(payload)[0]
+                self.sections.pop(section_id, None)
+            elif code == b"FREE":
+                for image_id in struct.unpack(f"<{len(payload) // 4}i", payload):
+                    self.images.pop(image_id, None)
+        return updated_section_ids
+
+
+def get_font_metrics(font: str, text: str) -> UserInterface.FontMetrics:
+    """Estimate font metrics from the pixel size in a CSS font string, for servers without fonts."""
+    match = re.search(r"(\d+(?:\.\d+)?)px", font or str())
+    size = float(match.group(1)) if match else 12.0
+    ascent = int(round(size * 0.8))
+    descent = int(round(size * 0.2))
+    return UserInterface.FontMetrics(width=int(round(len(text) * size * 0.6)), height=ascent + descent, ascent=ascent,
+                                     descent=descent, leading=0)
+
+
+class CanvasStreamConnection:
+    """A client connection of a CanvasStreamServer, sending the latest drawing of each section on its own thread."""
+
+    def __init__(self, server: "CanvasStreamServer", sock: socket.socket, encoder: CanvasStreamEncoder):
+        self.__server = server
+        self.__socket = sock
+        self.encoder = encoder
+        self.__pending = dict()  # type: typing.Dict[int, typing.Optional[typing.Tuple[DrawingContext.DrawingContext, Geometry.IntRect]]]
+        self.__condition = threading.Condition()
+        self.__closed = False
+        self.__send_thread = threading.Thread(target=self.__send_loop, name="CanvasStreamSend", daemon=True)
+        self.__receive_thread = threading.Thread(target=self.__receive_loop, name="CanvasStreamReceive", daemon=True)
+        self.__send_thread.start()
+        self.__receive_thread.start()
+
+    def close(self) -> None:
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify()
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__socket.close()
+
+    def draw_section(self, section_id: int, drawing_context: DrawingContext.DrawingContext,
+                     canvas_rect: Geometry.IntRect) -> None:
+        with self.__condition:
+            self.__pending[section_id] = (drawing_context, canvas_rect)
+            self.__condition.notify()
+
+    def remove_section(self, section_id: int) -> None:
+        with self.__condition:
+            self.__pending[section_id] = None
+            self.__condition.notify()
+
+    def __send_loop(self) -> None:
+        while True:
+            with self.__condition:
+                while not self.__pending and not self.__closed:
+                    self.__condition.wait()
+                if self.__closed:
+                    return
+                pending, self.__pending = self.__pending, dict()
+            messages = list()
+            for section_id, drawing in pending.items():
+                if drawing is not None:
+                    messages.append(self.encoder.encode_section(section_id, *drawing))
+                else:
+                    messages.append(self.encoder.remove_section(section_id))
+            try:
+                self.__socket.sendall(b"".join(messages))
+            except OSError:
+                self.__server._connection_closed(self)
+                return
+
+    def __receive_loop(self) -> None:
+        buffer = bytearray()
+        while True:
+            try:
+                data = self.__socket.recv(65536)
+            except OSError:
+                data = None
+            if not data:
+                self.__server._connection_closed(self)
+                return
+            buffer.extend(data)
+            try:
+                messages = decode_messages(buffer)
+            except zlib.error:
+                # the stream cannot be followed past a corrupt payload.
+                logging.warning("CanvasStream: closing connection with corrupt message")
+                self.__server._connection_closed(self)
+                return
+            for code, payload in messages:
+                if code == b"EVNT":
+                    try:
+                        event_dict = json.loads(payload.decode("utf-8"))
+                    except ValueError:  # includes invalid JSON and invalid UTF-8
+                        event_dict = None
+                    if isinstance(event_dict, dict):
+                        self.__server._handle_event(event_dict)
+                    else:
+                        logging.warning("CanvasStream: dropping malformed event message")
+
+
+class CanvasStreamServer:
+    """Stream canvas drawing to clients connecting to host and port (port 0 picks a free port).
+
+    draw(drawing_context) draws the whole canvas as section 0; draw_section draws a section. Events received from
+    clients are put on event_queue, in the form expected by CanvasUI.CanvasUserInterface.run.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, width: int = 960, height: int = 720,
+                 compress: bool = False, event_queue: typing.Optional[queue.Queue] = None,
+                 get_font_metrics_fn: typing.Optional[typing.Callable[[str, str], UserInterface.FontMetrics]] = None):
+        self.width = width
+        self.height = height
+        self.compress = compress
+        self.event_queue = event_queue if event_queue is not None else queue.Queue()
+        self.__get_font_metrics_fn = get_font_metrics_fn or get_font_metrics
+        self.__lock = threading.RLock()
+        self.__connections = list()  # type: typing.List[CanvasStreamConnection]
+        self.__sections = dict()  # type: typing.Dict[int, typing.Tuple[DrawingContext.DrawingContext, Geometry.IntRect]]
+        self.__listen_socket = self.__make_listen_socket(host, port)
+        self.__closed = False
+        self.__accept_thread = threading.Thread(target=self.__accept_loop, name="CanvasStreamAccept", daemon=True)
+        self.__accept_thread.start()
+
+    @staticmethod
+    def __make_listen_socket(host: str, port: int) -> socket.socket:
+        family, type_, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+        listen_socket = socket.socket(family, type_, proto)
+        try:
+            # allow restarting on the same port while old connections linger; on Windows this would allow sharing it.
+            if os.name not in ("nt", "cygwin"):
+                listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listen_socket.bind(address)
+            listen_socket.listen()
+        except OSError:
+            listen_socket.close()
+            raise
+        return listen_socket
+
+    @property
+    def address(self) -> typing.Tuple[str, int]:
+        return self.__listen_socket.getsockname()[:2]
+
+    @property
+    def connections(self) -> typing.List[CanvasStreamConnection]:
+        with self.__lock:
+            return list(self.__connections)
+
+    def close(self) -> None:
+        self.__closed = True
+        self.__listen_socket.close()
+        with self.__lock:
+            connections, self.__connections = self.__connections, list()
+        for connection in connections:
+            connection.close()
+
+    def __accept_loop(self) -> None:
+        while not self.__closed:
+            try:
+                sock, _ = self.__listen_socket.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = CanvasStreamConnection(self, sock, CanvasStreamEncoder(compress=self.compress))
+            with self.__lock:
+                self.__connections.append(connection)
+                # bring the new client up to date with the last drawing of each section.
+                for section_id, (drawing_context, canvas_rect) in self.__sections.items():
+                    connection.draw_section(section_id, drawing_context, canvas_rect)
+
+    def _connection_closed(self, connection: CanvasStreamConnection) -> None:
+        with self.__lock:
+            if connection in self.__connections:
+                self.__connections.remove(connection)
+        connection.close()
+
+    def _handle_event(self, event_dict: typing.Mapping) -> None:
+        self.event_queue.put(event_dict)
+
+    def draw(self, drawing_context: DrawingContext.DrawingContext) -> None:
+        self.draw_section(0, drawing_context, Geometry.IntRect.from_tlhw(0, 0, self.height, self.width))
+
+    def draw_section(self, section_id: int, drawing_context: DrawingContext.DrawingContext,
+                     canvas_rect: Geometry.IntRect) -> None:
+        with self.__lock:
+            self.__sections[section_id] = (drawing_context, canvas_rect)
+            for connection in self.__connections:
+                connection.draw_section(section_id, drawing_context, canvas_rect)
+
+    def remove_section(self, section_id: int) -> None:
+        with self.__lock:
+            self.__sections.pop(section_id, None)
+            for connection in self.__connections:
+                connection.remove_section(section_id)
+
+    def get_font_metrics(self, font: str, text: str) -> UserInterface.FontMetrics:
+        return self.__get_font_metrics_fn(font, text)
+
+
+class CanvasStreamClient:
+    """A minimal client: receive and decode the stream on a thread and send events. Used for testing."""
+
+    def __init__(self, host: str, port: int, *, timeout: float = 10.0):
+        self.decoder = CanvasStreamDecoder()
+        self.__socket = socket.create_connection((host, port), timeout=timeout)
+        self.__socket.settimeout(None)
+        self.__condition = threading.Condition()
+        self.__update_count = 0
+        self.__closed = False
+        self.__thread = threading.Thread(target=self.__receive_loop, name="CanvasStreamClient", daemon=True)
+        self.__thread.start()
+
+    def close(self) -> None:
+        self.__closed = True
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.__socket.close()
+        self.__thread.join()
+
+    @property
+    def update_count(self) -> int:
+        """Return the number of section updates received."""
+        with self.__condition:
+            return self.__update_count
+
+    def wait_for_update_count(self, update_count: int, timeout: float = 10.0) -> bool:
+        with self.__condition:
+            return self.__condition.wait_for(lambda: self.__update_count >= update_count, timeout)
+
+    def send_event(self, event_dict: typing.Mapping) -> None:
+        self.__socket.sendall(encode_message(b"EVNT", json.dumps(event_dict).encode("utf-8")))
+
+    def __receive_loop(self) -> None:
+        while not self.__closed:
+            try:
+                data = self.__socket.recv(65536)
+            except OSError:
+                return
+            if not data:
+                return
+            with self.__condition:
+                self.__update_count += len(self.decoder.feed(data))
+                self.__condition.notify_all()
@@ -3,19 +3,18 @@ Provides a user interface object that can render to an HTML canvas.
 """
 
 # standard libraries
-import binascii
+import asyncio
 import collections
+import concurrent.futures
 import numbers
-import pickle
 import queue
 import threading
-import time
+import typing
 
 # third party libraries
 # None
 
 # local libraries
-import typing
 
 from . import CanvasItem
 from . import DrawingContext
@@ -119,6 +118,17 @@ def extract_canvas_item(widget):
     return None
 
 
+def coalesce_events(event_dicts: typing.Sequence[typing.Mapping]) -> typing.List[typing.Mapping]:
+    """Return the events with each run of consecutive mouse moves replaced by its last move."""
+    coalesced_event_dicts = list()
+    for event_dict in event_dicts:
+        if event_dict.get("type") == "mouse_move" and coalesced_event_dicts and coalesced_event_dicts[-1].get("type") == "mouse_move":
+            coalesced_event_dicts[-1] = event_dict
+        else:
+            coalesced_event_dicts.append(event_dict)
+    return coalesced_event_dicts
+
+
 ChildDescription = collections.namedtuple("ChildDescription", ["widget", "fill", "alignment"])
 
 
@@ -273,9 +283,9 @@ class CanvasWidgetBehavior(WidgetBehavior):
         self.__focusable = False
         self.__draw_mutex = threading.Lock()  # don't delete while drawing
         if self.width > 0:
-            self.canvas_item.sizing.set_fixed_width(self.width)
+            self.canvas_item.update_sizing(self.canvas_item.sizing.with_fixed_width(self.width))
         if self.height > 0:
-            self.canvas_item.sizing.set_fixed_height(self.height)
+            self.canvas_item.update_sizing(self.canvas_item.sizing.with_fixed_height(self.height))
 
     def close(self):
         with self.__draw_mutex:
@@ -370,9 +380,9 @@ class CanvasWidgetBehavior(WidgetBehavior):
         self.width = width
         self.height = height
         if self.width > 0:
-            self.canvas_item.sizing.set_fixed_width(self.width)
+            self.canvas_item.update_sizing(self.canvas_item.sizing.with_fixed_width(self.width))
         if self.height > 0:
-            self.canvas_item.sizing.set_fixed_height(self.height)
+            self.canvas_item.update_sizing(self.canvas_item.sizing.with_fixed_height(self.height))
         if callable(self.on_size_changed):
             self.on_size_changed(self.width, self.height)
 
@@ -483,45 +493,92 @@ class CanvasUserInterface(UserInterface.UserInterface):
         self.__draw_fn = draw_fn
         self.__get_font_metrics_fn = get_font_metrics_fn
         self.__done = False
+        self.__loop = None  # type: typing.Optional[asyncio.AbstractEventLoop]
+        self.__done_event = None  # type: typing.Optional[asyncio.Event]
         self.__document_windows = list()
+        self.__keyboard_modifiers = CanvasItem.KeyboardModifiers()  # events carry no modifiers; share one instance
 
     def close(self):
         self.__done = True
+        loop = self.__loop
+        if loop:
+            loop.call_soon_threadsafe(self.__done_event.set)
 
     def run(self, event_queue):
         """Run the Python event loop.
 
-        Wait for messages to arrive on event_queue and process them.
+        Wait for messages to arrive on event_queue and process them until a quit message arrives or close is called.
+        See run_async.
         """
-        start = time.time()
-        while not self.__done and time.time() - start < 1000.0:
-            try:
-                event_dict = event_queue.get(timeout=1/50.0)
-                event_type = event_dict.get("type")
-                document_window = self.__document_windows[0] if len(self.__document_windows) > 0 else None
-                root_widget = document_window.root_widget if document_window else None
-
-                if event_type == "quit":
-                    return 0
-
-                if root_widget:
-                    if event_type == "mouse_enter":
-                        root_widget._behavior.handle_mouse_entered()
-                    elif event_type == "mouse_leave":
-                        root_widget._behavior.handle_mouse_exited()
-                    elif event_type == "mouse_down":
-                        root_widget._behavior.handle_mouse_pressed(event_dict.get("x", 0.0), event_dict.get("y", 0.0), CanvasItem.KeyboardModifiers())
-                    elif event_type == "mouse_up":
-                        root_widget._behavior.handle_mouse_released(event_dict.get("x", 0.0), event_dict.get("y", 0.0), CanvasItem.KeyboardModifiers())
-                    elif event_type == "mouse_move":
-                        root_widget._behavior.handle_mouse_position_changed(event_dict.get("x", 0.0), event_dict.get("y", 0.0), CanvasItem.KeyboardModifiers())
-                    elif event_type == "click":
-                        root_widget._behavior.handle_mouse_clicked(event_dict.get("x", 0.0), event_dict.get("y", 0.0), CanvasItem.KeyboardModifiers())
-                    elif event_type == "double_click":
-                        root_widget._behavior.handle_mouse_double_clicked(event_dict.get("x", 0.0), event_dict.get("y", 0.0), CanvasItem.KeyboardModifiers())
-                event_queue.task_done()
-            except queue.Empty as e:
-                pass
+        return asyncio.run(self.run_async(event_queue))
+
+    async def run_async(self, event_queue, *, periodic_interval: float = 1 / 50.0):
+        """Run the event loop as a coroutine.
+
+        Events are awaited on event_queue, which may be an asyncio.Queue or a thread safe queue.Queue (which is read
+        on a helper thread). Events which are available together are handled together, with consecutive mouse moves
+        coalesced into the last one. Window periodic calls are made every periodic_interval seconds on a separate task,
+        independent of the number of events.
+
+        Returns 0 when a quit message arrives or close is called.
+        """
+        loop = asyncio.get_running_loop()
+        self.__loop = loop
+        self.__done_event = asyncio.Event()
+        if self.__done:
+            self.__done_event.set()
+        periodic_task = loop.create_task(self.__run_periodic(periodic_interval))
+        executor = None if isinstance(event_queue, asyncio.Queue) else concurrent.futures.ThreadPoolExecutor(1)
+        done_task = loop.create_task(self.__done_event.wait())
+        try:
+            while not self.__done_event.is_set():
+                if executor:
+                    get_future = loop.run_in_executor(executor, self.__get_event, event_queue)
+                else:
+                    get_future = loop.create_task(event_queue.get())
+                await asyncio.wait({get_future, done_task}, return_when=asyncio.FIRST_COMPLETED)
+                if not get_future.done():
+                    get_future.cancel()
+                    break
+                event_dict = get_future.result()
+                if event_dict is None:
+                    continue
+                event_dicts = [event_dict]
+                while True:
+                    try:
+                        event_dicts.append(event_queue.get_nowait())
+                    except (queue.Empty, asyncio.QueueEmpty):
+                        break
+                for event_dict in coalesce_events(event_dicts):
+                    if event_dict.get("type") == "quit":
+                        return 0
+                    try:
+                        self.__handle_event(event_dict)
+                    except Exception as e:
+                        import traceback
+                        traceback.print_exc()
+                for _ in event_dicts:
+                    event_queue.task_done()
+            return 0
+        finally:
+            self.__done = True
+            done_task.cancel()
+            periodic_task.cancel()
+            if executor:
+                executor.shutdown(wait=False)
+            self.__loop = None
+
+    def __get_event(self, event_queue: queue.Queue) -> typing.Optional[typing.Mapping]:
+        # called on the executor thread. wake up regularly so that the thread ends soon after the loop is done.
+        try:
+            return event_queue.get(timeout=0.1) if not self.__done else None
+        except queue.Empty:
+            return None
+
+    async def __run_periodic(self, periodic_interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
             try:
                 for document_window in self.__document_windows:
                     document_window.periodic()
@@ -529,6 +586,33 @@ class CanvasUserInterface(UserInterface.UserInterface):
                 import traceback
                 traceback.print_exc()
                 traceback.print_stack()
+            # keep a fixed cadence; skip ticks missed while busy rather than running them back to back.
+            next_time += periodic_interval
+            now = loop.time()
+            if next_time < now:
+                next_time = now
+            await asyncio.sleep(next_time - now)
+
+    def __handle_event(self, event_dict: typing.Mapping) -> None:
+        event_type = event_dict.get("type")
+        document_window = self.__document_windows[0] if len(self.__document_windows) > 0 else None
+        root_widget = document_window.root_widget if document_window else None
+        if root_widget:
+            modifiers = self.__keyboard_modifiers
+            if event_type == "mouse_enter":
+                root_widget._behavior.handle_mouse_entered()
+            elif event_type == "mouse_leave":
+                root_widget._behavior.handle_mouse_exited()
+            elif event_type == "mouse_down":
+                root_widget._behavior.handle_mouse_pressed(event_dict.get("x", 0.0), event_dict.get("y", 0.0), modifiers)
+            elif event_type == "mouse_up":
+                root_widget._behavior.handle_mouse_released(event_dict.get("x", 0.0), event_dict.get("y", 0.0), modifiers)
+            elif event_type == "mouse_move":
+                root_widget._behavior.handle_mouse_position_changed(event_dict.get("x", 0.0), event_dict.get("y", 0.0), modifiers)
+            elif event_type == "click":
+                root_widget._behavior.handle_mouse_clicked(event_dict.get("x", 0.0), event_dict.get("y", 0.0), modifiers)
+            elif event_type == "double_click":
+                root_widget._behavior.handle_mouse_double_clicked(event_dict.get("x", 0.0), event_dict.get("y", 0.0), modifiers)
 
     def _draw(self, drawing_context):
         """Render the drawing context.
@@ -583,6 +667,9 @@ class CanvasUserInterface(UserInterface.UserInterface):
     def create_tab_widget(self, properties=None):
         raise NotImplementedError()
 
+    def create_group_widget(self, properties=None):
+        raise NotImplementedError()
+
     def create_stack_widget(self, properties=None):
         raise NotImplementedError()
 
@@ -663,11 +750,11 @@ class CanvasUserInterface(UserInterface.UserInterface):
     def get_persistent_object(self, key, default_value=None):
         key = "/".join([self.persistence_root, key])
         value = self.get_persistent_string(key)
-        return pickle.loads(binascii.unhexlify(value.encode("utf-8"))) if value else default_value
+        return UserInterface.decode_persistent_object(value) if value else default_value
 
     def set_persistent_object(self, key, value):
         key = "/".join([self.persistence_root, key])
-        self.set_persistent_string(key, binascii.hexlify(pickle.dumps(value, 0)).decode("utf-8"))
+        self.set_persistent_string(key, UserInterface.encode_persistent_object(value))
 
     def remove_persistent_key(self, key):
         raise NotImplementedError()
@@ -703,6 +790,9 @@ class CanvasUserInterface(UserInterface.UserInterface):
     def get_tolerance(self, tolerance_type: UserInterface.ToleranceType) -> float:
         return 5
 
+    def get_qt_version(self) -> str:
+        return "CANVAS"
+
     def create_context_menu(self, document_window):
         raise NotImplementedError()
 
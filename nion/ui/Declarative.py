@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 # standard libraries
+import functools
 import gettext
 import re
 import typing
 
 # local libraries
-from nion.ui import Dialog
+from nion.ui import Startup
 from nion.ui import UserInterface
 from nion.ui import Window
 from nion.ui import Widgets
@@ -18,6 +19,9 @@ from nion.utils import Selection
 if typing.TYPE_CHECKING:
     from nion.ui import Application
 
+# dialogs are only needed for modeless dialog descriptions.
+Dialog = Startup.lazy_import("nion.ui.Dialog")
+
 
 UIDescription = typing.Dict  # when napolean works: typing.NewType("UIDescription", typing.Dict)
 UIResources = typing.Dict  # when napolean works: typing.NewType("UIResources", typing.Dict)
@@ -221,7 +225,7 @@ class DeclarativeUI:
         """
         return {"type": "tab", "label": label, "content": content}
 
-    def create_tabs(self, *tabs: UIDescription, name: UIIdentifier=None, current_index: UIIdentifier=None, on_current_index_changed: UICallableIdentifier=None, **kwargs) -> UIDescription:
+    def create_tabs(self, *tabs: UIDescription, name: UIIdentifier=None, current_index: UIIdentifier=None, on_current_index_changed: UICallableIdentifier=None, lazy: bool=None, **kwargs) -> UIDescription:
         """Create a tabs UI description with children, the current index and optional changed event.
 
         The children must be tabs created by :py:meth:`create_tab`.
@@ -231,6 +235,10 @@ class DeclarativeUI:
         The on_current_index_changed callback reference takes ``widget`` and ``current_index`` parameters. The type
         signature in the handler should be ``typing.Callable[[UIWidget, int], None]``.
 
+        If lazy is True, the content of each tab is constructed (and its bindings connected) when the tab is first
+        shown rather than when the tabs are constructed. Named widgets within a tab are not available in the handler
+        until the tab has been shown.
+
         Args:
             children: child tabs
 
@@ -238,6 +246,7 @@ class DeclarativeUI:
             name: handler property in which to store widget (optional)
             current_index: current index handler reference (bindable, optional)
             on_current_index_changed: callback when current index changes (optional)
+            lazy: construct tab content on first show (optional)
 
         Returns:
             a UI description of the tabs
@@ -253,10 +262,12 @@ class DeclarativeUI:
             d["current_index"] = current_index
         if on_current_index_changed is not None:
             d["on_current_index_changed"] = on_current_index_changed
+        if lazy:
+            d["lazy"] = True
         self.__process_common_properties(d, **kwargs)
         return d
 
-    def create_stack(self, *children: UIDescription, items: UIIdentifier=None, item_component_id: str=None, name: UIIdentifier=None, current_index: UIIdentifier=None, on_current_index_changed: UICallableIdentifier=None, **kwargs) -> UIDescription:
+    def create_stack(self, *children: UIDescription, items: UIIdentifier=None, item_component_id: str=None, name: UIIdentifier=None, current_index: UIIdentifier=None, on_current_index_changed: UICallableIdentifier=None, lazy: bool=None, **kwargs) -> UIDescription:
         """Create a stack UI description with children or dynamic items, the current index and optional changed event.
 
         The children can be passed as parameters or constructed from an observable list specified by `items` and
@@ -274,6 +285,9 @@ class DeclarativeUI:
         The on_current_index_changed callback reference takes ``widget`` and ``current_index`` parameters. The type
         signature in the handler should be ``typing.Callable[[UIWidget, int], None]``.
 
+        If lazy is True, each child passed as a parameter is constructed (and its bindings connected) when it is first
+        shown rather than when the stack is constructed. Children constructed from `items` are not affected.
+
         Args:
             children: stack items
 
@@ -283,6 +297,7 @@ class DeclarativeUI:
             name: handler property in which to store widget (optional)
             current_index: current index handler reference (bindable, optional)
             on_current_index_changed: callback when current index changes (optional)
+            lazy: construct children on first show (optional)
 
         Returns:
             a UI description of the stack
@@ -302,6 +317,8 @@ class DeclarativeUI:
             d["current_index"] = current_index
         if on_current_index_changed is not None:
             d["on_current_index_changed"] = on_current_index_changed
+        if lazy:
+            d["lazy"] = True
         self.__process_common_properties(d, **kwargs)
         return d
 
@@ -841,31 +858,70 @@ def connect_name(widget, d, handler):
         setattr(handler, name, widget)
 
 
+class BindingExpression:
+    """A parsed binding expression of the form '@binding(a.b.c, converter=converter_name)'.
+
+    The property path is relative to the handler. The converter, if any, is a property of the handler.
+    """
+
+    def __init__(self, property_path: typing.Sequence[str], converter_name: typing.Optional[str]):
+        self.property_path = tuple(property_path)
+        self.converter_name = converter_name
+
+    @property
+    def property_name(self) -> str:
+        return self.property_path[-1]
+
+    def resolve_source(self, handler):
+        source = handler
+        for p in self.property_path[:-1]:
+            source = getattr(source, p)
+        return source
+
+    def resolve_converter(self, handler):
+        return getattr(handler, self.converter_name) if self.converter_name else None
+
+
+_binding_re = re.compile(r"^@binding\((.+)\)$")
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_binding_expression(v: str) -> typing.Optional[BindingExpression]:
+    m = _binding_re.match(v)
+    if m:
+        parts = [p.strip() for p in m.group(1).split(',')]
+        converter_name = None
+        for part in parts:
+            if part.startswith("converter="):
+                converter_name = part[len("converter="):]
+        return BindingExpression([p.strip() for p in parts[0].split('.')], converter_name)
+    return None
+
+
+def parse_binding_expression(v) -> typing.Optional[BindingExpression]:
+    """Return the parsed binding expression if v is a binding expression string; otherwise None.
+
+    Parsed expressions are cached so that repeated construction of the same description does not re-parse.
+    """
+    return _parse_binding_expression(v) if isinstance(v, str) and v else None
+
+
 def connect_string_value(widget, d, handler, property, finishes):
     """Connects a value in the property, but also allows binding.
 
     A value means the value for the property is directly contained in the string.
     """
     v = d.get(property)
-    m = re.match("^@binding\((.+)\)$", v if v else "")
-    # print(f"{v}, {m}, {m.group(1) if m else 'NA'}")
-    if m:
-        b = m.group(1)
-        parts = [p.strip() for p in b.split(',')]
+    binding_expression = parse_binding_expression(v)
+    if binding_expression:
         def finish_binding():
-            handler_property_path = parts[0].split('.')
-            source = handler
-            for p in handler_property_path[:-1]:
-                source = getattr(source, p.strip())
-            converter = None
-            for part in parts:
-                if part.startswith("converter="):
-                    converter = getattr(handler, part[len("converter="):])
+            source = binding_expression.resolve_source(handler)
+            converter = binding_expression.resolve_converter(handler)
             if hasattr(source, "property_changed_event"):
-                binding = Binding.PropertyBinding(source, handler_property_path[-1].strip(), converter=converter)
+                binding = Binding.PropertyBinding(source, binding_expression.property_name, converter=converter)
                 getattr(widget, "bind_" + property)(binding)
             else:
-                setattr(widget, property, getattr(source, handler_property_path[-1].strip()))
+                setattr(widget, property, getattr(source, binding_expression.property_name))
         finishes.append(finish_binding)
     else:
         setattr(widget, property, v)
@@ -908,34 +964,24 @@ def connect_reference_value(widget, d, handler, property, finishes, binding_name
     """
     binding_name = binding_name if binding_name else property
     v = d.get(property)
-    m = re.match("^@binding\((.+)\)$", v if v else "")
-    # print(f"{v}, {m}, {m.group(1) if m else 'NA'}")
-    if m:
-        b = m.group(1)
-        parts = [p.strip() for p in b.split(',')]
+    binding_expression = parse_binding_expression(v)
+    if binding_expression:
 
         # finish binding is called after the window has been constructed using the 'finishes' list.
         def finish_binding():
-            handler_property_path = parts[0].split('.')
-            source = handler
-            for p in handler_property_path[:-1]:
-                source = getattr(source, p.strip())
-            converter = None
-            # check if any of the parts has a converter.
-            for part in parts:
-                if part.startswith("converter="):
-                    converter = getattr(handler, part[len("converter="):])
+            source = binding_expression.resolve_source(handler)
+            converter = binding_expression.resolve_converter(handler)
             # give the handler a chance to make object conversions. this is useful if the objects
             # in the handler are stored in a proxy format or something similar.
             if getattr(handler, "get_object_converter", None):
                 converter = handler.get_object_converter(converter)
             # configure the binding if the source and widget meet the criteria.
             if hasattr(source, "property_changed_event") and hasattr(widget, "bind_" + binding_name):
-                binding = Binding.PropertyBinding(source, handler_property_path[-1].strip(), converter=converter)
+                binding = Binding.PropertyBinding(source, binding_expression.property_name, converter=converter)
                 getattr(widget, "bind_" + binding_name)(binding)
             # otherwise just set the value.
             else:
-                setattr(widget, binding_name, getattr(source, handler_property_path[-1].strip()))
+                setattr(widget, binding_name, getattr(source, binding_expression.property_name))
 
         finishes.append(finish_binding)
     elif v is not None:
@@ -1076,6 +1122,15 @@ def connect_items(ui, window, container_widget, handler, items, item_component_i
     # assumption so that sub-components have a path by which to get closed.
     assert handler._closer
 
+    # the plan of the component, compiled for the first item and reused for the others while the component resource
+    # is the same object.
+    component_plans = list()
+
+    def get_component_plan(component) -> ConstructionPlan:
+        if not component_plans or component_plans[0][0] is not component:
+            component_plans[:] = [(component, compile_description(component))]
+        return component_plans[0][1]
+
     def insert_item(index, item):
         item_widget = None
         component = handler.resources.get(item_component_id)
@@ -1083,7 +1138,7 @@ def connect_items(ui, window, container_widget, handler, items, item_component_i
             assert component.get("type") == "component"
             # the component will have a content portion, which is a widget description. component events are
             # ignored in this case.
-            content = component.get("content")
+            content = get_component_plan(component).content
             component_id = component.get("component_id")
             assert component_id == item_component_id
             assert callable(getattr(handler, "create_handler", None))
@@ -1123,6 +1178,62 @@ def connect_items(ui, window, container_widget, handler, items, item_component_i
     handler._closer.push_closeable(container.item_removed_event.listen(row_item_removed))
 
 
+class LazyPages:
+    """Construct the pages of a tab or stack widget when they are first shown.
+
+    Each page is represented by an empty column until it is first shown. The page content is then constructed into
+    the column and its bindings are connected. Constructed pages are kept when hidden again.
+
+    No page is constructed until start is called, which constructs the page at the current index; construction calls
+    it once the current index of the widget is connected. Pages are constructed as they become current after that.
+    """
+
+    def __init__(self, ui, window, widget, handler, page_plans: typing.Sequence[ConstructionPlan]):
+        self.__ui = ui
+        self.__window = window
+        self.__widget = widget
+        self.__handler = handler
+        self.__page_plans = list(page_plans)
+        self.__constructed = [False] * len(self.__page_plans)
+        self.__started = False
+        self.pages = [ui.create_column_widget() for _ in self.__page_plans]
+        # the listener lives as long as the widget.
+        widget.current_index_changed_event.listen(self.__current_index_changed, owner=widget)
+
+    def __current_index_changed(self, index: int) -> None:
+        if self.__started and self.__widget._behavior:  # widget may have been closed
+            self.construct_page(index)
+
+    def start(self) -> None:
+        self.__started = True
+        if self.__widget._behavior:
+            # the first page is shown when the current index has not been set.
+            current_index = self.__widget.current_index
+            self.construct_page(current_index if current_index is not None and current_index >= 0 else 0)
+
+    def is_constructed(self, index: int) -> bool:
+        return self.__constructed[index]
+
+    def construct_page(self, index: int, finishes: typing.List[typing.Callable[[], None]] = None) -> None:
+        if 0 <= index < len(self.__page_plans) and not self.__constructed[index]:
+            self.__constructed[index] = True
+            page_finishes = finishes if finishes is not None else list()
+            self.pages[index].add(construct(self.__ui, self.__window, self.__page_plans[index], self.__handler, page_finishes))
+            if finishes is None:
+                for finish in page_finishes:
+                    finish()
+
+
+def start_lazy_pages(lazy_pages: typing.Optional[LazyPages], finishes) -> None:
+    # start after the current index bindings, which are connected in the finishes, so that the page at the initial
+    # current index is the one constructed.
+    if lazy_pages:
+        if finishes is not None:
+            finishes.append(lazy_pages.start)
+        else:
+            lazy_pages.start()
+
+
 def construct_sizing_properties(d: typing.Mapping) -> typing.Dict:
     properties = dict()
     for k in ("width", "min_width", "max_width", "height", "min_height", "max_height"):
@@ -1136,17 +1247,68 @@ def construct_sizing_properties(d: typing.Mapping) -> typing.Dict:
     return properties
 
 
+class ConstructionPlan:
+    """A compiled declarative description which can be constructed repeatedly.
+
+    The plan holds the original description along with the sizing properties and the plans for the children, content,
+    and tabs precomputed; the plans of components it instantiates are compiled on first use and kept while the
+    component resource is the same object. Construction still interprets the remaining keys of each description for
+    each widget, so a plan saves the walk of the description tree, not the cost of making widgets and bindings. Binding
+    expressions within the description are parsed (and cached) on first use.
+
+    Plans are obtained using `compile_description`. Constructing from a plan is equivalent to constructing from the
+    description itself.
+    """
+
+    def __init__(self, d: typing.Mapping):
+        self.d = d
+        self.d_type = d.get("type")
+        self.__properties = construct_sizing_properties(d)
+        self.children = [compile_description(child) for child in d.get("children", list())]
+        content = d.get("content")
+        self.content = compile_description(content) if isinstance(content, typing.Mapping) else None
+        self.tabs = [(tab["label"], compile_description(tab["content"])) for tab in d.get("tabs", list())]
+        self.__component_plan = None  # type: typing.Optional[typing.Tuple[typing.Mapping, ConstructionPlan]]
+
+    @property
+    def properties(self) -> typing.Dict:
+        # return a copy so the caller can adjust the properties
+        return dict(self.__properties)
+
+    def get_component_plan(self, component: typing.Mapping) -> "ConstructionPlan":
+        """Return the plan of the component instantiated by this plan, compiled once while it is the same object."""
+        component_plan = self.__component_plan
+        if component_plan is None or component_plan[0] is not component:
+            component_plan = component, compile_description(component)
+            self.__component_plan = component_plan
+        return component_plan[1]
+
+
+def compile_description(d: typing.Union[typing.Mapping, ConstructionPlan]) -> ConstructionPlan:
+    """Compile the description into a construction plan.
+
+    Keep the plan to construct the description repeatedly; the description must not be changed while the plan is in
+    use. Constructing from a description (rather than a plan) compiles a new plan each time, so changes to the
+    description are always reflected.
+    """
+    if isinstance(d, ConstructionPlan):
+        return d
+    return ConstructionPlan(d)
+
+
 class DeclarativeConstructor:
     def construct(self, d_type: str, ui: UserInterface.UserInterface, window, d: typing.Mapping, handler, finishes: typing.Sequence[typing.Callable[[], None]] = None): ...
 
 
 def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.Mapping, handler, finishes: typing.Sequence[typing.Callable[[], None]] = None):
-    d_type = d.get("type")
+    plan = compile_description(d)
+    d = plan.d
+    d_type = plan.d_type
     if d_type == "modeless_dialog":
         title = d.get("title", _("Untitled"))
         margin = d.get("margin")
         persistent_id = d.get("persistent_id")
-        content = d.get("content")
+        content = plan.content
         resources = d.get("resources", dict())
         for k, v in resources.items():
             resources[k] = v
@@ -1181,21 +1343,21 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
             handler.init_handler()
         return dialog
     elif d_type == "column":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         column_widget = ui.create_column_widget(properties=properties)
         spacing = d.get("spacing")
         margin = d.get("margin")
         items = d.get("items")
         item_component_id = d.get("item_component_id")
-        children = d.get("children", list())
+        children = plan.children
         assert not items or not children
         first = True
         for child in children:
             if not first and spacing is not None:
                 column_widget.add_spacing(spacing)
-            if child.get("type") == "spacing":
-                column_widget.add_spacing(child.get("size", 0))
-            elif child.get("type") == "stretch":
+            if child.d_type == "spacing":
+                column_widget.add_spacing(child.d.get("size", 0))
+            elif child.d_type == "stretch":
                 column_widget.add_stretch()
             else:
                 column_widget.add(construct(ui, window, child, handler, finishes))
@@ -1208,21 +1370,21 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
             connect_attributes(column_widget, d, handler, finishes)
         return construct_margin(ui, column_widget, margin)
     elif d_type == "row":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         row_widget = ui.create_row_widget(properties=properties)
         spacing = d.get("spacing")
         margin = d.get("margin")
         items = d.get("items")
         item_component_id = d.get("item_component_id")
-        children = d.get("children", list())
+        children = plan.children
         assert not items or not children
         first = True
         for child in children:
             if not first and spacing is not None:
                 row_widget.add_spacing(spacing)
-            if child.get("type") == "spacing":
-                row_widget.add_spacing(child.get("size", 0))
-            elif child.get("type") == "stretch":
+            if child.d_type == "spacing":
+                row_widget.add_spacing(child.d.get("size", 0))
+            elif child.d_type == "stretch":
                 row_widget.add_stretch()
             else:
                 row_widget.add(construct(ui, window, child, handler, finishes))
@@ -1235,7 +1397,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
             connect_attributes(row_widget, d, handler, finishes)
         return construct_margin(ui, row_widget, margin)
     elif d_type == "text_label":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_label_widget(None, properties)
         if handler:
             connect_string_value(widget, d, handler, "text", finishes)
@@ -1245,7 +1407,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "line_edit":
         editable = d.get("editable", None)
         clear_button_enabled = d.get("clear_button_enabled", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_line_edit_widget(properties)
         if editable is not None:
             widget.editable = editable
@@ -1265,7 +1427,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "text_edit":
         editable = d.get("editable", None)
         clear_button_enabled = d.get("clear_button_enabled", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_text_edit_widget(properties)
         if editable is not None:
             widget.editable = editable
@@ -1283,7 +1445,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "push_button":
         text = d.get("text", None)
         icon_identifier = d.get("icon", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_push_button_widget(text, properties)
         if handler:
             if icon_identifier:
@@ -1296,7 +1458,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
         # TODO: 'checked' and 'check_state' are bindings, not values
         text = d.get("text", None)
         tristate = d.get("tristate", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_check_box_widget(text, properties=properties)
         if tristate is not None:
             widget.tristate = tristate
@@ -1310,7 +1472,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
         return widget
     elif d_type == "combo_box":
         items = d.get("items", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_combo_box_widget(items=items, properties=properties)
         if handler:
             connect_name(widget, d, handler)
@@ -1323,7 +1485,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "radio_button":
         text = d.get("text", None)
         value = d.get("value", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_radio_button_widget(text, properties)
         widget.value = value
         if handler:
@@ -1334,7 +1496,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "slider":
         minimum = d.get("minimum", 0)
         maximum = d.get("maximum", 100)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_slider_widget(properties)
         widget.minimum = minimum
         widget.maximum = maximum
@@ -1350,7 +1512,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
     elif d_type == "progress_bar":
         minimum = d.get("minimum", 0)
         maximum = d.get("maximum", 100)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         properties.setdefault("height", 18)
         properties.setdefault("width", 64)
         widget = ui.create_progress_bar_widget(properties=properties)
@@ -1362,21 +1524,34 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
             connect_attributes(widget, d, handler, finishes)
         return widget
     elif d_type == "tabs":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_tab_widget(properties)
-        for tab in d.get("tabs", list()):
-            widget.add(construct(ui, window, tab["content"], handler, finishes), tab["label"])
+        lazy_pages = None
+        if d.get("lazy", False):
+            lazy_pages = LazyPages(ui, window, widget, handler, [content for label, content in plan.tabs])
+            for (label, content), page in zip(plan.tabs, lazy_pages.pages):
+                widget.add(page, label)
+        else:
+            for label, content in plan.tabs:
+                widget.add(construct(ui, window, content, handler, finishes), label)
         if handler:
             connect_name(widget, d, handler)
             connect_reference_value(widget, d, handler, "current_index", finishes, value_type=int)
             connect_event(widget, widget, d, handler, "on_current_index_changed", ["current_index"])
             connect_attributes(widget, d, handler, finishes)
+        start_lazy_pages(lazy_pages, finishes)
         return widget
     elif d_type == "stack":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_stack_widget(properties)
-        for child in d.get("children", list()):
-            widget.add(construct(ui, window, child, handler, finishes))
+        lazy_pages = None
+        if d.get("lazy", False):
+            lazy_pages = LazyPages(ui, window, widget, handler, plan.children)
+            for page in lazy_pages.pages:
+                widget.add(page)
+        else:
+            for child in plan.children:
+                widget.add(construct(ui, window, child, handler, finishes))
         items = d.get("items")
         item_component_id = d.get("item_component_id")
         if items and item_component_id:
@@ -1386,22 +1561,23 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
             connect_reference_value(widget, d, handler, "current_index", finishes, value_type=int)
             connect_event(widget, widget, d, handler, "on_current_index_changed", ["current_index"])
             connect_attributes(widget, d, handler, finishes)
+        start_lazy_pages(lazy_pages, finishes)
         return widget
     elif d_type == "scroll_area":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_scroll_area_widget(properties)
         widget.set_scrollbar_policies("needed", "needed")
-        content = d.get("content")
+        content = plan.content
         widget.content = construct(ui, window, content, handler, finishes)
         if handler:
             connect_name(widget, d, handler)
             connect_attributes(widget, d, handler, finishes)
         return widget
     elif d_type == "group":
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = ui.create_group_widget(properties)
         margin = d.get("margin")
-        content = d.get("content")
+        content = plan.content
         outer_row = ui.create_row_widget()
         outer_column = ui.create_column_widget()
         inner_content = construct(ui, window, content, handler, finishes)
@@ -1421,7 +1597,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
         return widget
     elif d_type == "list_box":
         items = d.get("items", None)
-        properties = construct_sizing_properties(d)
+        properties = plan.properties
         widget = Widgets.ListWidget(ui, Widgets.StringListCanvasItemDelegate(lambda x: x), items=items, selection_style=Selection.Style.single_or_none, border_color="#888", properties=properties)
         if handler:
             connect_name(widget, d, handler)
@@ -1440,7 +1616,7 @@ def construct(ui: UserInterface.UserInterface, window: Window.Window, d: typing.
         if component:
             assert component.get("type") == "component"
             # the component will have a content portion, which is a widget description, and a list of events.
-            content = component.get("content")
+            content = plan.get_component_plan(component).content
             component_id = component.get("component_id")
             events = component.get("events", list())
             # create the handler first, but don't initialize it.
@@ -0,0 +1,210 @@
+"""
+Replay recorded drawing command streams against drawing context backends.
+
+Record command streams by running an application with the environment variable NIONUI_RECORD_DRAWING set to a file
+path; the streams are saved when the application exits. Time the replay of each backend, and compare it with the
+baselines of this machine, with the benchmark runner:
+
+    python -m nion.ui.Benchmarks --recording recording.pickle --backend svg --backend js --baseline benchmarks.json
+
+Find out where the time goes with:
+
+    python -m nion.ui.DrawingBenchmark recording.pickle --backend svg --backend js
+
+which reports the output size for each backend and the count, time and allocated bytes for each opcode.
+"""
+
+# standard libraries
+import argparse
+import sys
+import time
+import tracemalloc
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import DrawingContext
+from nion.ui import Startup
+from nion.utils import Geometry
+
+
+BackendFactory = typing.Callable[[int, int], DrawingContext.DrawingContextBackend]
+
+
+class OpcodeStatistics:
+
+    def __init__(self, name: str, count: int = 0, elapsed: float = 0.0, allocated: int = 0):
+        self.name = name
+        self.count = count
+        self.elapsed = elapsed
+        self.allocated = allocated
+
+
+class BackendStatistics:
+    """The per opcode statistics of one backend over a list of command streams.
+
+    Opcode elapsed and allocated are only measured for backends which execute commands individually; allocated is the
+    growth in traced memory while executing the command, using the peak where available (Python 3.9 and later).
+    """
+
+    def __init__(self, backend_name: str):
+        self.backend_name = backend_name
+        self.stream_count = 0
+        self.command_count = 0
+        self.output_size = 0
+        self.opcodes = dict()  # type: typing.Dict[str, OpcodeStatistics]
+
+    def report(self, file: typing.TextIO = None) -> None:
+        """Write the statistics to file (stdout by default), slowest opcodes first."""
+        file = file if file is not None else sys.stdout
+        print(f"{self.backend_name}: {self.stream_count} streams, {self.command_count} commands, "
+              f"output {self.output_size} bytes", file=file)
+        print(f"{'count':>9} {'total ms':>9} {'us/cmd':>9} {'alloc KB':>9}  opcode", file=file)
+        for opcode in sorted(self.opcodes.values(), key=lambda o: (-o.elapsed, -o.count, o.name)):
+            per_command = opcode.elapsed / opcode.count * 1E6 if opcode.count else 0.0
+            print(f"{opcode.count:9d} {opcode.elapsed * 1000:9.2f} {per_command:9.2f} {opcode.allocated / 1024:9.1f}  "
+                  f"{opcode.name}", file=file)
+
+
+class RGBAImageBackend(DrawingContext.DrawingContextBackend):
+    """Render the commands to an RGBA image using the create_rgba_image method of a user interface.
+
+    The user interface renders the commands as a whole, so opcode timing is not available.
+    """
+
+    executes_commands_individually = False
+
+    def __init__(self, ui, width: int, height: int):
+        self.__ui = ui
+        self.__width = width
+        self.__height = height
+
+    def render(self, commands: typing.Sequence[typing.Sequence]) -> typing.Any:
+        drawing_context = DrawingContext.DrawingContext()
+        drawing_context.commands = list(commands)
+        return self.__ui.create_rgba_image(drawing_context, self.__width, self.__height)
+
+
+def make_svg_backend(width: int, height: int) -> DrawingContext.DrawingContextBackend:
+    return DrawingContext.SVGBackend(Geometry.IntSize(width=width, height=height),
+                                     Geometry.IntRect.from_tlbr(0, 0, height, width))
+
+
+def make_js_backend(width: int, height: int) -> DrawingContext.DrawingContextBackend:
+    return DrawingContext.JavaScriptBackend()
+
+
+def make_qt_backend_factory() -> BackendFactory:
+    """Return a factory for backends rendering with the Qt paint interpreter. Requires PyQt5 or PySide2."""
+    if Startup.has_module("PyQt5"):
+        import PyQt5.QtWidgets  # PyQtProxy uses PyQt5 if it is already imported, otherwise PySide2
+    from nion.ui import PyQtProxy
+    from nion.ui import QtUserInterface
+    if not PyQtProxy.QtWidgets.QApplication.instance():
+        PyQtProxy.app = PyQtProxy.QtWidgets.QApplication([])
+    stdout, stderr = sys.stdout, sys.stderr
+    proxy = PyQtProxy.PyQtProxy()
+    sys.stdout, sys.stderr = stdout, stderr  # the proxy redirects output to logging for the application
+    ui = QtUserInterface.QtUserInterface(proxy)
+    return lambda width, height: RGBAImageBackend(ui, width, height)
+
+
+backend_factories = {"svg": make_svg_backend, "js": make_js_backend}  # type: typing.Dict[str, BackendFactory]
+
+backend_names = sorted(backend_factories) + ["qt"]
+
+
+def get_backend_factory(backend_name: str) -> BackendFactory:
+    """Return the factory for the named backend (one of backend_names)."""
+    return make_qt_backend_factory() if backend_name == "qt" else backend_factories[backend_name]
+
+
+def make_replay_benchmark(backend_factory: BackendFactory,
+                          command_streams: typing.Sequence[DrawingContext.CommandStream]) -> typing.Callable[[], None]:
+    """Return a function rendering each of the command streams with a new backend, to time with Benchmarks."""
+
+    def fn():
+        for command_stream in command_streams:
+            backend = backend_factory(command_stream.width, command_stream.height)
+            backend.render(command_stream.commands)
+
+    return fn
+
+
+def profile_opcodes(backend_name: str, backend_factory: BackendFactory,
+                    command_streams: typing.Sequence[DrawingContext.CommandStream]) -> BackendStatistics:
+    """Render the command streams with backends made by backend_factory(width, height) and return the statistics.
+
+    Each stream is rendered with a new backend. The opcode time and allocations are measured in separate passes, so
+    that the allocation tracing does not distort the time. Backends which execute commands individually skip the layer
+    updates, as render does, so only the commands they execute are counted.
+    """
+    statistics = BackendStatistics(backend_name)
+    statistics.stream_count = len(command_streams)
+    executes_commands_individually = backend_factory(1, 1).executes_commands_individually
+
+    def get_commands(command_stream: DrawingContext.CommandStream) -> typing.Sequence[typing.Sequence]:
+        if executes_commands_individually:
+            return list(DrawingContext.iter_commands_without_layer_updates(command_stream.commands))
+        return command_stream.commands
+
+    for command_stream in command_streams:
+        commands = get_commands(command_stream)
+        statistics.command_count += len(commands)
+        for command in commands:
+            opcode = statistics.opcodes.setdefault(command[0], OpcodeStatistics(command[0]))
+            opcode.count += 1
+        backend = backend_factory(command_stream.width, command_stream.height)
+        statistics.output_size += backend.output_size(backend.render(command_stream.commands))
+
+    if executes_commands_individually:
+        opcodes = statistics.opcodes
+        perf_counter = time.perf_counter
+        for command_stream in command_streams:
+            backend = backend_factory(command_stream.width, command_stream.height)
+            backend.begin()
+            for command in get_commands(command_stream):
+                start = perf_counter()
+                backend.execute(command)
+                opcodes[command[0]].elapsed += perf_counter() - start
+            backend.end()
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            for command_stream in command_streams:
+                backend = backend_factory(command_stream.width, command_stream.height)
+                backend.begin()
+                for command in get_commands(command_stream):
+                    if reset_peak:
+                        reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    backend.execute(command)
+                    current, peak = tracemalloc.get_traced_memory()
+                    opcodes[command[0]].allocated += max((peak if reset_peak else current) - before, 0)
+                backend.end()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+    return statistics
+
+
+def main(argv: typing.Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report the time and allocations of each opcode of recorded drawing command streams.")
+    parser.add_argument("recording", help="command stream file recorded with NIONUI_RECORD_DRAWING")
+    parser.add_argument("--backend", action="append", choices=backend_names,
+                        help="backend to profile; may be repeated (default svg and js)")
+    args = parser.parse_args(argv)
+
+    command_streams = DrawingContext.load_command_streams(args.recording)
+    for backend_name in args.backend or ["svg", "js"]:
+        profile_opcodes(backend_name, get_backend_factory(backend_name), command_streams).report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,24 +9,28 @@
 import base64
 import collections
 from contextlib import contextmanager
-import copy
+import functools
 import io
 import logging
 import math
+import pickle
 import re
 import struct
 import sys
 import time
 import threading
 import typing
+import weakref
 import xml.sax.saxutils
 
 # third party libraries
-import imageio
 import numpy
 
 # local libraries
-# None
+from nion.ui import Startup
+
+# imageio is slow to import and only used to export images.
+imageio = Startup.lazy_import("imageio")
 
 # pylint: disable=star-args
 
@@ -87,6 +91,173 @@ def get_alpha_view(rgba_image, byteorder=None):
         return bytes[..., 0]  # A of ARGB
 
 
+Opcode = collections.namedtuple("Opcode", ["name", "code", "handler", "binary_format"])
+
+# the table of drawing commands, used to write binary_commands and to dispatch commands to backends. name is the
+# command name in DrawingContext.commands, code is the four character code in DrawingContext.binary_commands, handler
+# is the name of the DrawingContextBackend method which executes the command, and binary_format is the struct format
+# of the arguments following the code in binary_commands, where S is a utf-8 string written as its length followed by
+# the bytes padded to an int boundary. a leading byte order character applies to the code and the arguments.
+opcodes = (
+    Opcode("save", b"save", "save", ""),
+    Opcode("restore", b"rest", "restore", ""),
+    Opcode("begin_layer", b"bgly", "begin_layer", "iiffff"),
+    Opcode("end_layer", b"enly", "end_layer", "iiffff"),
+    Opcode("begin_layer_update", b"bglu", "begin_layer_update", "iiffff"),
+    Opcode("end_layer_update", b"enlu", "end_layer_update", "iiffff"),
+    Opcode("beginPath", b"bpth", "begin_path", ""),
+    Opcode("closePath", b"cpth", "close_path", ""),
+    Opcode("clip", b"clip", "clip_rect", "ffff"),
+    Opcode("translate", b"tran", "translate", "ff"),
+    Opcode("scale", b"scal", "scale", "ff"),
+    Opcode("rotate", b"rota", "rotate", "f"),
+    Opcode("moveTo", b"move", "move_to", "ff"),
+    Opcode("lineTo", b"line", "line_to", "ff"),
+    Opcode("rect", b"rect", "rect", "ffff"),
+    Opcode("arc", b"arc ", "arc", "fffffi"),
+    Opcode("arcTo", b"arct", "arc_to", "fffff"),
+    Opcode("cubicTo", b"cubc", "bezier_curve_to", "ffffff"),
+    Opcode("quadraticTo", b"quad", "quadratic_curve_to", "ffff"),
+    Opcode("image", b"imag", "draw_image", "iiiffff"),
+    Opcode("data", b"data", "draw_data", "iiiffffffi"),
+    Opcode("stroke", b"strk", "stroke", ""),
+    Opcode("sleep", b"slep", "sleep", "f"),
+    Opcode("latency", b"latn", "latency", "<d"),
+    Opcode("message", b"mesg", "message", "S"),
+    Opcode("timestamp", b"time", "timestamp", "S"),
+    Opcode("fill", b"fill", "fill", ""),
+    Opcode("fillText", b"text", "fill_text", "Sfff"),
+    Opcode("fillStyleGradient", b"flsg", "fill_style_gradient", "i"),
+    Opcode("fillStyle", b"flst", "fill_style", "S"),
+    Opcode("font", b"font", "font", "S"),
+    Opcode("textAlign", b"algn", "text_align", "S"),
+    Opcode("textBaseline", b"tbas", "text_baseline", "S"),
+    Opcode("strokeStyle", b"stst", "stroke_style", "S"),
+    Opcode("lineWidth", b"linw", "line_width", "f"),
+    Opcode("lineDash", b"ldsh", "line_dash", "f"),
+    Opcode("lineCap", b"lcap", "line_cap", "S"),
+    Opcode("lineJoin", b"lnjn", "line_join", "S"),
+    Opcode("gradient", b"grad", "gradient", "iffffff"),
+    Opcode("colorStop", b"grcs", "color_stop", "ifS"),
+    Opcode("statistics", b"stat", "statistics", "S"),
+)
+
+opcodes_by_name = {opcode.name: opcode for opcode in opcodes}
+opcodes_by_code = {opcode.code: opcode for opcode in opcodes}
+
+
+def _make_binary_packer(opcode: Opcode) -> typing.Callable[..., bytes]:
+    binary_format = opcode.binary_format
+    byte_order = str()
+    if binary_format[:1] in ("<", ">", "=", "!", "@"):
+        byte_order, binary_format = binary_format[0], binary_format[1:]
+    if "S" not in binary_format:
+        return functools.partial(struct.Struct(byte_order + "4s" + binary_format).pack, opcode.code)
+
+    def pack(*args) -> bytes:
+        struct_format = byte_order + "4s"
+        values = [opcode.code]
+        for format_char, arg in zip(binary_format, args):
+            if format_char == "S":
+                arg_encoded = arg.encode("utf-8")
+                struct_format += "i{}s0i".format(len(arg_encoded))
+                values.extend((len(arg_encoded), arg_encoded))
+            else:
+                struct_format += format_char
+                values.append(arg)
+        return struct.pack(struct_format, *values)
+
+    return pack
+
+
+_binary_packers = {opcode.name: _make_binary_packer(opcode) for opcode in opcodes}
+
+
+def pack_binary_command(name: str, *args) -> bytes:
+    """Return the binary command for the named command and its arguments, packed using the opcode table."""
+    return _binary_packers[name](*args)
+
+
+_image_id = 0
+_image_id_lock = threading.RLock()
+
+
+def _allocate_image_id() -> int:
+    global _image_id
+    with _image_id_lock:
+        _image_id += 1
+        return _image_id
+
+
+class ImageBufferRegistry:
+    """Stable image ids for arrays drawn repeatedly, so that backends can keep what they made from them.
+
+    draw_image and draw_data give an unregistered array a new image id each time it is drawn, so backends must treat
+    it as new. A registered array keeps its image id while it is registered; backends such as the Qt paint interpreter
+    cache the image wrapping it by id and reuse it in later frames instead of converting the array again.
+
+    Registrations are counted: each register must be balanced by a release, and the array keeps its id until the last
+    release. The registry only holds weak references, so an array which is no longer used is dropped from the registry
+    even if it was not released. Call changed after modifying a registered array in place, to give it a new id.
+    """
+
+    def __init__(self):
+        self.__entries = dict()  # type: typing.Dict[int, typing.List]  # id(array) -> [weakref, image_id, count]
+        self.__lock = threading.RLock()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return len(self.__entries)
+
+    def __remove_entry(self, key: int, array_ref: weakref.ref) -> None:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry and entry[0] is array_ref:
+                del self.__entries[key]
+
+    def __get_entry(self, array: numpy.ndarray) -> typing.Optional[typing.List]:
+        entry = self.__entries.get(id(array))
+        return entry if entry and entry[0]() is array else None
+
+    def register(self, array: numpy.ndarray) -> int:
+        """Register the array, or count another registration of it, and return its image id."""
+        with self.__lock:
+            entry = self.__get_entry(array)
+            if entry:
+                entry[2] += 1
+            else:
+                key = id(array)
+                array_ref = weakref.ref(array, lambda r: self.__remove_entry(key, r))
+                entry = [array_ref, _allocate_image_id(), 1]
+                self.__entries[key] = entry
+            return entry[1]
+
+    def release(self, array: numpy.ndarray) -> None:
+        with self.__lock:
+            entry = self.__get_entry(array)
+            if entry:
+                entry[2] -= 1
+                if entry[2] <= 0:
+                    del self.__entries[id(array)]
+
+    def changed(self, array: numpy.ndarray) -> None:
+        """Give the registered array a new image id after it has been modified in place."""
+        with self.__lock:
+            entry = self.__get_entry(array)
+            if entry:
+                entry[1] = _allocate_image_id()
+
+    def get_image_id(self, array: numpy.ndarray) -> int:
+        """Return the image id of a registered array, or a new image id for an unregistered array."""
+        with self.__lock:
+            entry = self.__get_entry(array)
+            return entry[1] if entry else _allocate_image_id()
+
+
+# the registry used by draw_image and draw_data.
+image_buffers = ImageBufferRegistry()
+
+
 class DrawingContext:
     """
         Path commands (begin_path, close_path, move_to, line_to, etc.) should not be intermixed
@@ -96,9 +267,6 @@ class DrawingContext:
     # TODO: stroke_fill
     # TODO: circle
 
-    __image_id = 0
-    __image_id_lock = threading.RLock()
-
     def __init__(self):
         self.commands = []
         self.binary_commands = bytearray()
@@ -124,350 +292,10 @@ class DrawingContext:
         self.images = dict()
 
     def to_js(self):
-        js = ""
-        for command in self.commands:
-            command_id = command[0]
-            command_args = command[1:]
-            if command_id == "save":
-                js += "ctx.save();"
-            elif command_id == "restore":
-                js += "ctx.restore();"
-            elif command_id == "beginPath":
-                js += "ctx.beginPath();"
-            elif command_id == "closePath":
-                js += "ctx.closePath();"
-            elif command_id == "clip":
-                js += "ctx.beginPath();"
-                js += "ctx.rect({0}, {1}, {2}, {3});".format(*command_args)
-                js += "ctx.clip();"
-            elif command_id == "translate":
-                js += "ctx.translate({0}, {1});".format(*command_args)
-            elif command_id == "scale":
-                js += "ctx.scale({0}, {1});".format(*command_args)
-            elif command_id == "rotate":
-                js += "ctx.rotate({0});".format(*command_args)
-            elif command_id == "moveTo":
-                js += "ctx.moveTo({0}, {1});".format(*command_args)
-            elif command_id == "lineTo":
-                js += "ctx.lineTo({0}, {1});".format(*command_args)
-            elif command_id == "rect":
-                js += "ctx.rect({0}, {1}, {2}, {3});".format(*command_args)
-            elif command_id == "arc":
-                x, y, r, sa, ea, ac = command_args
-                js += "ctx.arc({0}, {1}, {2}, {3}, {4}, {5});".format(x, y, r, sa, ea, "true" if ac else "false")
-            elif command_id == "arcTo":
-                x1, y1, x2, y2, r = command_args
-                js += "ctx.arcTo({0}, {1}, {2}, {3}, {4});".format(x1, y1, x2, y2, r)
-            elif command_id == "cubicTo":
-                x1, y1, x2, y2, x, y = command_args
-                js += "ctx.bezierCurveTo({0}, {1}, {2}, {3}, {4}, {5});".format(x1, y1, x2, y2, x, y)
-            elif command_id == "quadraticTo":
-                x1, y1, x, y = command_args
-                js += "ctx.quadraticCurveTo({0}, {1}, {2}, {3});".format(x1, y1, x, y)
-            elif command_id == "image":
-                w, h, image, image_id, a, b, c, d = command_args
-                js += "ctx.rect({0}, {1}, {2}, {3});".format(a, b, c, d)
-            elif command_id == "data":
-                w, h, data, data_id, a, b, c, d, low, high, color_table = command_args
-                js += "ctx.rect({0}, {1}, {2}, {3});".format(a, b, c, d)
-            elif command_id == "stroke":
-                js += "ctx.stroke();"
-            elif command_id == "sleep":
-                pass  # used for performance testing
-            elif command_id == "fill":
-                js += "ctx.fill();"
-            elif command_id == "fillText":
-                text, x, y, max_width = command_args
-                js += "ctx.fillText('{0}', {1}, {2}{3});".format(xml.sax.saxutils.escape(text), x, y, ", {0}".format(max_width) if max_width else "")
-            elif command_id == "fillStyleGradient":
-                command_var = command_args[0]
-                js += "ctx.fillStyle = {0};".format("grad" + str(command_var))
-            elif command_id == "fillStyle":
-                js += "ctx.fillStyle = '{0}';".format(*command_args)
-            elif command_id == "font":
-                js += "ctx.font = '{0}';".format(*command_args)
-            elif command_id == "textAlign":
-                js += "ctx.textAlign = '{0}';".format(*command_args)
-            elif command_id == "textBaseline":
-                js += "ctx.textBaseline = '{0}';".format(*command_args)
-            elif command_id == "strokeStyle":
-                js += "ctx.strokeStyle = '{0}';".format(*command_args)
-            elif command_id == "lineWidth":
-                js += "ctx.lineWidth = {0};".format(*command_args)
-            elif command_id == "lineDash":
-                js += "ctx.lineDash = {0};".format(*command_args)
-            elif command_id == "lineCap":
-                js += "ctx.lineCap = '{0}';".format(*command_args)
-            elif command_id == "lineJoin":
-                js += "ctx.lineJoin = '{0}';".format(*command_args)
-            elif command_id == "gradient":
-                command_var, width, height, x1, y1, x2, y2 = command_args  # pylint: disable=invalid-name
-                js_var = "grad" + str(command_var)
-                js += "var {0} = ctx.createLinearGradient({1}, {2}, {3}, {4});".format(js_var, x1, y1, x2 - x1, y2 - y1)
-            elif command_id == "colorStop":
-                command_var, x, color = command_args
-                js_var = "grad" + str(command_var)
-                js += "{0}.addColorStop({1}, '{2}');".format(js_var, x, color)
-        return js
+        return JavaScriptBackend().render(self.commands)
 
     def to_svg(self, size, viewbox):
-        svg = ""
-        defs = ""
-        path = ""
-        next_clip_id = 1
-        transform = list()
-        closers = list()
-        fill_style = None
-        fill_opacity = 1.0
-        stroke_style = None
-        stroke_opacity = 1.0
-        line_cap = "square"
-        line_join = "bevel"
-        line_width = 1.0
-        line_dash = None
-        text_anchor = "start"
-        text_baseline = "alphabetic"
-        font_style = None
-        font_weight = None
-        font_size = None
-        font_unit = None
-        font_family = None
-        contexts = collections.deque()
-        gradient_start = None
-        gradient_stops = list()
-
-        # make a SVG 1.1 compatible color, opacity tuple
-        def parse_color(color_str: str) -> typing.Tuple[str, float]:
-            color_str = ''.join(color_str.split())
-            if color_str.startswith("rgba"):
-                c = re.split("rgba\((\d+),(\d+),(\d+),([\d.]+)\)", color_str)
-                return f"rgb({c[1]}, {c[2]}, {c[3]})", float(c[4])
-            return color_str, 1.0
-
-        for command in self.commands:
-            command_id = command[0]
-            #logging.debug(command_id)
-            command_args = command[1:]
-            if command_id == "save":
-                context = dict()
-                context["path"] = path
-                context["transform"] = copy.deepcopy(transform)
-                context["fill_style"] = fill_style
-                context["fill_opacity"] = fill_opacity
-                context["stroke_style"] = stroke_style
-                context["stroke_opacity"] = stroke_opacity
-                context["line_cap"] = line_cap
-                context["line_join"] = line_join
-                context["line_width"] = line_width
-                context["line_dash"] = line_dash
-                context["font_style"] = font_style
-                context["font_weight"] = font_weight
-                context["font_size"] = font_size
-                context["font_unit"] = font_unit
-                context["font_family"] = font_family
-                context["text_anchor"] = text_anchor
-                context["text_baseline"] = text_baseline
-                context["closers"] = copy.deepcopy(closers)
-                closers = list()
-                contexts.append(context)
-            elif command_id == "restore":
-                svg += "".join(closers)
-                context = contexts.pop()
-                path = context["path"]
-                transform = context["transform"]
-                fill_style = context["fill_style"]
-                fill_opacity = context["fill_opacity"]
-                font_style = context["font_style"]
-                font_weight = context["font_weight"]
-                font_size = context["font_size"]
-                font_unit = context["font_unit"]
-                font_family = context["font_family"]
-                text_anchor = context["text_anchor"]
-                text_baseline = context["text_baseline"]
-                stroke_style = context["stroke_style"]
-                stroke_opacity = context["stroke_opacity"]
-                line_cap = context["line_cap"]
-                line_join = context["line_join"]
-                line_width = context["line_width"]
-                line_dash = context["line_dash"]
-                closers = context["closers"]
-            elif command_id == "beginPath":
-                path = ""
-            elif command_id == "closePath":
-                path += " Z"
-            elif command_id == "moveTo":
-                path += " M {0} {1}".format(*command_args)
-            elif command_id == "lineTo":
-                path += " L {0} {1}".format(*command_args)
-            elif command_id == "rect":
-                x, y, w, h = command_args
-                path += " M {0} {1}".format(x, y)
-                path += " L {0} {1}".format(x + w, y)
-                path += " L {0} {1}".format(x + w, y + h)
-                path += " L {0} {1}".format(x, y + h)
-                path += " Z"
-            elif command_id == "arc":
-                x, y, r, sa, ea, ac = command_args
-                # js += "ctx.arc({0}, {1}, {2}, {3}, {4}, {5});".format(x, y, r, sa, ea, "true" if ac else "false")
-            elif command_id == "arcTo":
-                x1, y1, x2, y2, r = command_args
-                # js += "ctx.arcTo({0}, {1}, {2}, {3}, {4});".format(x1, y1, x2, y2, r)
-            elif command_id == "cubicTo":
-                path += " C {0} {1}, {2} {3}, {4} {5}".format(*command_args)
-            elif command_id == "quadraticTo":
-                path += " Q {0} {1}, {2} {3}".format(*command_args)
-            elif command_id == "clip":
-                x, y, w, h = command_args
-                clip_id = "clip" + str(next_clip_id)
-                next_clip_id += 1
-                transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                defs_format_str = "<clipPath id='{0}'><rect x='{1}' y='{2}' width='{3}' height='{4}'{5} /></clipPath>"
-                defs += defs_format_str.format(clip_id, x, y, w, h, transform_str)
-                svg += "<g style='clip-path: url(#{0});'>".format(clip_id)
-                closers.append("</g>")
-            elif command_id == "translate":
-                transform.append("translate({0},{1})".format(*command_args))
-            elif command_id == "scale":
-                transform.append("scale({0},{1})".format(*command_args))
-            elif command_id == "rotate":
-                transform.append("rotate({0})".format(*command_args))
-            elif command_id == "image":
-                w, h, image, image_id, a, b, c, d = command_args
-                png_file = io.BytesIO()
-                rgba_data = get_rgba_view_from_rgba_data(image)
-                imageio.imwrite(png_file, rgba_data[..., (2,1,0,3)], "png")
-                png_encoded = base64.b64encode(png_file.getvalue()).decode('utf=8')
-                transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                svg_format_str = "<image x='{0}' y='{1}' width='{2}' height='{3}' xlink:href='data:image/png;base64,{4}'{5} />"
-                svg += svg_format_str.format(a, b, c, d, png_encoded, transform_str)
-            elif command_id == "data":
-                w, h, data, data_id, a, b, c, d, low, high, color_table, color_table_image_id = command_args
-                m = 255.0 / (high - low) if high != low else 1
-                image = numpy.empty(data.shape, numpy.uint32)
-                if color_table is not None:
-                    adj_color_table = numpy.empty(color_table.shape, numpy.uint32)
-                    # ordering of color_table is BGRA
-                    # ordering of adj_color_table is RGBA
-                    get_byte_view(adj_color_table)[:, 0] = get_byte_view(color_table)[:, 2]
-                    get_byte_view(adj_color_table)[:, 1] = get_byte_view(color_table)[:, 1]
-                    get_byte_view(adj_color_table)[:, 2] = get_byte_view(color_table)[:, 0]
-                    get_byte_view(adj_color_table)[:, 3] = get_byte_view(color_table)[:, 3]
-                    clipped_array = numpy.clip((m * (data - low)).astype(numpy.int), 0, 255).astype(numpy.uint8)
-                    image[:] = adj_color_table[clipped_array]
-                else:
-                    clipped_array = numpy.clip(data, low, high)
-                    numpy.subtract(clipped_array, low, out=clipped_array)
-                    numpy.multiply(clipped_array, m, out=clipped_array)
-                    get_red_view(image)[:] = clipped_array
-                    get_green_view(image)[:] = clipped_array
-                    get_blue_view(image)[:] = clipped_array
-                    get_alpha_view(image)[:] = 255
-                png_file = io.BytesIO()
-                imageio.imwrite(png_file, get_rgba_view_from_rgba_data(image), "png")
-                png_encoded = base64.b64encode(png_file.getvalue()).decode('utf=8')
-                transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                svg_format_str = "<image x='{0}' y='{1}' width='{2}' height='{3}' xlink:href='data:image/png;base64,{4}'{5} />"
-                svg += svg_format_str.format(a, b, c, d, png_encoded, transform_str)
-            elif command_id == "stroke":
-                if stroke_style is not None:
-                    transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                    dash_str = " stroke-dasharray='{0}, {1}'".format(line_dash, line_dash) if line_dash else ""
-                    svg += f"<path d='{path}' fill='none' stroke='{stroke_style}' stroke-opacity='{stroke_opacity}' stroke-width='{line_width}' stroke-linejoin='{line_join}' stroke-linecap='{line_cap}'{dash_str}{transform_str} />"
-            elif command_id == "sleep":
-                pass  # used for performance testing
-            elif command_id == "fill":
-                if fill_style is not None:
-                    transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                    svg += f"<path d='{path}' fill='{fill_style}' fill-opacity='{fill_opacity}' stroke='none'{transform_str} />"
-            elif command_id == "fillText":
-                text, x, y, max_width = command_args
-                transform_str = " transform='{0}'".format(" ".join(transform)) if len(transform) > 0 else ""
-                font_str = ""
-                if font_style:
-                    font_str += " font-style='{0}'".format(font_style)
-                if font_weight:
-                    font_str += " font-weight='{0}'".format(font_weight)
-                if font_size:
-                    font_str += " font-size='{0}{1}'".format(font_size, font_unit)
-                if font_family:
-                    font_str += " font-family='{0}'".format(font_family)
-                if fill_style:
-                    font_str += " fill='{0}'".format(fill_style)
-                if fill_opacity < 1.0:
-                    font_str += " fill-opacity='{0}'".format(fill_opacity)
-                svg_format_str = "<text x='{0}' y='{1}' text-anchor='{3}' alignment-baseline='{4}'{5}{6}>{2}</text>"
-                svg += svg_format_str.format(x, y, xml.sax.saxutils.escape(text), text_anchor, text_baseline, font_str,
-                                             transform_str)
-            elif command_id == "fillStyleGradient":
-                command_var = command_args[0]
-                defs += gradient_start + "".join(gradient_stops) + "</linearGradient>"
-                fill_style = "url(#{0})".format("grad" + str(command_var))
-            elif command_id == "fillStyle":
-                fill_style, fill_opacity = parse_color(command_args[0])
-            elif command_id == "font":
-                font_style = None
-                font_weight = None
-                font_size = None
-                font_unit = None
-                font_family = None
-                for font_part in [s for s in command_args[0].split(" ") if s]:
-                    if font_part == "italic":
-                        font_style = "italic"
-                    elif font_part == "bold":
-                        font_weight = "bold"
-                    elif font_part.endswith("px") and int(font_part[0:-2]) > 0:
-                        font_size = int(font_part[0:-2])
-                        font_unit = "px"
-                    elif font_part.endswith("pt") and int(font_part[0:-2]) > 0:
-                        font_size = int(font_part[0:-2])
-                        font_unit = "pt"
-                    else:
-                        font_family = font_part
-            elif command_id == "textAlign":
-                text_anchors = {"start": "start", "end": "end", "left": "start", "center": "middle", "right": "end"}
-                text_anchor = text_anchors.get(command_args[0], "start")
-            elif command_id == "textBaseline":
-                text_baselines = {"top": "hanging", "hanging": "hanging", "middle": "middle",
-                                  "alphabetic": "alphabetic", "ideaographic": "ideaographic", "bottom": "bottom"}
-                text_baseline = text_baselines.get(command_args[0], "alphabetic")
-            elif command_id == "strokeStyle":
-                stroke_style, stroke_opacity = parse_color(command_args[0])
-            elif command_id == "lineWidth":
-                line_width = command_args[0]
-            elif command_id == "lineDash":
-                line_dash = command_args[0]
-            elif command_id == "lineCap":
-                line_caps = {"square": "square", "round": "round", "butt": "butt"}
-                line_cap = line_caps.get(command_args[0], "square")
-            elif command_id == "lineJoin":
-                line_joins = {"round": "round", "miter": "miter", "bevel": "bevel"}
-                line_join = line_joins.get(command_args[0], "bevel")
-            elif command_id == "gradient":
-                # assumes that gradient will be used immediately after being
-                # declared and stops being defined. this is currently enforced by
-                # the way the commands are generated in drawing context.
-                command_var, w, h, x1, y1, x2, y2 = command_args
-                grad_id = "grad" + str(command_var)
-                gradient_start = "<linearGradient id='{0}' x1='{1}' y1='{2}' x2='{3}' y2='{4}'>".format(grad_id,
-                                                                                                        float(x1 / w),
-                                                                                                        float(y1 / h),
-                                                                                                        float(x2 / w),
-                                                                                                        float(y2 / h))
-            elif command_id == "colorStop":
-                command_var, x, color = command_args
-                gradient_stops.append("<stop offset='{0}%' stop-color='{1}' />".format(int(x * 100), color))
-            else:
-                logging.debug("Unknown command %s", command)
-        xmlns = "xmlns='http://www.w3.org/2000/svg' xmlns:xlink='http://www.w3.org/1999/xlink'"
-        viewbox_str = "{0} {1} {2} {3}".format(viewbox.left, viewbox.top, viewbox.width, viewbox.height)
-        result = "<svg version='1.1' baseProfile='full' width='{0}' height='{1}' viewBox='{2}' {3}>".format(size.width,
-                                                                                                            size.height,
-                                                                                                            viewbox_str,
-                                                                                                            xmlns)
-        result += "<defs>" + defs + "</defs>"
-        result += svg
-        result += "</svg>"
-        return result
+        return SVGBackend(size, viewbox).render(self.commands)
 
     @contextmanager
     def saver(self):
@@ -479,57 +307,72 @@ class DrawingContext:
 
     def save(self):
         self.commands.append(("save", ))
-        self.binary_commands.extend(b"save")
+        self.binary_commands.extend(pack_binary_command("save"))
         self.save_count += 1
 
     def restore(self):
         self.commands.append(("restore", ))
-        self.binary_commands.extend(b"rest")
+        self.binary_commands.extend(pack_binary_command("restore"))
         self.save_count -= 1
 
     def begin_layer(self, layer_id: int, layer_seed: int, a, b, c, d) -> None:
         self.commands.append(("begin_layer", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
-        self.binary_commands.extend(struct.pack("4siiffff", b"bgly", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
+        self.binary_commands.extend(pack_binary_command("begin_layer", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
 
     def end_layer(self, layer_id: int, layer_seed: int, a, b, c, d) -> None:
         self.commands.append(("end_layer", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
-        self.binary_commands.extend(struct.pack("4siiffff", b"enly", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
+        self.binary_commands.extend(pack_binary_command("end_layer", int(layer_id), int(layer_seed), float(a), float(b), float(c), float(d)))
+
+    def begin_layer_update(self, layer_id: int, base_seed: int, a, b, c, d) -> None:
+        """Begin the commands which update the layer image made at base_seed to the current seed.
+
+        The update commands redraw the rect (top, left, height, width in layer coordinates) and are followed by
+        end_layer_update and then the complete layer commands. Backends which keep the layer image made at base_seed
+        redraw the rect with the update commands and skip the complete commands; other backends skip the update
+        commands.
+        """
+        self.commands.append(("begin_layer_update", int(layer_id), int(base_seed), float(a), float(b), float(c), float(d)))
+        self.binary_commands.extend(pack_binary_command("begin_layer_update", int(layer_id), int(base_seed), float(a), float(b), float(c), float(d)))
+
+    def end_layer_update(self, layer_id: int, base_seed: int, a, b, c, d) -> None:
+        self.commands.append(("end_layer_update", int(layer_id), int(base_seed), float(a), float(b), float(c), float(d)))
+        self.binary_commands.extend(pack_binary_command("end_layer_update", int(layer_id), int(base_seed), float(a), float(b), float(c), float(d)))
 
     def begin_path(self):
         self.commands.append(("beginPath", ))
-        self.binary_commands.extend(b"bpth")
+        self.binary_commands.extend(pack_binary_command("beginPath"))
 
     def close_path(self):
         self.commands.append(("closePath", ))
-        self.binary_commands.extend(b"cpth")
+        self.binary_commands.extend(pack_binary_command("closePath"))
 
     def clip_rect(self, a, b, c, d):
         self.commands.append(("clip", float(a), float(b), float(c), float(d)))
-        self.binary_commands.extend(struct.pack("4sffff", b"clip", float(a), float(b), float(c), float(d)))
+        self.binary_commands.extend(pack_binary_command("clip", float(a), float(b), float(c), float(d)))
 
     def translate(self, x, y):
         self.commands.append(("translate", float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sff", b"tran", float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("translate", float(x), float(y)))
 
     def scale(self, x, y):
         self.commands.append(("scale", float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sff", b"scal", float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("scale", float(x), float(y)))
 
     def rotate(self, radians):
         self.commands.append(("rotate", math.degrees(float(radians))))
-        self.binary_commands.extend(struct.pack("4sf", b"rota", math.degrees(float(radians))))
+        self.binary_commands.extend(pack_binary_command("rotate", math.degrees(float(radians))))
 
     def move_to(self, x, y):
         self.commands.append(("moveTo", float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sff", b"move", float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("moveTo", float(x), float(y)))
 
     def line_to(self, x, y):
         self.commands.append(("lineTo", float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sff", b"line", float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("lineTo", float(x), float(y)))
 
     def rect(self, l, t, w, h):
         self.commands.append(("rect", float(l), float(t), float(w), float(h)))
-        self.binary_commands.extend(struct.pack("4sffff", b"rect", float(l), float(t), float(w), float(h)))
+        self.binary_commands.extend(pack_binary_command("rect", float(l), float(t), float(w), float(h)))
 
     def round_rect(self, x, y, w, h, r):
         self.move_to(x + r, y)
@@ -541,80 +384,69 @@ class DrawingContext:
 
     def arc(self, x, y, r, sa, ea, ac=False):
         self.commands.append(("arc", float(x), float(y), float(r), float(sa), float(ea), bool(ac)))
-        self.binary_commands.extend(struct.pack("4sfffffi", b"arc ", float(x), float(y), float(r), float(sa), float(ea), bool(ac)))
+        self.binary_commands.extend(pack_binary_command("arc", float(x), float(y), float(r), float(sa), float(ea), bool(ac)))
 
     def arc_to(self, x1, y1, x2, y2, r):
         self.commands.append(("arcTo", float(x1), float(y1), float(x2), float(y2), float(r)))
-        self.binary_commands.extend(struct.pack("4sfffff", b"arct", float(x1), float(y1), float(x2), float(y2), float(r)))
+        self.binary_commands.extend(pack_binary_command("arcTo", float(x1), float(y1), float(x2), float(y2), float(r)))
 
     def bezier_curve_to(self, x1, y1, x2, y2, x, y):
         self.commands.append(("cubicTo", float(x1), float(y1), float(x2), float(y2), float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sffffff", b"cubc", float(x1), float(y1), float(x2), float(y2), float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("cubicTo", float(x1), float(y1), float(x2), float(y2), float(x), float(y)))
 
     def quadratic_curve_to(self, x1, y1, x, y):
         self.commands.append(("quadraticTo", float(x1), float(y1), float(x), float(y)))
-        self.binary_commands.extend(struct.pack("4sffff", b"quad", float(x1), float(y1), float(x), float(y)))
+        self.binary_commands.extend(pack_binary_command("quadraticTo", float(x1), float(y1), float(x), float(y)))
 
     def draw_image(self, img, x, y, width, height):
         # img should be rgba pack, uint32
         assert img.dtype == numpy.uint32
-        with DrawingContext.__image_id_lock:
-            DrawingContext.__image_id += 1
-            image_id = DrawingContext.__image_id
+        image_id = image_buffers.get_image_id(img)
         self.commands.append(
             ("image", img.shape[1], img.shape[0], img, int(image_id), float(x), float(y), float(width), float(height)))
         self.images[str(image_id)] = img
-        self.binary_commands.extend(struct.pack("4siiiffff", b"imag", img.shape[1], img.shape[0], int(image_id), float(x), float(y), float(width), float(height)))
+        self.binary_commands.extend(pack_binary_command("image", img.shape[1], img.shape[0], int(image_id), float(x), float(y), float(width), float(height)))
 
     def draw_data(self, img, x, y, width, height, low, high, color_map_data):
         # img should be float
         assert img.dtype == numpy.float32
-        with DrawingContext.__image_id_lock:
-            DrawingContext.__image_id += 1
-            image_id = DrawingContext.__image_id
-            if color_map_data is not None:
-                DrawingContext.__image_id += 1
-                color_map_image_id = DrawingContext.__image_id
-            else:
-                color_map_image_id = 0
+        image_id = image_buffers.get_image_id(img)
+        color_map_image_id = image_buffers.get_image_id(color_map_data) if color_map_data is not None else 0
         self.images[str(image_id)] = img
         if color_map_data is not None:
             self.images[str(color_map_image_id)] = color_map_data
         self.commands.append(
             ("data", img.shape[1], img.shape[0], img, int(image_id), float(x), float(y), float(width), float(height), float(low), float(high), color_map_data, int(color_map_image_id)))
-        self.binary_commands.extend(struct.pack("4siiiffffffi", b"data", img.shape[1], img.shape[0], int(image_id), float(x), float(y), float(width), float(height), float(low), float(high), int(color_map_image_id)))
+        self.binary_commands.extend(pack_binary_command("data", img.shape[1], img.shape[0], int(image_id), float(x), float(y), float(width), float(height), float(low), float(high), int(color_map_image_id)))
 
     def stroke(self):
         self.commands.append(("stroke", ))
-        self.binary_commands.extend(b"strk")
+        self.binary_commands.extend(pack_binary_command("stroke"))
 
     def sleep(self, duration):
         self.commands.append(("sleep", float(duration)))
-        self.binary_commands.extend(struct.pack("4sf", b"slep", float(duration)))
+        self.binary_commands.extend(pack_binary_command("sleep", float(duration)))
 
     def mark_latency(self):
         self.commands.append(("latency", time.perf_counter()))
-        self.binary_commands.extend(struct.pack("<4sd", b"latn", time.perf_counter()))
+        self.binary_commands.extend(pack_binary_command("latency", time.perf_counter()))
 
     def message(self, text):
         self.commands.append(("message", text))
-        text_encoded = text.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(text_encoded)), b"mesg", len(text_encoded), text_encoded))
+        self.binary_commands.extend(pack_binary_command("message", text))
 
     def timestamp(self, timestamp):
         self.commands.append(("timestamp", timestamp))
-        timestamp_encoded = timestamp.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(timestamp_encoded)), b"time", len(timestamp_encoded), timestamp_encoded))
+        self.binary_commands.extend(pack_binary_command("timestamp", timestamp))
 
     def fill(self):
         self.commands.append(("fill", ))
-        self.binary_commands.extend(b"fill")
+        self.binary_commands.extend(pack_binary_command("fill"))
 
     def fill_text(self, text, x, y, max_width=None):
         text = str(text) if text is not None else str()
         self.commands.append(("fillText", text, float(x), float(y), float(max_width) if max_width else 0))
-        text_encoded = text.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}sfff".format(len(text_encoded)), b"text", len(text_encoded), text_encoded, float(x), float(y), float(max_width) if max_width else 0))
+        self.binary_commands.extend(pack_binary_command("fillText", text, float(x), float(y), float(max_width) if max_width else 0))
 
     @property
     def fill_style(self):
@@ -627,11 +459,10 @@ class DrawingContext:
             self.commands.extend(a.commands)
             self.commands.append(("fillStyleGradient", int(a.command_var)))
             self.binary_commands.extend(a.binary_commands)
-            self.binary_commands.extend(struct.pack("4si", b"flsg", int(a.command_var)))
+            self.binary_commands.extend(pack_binary_command("fillStyleGradient", int(a.command_var)))
         else:
             self.commands.append(("fillStyle", str(a)))
-            a_encoded = a.encode("utf-8")
-            self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"flst", len(a_encoded), a_encoded))
+            self.binary_commands.extend(pack_binary_command("fillStyle", a))
 
     @property
     def font(self):
@@ -645,8 +476,7 @@ class DrawingContext:
             Supports 'normal', 'bold', 'italic', size specific as '14px', and font-family.
         """
         self.commands.append(("font", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"font", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("font", a))
 
     def __get_text_align(self):
         raise NotImplementedError()
@@ -660,8 +490,7 @@ class DrawingContext:
             Default is 'start'.
         """
         self.commands.append(("textAlign", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"algn", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("textAlign", a))
 
     text_align = property(__get_text_align, __set_text_align)
 
@@ -677,8 +506,7 @@ class DrawingContext:
             Default is 'alphabetic'.
         """
         self.commands.append(("textBaseline", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"tbas", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("textBaseline", a))
 
     text_baseline = property(__get_text_baseline, __set_text_baseline)
 
@@ -688,8 +516,7 @@ class DrawingContext:
     def __set_stroke_style(self, a):
         a = a or "rgba(0, 0, 0, 0.0)"
         self.commands.append(("strokeStyle", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"stst", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("strokeStyle", a))
 
     stroke_style = property(__get_stroke_style, __set_stroke_style)
 
@@ -698,7 +525,7 @@ class DrawingContext:
 
     def __set_line_width(self, a):
         self.commands.append(("lineWidth", float(a)))
-        self.binary_commands.extend(struct.pack("4sf", b"linw", float(a)))
+        self.binary_commands.extend(pack_binary_command("lineWidth", float(a)))
 
     line_width = property(__get_line_width, __set_line_width)
 
@@ -708,7 +535,7 @@ class DrawingContext:
     def __set_line_dash(self, a):
         """ Set the line dash. Takes a single value with the length of the dash. """
         self.commands.append(("lineDash", float(a)))
-        self.binary_commands.extend(struct.pack("4sf", b"ldsh", float(a)))
+        self.binary_commands.extend(pack_binary_command("lineDash", float(a)))
 
     line_dash = property(__get_line_dash, __set_line_dash)
 
@@ -718,8 +545,7 @@ class DrawingContext:
     def __set_line_cap(self, a):
         """ Set the line join. Valid values are 'square', 'round', 'butt'. Default is 'square'. """
         self.commands.append(("lineCap", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"lcap", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("lineCap", a))
 
     line_cap = property(__get_line_cap, __set_line_cap)
 
@@ -729,8 +555,7 @@ class DrawingContext:
     def __set_line_join(self, a):
         """ Set the line join. Valid values are 'round', 'miter', 'bevel'. Default is 'bevel'. """
         self.commands.append(("lineJoin", str(a)))
-        a_encoded = a.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(a_encoded)), b"lnjn", len(a_encoded), a_encoded))
+        self.binary_commands.extend(pack_binary_command("lineJoin", a))
 
     line_join = property(__get_line_join, __set_line_join)
 
@@ -742,13 +567,12 @@ class DrawingContext:
             self.binary_commands = []
             self.command_var = DrawingContext.LinearGradient.next
             self.commands.append(("gradient", self.command_var, float(width), float(height), float(x1), float(y1), float(x2), float(y2)))
-            self.binary_commands.extend(struct.pack("4siffffff", b"grad", self.command_var, float(width), float(height), float(x1), float(y1), float(x2), float(y2)))
+            self.binary_commands.extend(pack_binary_command("gradient", self.command_var, float(width), float(height), float(x1), float(y1), float(x2), float(y2)))
             DrawingContext.LinearGradient.next += 1
 
         def add_color_stop(self, x, color):
             self.commands.append(("colorStop", self.command_var, float(x), str(color)))
-            color_encoded = color.encode("utf-8")
-            self.binary_commands.extend(struct.pack("4sifi{}s0i".format(len(color_encoded)), b"grcs", self.command_var, float(x), len(color_encoded), color_encoded))
+            self.binary_commands.extend(pack_binary_command("colorStop", self.command_var, float(x), color))
 
     def create_linear_gradient(self, width, height, x1, y1, x2, y2):  # pylint: disable=invalid-name
         gradient = DrawingContext.LinearGradient(width, height, x1, y1, x2, y2)
@@ -756,5 +580,581 @@ class DrawingContext:
 
     def statistics(self, stat_id):
         self.commands.append(("statistics", str(stat_id)))
-        stat_id_encoded = stat_id.encode("utf-8")
-        self.binary_commands.extend(struct.pack("4si{}s0i".format(len(stat_id_encoded)), b"stat", len(stat_id_encoded), stat_id_encoded))
+        self.binary_commands.extend(pack_binary_command("statistics", stat_id))
+
+
+def iter_commands_without_layer_updates(commands: typing.Iterable[typing.Sequence]) -> typing.Iterator[typing.Sequence]:
+    """Yield the commands drawn by a backend without layer images, skipping the layer updates.
+
+    A layer update (begin_layer_update to end_layer_update) redraws part of a cached layer image; the complete layer
+    commands follow it, so backends without layer images draw those instead.
+    """
+    layer_update_depth = 0
+    for command in commands:
+        if command[0] == "begin_layer_update":
+            layer_update_depth += 1
+        elif command[0] == "end_layer_update":
+            layer_update_depth -= 1
+        elif not layer_update_depth:
+            yield command
+
+
+class DrawingContextBackend:
+    """Base class for backends which execute the commands of a drawing context.
+
+    The render method executes a list of commands and returns the output of the backend. Each command is dispatched
+    through the opcode table to the backend method named by the opcode handler, called with the command arguments.
+    Commands without a handler method are passed to unhandled_command; commands missing from the opcode table are
+    passed to unknown_command.
+
+    Subclasses implement begin to reset their state, end to return their output, and a handler method for each command
+    they support.
+
+    Backends which render the commands as a whole, rather than one by one, override render and set
+    executes_commands_individually to False; execute is not available for them.
+
+    Backends do not keep layer images, so render skips layer update commands (begin_layer_update to end_layer_update)
+    and draws the complete layer commands which follow them.
+    """
+
+    executes_commands_individually = True
+
+    __dispatch_tables = dict()  # type: typing.Dict[type, typing.Dict[str, typing.Callable]]
+
+    @classmethod
+    def _get_dispatch_table(cls) -> typing.Dict[str, typing.Callable]:
+        dispatch_table = DrawingContextBackend.__dispatch_tables.get(cls)
+        if dispatch_table is None:
+            dispatch_table = dict()
+            for opcode in opcodes:
+                handler = getattr(cls, opcode.handler, None)
+                if callable(handler):
+                    dispatch_table[opcode.name] = handler
+            DrawingContextBackend.__dispatch_tables[cls] = dispatch_table
+        return dispatch_table
+
+    def begin(self) -> None:
+        pass
+
+    def end(self) -> typing.Any:
+        return None
+
+    def execute(self, command: typing.Sequence) -> None:
+        """Execute a single command. Must be called between begin and end."""
+        handler = self._get_dispatch_table().get(command[0])
+        if handler:
+            handler(self, *command[1:])
+        elif command[0] in opcodes_by_name:
+            self.unhandled_command(command)
+        else:
+            self.unknown_command(command)
+
+    def render(self, commands: typing.Sequence[typing.Sequence]) -> typing.Any:
+        self.begin()
+        dispatch_table = self._get_dispatch_table()
+        for command in iter_commands_without_layer_updates(commands):
+            handler = dispatch_table.get(command[0])
+            if handler:
+                handler(self, *command[1:])
+            elif command[0] in opcodes_by_name:
+                self.unhandled_command(command)
+            else:
+                self.unknown_command(command)
+        return self.end()
+
+    def output_size(self, output: typing.Any) -> int:
+        """Return the size in bytes of the output returned from render."""
+        if isinstance(output, str):
+            return len(output.encode("utf-8"))
+        if isinstance(output, numpy.ndarray):
+            return output.nbytes
+        return len(output) if output is not None else 0
+
+    def unhandled_command(self, command: typing.Sequence) -> None:
+        pass
+
+    def unknown_command(self, command: typing.Sequence) -> None:
+        logging.debug("Unknown command %s", command)
+
+
+class JavaScriptBackend(DrawingContextBackend):
+    """Produce javascript which draws the commands into a canvas 2d context named ctx."""
+
+    def __init__(self):
+        self.__js = list()
+
+    def begin(self) -> None:
+        self.__js = list()
+
+    def end(self) -> str:
+        return "".join(self.__js)
+
+    def save(self):
+        self.__js.append("ctx.save();")
+
+    def restore(self):
+        self.__js.append("ctx.restore();")
+
+    def begin_path(self):
+        self.__js.append("ctx.beginPath();")
+
+    def close_path(self):
+        self.__js.append("ctx.closePath();")
+
+    def clip_rect(self, a, b, c, d):
+        self.__js.append("ctx.beginPath();")
+        self.__js.append("ctx.rect({0}, {1}, {2}, {3});".format(a, b, c, d))
+        self.__js.append("ctx.clip();")
+
+    def translate(self, x, y):
+        self.__js.append("ctx.translate({0}, {1});".format(x, y))
+
+    def scale(self, x, y):
+        self.__js.append("ctx.scale({0}, {1});".format(x, y))
+
+    def rotate(self, degrees):
+        self.__js.append("ctx.rotate({0});".format(degrees))
+
+    def move_to(self, x, y):
+        self.__js.append("ctx.moveTo({0}, {1});".format(x, y))
+
+    def line_to(self, x, y):
+        self.__js.append("ctx.lineTo({0}, {1});".format(x, y))
+
+    def rect(self, x, y, w, h):
+        self.__js.append("ctx.rect({0}, {1}, {2}, {3});".format(x, y, w, h))
+
+    def arc(self, x, y, r, sa, ea, ac):
+        self.__js.append("ctx.arc({0}, {1}, {2}, {3}, {4}, {5});".format(x, y, r, sa, ea, "true" if ac else "false"))
+
+    def arc_to(self, x1, y1, x2, y2, r):
+        self.__js.append("ctx.arcTo({0}, {1}, {2}, {3}, {4});".format(x1, y1, x2, y2, r))
+
+    def bezier_curve_to(self, x1, y1, x2, y2, x, y):
+        self.__js.append("ctx.bezierCurveTo({0}, {1}, {2}, {3}, {4}, {5});".format(x1, y1, x2, y2, x, y))
+
+    def quadratic_curve_to(self, x1, y1, x, y):
+        self.__js.append("ctx.quadraticCurveTo({0}, {1}, {2}, {3});".format(x1, y1, x, y))
+
+    def draw_image(self, w, h, image, image_id, a, b, c, d):
+        self.__js.append("ctx.rect({0}, {1}, {2}, {3});".format(a, b, c, d))
+
+    def draw_data(self, w, h, data, data_id, a, b, c, d, low, high, color_table, color_table_image_id):
+        self.__js.append("ctx.rect({0}, {1}, {2}, {3});".format(a, b, c, d))
+
+    def stroke(self):
+        self.__js.append("ctx.stroke();")
+
+    def fill(self):
+        self.__js.append("ctx.fill();")
+
+    def fill_text(self, text, x, y, max_width):
+        self.__js.append("ctx.fillText('{0}', {1}, {2}{3});".format(xml.sax.saxutils.escape(text), x, y, ", {0}".format(max_width) if max_width else ""))
+
+    def fill_style_gradient(self, command_var):
+        self.__js.append("ctx.fillStyle = {0};".format("grad" + str(command_var)))
+
+    def fill_style(self, color):
+        self.__js.append("ctx.fillStyle = '{0}';".format(color))
+
+    def font(self, font):
+        self.__js.append("ctx.font = '{0}';".format(font))
+
+    def text_align(self, text_align):
+        self.__js.append("ctx.textAlign = '{0}';".format(text_align))
+
+    def text_baseline(self, text_baseline):
+        self.__js.append("ctx.textBaseline = '{0}';".format(text_baseline))
+
+    def stroke_style(self, color):
+        self.__js.append("ctx.strokeStyle = '{0}';".format(color))
+
+    def line_width(self, line_width):
+        self.__js.append("ctx.lineWidth = {0};".format(line_width))
+
+    def line_dash(self, line_dash):
+        self.__js.append("ctx.lineDash = {0};".format(line_dash))
+
+    def line_cap(self, line_cap):
+        self.__js.append("ctx.lineCap = '{0}';".format(line_cap))
+
+    def line_join(self, line_join):
+        self.__js.append("ctx.lineJoin = '{0}';".format(line_join))
+
+    def gradient(self, command_var, width, height, x1, y1, x2, y2):  # pylint: disable=invalid-name
+        js_var = "grad" + str(command_var)
+        self.__js.append("var {0} = ctx.createLinearGradient({1}, {2}, {3}, {4});".format(js_var, x1, y1, x2 - x1, y2 - y1))
+
+    def color_stop(self, command_var, x, color):
+        js_var = "grad" + str(command_var)
+        self.__js.append("{0}.addColorStop({1}, '{2}');".format(js_var, x, color))
+
+
+# make a SVG 1.1 compatible color, opacity tuple
+def _parse_svg_color(color_str: str) -> typing.Tuple[str, float]:
+    color_str = ''.join(color_str.split())
+    if color_str.startswith("rgba"):
+        c = re.split(r"rgba\((\d+),(\d+),(\d+),([\d.]+)\)", color_str)
+        return f"rgb({c[1]}, {c[2]}, {c[3]})", float(c[4])
+    return color_str, 1.0
+
+
+def _encode_png(rgba_view: numpy.ndarray) -> str:
+    png_file = io.BytesIO()
+    imageio.imwrite(png_file, rgba_view, "png")
+    return base64.b64encode(png_file.getvalue()).decode('utf=8')
+
+
+class SVGBackend(DrawingContextBackend):
+    """Produce an SVG 1.1 document of the given size and viewbox."""
+
+    __text_anchors = {"start": "start", "end": "end", "left": "start", "center": "middle", "right": "end"}
+    __text_baselines = {"top": "hanging", "hanging": "hanging", "middle": "middle", "alphabetic": "alphabetic",
+                        "ideaographic": "ideaographic", "bottom": "bottom"}
+    __line_caps = {"square": "square", "round": "round", "butt": "butt"}
+    __line_joins = {"round": "round", "miter": "miter", "bevel": "bevel"}
+
+    def __init__(self, size, viewbox):
+        self.size = size
+        self.viewbox = viewbox
+        self.begin()
+
+    def begin(self) -> None:
+        self.__svg = list()
+        self.__defs = list()
+        self.__path = ""
+        self.__next_clip_id = 1
+        self.__transform = list()
+        self.__closers = list()
+        self.__fill_style = None
+        self.__fill_opacity = 1.0
+        self.__stroke_style = None
+        self.__stroke_opacity = 1.0
+        self.__line_cap = "square"
+        self.__line_join = "bevel"
+        self.__line_width = 1.0
+        self.__line_dash = None
+        self.__text_anchor = "start"
+        self.__text_baseline = "alphabetic"
+        self.__font_style = None
+        self.__font_weight = None
+        self.__font_size = None
+        self.__font_unit = None
+        self.__font_family = None
+        self.__contexts = collections.deque()
+        self.__gradient_start = None
+        self.__gradient_stops = list()
+
+    def end(self) -> str:
+        size = self.size
+        viewbox = self.viewbox
+        xmlns = "xmlns='http://www.w3.org/2000/svg' xmlns:xlink='http://www.w3.org/1999/xlink'"
+        viewbox_str = "{0} {1} {2} {3}".format(viewbox.left, viewbox.top, viewbox.width, viewbox.height)
+        result = "<svg version='1.1' baseProfile='full' width='{0}' height='{1}' viewBox='{2}' {3}>".format(size.width,
+                                                                                                            size.height,
+                                                                                                            viewbox_str,
+                                                                                                            xmlns)
+        result += "<defs>" + "".join(self.__defs) + "</defs>"
+        result += "".join(self.__svg)
+        result += "</svg>"
+        return result
+
+    def __get_transform_str(self) -> str:
+        return " transform='{0}'".format(" ".join(self.__transform)) if len(self.__transform) > 0 else ""
+
+    def unhandled_command(self, command: typing.Sequence) -> None:
+        logging.debug("Unknown command %s", command)
+
+    def save(self):
+        context = dict()
+        context["path"] = self.__path
+        context["transform"] = list(self.__transform)
+        context["fill_style"] = self.__fill_style
+        context["fill_opacity"] = self.__fill_opacity
+        context["stroke_style"] = self.__stroke_style
+        context["stroke_opacity"] = self.__stroke_opacity
+        context["line_cap"] = self.__line_cap
+        context["line_join"] = self.__line_join
+        context["line_width"] = self.__line_width
+        context["line_dash"] = self.__line_dash
+        context["font_style"] = self.__font_style
+        context["font_weight"] = self.__font_weight
+        context["font_size"] = self.__font_size
+        context["font_unit"] = self.__font_unit
+        context["font_family"] = self.__font_family
+        context["text_anchor"] = self.__text_anchor
+        context["text_baseline"] = self.__text_baseline
+        context["closers"] = list(self.__closers)
+        self.__closers = list()
+        self.__contexts.append(context)
+
+    def restore(self):
+        self.__svg.append("".join(self.__closers))
+        context = self.__contexts.pop()
+        self.__path = context["path"]
+        self.__transform = context["transform"]
+        self.__fill_style = context["fill_style"]
+        self.__fill_opacity = context["fill_opacity"]
+        self.__stroke_style = context["stroke_style"]
+        self.__stroke_opacity = context["stroke_opacity"]
+        self.__line_cap = context["line_cap"]
+        self.__line_join = context["line_join"]
+        self.__line_width = context["line_width"]
+        self.__line_dash = context["line_dash"]
+        self.__font_style = context["font_style"]
+        self.__font_weight = context["font_weight"]
+        self.__font_size = context["font_size"]
+        self.__font_unit = context["font_unit"]
+        self.__font_family = context["font_family"]
+        self.__text_anchor = context["text_anchor"]
+        self.__text_baseline = context["text_baseline"]
+        self.__closers = context["closers"]
+
+    def begin_path(self):
+        self.__path = ""
+
+    def close_path(self):
+        self.__path += " Z"
+
+    def move_to(self, x, y):
+        self.__path += " M {0} {1}".format(x, y)
+
+    def line_to(self, x, y):
+        self.__path += " L {0} {1}".format(x, y)
+
+    def rect(self, x, y, w, h):
+        self.__path += " M {0} {1}".format(x, y)
+        self.__path += " L {0} {1}".format(x + w, y)
+        self.__path += " L {0} {1}".format(x + w, y + h)
+        self.__path += " L {0} {1}".format(x, y + h)
+        self.__path += " Z"
+
+    def arc(self, x, y, r, sa, ea, ac):
+        pass
+
+    def arc_to(self, x1, y1, x2, y2, r):
+        pass
+
+    def bezier_curve_to(self, x1, y1, x2, y2, x, y):
+        self.__path += " C {0} {1}, {2} {3}, {4} {5}".format(x1, y1, x2, y2, x, y)
+
+    def quadratic_curve_to(self, x1, y1, x, y):
+        self.__path += " Q {0} {1}, {2} {3}".format(x1, y1, x, y)
+
+    def clip_rect(self, x, y, w, h):
+        clip_id = "clip" + str(self.__next_clip_id)
+        self.__next_clip_id += 1
+        defs_format_str = "<clipPath id='{0}'><rect x='{1}' y='{2}' width='{3}' height='{4}'{5} /></clipPath>"
+        self.__defs.append(defs_format_str.format(clip_id, x, y, w, h, self.__get_transform_str()))
+        self.__svg.append("<g style='clip-path: url(#{0});'>".format(clip_id))
+        self.__closers.append("</g>")
+
+    def translate(self, x, y):
+        self.__transform.append("translate({0},{1})".format(x, y))
+
+    def scale(self, x, y):
+        self.__transform.append("scale({0},{1})".format(x, y))
+
+    def rotate(self, degrees):
+        self.__transform.append("rotate({0})".format(degrees))
+
+    def draw_image(self, w, h, image, image_id, a, b, c, d):
+        rgba_data = get_rgba_view_from_rgba_data(image)
+        png_encoded = _encode_png(rgba_data[..., (2,1,0,3)])
+        svg_format_str = "<image x='{0}' y='{1}' width='{2}' height='{3}' xlink:href='data:image/png;base64,{4}'{5} />"
+        self.__svg.append(svg_format_str.format(a, b, c, d, png_encoded, self.__get_transform_str()))
+
+    def draw_data(self, w, h, data, data_id, a, b, c, d, low, high, color_table, color_table_image_id):
+        m = 255.0 / (high - low) if high != low else 1
+        image = numpy.empty(data.shape, numpy.uint32)
+        if color_table is not None:
+            adj_color_table = numpy.empty(color_table.shape, numpy.uint32)
+            # ordering of color_table is BGRA
+            # ordering of adj_color_table is RGBA
+            get_byte_view(adj_color_table)[:, 0] = get_byte_view(color_table)[:, 2]
+            get_byte_view(adj_color_table)[:, 1] = get_byte_view(color_table)[:, 1]
+            get_byte_view(adj_color_table)[:, 2] = get_byte_view(color_table)[:, 0]
+            get_byte_view(adj_color_table)[:, 3] = get_byte_view(color_table)[:, 3]
+            clipped_array = numpy.clip((m * (data - low)).astype(int), 0, 255).astype(numpy.uint8)
+            image[:] = adj_color_table[clipped_array]
+        else:
+            clipped_array = numpy.clip(data, low, high)
+            numpy.subtract(clipped_array, low, out=clipped_array)
+            numpy.multiply(clipped_array, m, out=clipped_array)
+            get_red_view(image)[:] = clipped_array
+            get_green_view(image)[:] = clipped_array
+            get_blue_view(image)[:] = clipped_array
+            get_alpha_view(image)[:] = 255
+        png_encoded = _encode_png(get_rgba_view_from_rgba_data(image))
+        svg_format_str = "<image x='{0}' y='{1}' width='{2}' height='{3}' xlink:href='data:image/png;base64,{4}'{5} />"
+        self.__svg.append(svg_format_str.format(a, b, c, d, png_encoded, self.__get_transform_str()))
+
+    def stroke(self):
+        if self.__stroke_style is not None:
+            transform_str = self.__get_transform_str()
+            dash_str = " stroke-dasharray='{0}, {1}'".format(self.__line_dash, self.__line_dash) if self.__line_dash else ""
+            self.__svg.append(f"<path d='{self.__path}' fill='none' stroke='{self.__stroke_style}' stroke-opacity='{self.__stroke_opacity}' stroke-width='{self.__line_width}' stroke-linejoin='{self.__line_join}' stroke-linecap='{self.__line_cap}'{dash_str}{transform_str} />")
+
+    def sleep(self, duration):
+        pass  # used for performance testing
+
+    def fill(self):
+        if self.__fill_style is not None:
+            transform_str = self.__get_transform_str()
+            self.__svg.append(f"<path d='{self.__path}' fill='{self.__fill_style}' fill-opacity='{self.__fill_opacity}' stroke='none'{transform_str} />")
+
+    def fill_text(self, text, x, y, max_width):
+        font_str = ""
+        if self.__font_style:
+            font_str += " font-style='{0}'".format(self.__font_style)
+        if self.__font_weight:
+            font_str += " font-weight='{0}'".format(self.__font_weight)
+        if self.__font_size:
+            font_str += " font-size='{0}{1}'".format(self.__font_size, self.__font_unit)
+        if self.__font_family:
+            font_str += " font-family='{0}'".format(self.__font_family)
+        if self.__fill_style:
+            font_str += " fill='{0}'".format(self.__fill_style)
+        if self.__fill_opacity < 1.0:
+            font_str += " fill-opacity='{0}'".format(self.__fill_opacity)
+        svg_format_str = "<text x='{0}' y='{1}' text-anchor='{3}' alignment-baseline='{4}'{5}{6}>{2}</text>"
+        self.__svg.append(svg_format_str.format(x, y, xml.sax.saxutils.escape(text), self.__text_anchor,
+                                                self.__text_baseline, font_str, self.__get_transform_str()))
+
+    def fill_style_gradient(self, command_var):
+        self.__defs.append(self.__gradient_start + "".join(self.__gradient_stops) + "</linearGradient>")
+        self.__fill_style = "url(#{0})".format("grad" + str(command_var))
+
+    def fill_style(self, color):
+        self.__fill_style, self.__fill_opacity = _parse_svg_color(color)
+
+    def font(self, font):
+        self.__font_style = None
+        self.__font_weight = None
+        self.__font_size = None
+        self.__font_unit = None
+        self.__font_family = None
+        for font_part in [s for s in font.split(" ") if s]:
+            if font_part == "italic":
+                self.__font_style = "italic"
+            elif font_part == "bold":
+                self.__font_weight = "bold"
+            elif font_part.endswith("px") and int(font_part[0:-2]) > 0:
+                self.__font_size = int(font_part[0:-2])
+                self.__font_unit = "px"
+            elif font_part.endswith("pt") and int(font_part[0:-2]) > 0:
+                self.__font_size = int(font_part[0:-2])
+                self.__font_unit = "pt"
+            else:
+                self.__font_family = font_part
+
+    def text_align(self, text_align):
+        self.__text_anchor = SVGBackend.__text_anchors.get(text_align, "start")
+
+    def text_baseline(self, text_baseline):
+        self.__text_baseline = SVGBackend.__text_baselines.get(text_baseline, "alphabetic")
+
+    def stroke_style(self, color):
+        self.__stroke_style, self.__stroke_opacity = _parse_svg_color(color)
+
+    def line_width(self, line_width):
+        self.__line_width = line_width
+
+    def line_dash(self, line_dash):
+        self.__line_dash = line_dash
+
+    def line_cap(self, line_cap):
+        self.__line_cap = SVGBackend.__line_caps.get(line_cap, "square")
+
+    def line_join(self, line_join):
+        self.__line_join = SVGBackend.__line_joins.get(line_join, "bevel")
+
+    def gradient(self, command_var, w, h, x1, y1, x2, y2):  # pylint: disable=invalid-name
+        # assumes that gradient will be used immediately after being
+        # declared and stops being defined. this is currently enforced by
+        # the way the commands are generated in drawing context.
+        grad_id = "grad" + str(command_var)
+        self.__gradient_start = "<linearGradient id='{0}' x1='{1}' y1='{2}' x2='{3}' y2='{4}'>".format(grad_id,
+                                                                                                      float(x1 / w),
+                                                                                                      float(y1 / h),
+                                                                                                      float(x2 / w),
+                                                                                                      float(y2 / h))
+
+    def color_stop(self, command_var, x, color):
+        self.__gradient_stops.append("<stop offset='{0}%' stop-color='{1}' />".format(int(x * 100), color))
+
+
+CommandStream = collections.namedtuple("CommandStream", ["width", "height", "commands"])
+
+
+class CommandStreamRecorder:
+    """Record the command streams drawn to canvases so they can be saved and replayed later.
+
+    While a recorder is installed with set_command_stream_recorder, canvas widgets record each drawing context they
+    draw. The recorded streams keep the image and data arrays they draw alive, so at most max_count command streams
+    and at most max_nbytes of arrays are kept; the oldest streams are discarded first. Arrays drawn by several streams
+    are counted once for each stream.
+    """
+
+    def __init__(self, max_count: int = 10000, max_nbytes: int = 256 * 1024 * 1024):
+        self.__max_count = max_count
+        self.__max_nbytes = max_nbytes
+        self.__command_streams = collections.deque()  # type: typing.Deque[typing.Tuple[CommandStream, int]]
+        self.__nbytes = 0
+        self.__lock = threading.RLock()
+
+    @property
+    def command_streams(self) -> typing.List[CommandStream]:
+        with self.__lock:
+            return [command_stream for command_stream, nbytes in self.__command_streams]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the arrays kept by the recorded command streams."""
+        with self.__lock:
+            return self.__nbytes
+
+    def record(self, drawing_context: DrawingContext, width: int, height: int) -> None:
+        commands = list(drawing_context.commands)
+        command_stream = CommandStream(int(width), int(height), commands)
+        nbytes = sum(arg.nbytes for command in commands for arg in command[1:] if isinstance(arg, numpy.ndarray))
+        with self.__lock:
+            self.__command_streams.append((command_stream, nbytes))
+            self.__nbytes += nbytes
+            while len(self.__command_streams) > self.__max_count or (self.__nbytes > self.__max_nbytes and len(self.__command_streams) > 1):
+                _, discarded_nbytes = self.__command_streams.popleft()
+                self.__nbytes -= discarded_nbytes
+
+    def save(self, file_path: str) -> None:
+        save_command_streams(file_path, self.command_streams)
+
+
+_command_stream_recorder = None  # type: typing.Optional[CommandStreamRecorder]
+
+
+def get_command_stream_recorder() -> typing.Optional[CommandStreamRecorder]:
+    return _command_stream_recorder
+
+
+def set_command_stream_recorder(recorder: typing.Optional[CommandStreamRecorder]) -> None:
+    global _command_stream_recorder
+    _command_stream_recorder = recorder
+
+
+_command_stream_format_version = 1
+
+
+def save_command_streams(file_path: str, command_streams: typing.Sequence[CommandStream]) -> None:
+    """Save the command streams to a file. Images within the commands are saved as numpy arrays."""
+    d = {"version": _command_stream_format_version, "command_streams": [tuple(c) for c in command_streams]}
+    with open(file_path, "wb") as f:
+        pickle.dump(d, f, protocol=4)
+
+
+def load_command_streams(file_path: str) -> typing.List[CommandStream]:
+    """Load command streams saved with save_command_streams. Only load files from trusted sources."""
+    with open(file_path, "rb") as f:
+        d = pickle.load(f)
+    if not isinstance(d, dict) or d.get("version") != _command_stream_format_version:
+        raise ValueError(f"{file_path} is not a version {_command_stream_format_version} command stream file.")
+    return [CommandStream(*c) for c in d["command_streams"]]
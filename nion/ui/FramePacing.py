@@ -0,0 +1,146 @@
+"""
+Frame pacing: merge the updates of a render target and render it at most a fixed number of frames per second.
+
+Producers such as live acquisition may call update far more often than the display can show. Each layer of canvas
+items paces its renders with a FramePacer: updates requested while a frame is pending are merged into that frame
+and counted as dropped frames, and frames start at most max_fps times per second.
+"""
+
+# standard libraries
+import collections
+import heapq
+import itertools
+import threading
+import time
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+FrameStatistics = collections.namedtuple("FrameStatistics", ["frame_count", "dropped_count", "fps"])
+
+# the frame rate used by new frame pacers; a typical display refresh rate. None disables pacing.
+default_max_fps = 60.0  # type: typing.Optional[float]
+
+
+class FrameTimer:
+    """Call functions at given perf_counter times on a single timer thread.
+
+    The functions must return quickly; typically they hand the work to an executor.
+    """
+
+    def __init__(self):
+        self.__entries = list()  # type: typing.List[typing.Tuple[float, int, typing.Callable[[], None]]]
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread = None  # type: typing.Optional[threading.Thread]
+
+    def call_at(self, due_time: float, fn: typing.Callable[[], None]) -> None:
+        with self.__condition:
+            heapq.heappush(self.__entries, (due_time, next(self.__counter), fn))
+            if not self.__thread:
+                self.__thread = threading.Thread(target=self.__run, name="FrameTimer", daemon=True)
+                self.__thread.start()
+            self.__condition.notify()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                while not self.__entries or self.__entries[0][0] > time.perf_counter():
+                    timeout = self.__entries[0][0] - time.perf_counter() if self.__entries else None
+                    self.__condition.wait(timeout)
+                fn = heapq.heappop(self.__entries)[2]
+            try:
+                fn()
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+
+
+# the clock and timer used by new frame pacers. the clock returns seconds; the timer calls a function at a clock time.
+default_clock = time.perf_counter  # type: typing.Callable[[], float]
+default_frame_timer = FrameTimer()
+
+
+class FramePacer:
+    """Schedule frames of one render target no more than max_fps times per second.
+
+    request_frame is called whenever the target needs to be rendered. If no frame is pending, a frame is scheduled at
+    the earliest time allowed by max_fps after the start of the previous frame and start_frame_fn is called at that
+    time, on the timer thread or on the calling thread if the frame is due immediately. start_frame_fn should submit
+    the render to an executor and return.
+
+    Requests made while a frame is pending are merged into it and counted as dropped frames. The frame rate is measured
+    over the last second of frames.
+
+    The clock and frame timer default to default_clock and default_frame_timer; a frame timer must have a call_at
+    method like FrameTimer, using times from the clock.
+    """
+
+    def __init__(self, start_frame_fn: typing.Callable[[], None], max_fps: typing.Optional[float] = None, *,
+                 clock: typing.Optional[typing.Callable[[], float]] = None, frame_timer=None):
+        self.__start_frame_fn = start_frame_fn
+        self.__clock = clock or default_clock
+        self.__frame_timer = frame_timer or default_frame_timer
+        self.max_fps = max_fps if max_fps is not None else default_max_fps
+        self.__lock = threading.RLock()
+        self.__pending = False
+        self.__last_frame_time = None  # type: typing.Optional[float]
+        self.__frame_times = collections.deque()  # type: typing.Deque[float]
+        self.__frame_count = 0
+        self.__dropped_count = 0
+        self.__closed = False
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__closed = True
+
+    @property
+    def statistics(self) -> FrameStatistics:
+        with self.__lock:
+            self.__discard_old_frame_times(self.__clock())
+            return FrameStatistics(self.__frame_count, self.__dropped_count, float(len(self.__frame_times)))
+
+    def reset_statistics(self) -> None:
+        with self.__lock:
+            self.__frame_times.clear()
+            self.__frame_count = 0
+            self.__dropped_count = 0
+
+    def request_frame(self) -> None:
+        with self.__lock:
+            if self.__closed:
+                return
+            if self.__pending:
+                self.__dropped_count += 1
+                return
+            self.__pending = True
+            now = self.__clock()
+            due_time = now
+            if self.max_fps and self.__last_frame_time is not None:
+                due_time = max(now, self.__last_frame_time + 1.0 / self.max_fps)
+        if due_time > now:
+            self.__frame_timer.call_at(due_time, self.__start_frame)
+        else:
+            self.__start_frame()
+
+    def __discard_old_frame_times(self, now: float) -> None:
+        frame_times = self.__frame_times
+        while frame_times and frame_times[0] <= now - 1.0:
+            frame_times.popleft()
+
+    def __start_frame(self) -> None:
+        with self.__lock:
+            self.__pending = False
+            if self.__closed:
+                return
+            now = self.__clock()
+            self.__last_frame_time = now
+            self.__frame_count += 1
+            self.__frame_times.append(now)
+            self.__discard_old_frame_times(now)
+        self.__start_frame_fn()
@@ -0,0 +1,210 @@
+"""
+Multi-resolution images, so that large images can be drawn from a level near their displayed size.
+
+ImagePyramid keeps whole downsampled levels of an image in memory. TiledImageSource divides each level into tiles
+which are made on demand and kept in a least recently used cache, so that only the visible part of very large or
+memory mapped images is read.
+"""
+
+# standard libraries
+import collections
+import math
+import threading
+import typing
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.ui import DrawingContext
+from nion.utils import Geometry
+
+
+def get_downsampled_shape(height: int, width: int) -> typing.Tuple[int, int]:
+    """Return the shape of an image of height by width after downsample."""
+    return (height + 1) // 2, (width + 1) // 2
+
+
+def downsample(image: numpy.ndarray) -> numpy.ndarray:
+    """Return the image at half size in each dimension, rounding up.
+
+    An odd last row or column is replicated before averaging, so that the result still covers the whole image and can
+    be drawn into the same destination rect.
+
+    Packed uint32 images (BGRA) are averaged per channel; floating point images are averaged; other images are
+    subsampled.
+    """
+    height, width = image.shape[:2]
+    if height % 2 or width % 2:
+        image = numpy.pad(image, ((0, height % 2), (0, width % 2)) + ((0, 0), ) * (image.ndim - 2), mode="edge")
+    if image.dtype == numpy.uint32:
+        channels = DrawingContext.get_byte_view(image).astype(numpy.uint16)
+        total = channels[0::2, 0::2] + channels[1::2, 0::2] + channels[0::2, 1::2] + channels[1::2, 1::2]
+        total += 2
+        total >>= 2
+        return DrawingContext.get_rgba_data_from_rgba(numpy.ascontiguousarray(total.astype(numpy.uint8)))
+    if numpy.issubdtype(image.dtype, numpy.floating):
+        total = image[0::2, 0::2] + image[1::2, 0::2]
+        total += image[0::2, 1::2]
+        total += image[1::2, 1::2]
+        total *= 0.25
+        return total.astype(image.dtype, copy=False)
+    return numpy.ascontiguousarray(image[0::2, 0::2])
+
+
+class ImagePyramid:
+    """Successively half sized levels of a 2d image.
+
+    Level 0 is the image itself and each level is built from the previous one with downsample. Levels are built on
+    first use and kept with the pyramid; call build to build them in advance. The image must not be modified while
+    the pyramid is in use.
+
+    Levels are built under a lock, so the pyramid can be used from the render threads.
+    """
+
+    def __init__(self, image: numpy.ndarray, *, minimum_size: int = 16):
+        self.__levels = [image]
+        self.__minimum_size = max(minimum_size, 1)
+        self.__lock = threading.RLock()
+
+    @property
+    def image(self) -> numpy.ndarray:
+        return self.__levels[0]
+
+    @property
+    def level_count(self) -> int:
+        """Return the number of levels, including levels not built yet."""
+        count = 1
+        height, width = self.image.shape[:2]
+        while min(height, width) // 2 >= self.__minimum_size:
+            height, width = get_downsampled_shape(height, width)
+            count += 1
+        return count
+
+    def get_level(self, index: int) -> numpy.ndarray:
+        index = min(max(index, 0), self.level_count - 1)
+        with self.__lock:
+            levels = self.__levels
+            while len(levels) <= index:
+                levels.append(downsample(levels[-1]))
+            return levels[index]
+
+    def build(self) -> None:
+        self.get_level(self.level_count - 1)
+
+    def get_level_index_for_size(self, height: float, width: float) -> int:
+        """Return the index of the smallest level at least height by width, or level 0 if none is."""
+        index = 0
+        level_height, level_width = self.image.shape[:2]
+        for _ in range(self.level_count - 1):
+            level_height, level_width = get_downsampled_shape(level_height, level_width)
+            if level_height < height or level_width < width:
+                break
+            index += 1
+        return index
+
+    def get_level_for_size(self, height: float, width: float) -> numpy.ndarray:
+        """Return the smallest level at least height by width, or the image itself if none is."""
+        return self.get_level(self.get_level_index_for_size(height, width))
+
+
+class TiledImageSource:
+    """A 2d image divided into square tiles at successively half sized levels.
+
+    The image can be any 2d array, including a numpy.memmap. Packed uint32 images (BGRA) give uint32 tiles suitable
+    for draw_image; other images give float32 tiles suitable for draw_data.
+
+    Level n is the image subsampled by 2 ** n, so that making a tile reads only the pixels it shows. Tiles are made
+    on the calling thread and kept in a least recently used cache of cache_size tiles shared between threads. Cached
+    tiles are registered as image buffers, so backends can reuse the images made from them. Call clear_cache after
+    modifying the image.
+    """
+
+    def __init__(self, image: numpy.ndarray, *, tile_size: int = 256, cache_size: int = 256):
+        assert len(image.shape) == 2
+        self.__image = image
+        self.__tile_size = max(tile_size, 1)
+        self.__cache_size = max(cache_size, 1)
+        self.__tile_cache = collections.OrderedDict()  # type: typing.MutableMapping[typing.Tuple[int, int, int], numpy.ndarray]
+        self.__tile_cache_lock = threading.RLock()
+
+    @property
+    def image(self) -> numpy.ndarray:
+        return self.__image
+
+    @property
+    def shape(self) -> typing.Tuple[int, int]:
+        return self.__image.shape
+
+    @property
+    def tile_size(self) -> int:
+        return self.__tile_size
+
+    @property
+    def level_count(self) -> int:
+        """Return the number of levels; the last level fits in a single tile."""
+        return max(math.ceil(math.log2(max(max(self.shape) / self.__tile_size, 1))), 0) + 1
+
+    @property
+    def cached_tile_count(self) -> int:
+        with self.__tile_cache_lock:
+            return len(self.__tile_cache)
+
+    def clear_cache(self) -> None:
+        with self.__tile_cache_lock:
+            tiles = list(self.__tile_cache.values())
+            self.__tile_cache.clear()
+        for tile in tiles:
+            DrawingContext.image_buffers.release(tile)
+
+    def get_level_for_scale(self, scale: float) -> int:
+        """Return the lowest resolution level with at least scale image pixels per displayed pixel."""
+        if scale <= 0:
+            return self.level_count - 1
+        return min(max(int(math.floor(math.log2(1 / scale))), 0), self.level_count - 1)
+
+    def get_tile(self, level: int, row: int, column: int) -> numpy.ndarray:
+        key = (level, row, column)
+        with self.__tile_cache_lock:
+            tile = self.__tile_cache.get(key)
+            if tile is not None:
+                self.__tile_cache.move_to_end(key)
+                return tile
+        step = 2 ** level
+        span = self.__tile_size * step
+        tile = self.__image[row * span:(row + 1) * span:step, column * span:(column + 1) * span:step]
+        if tile.dtype == numpy.uint32:
+            tile = numpy.array(tile)
+        else:
+            tile = numpy.array(tile, dtype=numpy.float32)
+        DrawingContext.image_buffers.register(tile)
+        evicted_tiles = list()
+        with self.__tile_cache_lock:
+            evicted_tiles.append(self.__tile_cache.pop(key, None))
+            self.__tile_cache[key] = tile
+            while len(self.__tile_cache) > self.__cache_size:
+                evicted_tiles.append(self.__tile_cache.popitem(last=False)[1])
+        for evicted_tile in evicted_tiles:
+            if evicted_tile is not None:
+                DrawingContext.image_buffers.release(evicted_tile)
+        return tile
+
+    def get_tiles(self, image_rect: Geometry.IntRect, scale: float) -> typing.List[typing.Tuple[Geometry.IntRect, numpy.ndarray]]:
+        """Return the tiles covering image_rect for drawing at scale displayed pixels per image pixel.
+
+        Each tile is returned with the rect it covers in image coordinates.
+        """
+        height, width = self.shape
+        top, left = max(image_rect.top, 0), max(image_rect.left, 0)
+        bottom, right = min(image_rect.bottom, height), min(image_rect.right, width)
+        if bottom <= top or right <= left:
+            return list()
+        level = self.get_level_for_scale(scale)
+        span = self.__tile_size * 2 ** level
+        tiles = list()
+        for row in range(top // span, (bottom - 1) // span + 1):
+            for column in range(left // span, (right - 1) // span + 1):
+                tile_rect = Geometry.IntRect.from_tlbr(row * span, column * span, min((row + 1) * span, height),
+                                                       min((column + 1) * span, width))
+                tiles.append((tile_rect, self.get_tile(level, row, column)))
+        return tiles
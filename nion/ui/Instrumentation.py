@@ -0,0 +1,226 @@
+"""
+Render instrumentation: the time spent laying out, recording and rasterizing canvas items and root sections.
+
+Instrumentation is disabled until a sink is added; while disabled, instrumented code only checks the module level
+enabled flag. Events are emitted from the render threads, so sinks must be thread safe.
+
+Event kinds:
+    layout - laying out the children of a canvas item composition, including nested compositions.
+    record - recording the drawing commands of a canvas item, including its children.
+    submit - a section handed to the canvas widget; duration is the time since the first update request.
+    raster - rasterizing a section in the backend, if the backend reports it.
+    latency - the time from the first update request to the end of rasterization of a section.
+
+Set the environment variable NIONUI_RENDER_LOG to a file path to have the nionui command write all events to that file
+as JSON lines.
+"""
+
+# standard libraries
+import collections
+import json
+import threading
+import time
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+from nion.utils import Geometry
+
+if typing.TYPE_CHECKING:
+    from nion.ui import DrawingContext
+
+
+RenderEvent = collections.namedtuple("RenderEvent", ["kind", "name", "item_id", "section_id", "timestamp", "duration", "command_count"])
+
+RenderSummary = collections.namedtuple("RenderSummary", ["count", "total", "maximum", "command_count"])
+
+
+class RenderSink:
+    """Base class for sinks receiving render events. handle_event is called on the render threads."""
+
+    def handle_event(self, event: RenderEvent) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class RingBufferSink(RenderSink):
+    """Keep the most recent max_count events in memory."""
+
+    def __init__(self, max_count: int = 10000):
+        self.__events = collections.deque(maxlen=max_count)
+        self.__lock = threading.RLock()
+
+    def handle_event(self, event: RenderEvent) -> None:
+        with self.__lock:
+            self.__events.append(event)
+
+    @property
+    def events(self) -> typing.List[RenderEvent]:
+        with self.__lock:
+            return list(self.__events)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__events.clear()
+
+    def summarize(self) -> typing.Dict[typing.Tuple[str, str], RenderSummary]:
+        """Return a summary of the events for each (kind, name)."""
+        return summarize_events(self.events)
+
+
+class JSONLinesSink(RenderSink):
+    """Write each event as a line of JSON to a file path or text stream."""
+
+    def __init__(self, file: typing.Union[str, typing.TextIO]):
+        self.__owns_file = isinstance(file, str)
+        self.__file = open(file, "a") if self.__owns_file else file
+        self.__lock = threading.RLock()
+
+    def handle_event(self, event: RenderEvent) -> None:
+        line = json.dumps(event._asdict())
+        with self.__lock:
+            if self.__file:
+                self.__file.write(line + "\n")
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__owns_file and self.__file:
+                self.__file.close()
+            self.__file = None
+
+
+class OverlaySink(RenderSink):
+    """Keep rolling statistics of the events within the last window seconds for display over a canvas.
+
+    on_changed is called with no arguments when new events arrive, at most once per interval seconds. It is called on
+    the render threads.
+    """
+
+    def __init__(self, window: float = 2.0, interval: float = 0.5):
+        self.window = window
+        self.interval = interval
+        self.on_changed = None
+        self.__events = collections.deque()
+        self.__lock = threading.RLock()
+        self.__last_changed = 0.0
+
+    def handle_event(self, event: RenderEvent) -> None:
+        with self.__lock:
+            self.__events.append(event)
+            while self.__events and self.__events[0].timestamp < event.timestamp - self.window:
+                self.__events.popleft()
+            notify = event.timestamp - self.__last_changed >= self.interval
+            if notify:
+                self.__last_changed = event.timestamp
+        if notify and callable(self.on_changed):
+            self.on_changed()
+
+    def get_lines(self, max_count: int = 8) -> typing.List[str]:
+        """Return text lines for the (kind, name) pairs with the most total time in the window, highest first."""
+        with self.__lock:
+            events = list(self.__events)
+        summaries = summarize_events(events)
+        keys = sorted(summaries, key=lambda k: -summaries[k].total)[:max_count]
+        lines = list()
+        for kind, name in keys:
+            summary = summaries[(kind, name)]
+            lines.append(f"{kind} {name}: {summary.count}x {summary.total * 1000 / summary.count:.1f}ms "
+                         f"max {summary.maximum * 1000:.1f}ms")
+        return lines
+
+    def draw(self, drawing_context: "DrawingContext.DrawingContext", canvas_rect: Geometry.IntRect, max_count: int = 8) -> None:
+        lines = self.get_lines(max_count)
+        line_height = 14
+        with drawing_context.saver():
+            drawing_context.begin_path()
+            drawing_context.rect(canvas_rect.left, canvas_rect.top, canvas_rect.width, line_height * len(lines) + 8)
+            drawing_context.fill_style = "rgba(0, 0, 0, 0.6)"
+            drawing_context.fill()
+            drawing_context.font = "11px monospace"
+            drawing_context.text_baseline = "top"
+            drawing_context.fill_style = "#FFF"
+            for i, line in enumerate(lines):
+                drawing_context.fill_text(line, canvas_rect.left + 4, canvas_rect.top + 4 + i * line_height)
+
+
+def summarize_events(events: typing.Iterable[RenderEvent]) -> typing.Dict[typing.Tuple[str, str], RenderSummary]:
+    summaries = dict()
+    for event in events:
+        key = (event.kind, event.name)
+        summary = summaries.get(key)
+        if summary:
+            summaries[key] = RenderSummary(summary.count + 1, summary.total + event.duration,
+                                           max(summary.maximum, event.duration),
+                                           summary.command_count + event.command_count)
+        else:
+            summaries[key] = RenderSummary(1, event.duration, event.duration, event.command_count)
+    return summaries
+
+
+# instrumented code checks this flag before taking any measurement. it is true while any sink is installed.
+enabled = False
+
+_sinks = list()  # type: typing.List[RenderSink]
+_sinks_lock = threading.RLock()
+_pending_section_requests = dict()  # type: typing.Dict[typing.Tuple[int, int], typing.Tuple[typing.Optional[float], str, int]]
+
+
+def add_sink(sink: RenderSink) -> None:
+    global enabled, _sinks
+    with _sinks_lock:
+        _sinks = _sinks + [sink]
+        enabled = True
+
+
+def remove_sink(sink: RenderSink) -> None:
+    global enabled, _sinks
+    with _sinks_lock:
+        _sinks = [s for s in _sinks if s is not sink]
+        enabled = len(_sinks) > 0
+        if not enabled:
+            _pending_section_requests.clear()
+
+
+def emit(kind: str, name: str, duration: float, *, item_id: int = None, section_id: int = None,
+         command_count: int = 0) -> None:
+    event = RenderEvent(kind, name, item_id, section_id, time.perf_counter(), duration, command_count)
+    for sink in _sinks:
+        sink.handle_event(event)
+
+
+def emit_canvas_item_event(kind: str, canvas_item, start: float, command_count: int = 0) -> None:
+    """Emit an event for the canvas item lasting from start (a perf_counter value) until now."""
+    emit(kind, type(canvas_item).__name__, time.perf_counter() - start, item_id=id(canvas_item), command_count=command_count)
+
+
+def section_submitted(canvas_widget, section_id: int, canvas_item, request_time: typing.Optional[float],
+                      command_count: int) -> None:
+    """Note that the section drawn by canvas_item has been handed to the canvas widget.
+
+    request_time is the perf_counter value when the canvas item first requested an update, if known. It is kept until
+    the backend reports that the section has been rasterized, to measure the end to end latency. If the section is
+    submitted again before it is rasterized, the earliest request time is kept.
+    """
+    name = type(canvas_item).__name__
+    key = (id(canvas_widget), section_id)
+    with _sinks_lock:
+        pending_request = _pending_section_requests.get(key)
+        if pending_request and pending_request[0] is not None:
+            request_time = pending_request[0] if request_time is None else min(request_time, pending_request[0])
+        _pending_section_requests[key] = (request_time, name, id(canvas_item))
+    duration = time.perf_counter() - request_time if request_time is not None else 0.0
+    emit("submit", name, duration, item_id=id(canvas_item), section_id=section_id, command_count=command_count)
+
+
+def section_rendered(canvas_widget, section_id: int, duration: float, command_count: int) -> None:
+    """Note that the backend rasterized the section in duration seconds."""
+    with _sinks_lock:
+        request_time, name, item_id = _pending_section_requests.pop((id(canvas_widget), section_id), (None, "section", None))
+    emit("raster", name, duration, item_id=item_id, section_id=section_id, command_count=command_count)
+    if request_time is not None:
+        emit("latency", name, time.perf_counter() - request_time, item_id=item_id, section_id=section_id,
+             command_count=command_count)
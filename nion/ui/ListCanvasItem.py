@@ -364,7 +364,5 @@ class ListCanvasItem(CanvasItem.AbstractCanvasItem):
 
     def size_to_content(self) -> None:
         """Size the canvas item to the height of the items."""
-        new_sizing = self.copy_sizing()
-        new_sizing.minimum_height = self.__item_height * self.__delegate.item_count
-        new_sizing.maximum_height = self.__item_height * self.__delegate.item_count
-        self.update_sizing(new_sizing)
+        content_height = self.__item_height * self.__delegate.item_count
+        self.update_sizing(self.sizing.with_minimum_height(content_height).with_maximum_height(content_height))
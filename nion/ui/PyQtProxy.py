@@ -1,10 +1,15 @@
 import collections
+import concurrent.futures
 import copy
+import functools
 import logging
 import math
 import numpy
+import os
 import pkgutil
+import re
 import sys
+import threading
 import time
 import typing
 
@@ -1222,7 +1227,7 @@ def ParseFontString(font_string: str, display_scaling: float = 1.0) -> QtGui.QFo
                 family += current
     family_list.append(family.strip())
 
-    families = [f.lower() for f in QtGui.QFontDatabase().families()]
+    families = GetFontFamilies()
     for family in family_list:
         if family in families:
             font.setFamily(family)
@@ -1239,7 +1244,211 @@ def ParseFontString(font_string: str, display_scaling: float = 1.0) -> QtGui.QFo
     return font
 
 
+# parsing colors and fonts is expensive relative to drawing, so the results are cached for the process and shared
+# between sections and render threads. the cached QColor and QFont values must not be modified by callers.
+
+@functools.lru_cache(maxsize=None)
+def GetFontFamilies() -> typing.FrozenSet[str]:
+    """Return the lower case names of the available font families."""
+    return frozenset(f.lower() for f in QtGui.QFontDatabase().families())
+
+
+@functools.lru_cache(maxsize=4096)
+def GetFont(font_string: str, display_scaling: float = 1.0) -> QtGui.QFont:
+    """Return the font for the font string, shared with other callers."""
+    return ParseFontString(font_string, display_scaling)
+
+
+color_rgba_re = re.compile("^rgba\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+),\\s*([0-9.]+)\\)$")
+color_rgb_re = re.compile("^rgb\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+)\\)$")
+
+
+@functools.lru_cache(maxsize=4096)
+def ParseColorString(color_str: str) -> QtGui.QColor:
+    """Return the color for a css color string, shared with other callers."""
+    color_str = color_str.strip()
+    match = color_rgba_re.match(color_str)
+    if match:
+        return QtGui.QColor(int(match.group(1)), int(match.group(2)), int(match.group(3)), int(float(match.group(4)) * 255))
+    match = color_rgb_re.match(color_str)
+    if match:
+        return QtGui.QColor(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    return QtGui.QColor(color_str)
+
+
+TextRun = collections.namedtuple("TextRun", ["path", "width", "ascent", "height", "x_height"])
+
+text_run_cache = collections.OrderedDict()
+text_run_cache_lock = threading.RLock()
+text_run_cache_size = 8192
+
+
+def GetTextRun(font: QtGui.QFont, text: str) -> TextRun:
+    """Return the glyph outlines and metrics of the text with its baseline origin at 0, 0.
+
+    Shaping text and converting the glyphs to outlines is expensive; repeated labels such as axis ticks and list rows
+    reuse the cached run and only translate it. The cache is shared between render threads and evicts the least
+    recently used runs.
+    """
+    key = (font.key(), text)
+    with text_run_cache_lock:
+        text_run = text_run_cache.get(key)
+        if text_run is not None:
+            text_run_cache.move_to_end(key)
+            return text_run
+    fm = QtGui.QFontMetrics(font)
+    path = QtGui.QPainterPath()
+    path.addText(0, 0, font, text)
+    text_run = TextRun(path, fm.width(text), fm.ascent(), fm.height(), fm.xHeight())
+    with text_run_cache_lock:
+        text_run_cache[key] = text_run
+        while len(text_run_cache) > text_run_cache_size:
+            text_run_cache.popitem(last=False)
+    return text_run
+
+
+def ClearPaintCaches() -> None:
+    """Clear the color, font and text run caches. Call after adding application fonts."""
+    GetFontFamilies.cache_clear()
+    GetFont.cache_clear()
+    ParseColorString.cache_clear()
+    with text_run_cache_lock:
+        text_run_cache.clear()
+
+
+paint_executor = None  # type: typing.Optional[concurrent.futures.ThreadPoolExecutor]
+paint_executor_lock = threading.RLock()
+
+
+def GetPaintExecutor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the worker pool for off-screen painting, shared by the process and made on first use."""
+    global paint_executor
+    with paint_executor_lock:
+        if not paint_executor:
+            paint_executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="paint")
+        return paint_executor
+
+
+class QImageArrayBase:
+    """The base of an array using the pixels of a QImage, keeping the image alive as long as the array."""
+
+    def __init__(self, image: QtGui.QImage, array: numpy.ndarray):
+        self.image = image
+        self.__array_interface__ = array.__array_interface__
+
+
+def GetImageArray(image: QtGui.QImage) -> numpy.ndarray:
+    """Return the pixels of the 32 bit image as a uint32 array using the image memory, without copying them."""
+    b = image.bits()
+    # sip.voidptr must know size to support python buffer interface
+    if hasattr(b, "setsize"):
+        b.setsize(image.size().width() * image.size().height() * 4)
+    array = numpy.frombuffer(b, numpy.uint32).reshape((image.size().height(), image.size().width()))
+    return numpy.asarray(QImageArrayBase(image, array))
+
+
+def PaintRGBA(commands: typing.Sequence[typing.Sequence], width: int, height: int, display_scaling: float = 1.0) -> numpy.ndarray:
+    """Paint the drawing context commands to a premultiplied ARGB32 image packed as uint32.
+
+    The painter draws in the premultiplied format, so the image is returned without a format conversion or copy.
+    Painting only uses the shared color, font and text run caches and the display_scaling passed in, so it may run on
+    any thread; get the display scaling on the main thread with GetDisplayScaling.
+    """
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtGui.QColor(0, 0, 0, 0))
+    image_cache = dict()
+    drawing_commands = MakeDrawingCommands(commands)
+    painter = QtGui.QPainter()
+    painter.begin(image)
+    try:
+        PaintCommands(painter, drawing_commands, image_cache, display_scaling)
+    finally:
+        painter.end()
+    return GetImageArray(image)
+
+
+def ReadImage(filename: str) -> typing.Optional[numpy.ndarray]:
+    """Read the image file to a premultiplied ARGB32 image packed as uint32. Return None if it cannot be read.
+
+    Images already in the premultiplied format are returned without a conversion or copy. May run on any thread.
+    """
+    reader = QtGui.QImageReader(filename)
+    if reader.canRead():
+        image = reader.read()
+        if not image.isNull():
+            if image.format() != QtGui.QImage.Format_ARGB32_Premultiplied:
+                image = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+            return GetImageArray(image)
+    return None
+
+
+# decoded images are cached by path and modification time, evicting the least recently used images once the cached
+# arrays exceed the size limit. the cached arrays are read only since they are shared between callers.
+
+DecodedImageCacheEntry = collections.namedtuple("DecodedImageCacheEntry", ["mtime", "array"])
+
+decoded_image_cache = collections.OrderedDict()
+decoded_image_cache_lock = threading.RLock()
+decoded_image_cache_nbytes = 0
+decoded_image_cache_size_limit = 256 * 1024 * 1024
+
+image_read_executor = None  # type: typing.Optional[concurrent.futures.ThreadPoolExecutor]
+image_read_executor_lock = threading.RLock()
+image_read_executor_max_workers = 4
+
+
+def GetImageReadExecutor() -> concurrent.futures.ThreadPoolExecutor:
+    """Return the worker pool for reading image files, shared by the process and made on first use.
+
+    The pool is small since reading is limited by the disk as much as by decoding.
+    """
+    global image_read_executor
+    with image_read_executor_lock:
+        if not image_read_executor:
+            max_workers = min(image_read_executor_max_workers, os.cpu_count() or 1)
+            image_read_executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image_read")
+        return image_read_executor
+
+
+def GetDecodedImage(filename: str) -> typing.Optional[numpy.ndarray]:
+    """Return the read only image for the file from the decoded image cache, reading it if it is missing or stale."""
+    global decoded_image_cache_nbytes
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except OSError:
+        mtime = None  # Qt resources do not change
+    with decoded_image_cache_lock:
+        entry = decoded_image_cache.get(filename)
+        if entry is not None and entry.mtime == mtime:
+            decoded_image_cache.move_to_end(filename)
+            return entry.array
+    array = ReadImage(filename)
+    if array is None:
+        return None
+    array.flags.writeable = False
+    with decoded_image_cache_lock:
+        entry = decoded_image_cache.pop(filename, None)
+        if entry is not None:
+            decoded_image_cache_nbytes -= entry.array.nbytes
+        if array.nbytes <= decoded_image_cache_size_limit:
+            decoded_image_cache[filename] = DecodedImageCacheEntry(mtime, array)
+            decoded_image_cache_nbytes += array.nbytes
+            while decoded_image_cache_nbytes > decoded_image_cache_size_limit:
+                _, entry = decoded_image_cache.popitem(last=False)
+                decoded_image_cache_nbytes -= entry.array.nbytes
+    return array
+
+
+def ClearDecodedImageCache() -> None:
+    """Clear the decoded image cache."""
+    global decoded_image_cache_nbytes
+    with decoded_image_cache_lock:
+        decoded_image_cache.clear()
+        decoded_image_cache_nbytes = 0
+
+
 def imageFromRGBA(array: numpy.ndarray) -> QtGui.QImage:
+    """Return an image wrapping the contiguous array without copying it. The array must outlive the image."""
     if array is not None:
         return QtGui.QImage(array, array.shape[1], array.shape[0], QtGui.QImage.Format_ARGB32)
     else:
@@ -1286,7 +1495,23 @@ def rescale(data: numpy.ndarray, rect, context_scaling) -> numpy.ndarray:
 
 
 CanvasDrawingCommand = collections.namedtuple("CanvasDrawingCommand", ["command", "args"])
-PaintImageCacheEntry = collections.namedtuple("PaintImageCacheEntry", ["image_id", "used", "image"])
+
+
+def MakeDrawingCommands(commands: typing.Sequence[typing.Sequence]) -> typing.List[CanvasDrawingCommand]:
+    """Make canvas drawing commands from drawing context commands, resolving color styles in advance."""
+    drawing_commands = list()
+    for command in commands:
+        cmd = command[0]
+        if cmd == "fillStyle" or cmd == "strokeStyle":
+            drawing_commands.append(CanvasDrawingCommand(cmd, (ParseColorString(command[1]), )))
+        else:
+            drawing_commands.append(CanvasDrawingCommand(cmd, command[1:]))
+    return drawing_commands
+
+
+# key identifies how the image was made from the array (the destination size and, for data, the display limits and
+# color map); array keeps the buffers wrapped by the image alive.
+PaintImageCacheEntry = collections.namedtuple("PaintImageCacheEntry", ["image_id", "used", "image", "key", "array"])
 LayerCacheEntry = collections.namedtuple("LayerCacheEntry", ["layer_seed", "layer_image", "layer_rect"])
 
 timer_map = dict()
@@ -1298,7 +1523,7 @@ RenderedTimestamp = collections.namedtuple("RenderedTimestamp", ["transform", "t
 
 
 def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCommand],
-                  image_cache: typing.MutableMapping[int, PaintImageCacheEntry], display_scaling: float = 1.0, *,
+                  image_cache: typing.MutableMapping[int, PaintImageCacheEntry], display_scaling: typing.Optional[float] = None, *,
                   layer_cache: typing.MutableMapping[int, LayerCacheEntry] = None,
                   section_id: int = 0) -> typing.List[RenderedTimestamp]:
     global timer_map
@@ -1309,13 +1534,15 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
 
     rendered_timestamps = list()
 
-    display_scaling = GetDisplayScaling()
+    # the display scaling must be passed in when painting off the main thread.
+    if display_scaling is None:
+        display_scaling = GetDisplayScaling()
 
     path = QtGui.QPainterPath()
 
     if image_cache:
         for image_id, entry in image_cache.items():
-            entry.used = False
+            image_cache[image_id] = entry._replace(used=False)
 
     fill_color = QtGui.QColor(QtCore.Qt.transparent)
     fill_gradient = -1
@@ -1348,6 +1575,7 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
     painter_stack = list()
     layer_image_stack = list()
     layer_skip_stack = list()
+    layer_update_skip = 0  # depth of the layer update commands being skipped
 
     for command in commands:
         args = command.args
@@ -1358,6 +1586,13 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
         if layer_skip and cmd != "end_layer" and cmd != "begin_layer":
             continue
 
+        if layer_update_skip:
+            if cmd == "begin_layer_update":
+                layer_update_skip += 1
+            elif cmd == "end_layer_update":
+                layer_update_skip -= 1
+            continue
+
         if cmd == "save":
             stack.append((fill_color, fill_gradient, line_color, line_width, line_dash, line_cap, line_join, text_font, text_baseline, text_align, context_scaling_x, context_scaling_y))
             painter.save()
@@ -1501,41 +1736,43 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
             timer.restart()
         elif cmd == "image":
             image_id = args[3]
-
-            if image_cache and image_id in image_cache:
-                image_cache[image_id].used = True
-                image = image_cache[image_id].image
-                destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
-                painter.drawImage(destination_rect, image)
+            destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
+            context_scaling = min(context_scaling_x, context_scaling_y)
+            image_key = ((destination_rect.size() * context_scaling).toSize(), )
+            entry = image_cache.get(image_id) if image_cache is not None else None
+
+            if entry and entry.key == image_key:
+                image_cache[image_id] = entry._replace(used=True)
+                painter.drawImage(destination_rect, entry.image)
             else:
                 image = QtGui.QImage()
 
-                # Grab the ndarray
+                # Grab the ndarray; regions of larger images are copied so the image can wrap them.
                 array = args[2]
                 if array is not None:
+                    array = numpy.ascontiguousarray(array)
                     image = imageFromRGBA(array)
 
                 if not image.isNull():
-                    destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
-                    context_scaling = min(context_scaling_x, context_scaling_y)
                     scaling = max(destination_rect.height() / image.height(), destination_rect.width() / image.width()) * context_scaling
                     if scaling < 0.75:
                         image = image.scaled((destination_rect.size() * context_scaling).toSize(), QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
                     painter.drawImage(destination_rect, image)
-                    if image_cache:
-                        image_cache[image_id] = PaintImageCacheEntry(image_id, True, image)
+                    if image_cache is not None:
+                        image_cache[image_id] = PaintImageCacheEntry(image_id, True, image, image_key, array)
         elif cmd == "data":
             image_id = args[3]
-
-            if image_cache and image_id in image_cache:
-                image_cache[image_id].used = True
-                image = image_cache[image_id].image
-                destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
-                painter.drawImage(destination_rect, image)
+            destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
+            context_scaling = min(context_scaling_x, context_scaling_y)
+            image_key = ((destination_rect.size() * context_scaling).toSize(), args[8], args[9], args[11])
+            entry = image_cache.get(image_id) if image_cache is not None else None
+
+            if entry and entry.key == image_key:
+                image_cache[image_id] = entry._replace(used=True)
+                painter.drawImage(destination_rect, entry.image)
             else:
                 image = QtGui.QImage()
-                destination_rect = QtCore.QRectF(QtCore.QPointF(args[4] * display_scaling, args[5] * display_scaling), QtCore.QSizeF(args[6] * display_scaling, args[7] * display_scaling))
-                context_scaling = min(context_scaling_x, context_scaling_y)
+                data = None
 
                 # Grab the ndarray
                 array = args[2]
@@ -1552,8 +1789,8 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
 
                 if not image.isNull():
                     painter.drawImage(destination_rect, image)
-                    if image_cache:
-                        image_cache[image_id] = PaintImageCacheEntry(image_id, True, image)
+                    if image_cache is not None:
+                        image_cache[image_id] = PaintImageCacheEntry(image_id, True, image, image_key, data)
         elif cmd == "stroke":
             pen = QtGui.QPen(line_color)
             pen.setWidthF(line_width * display_scaling)
@@ -1567,41 +1804,31 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
             brush = QtGui.QBrush(gradients[fill_gradient]) if fill_gradient >= 0 else QtGui.QBrush(fill_color)
             painter.fillPath(path, brush)
         elif cmd == "fillStyle":
-            color_arg = args[0].strip()
-            re1 = QtCore.QRegExp("^rgba\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+),\\s*([0-9.]+)\\)$")
-            re2 = QtCore.QRegExp("^rgb\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+)\\)$")
-            pos1 = re1.indexIn(color_arg)
-            pos2 = re2.indexIn(color_arg)
-            if pos1 > -1:
-                fill_color = QtGui.QColor(int(re1.cap(1)), int(re1.cap(2)), int(re1.cap(3)), int(float(re1.cap(4)) * 255))
-            elif pos2 > -1:
-                fill_color = QtGui.QColor(int(re2.cap(1)), int(re2.cap(2)), int(re2.cap(3)))
-            else:
-                fill_color = QtGui.QColor(color_arg)
+            # the color may have been resolved when the commands were made; see MakeDrawingCommands.
+            fill_color = args[0] if isinstance(args[0], QtGui.QColor) else ParseColorString(args[0])
             fill_gradient = -1
         elif cmd == "fillStyleGradient":
             fill_gradient = args[0]
         elif cmd == "fillText" or cmd == "strokeText":
             text = args[0]
             text_pos = QtCore.QPointF(args[1] * display_scaling, args[2] * display_scaling)
-            fm = QtGui.QFontMetrics(text_font)
-            text_width = fm.width(text)
+            text_run = GetTextRun(text_font, text)
+            text_width = text_run.width
             if text_align == 2 or text_align == 5:  # end or right
                 text_pos.setX(text_pos.x() - text_width)
             elif text_align == 4:  # center
                 text_pos.setX(text_pos.x() - text_width*0.5)
             if text_baseline == 1:  # top
-                text_pos.setY(text_pos.y() + fm.ascent())
+                text_pos.setY(text_pos.y() + text_run.ascent)
             elif text_baseline == 2:  # hanging
-                text_pos.setY(text_pos.y() + 2 * fm.ascent() - fm.height())
+                text_pos.setY(text_pos.y() + 2 * text_run.ascent - text_run.height)
             elif text_baseline == 3:  # middle
-                text_pos.setY(text_pos.y() + fm.xHeight() * 0.5)
+                text_pos.setY(text_pos.y() + text_run.x_height * 0.5)
             elif text_baseline == 4 or text_baseline == 5:  # alphabetic or ideographic
                 text_pos.setY(text_pos.y())
-            elif text_baseline == 5:  # bottom
-                text_pos.setY(text_pos.y() + fm.ascent() - fm.height())
-            path = QtGui.QPainterPath()
-            path.addText(text_pos, text_font, text)
+            elif text_baseline == 6:  # bottom
+                text_pos.setY(text_pos.y() + text_run.ascent - text_run.height)
+            path = text_run.path.translated(text_pos)
             if cmd == "fillText":
                 brush = QtGui.QBrush(gradients[fill_gradient]) if fill_gradient >= 0 else QtGui.QBrush(fill_color)
                 painter.fillPath(path, brush)
@@ -1612,7 +1839,7 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
                 pen.setCapStyle(line_cap)
                 painter.strokePath(path, pen)
         elif cmd == "font":
-            text_font = ParseFontString(args[0], display_scaling)
+            text_font = GetFont(args[0], display_scaling)
         elif cmd == "textAlign":
             if args[0] == "start":
                 text_align = 1
@@ -1638,17 +1865,7 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
             if args[0] == "bottom":
                 text_baseline = 6
         elif cmd == "strokeStyle":
-            color_arg = args[0].strip()
-            re1 = QtCore.QRegExp("^rgba\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+),\\s*([0-9.]+)\\)$")
-            re2 = QtCore.QRegExp("^rgb\\(([0-9]+),\\s*([0-9]+),\\s*([0-9]+)\\)$")
-            pos1 = re1.indexIn(color_arg)
-            pos2 = re2.indexIn(color_arg)
-            if pos1 > -1:
-                line_color = QtGui.QColor(int(re1.cap(1)), int(re1.cap(2)), int(re1.cap(3)), int(float(re1.cap(4)) * 255))
-            elif pos2 > -1:
-                line_color = QtGui.QColor(int(re2.cap(1)), int(re2.cap(2)), int(re2.cap(3)))
-            else:
-                line_color = QtGui.QColor(color_arg)
+            line_color = args[0] if isinstance(args[0], QtGui.QColor) else ParseColorString(args[0])
         elif cmd == "lineDash":
             line_dash = args[0]
         elif cmd == "lineWidth":
@@ -1670,7 +1887,7 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
         elif cmd == "gradient":
             gradients[args[0]] = QtGui.QLinearGradient(args[3] * display_scaling, args[4] * display_scaling, args[3] * display_scaling + args[5] * display_scaling, args[4] * display_scaling + args[6] * display_scaling)
         elif cmd == "colorStop":
-            gradients[args[0]].setColorAt(args[1], QtGui.QColor(args[2]))
+            gradients[args[0]].setColorAt(args[1], ParseColorString(args[2]))
         elif cmd == "sleep":
             duration = args[0] * 1000000
             QtCore.QThread.usleep(duration)
@@ -1719,6 +1936,28 @@ def PaintCommands(painter: QtGui.QPainter, commands: typing.List[CanvasDrawingCo
                     painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.TextAntialiasing | QtGui.QPainter.HighQualityAntialiasing)
                     painter.translate(layer_rect.left(), layer_rect.top())
             layers_used.add(layer_id)
+        elif cmd == "begin_layer_update":
+            # the update commands follow begin_layer directly. if the cached layer image is at the base seed, draw the
+            # update into a copy of it, clipped to the update rect, and skip the complete layer commands. otherwise
+            # skip the update commands and draw the complete layer commands.
+            layer_id = int(args[0])
+            base_seed = int(args[1])
+            layer_cache_entry = layer_cache.get(layer_id) if layer_cache is not None else None
+            if layer_image is not None and layer_cache_entry and layer_cache_entry.layer_seed == base_seed and layer_cache_entry.layer_image.size() == layer_image.size():
+                painter.end()
+                layer_image = layer_cache_entry.layer_image.copy()
+                painter = QtGui.QPainter(layer_image)
+                painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.TextAntialiasing | QtGui.QPainter.HighQualityAntialiasing)
+                painter.translate(layer_cache_entry.layer_rect.left(), layer_cache_entry.layer_rect.top())
+                update_rect = QtCore.QRectF(args[3] * display_scaling, args[2] * display_scaling, args[5] * display_scaling, args[4] * display_scaling)
+                painter.setClipRect(update_rect)
+                painter.setCompositionMode(QtGui.QPainter.CompositionMode_Clear)
+                painter.fillRect(update_rect, QtCore.Qt.transparent)
+                painter.setCompositionMode(QtGui.QPainter.CompositionMode_SourceOver)
+            else:
+                layer_update_skip = 1
+        elif cmd == "end_layer_update":
+            layer_skip = True
         elif cmd == "end_layer":
             layer_id = int(args[0])
             layer_seed = int(args[1])
@@ -1845,11 +2084,15 @@ class PyCanvas(QtWidgets.QWidget):
             image.fill(QtGui.QColor(0, 0, 0, 0))
             painter = QtGui.QPainter()
             painter.begin(image)
+            start = time.perf_counter()
             try:
                 painter.setRenderHints(QtGui.QPainter.Antialiasing | QtGui.QPainter.TextAntialiasing | QtGui.QPainter.HighQualityAntialiasing)
                 rendered_timestamps = PaintCommands(painter, commands, section.image_cache, layer_cache=section.layer_cache, section_id=section_id)
             finally:
                 painter.end()
+            section_rendered = getattr(self.object, "sectionRendered", None)
+            if section_rendered:
+                section_rendered(section_id, time.perf_counter() - start, len(commands))
 
             with QtCore.QMutexLocker(section.mutex):
                 section.image = image
@@ -2426,16 +2669,12 @@ class PyQtProxy:
 
     def Canvas_draw(self, canvas: PyCanvas, commands: list, storage) -> None:
         assert canvas is not None
-        drawing_commands = list()
-        for command in commands:
-            drawing_commands.append(CanvasDrawingCommand(command[0], command[1:]))
+        drawing_commands = MakeDrawingCommands(commands)
         canvas.setCommands(drawing_commands)
 
     def Canvas_drawSection(self, canvas: PyCanvas, section_id, commands: list, storage, left, top, width, height) -> None:
         assert canvas is not None
-        drawing_commands = list()
-        for command in commands:
-            drawing_commands.append(CanvasDrawingCommand(command[0], command[1:]))
+        drawing_commands = MakeDrawingCommands(commands)
         canvas.setSectionCommands(section_id, drawing_commands, left, top, width, height)
 
     def Canvas_grabMouse(self, canvas: PyCanvas, gx: int, gy: int) -> None:
@@ -2613,7 +2852,7 @@ class PyQtProxy:
     def Core_getFontMetrics(self, font_str: str, text: str) -> typing.Tuple[int, int, int, int, int]:
         text = text if text else str()
         display_scaling = GetDisplayScaling()
-        font = ParseFontString(font_str, display_scaling)
+        font = GetFont(font_str, display_scaling)
         font_metrics = QtGui.QFontMetrics(font)
         return font_metrics.width(text) / display_scaling, font_metrics.height() / display_scaling, font_metrics.ascent() / display_scaling, font_metrics.descent() / display_scaling, font_metrics.leading() / display_scaling
 
@@ -2644,16 +2883,15 @@ class PyQtProxy:
         return QtCore.QUrl.fromLocalFile(path).toString()
 
     def Core_readImageToBinary(self, filename: str) -> typing.Optional[numpy.ndarray]:
-        reader = QtGui.QImageReader(filename)
-        if reader.canRead():
-            image = reader.read()
-            if image.format() != QtGui.QImage.Format_ARGB32_Premultiplied:
-                image = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
-                b = image.bits()
-                # sip.voidptr must know size to support python buffer interface
-                b.setsize(image.size().width() * image.size().height() * 4)
-                return numpy.copy(numpy.frombuffer(b, numpy.uint32).reshape((image.size().height(), image.size().width())))
-        return None
+        return ReadImage(filename)
+
+    def Core_readImagesToBinary(self, filenames: typing.Sequence[str]) -> typing.List[concurrent.futures.Future]:
+        """Read each image file on the image read worker pool, returning a future for each file.
+
+        The results are shared, read only arrays from the decoded image cache.
+        """
+        image_read_executor = GetImageReadExecutor()
+        return [image_read_executor.submit(GetDecodedImage, filename) for filename in filenames]
 
     def Core_setApplicationInfo(self, application_name: str, organization_name: str, organization_domain: str):
         QtWidgets.QApplication.setApplicationName(application_name)
@@ -2667,7 +2905,7 @@ class PyQtProxy:
     def Core_truncateToWidth(self, font_str: str, text: str, pixel_width: int, mode: int) -> str:
         text = text if text else str()
         display_scaling = GetDisplayScaling()
-        font = ParseFontString(font_str, display_scaling)
+        font = GetFont(font_str, display_scaling)
         font_metrics = QtGui.QFontMetrics(font)
         mapping = {
             0: QtCore.Qt.ElideLeft,
@@ -2941,32 +3179,17 @@ class PyQtProxy:
         global app
         assert app.thread() == QtCore.QThread.currentThread()
         assert drawing_context is not None
-        drawing_commands = list()
-        for command in commands:
-            drawing_commands.append(CanvasDrawingCommand(command[0], command[1:]))
+        drawing_commands = MakeDrawingCommands(commands)
         drawing_context.paintCommands(drawing_commands)
 
     def DrawingContext_paintRGBA(self, commands: list, width: int, height: int) -> typing.Optional[numpy.ndarray]:
-        image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32)
-        image.fill(QtGui.QColor(0,0,0,0))
-        image_cache = dict()
-        drawing_commands = list()
-        for command in commands:
-            drawing_commands.append(CanvasDrawingCommand(command[0], command[1:]))
-        painter = QtGui.QPainter()
-        painter.begin(image)
-        try:
-            PaintCommands(painter, drawing_commands, image_cache, 1.0)
-        finally:
-            painter.end()
-        if image.format() != QtGui.QImage.Format_ARGB32_Premultiplied:
-            image = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
-            b = image.bits()
-            # sip.voidptr must know size to support python buffer interface
-            if hasattr(b, "setsize"):
-                b.setsize(image.size().width() * image.size().height() * 4)
-            return numpy.copy(numpy.frombuffer(b, numpy.uint32).reshape((image.size().height(), image.size().width())))
-        return None
+        return PaintRGBA(commands, width, height, GetDisplayScaling())
+
+    def DrawingContext_paintRGBAImages(self, jobs: typing.Sequence[typing.Tuple[list, int, int]]) -> typing.List[concurrent.futures.Future]:
+        """Paint each (commands, width, height) job on the paint worker pool, returning a future for each job."""
+        paint_executor = GetPaintExecutor()
+        display_scaling = GetDisplayScaling()
+        return [paint_executor.submit(PaintRGBA, commands, width, height, display_scaling) for commands, width, height in jobs]
 
     def GroupBoxWidget_setTitle(self, group_box: QtWidgets.QGroupBox, title: str) -> None:
         global app
@@ -3,10 +3,9 @@ Provides a user interface object that can render to an Qt host.
 """
 
 # standard libraries
-import binascii
+import concurrent.futures
 import copy
 import os
-import pickle
 import sys
 import time
 import typing
@@ -45,9 +44,40 @@ def parse_color(color: str) -> typing.Tuple[int, int, int, int]:
     else:
         return 255, 255, 255, 255
 
+def map_future(future: concurrent.futures.Future, fn: typing.Callable[[typing.Any], typing.Any]) -> concurrent.futures.Future:
+    """Return a future for fn applied to the result of future. Cancelling either future cancels the other."""
+    mapped_future = concurrent.futures.Future()  # type: concurrent.futures.Future
+
+    def future_done(future: concurrent.futures.Future) -> None:
+        if future.cancelled():
+            mapped_future.cancel()
+        elif mapped_future.set_running_or_notify_cancel():
+            try:
+                mapped_future.set_result(fn(future.result()))
+            except Exception as e:
+                mapped_future.set_exception(e)
+
+    def mapped_future_done(mapped_future: concurrent.futures.Future) -> None:
+        if mapped_future.cancelled():
+            future.cancel()
+
+    mapped_future.add_done_callback(mapped_future_done)
+    future.add_done_callback(future_done)
+    return mapped_future
+
+
 class QtKeyboardModifiers(UserInterface.KeyboardModifiers):
+    """Keyboard modifiers from a raw Qt modifiers bitmask.
+
+    Instances are immutable and shared; use get_keyboard_modifiers to get the instance for a bitmask.
+    """
+
     def __init__(self, raw_modifiers):
-        self.raw_modifiers = int(raw_modifiers)  # convert from internal Qt type to int (pyqt)
+        self.__raw_modifiers = int(raw_modifiers)  # convert from internal Qt type to int (pyqt)
+
+    @property
+    def raw_modifiers(self) -> int:
+        return self.__raw_modifiers
 
     def __str__(self):
         return "shift:{} control:{} alt:{} option:{} meta:{}".format(self.shift, self.control, self.alt, self.option, self.meta)
@@ -116,10 +146,15 @@ class QtKeyboardModifiers(UserInterface.KeyboardModifiers):
 
 
 class QtKey(UserInterface.Key):
+    """A key with its text, raw Qt key code and modifiers.
+
+    Instances are immutable and shared; use get_key to get the instance for a text, key code, and modifiers.
+    """
+
     def __init__(self, text, key, raw_modifiers):
         self.__text = text
         self.__key = key
-        self.__modifiers = QtKeyboardModifiers(raw_modifiers)
+        self.__modifiers = get_keyboard_modifiers(raw_modifiers)
 
     @property
     def text(self) -> str:
@@ -202,6 +237,36 @@ class QtKey(UserInterface.Key):
         return self.key == 0x1000017
 
 
+_keyboard_modifiers_map: typing.Dict[int, QtKeyboardModifiers] = dict()
+_key_map: typing.Dict[typing.Tuple[str, int, int], QtKey] = dict()
+_key_map_max_size = 1024
+
+
+def get_keyboard_modifiers(raw_modifiers) -> QtKeyboardModifiers:
+    """Return the shared keyboard modifiers for the raw Qt modifiers bitmask.
+
+    Input callbacks use this so that pointer input does not allocate a modifiers object for each event.
+    """
+    raw_modifiers = int(raw_modifiers)
+    keyboard_modifiers = _keyboard_modifiers_map.get(raw_modifiers)
+    if keyboard_modifiers is None:
+        # the number of distinct bitmasks is small, so the map is not bounded.
+        keyboard_modifiers = _keyboard_modifiers_map.setdefault(raw_modifiers, QtKeyboardModifiers(raw_modifiers))
+    return keyboard_modifiers
+
+
+def get_key(text, key, raw_modifiers) -> QtKey:
+    """Return the shared key for the text, raw Qt key code, and raw Qt modifiers bitmask."""
+    key_tuple = (text, int(key), int(raw_modifiers))
+    qt_key = _key_map.get(key_tuple)
+    if qt_key is None:
+        # text can be arbitrary (input methods), so bound the map by starting over when it is full.
+        if len(_key_map) >= _key_map_max_size:
+            _key_map.clear()
+        qt_key = _key_map.setdefault(key_tuple, QtKey(text, key, raw_modifiers))
+    return qt_key
+
+
 class QtMimeData(UserInterface.MimeData):
     def __init__(self, proxy, mime_data=None):
         self.proxy = proxy
@@ -1195,7 +1260,7 @@ class QtLineEditWidgetBehavior(QtWidgetBehavior):
     def keyPressed(self, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_key_pressed):
-            return self.on_key_pressed(QtKey(text, key, raw_modifiers))
+            return self.on_key_pressed(get_key(text, key, raw_modifiers))
         return False
 
     def textEdited(self, text):
@@ -1336,7 +1401,7 @@ class QtTextEditWidgetBehavior(QtWidgetBehavior):
     def keyPressed(self, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_key_pressed):
-            return self.on_key_pressed(QtKey(text, key, raw_modifiers))
+            return self.on_key_pressed(get_key(text, key, raw_modifiers))
         return False
 
     def insertFromMimeData(self, raw_mime_data):
@@ -1371,6 +1436,7 @@ class QtCanvasWidgetBehavior(QtWidgetBehavior):
         self.on_drop = None
         self.on_tool_tip = None
         self.on_pan_gesture = None
+        self.on_section_rendered = None
         self.__focusable = False
 
     def close(self):
@@ -1392,6 +1458,7 @@ class QtCanvasWidgetBehavior(QtWidgetBehavior):
         self.on_drop = None
         self.on_tool_tip = None
         self.on_pan_gesture = None
+        self.on_section_rendered = None
         super().close()
 
     def _set_canvas_item(self, canvas_item):
@@ -1454,31 +1521,31 @@ class QtCanvasWidgetBehavior(QtWidgetBehavior):
     def mouseClicked(self, x, y, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_mouse_clicked):
-            self.on_mouse_clicked(x, y, QtKeyboardModifiers(raw_modifiers))
+            self.on_mouse_clicked(x, y, get_keyboard_modifiers(raw_modifiers))
 
     def mouseDoubleClicked(self, x, y, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_mouse_double_clicked):
-            self.on_mouse_double_clicked(x, y, QtKeyboardModifiers(raw_modifiers))
+            self.on_mouse_double_clicked(x, y, get_keyboard_modifiers(raw_modifiers))
 
     def mousePressed(self, x, y, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_mouse_pressed):
-            self.on_mouse_pressed(x, y, QtKeyboardModifiers(raw_modifiers))
+            self.on_mouse_pressed(x, y, get_keyboard_modifiers(raw_modifiers))
 
     def mouseReleased(self, x, y, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_mouse_released):
-            self.on_mouse_released(x, y, QtKeyboardModifiers(raw_modifiers))
+            self.on_mouse_released(x, y, get_keyboard_modifiers(raw_modifiers))
 
     def mousePositionChanged(self, x, y, raw_modifiers):
         if callable(self.on_mouse_position_changed):
-            self.on_mouse_position_changed(x, y, QtKeyboardModifiers(raw_modifiers))
+            self.on_mouse_position_changed(x, y, get_keyboard_modifiers(raw_modifiers))
 
     def grabbedMousePositionChanged(self, dx, dy, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_grabbed_mouse_position_changed):
-            self.on_grabbed_mouse_position_changed(dx, dy, QtKeyboardModifiers(raw_modifiers))
+            self.on_grabbed_mouse_position_changed(dx, dy, get_keyboard_modifiers(raw_modifiers))
 
     def wheelChanged(self, x, y, dx, dy, is_horizontal):
         self._register_ui_activity()
@@ -1493,13 +1560,13 @@ class QtCanvasWidgetBehavior(QtWidgetBehavior):
     def keyPressed(self, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_key_pressed):
-            return self.on_key_pressed(QtKey(text, key, raw_modifiers))
+            return self.on_key_pressed(get_key(text, key, raw_modifiers))
         return False
 
     def keyReleased(self, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_key_released):
-            return self.on_key_released(QtKey(text, key, raw_modifiers))
+            return self.on_key_released(get_key(text, key, raw_modifiers))
         return False
 
     def dragEnterEvent(self, raw_mime_data):
@@ -1538,6 +1605,12 @@ class QtCanvasWidgetBehavior(QtWidgetBehavior):
             return self.on_pan_gesture(delta_x, delta_y)
         return False
 
+    def sectionRendered(self, section_id: int, duration: float, command_count: int) -> None:
+        # called on the backend render thread.
+        on_section_rendered = self.on_section_rendered
+        if callable(on_section_rendered):
+            on_section_rendered(section_id, duration, command_count)
+
 
 class QtTreeWidgetBehavior(QtWidgetBehavior):
 
@@ -1608,7 +1681,7 @@ class QtTreeWidgetBehavior(QtWidgetBehavior):
     def keyPressed(self, indexes, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_key_pressed):
-            return self.on_key_pressed(indexes, QtKey(text, key, raw_modifiers))
+            return self.on_key_pressed(indexes, get_key(text, key, raw_modifiers))
         return False
 
     def treeItemChanged(self, index, parent_row, parent_id):
@@ -1624,7 +1697,7 @@ class QtTreeWidgetBehavior(QtWidgetBehavior):
     def treeItemKeyPressed(self, index, parent_row, parent_id, text, key, raw_modifiers):
         self._register_ui_activity()
         if callable(self.on_tree_item_key_pressed):
-            return self.on_tree_item_key_pressed(index, parent_row, parent_id, QtKey(text, key, raw_modifiers))
+            return self.on_tree_item_key_pressed(index, parent_row, parent_id, get_key(text, key, raw_modifiers))
         return False
 
     def treeItemClicked(self, index, parent_row, parent_id):
@@ -1761,9 +1834,10 @@ class QtMenu(UserInterface.Menu):
 
 class QtWindow(UserInterface.Window):
 
-    def __init__(self, proxy, parent, title):
+    def __init__(self, proxy, parent, title, *, persistent_settings: typing.Optional[UserInterface.PersistentSettingsCache] = None):
         super().__init__(parent, title)
         self.proxy = proxy
+        self.__persistent_settings = persistent_settings
         parent_native = parent.native_document_window if parent else None
         self.native_document_window = self.proxy.DocumentWindow_create(parent_native, title)
         self.proxy.DocumentWindow_connect(self.native_document_window, self)
@@ -1860,6 +1934,9 @@ class QtWindow(UserInterface.Window):
 
     def periodic(self):
         self._handle_periodic()
+        # the window timer writes pending settings so that they do not depend on the application calling periodic.
+        if self.__persistent_settings:
+            self.__persistent_settings.periodic()
 
     def aboutToShow(self):
         self._register_ui_activity()
@@ -1872,14 +1949,17 @@ class QtWindow(UserInterface.Window):
     def aboutToClose(self, geometry, state):
         self._register_ui_activity()
         self._handle_about_to_close(geometry, state)
+        # write the settings saved while closing (geometry, splitter state) immediately.
+        if self.__persistent_settings:
+            self.__persistent_settings.flush()
 
     def keyPressed(self, text, key, raw_modifiers):
         self._register_ui_activity()
-        return self._handle_key_pressed(QtKey(text, key, raw_modifiers))
+        return self._handle_key_pressed(get_key(text, key, raw_modifiers))
 
     def keyReleased(self, text, key, raw_modifiers):
         self._register_ui_activity()
-        return self._handle_key_released(QtKey(text, key, raw_modifiers))
+        return self._handle_key_released(get_key(text, key, raw_modifiers))
 
     def add_menu(self, title: str, menu_id: str = None) -> UserInterface.Menu:
         native_menu = self.proxy.DocumentWindow_addMenu(self.native_document_window, notnone(title))
@@ -1980,11 +2060,21 @@ class QtUserInterface(UserInterface.UserInterface):
         self.proxy = proxy
         self.persistence_root = "0"
         self.proxy.Core_syncLatencyTimer(time.perf_counter())
+        # settings are cached and written in batches so that frequent saves (window geometry, splitter state during
+        # resize and drag) do not hit the settings backend on every change.
+        self.__persistent_settings = UserInterface.PersistentSettingsCache(self.proxy.Settings_getString, self.proxy.Settings_setString, self.proxy.Settings_remove)
 
     def close(self):
+        self.__persistent_settings.close()
         self.proxy.Application_close()
         self.proxy = None
 
+    def periodic(self) -> None:
+        self.__persistent_settings.periodic()
+
+    def flush_persistent_settings(self) -> None:
+        self.__persistent_settings.flush()
+
     def set_application_info(self, application_name: str, organization_name: str, organization_domain: str):
         self.proxy.Core_setApplicationInfo(application_name, organization_name, organization_domain)
 
@@ -2005,7 +2095,7 @@ class QtUserInterface(UserInterface.UserInterface):
     # window elements
 
     def create_document_window(self, title=None, parent_window=None):
-        return QtWindow(self.proxy, parent_window, title)
+        return QtWindow(self.proxy, parent_window, title, persistent_settings=self.__persistent_settings)
 
     def destroy_document_window(self, document_window):
         document_window.close()
@@ -2072,6 +2162,20 @@ class QtUserInterface(UserInterface.UserInterface):
         # returns data packed as uint32
         return self.proxy.decode_data(self.proxy.Core_readImageToBinary(notnone(filename)))
 
+    def load_rgba_data_from_files(self, filenames: typing.Sequence[str], *, read_only: bool = False) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        # the proxy may read the files in parallel and from its decoded image cache, sharing read only data.
+        if self.proxy.has_method("Core_readImagesToBinary"):
+            filenames = [notnone(filename) for filename in filenames]
+            futures = self.proxy.Core_readImagesToBinary(filenames)
+            future_filenames = dict(zip(futures, filenames))
+            for future in concurrent.futures.as_completed(futures):
+                data = self.proxy.decode_data(future.result())
+                if not read_only and data is not None and not data.flags.writeable:
+                    data = data.copy()
+                yield future_filenames[future], data
+        else:
+            yield from super().load_rgba_data_from_files(filenames, read_only=read_only)
+
     def save_rgba_data_to_file(self, data, filename, format):
         return self.proxy.Core_writeBinaryToImage(data.shape[1], data.shape[0], data, notnone(filename), str(format))
 
@@ -2110,31 +2214,31 @@ class QtUserInterface(UserInterface.UserInterface):
 
     def get_persistent_string(self, key, default_value=None):
         key = "/".join([self.persistence_root, key])
-        value = self.proxy.Settings_getString(key)
+        value = self.__persistent_settings.get(key)
         return value if value else default_value
 
     def set_persistent_string(self, key, value):
         if value is not None:
             key = "/".join([self.persistence_root, key])
-            self.proxy.Settings_setString(key, value)
+            self.__persistent_settings.set(key, value)
         else:
             self.remove_persistent_key(key)
 
     def get_persistent_object(self, key, default_value=None):
         key = "/".join([self.persistence_root, key])
         value = self.get_persistent_string(key)
-        return pickle.loads(binascii.unhexlify(value.encode("utf-8"))) if value else default_value
+        return UserInterface.decode_persistent_object(value) if value else default_value
 
     def set_persistent_object(self, key, value):
         if value is not None:
             key = "/".join([self.persistence_root, key])
-            self.set_persistent_string(key, binascii.hexlify(pickle.dumps(value, 0)).decode("utf-8"))
+            self.set_persistent_string(key, UserInterface.encode_persistent_object(value))
         else:
             self.remove_persistent_key(key)
 
     def remove_persistent_key(self, key):
         key = "/".join([self.persistence_root, key])
-        self.proxy.Settings_remove(key)
+        self.__persistent_settings.remove(key)
 
     # clipboard
 
@@ -2161,6 +2265,13 @@ class QtUserInterface(UserInterface.UserInterface):
         else:
             return self.proxy.decode_data(self.proxy.DrawingContext_paintRGBA(self.proxy.convert_drawing_commands(drawing_context.commands), width, height))
 
+    def create_rgba_images(self, jobs: typing.Sequence[typing.Tuple[DrawingContext.DrawingContext, int, int]]) -> typing.List[concurrent.futures.Future]:
+        # the proxy may paint the jobs in parallel on its paint worker pool.
+        if not hasattr(self.proxy, "Canvas_draw_binary") and self.proxy.has_method("DrawingContext_paintRGBAImages"):
+            futures = self.proxy.DrawingContext_paintRGBAImages([(self.proxy.convert_drawing_commands(drawing_context.commands), width, height) for drawing_context, width, height in jobs])
+            return [map_future(future, self.proxy.decode_data) for future in futures]
+        return super().create_rgba_images(jobs)
+
     def get_font_metrics(self, font_str: str, text: str) -> UserInterface.FontMetrics:
         return self.proxy.decode_font_metrics(self.proxy.Core_getFontMetrics(font_str, text))
 
@@ -0,0 +1,191 @@
+"""
+Helpers to keep application startup fast: lazy module loading, backend detection, and startup profiling.
+
+Set the environment variable NIONUI_PROFILE_STARTUP to a non-empty value to have the nionui command report the
+import time of each module and the time of each initialization step during startup.
+"""
+
+# standard libraries
+import builtins
+import contextlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+import types
+import typing
+
+# third party libraries
+# None
+
+# local libraries
+# None
+
+
+class _LazyModule(types.ModuleType):
+    """A module which is executed when an attribute is first accessed.
+
+    The first access executes the module while holding a lock for the module, so that other threads accessing it at
+    the same time wait for it to be executed rather than seeing a partially executed module. Accesses from the thread
+    executing the module (circular imports) see the partially executed module, like a regular import. Once executed,
+    the module becomes a regular module.
+    """
+
+    def __getattribute__(self, attr):
+        name = object.__getattribute__(self, "__name__")
+        with _lazy_module_locks_lock:
+            lock = _lazy_module_locks.setdefault(name, threading.RLock())
+        with lock:
+            if type(self) is _LazyModule and id(self) not in _executing_lazy_module_ids:
+                _executing_lazy_module_ids.add(id(self))
+                try:
+                    object.__getattribute__(self, "__spec__").loader.exec_module(self)
+                    self.__class__ = types.ModuleType
+                finally:
+                    _executing_lazy_module_ids.discard(id(self))
+        return types.ModuleType.__getattribute__(self, attr)
+
+
+_lazy_module_locks: typing.Dict[str, threading.RLock] = dict()
+_lazy_module_locks_lock = threading.RLock()
+_executing_lazy_module_ids: typing.Set[int] = set()
+
+
+def lazy_import(name: str) -> typing.Any:
+    """Return the module with the given name, deferring its execution until an attribute is first accessed.
+
+    If the module is already imported, return it directly. If the module cannot be found, raise ImportError, just
+    like a regular import. The first attribute access may be made from any thread; see _LazyModule.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    module = importlib.util.module_from_spec(spec)
+    module.__class__ = _LazyModule
+    sys.modules[name] = module
+    parent_name, _, child_name = name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child_name, module)
+    return module
+
+
+def has_module(name: str) -> bool:
+    """Return whether the module is available, without importing it.
+
+    The parent packages of a dotted name are imported, but not the module itself.
+    """
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class StartupProfileEntry:
+
+    def __init__(self, kind: str, name: str, depth: int, elapsed: float, self_elapsed: float):
+        self.kind = kind
+        self.name = name
+        self.depth = depth
+        self.elapsed = elapsed
+        self.self_elapsed = self_elapsed
+
+
+class StartupProfiler:
+    """Record the import time of each module and the time of each initialization step.
+
+    Module imports are timed by wrapping the built-in import function while the profiler is installed; imports of
+    modules that are already loaded are not recorded. Both the cumulative time and the time excluding nested imports
+    are recorded. Steps are timed with the `step` context manager.
+
+    Only imports made on the thread which installed the profiler are recorded.
+    """
+
+    def __init__(self):
+        self.entries: typing.List[StartupProfileEntry] = list()
+        self.__original_import = None
+        self.__thread = None
+        self.__stack: typing.List[float] = list()  # time spent in nested entries, one element per open entry
+        self.__start = time.perf_counter()
+
+    def install(self) -> None:
+        assert self.__original_import is None
+        self.__original_import = builtins.__import__
+        self.__thread = threading.current_thread()
+        builtins.__import__ = self.__import
+
+    def uninstall(self) -> None:
+        if self.__original_import is not None:
+            builtins.__import__ = self.__original_import
+            self.__original_import = None
+
+    def __enter__(self) -> "StartupProfiler":
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.uninstall()
+
+    def __begin(self, kind: str, name: str) -> typing.Tuple[StartupProfileEntry, float]:
+        entry = StartupProfileEntry(kind, name, len(self.__stack), 0.0, 0.0)
+        self.entries.append(entry)
+        self.__stack.append(0.0)
+        return entry, time.perf_counter()
+
+    def __end(self, entry: StartupProfileEntry, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        nested_elapsed = self.__stack.pop()
+        entry.elapsed = elapsed
+        entry.self_elapsed = elapsed - nested_elapsed
+        if self.__stack:
+            self.__stack[-1] += elapsed
+
+    def __import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self.__original_import
+        if level != 0 or threading.current_thread() is not self.__thread:
+            return original_import(name, globals, locals, fromlist, level)
+        label = name
+        module = sys.modules.get(name)
+        if module is not None:
+            # 'from package import module' imports the submodules named in fromlist, if not already loaded.
+            missing = [f for f in fromlist or () if f != "*" and f not in module.__dict__]
+            if not missing:
+                return original_import(name, globals, locals, fromlist, level)
+            label = ", ".join(f"{name}.{f}" for f in missing)
+        entry, start = self.__begin("import", label)
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.__end(entry, start)
+
+    @contextlib.contextmanager
+    def step(self, name: str) -> typing.Iterator[None]:
+        """Time the enclosed initialization step. Imports within the step are nested beneath it."""
+        entry, start = self.__begin("step", name)
+        try:
+            yield
+        finally:
+            self.__end(entry, start)
+
+    @property
+    def total_elapsed(self) -> float:
+        return time.perf_counter() - self.__start
+
+    def report(self, file: typing.TextIO = None, *, threshold: float = 0.0) -> None:
+        """Write the profile to file (stderr by default), skipping entries faster than threshold seconds."""
+        file = file if file is not None else sys.stderr
+        print(f"{'self ms':>9} {'total ms':>9}  name", file=file)
+        for entry in self.entries:
+            if entry.elapsed >= threshold:
+                label = entry.name if entry.kind == "import" else f"[{entry.name}]"
+                print(f"{entry.self_elapsed * 1000:9.1f} {entry.elapsed * 1000:9.1f}  {'  ' * entry.depth}{label}", file=file)
+        print(f"startup total {self.total_elapsed * 1000:.1f} ms", file=file)
+
+
+def is_profile_startup_enabled() -> bool:
+    return bool(os.environ.get("NIONUI_PROFILE_STARTUP"))
@@ -488,6 +488,36 @@ class TabWidgetBehavior(WidgetBehavior):
 
     def __init__(self, widget_type: str, properties: typing.Mapping):
         super().__init__(widget_type, properties)
+        self.on_current_index_changed = None
+        self.__current_index = -1
+
+    def close(self):
+        self.on_current_index_changed = None
+        super().close()
+
+    def add(self, child: UserInterfaceModule.Widget, label: str) -> None:
+        child_widget = extract_widget(child)
+        self.widget.children.append(child_widget)
+        if self.__current_index < 0:
+            self.current_index = 0
+
+    def restore_state(self, tag: str) -> None:
+        pass
+
+    def save_state(self, tag: str) -> None:
+        pass
+
+    @property
+    def current_index(self) -> int:
+        return self.__current_index
+
+    @current_index.setter
+    def current_index(self, index: int) -> None:
+        # like Qt, notify when the current index changes, whether by the user or programmatically
+        if index != self.__current_index:
+            self.__current_index = index
+            if callable(self.on_current_index_changed):
+                self.on_current_index_changed(index)
 
 
 class StackWidgetBehavior(WidgetBehavior):
@@ -819,9 +849,10 @@ class TreeWidgetBehavior(WidgetBehavior):
 
 class DocumentWindowX(UserInterfaceModule.Window):
 
-    def __init__(self, size: typing.Optional[Geometry.IntSize] = None):
+    def __init__(self, size: typing.Optional[Geometry.IntSize] = None, display_scaling: float = 1.0):
         super().__init__(None, "title")
         self.__size = size if size is not None else Geometry.IntSize(height=720, width=960)
+        self.__display_scaling = display_scaling
         self.__title = None
 
     def request_close(self):
@@ -851,6 +882,9 @@ class DocumentWindowX(UserInterfaceModule.Window):
     def size(self) -> Geometry.IntSize:
         return Geometry.IntSize(w=640, h=480)
 
+    def _get_display_scaling(self) -> float:
+        return self.__display_scaling
+
     def create_dock_widget(self, widget: UserInterfaceModule.Widget, panel_id: str, title: str, positions: typing.Sequence[str], position: str) -> UserInterfaceModule.DockWidget:
         dock_widget = DockWidget(self, widget, panel_id, title, positions, position)
         dock_widget.size_changed(Geometry.IntSize(height=320, width=480))
@@ -4,10 +4,17 @@ Provides a user interface object that can render to an Qt host.
 
 # standard libraries
 import abc
+import base64
+import binascii
 import collections
+import concurrent.futures
 import copy
 import enum
+import json
 import numbers
+import pickle
+import threading
+import time
 import typing
 import weakref
 
@@ -17,6 +24,8 @@ import weakref
 # local libraries
 from nion.ui import CanvasItem
 from nion.ui import DrawingContext
+from nion.ui import Instrumentation
+from nion.utils import Event
 from nion.utils import Geometry
 
 
@@ -672,8 +681,10 @@ class TabWidget(Widget):
         self.children = []
         self.__current_index_binding = None
         self.on_current_index_changed = None
+        self.current_index_changed_event = Event.Event()
 
         def handle_current_index_changed(index):
+            self.current_index_changed_event.fire(index)
             if callable(self.on_current_index_changed):
                 self.on_current_index_changed(index)
 
@@ -749,6 +760,7 @@ class StackWidget(Widget):
         super().__init__(widget_behavior)
         self.children = []
         self.__current_index_binding = None
+        self.current_index_changed_event = Event.Event()
 
     def close(self):
         for child in self.children:
@@ -808,7 +820,10 @@ class StackWidget(Widget):
 
     @current_index.setter
     def current_index(self, index):
+        old_index = self._behavior.current_index
         self._behavior.current_index = index
+        if index != old_index:
+            self.current_index_changed_event.fire(index)
 
     def bind_current_index(self, binding):
         if self.__current_index_binding:
@@ -2047,6 +2062,12 @@ class CanvasWidget(Widget):
 
         self._behavior.on_pan_gesture = handle_pan_gesture
 
+        def handle_section_rendered(section_id: int, duration: float, command_count: int) -> None:
+            if Instrumentation.enabled:
+                Instrumentation.section_rendered(self, section_id, duration, command_count)
+
+        self._behavior.on_section_rendered = handle_section_rendered
+
         self.__canvas_item = CanvasItem.RootCanvasItem(self, layout_render=layout_render)
         self._behavior._set_canvas_item(self.__canvas_item)
 
@@ -2107,9 +2128,15 @@ class CanvasWidget(Widget):
         self._behavior.focusable = focusable
 
     def draw(self, drawing_context: DrawingContext.DrawingContext) -> None:
+        recorder = DrawingContext.get_command_stream_recorder()
+        if recorder:
+            recorder.record(drawing_context, self.width, self.height)
         self._behavior.draw(drawing_context)
 
     def draw_section(self, section_id: int, drawing_context: DrawingContext.DrawingContext, canvas_rect: Geometry.IntRect) -> None:
+        recorder = DrawingContext.get_command_stream_recorder()
+        if recorder:
+            recorder.record(drawing_context, canvas_rect.width, canvas_rect.height)
         self._behavior.draw_section(section_id, drawing_context, canvas_rect)
 
     def remove_section(self, section_id: int) -> None:
@@ -2170,8 +2197,8 @@ class ProgressBarWidget(CanvasWidget):
         self.__binding = None
 
         self.__progress_bar_canvas_item = CanvasItem.ProgressBarCanvasItem()
-        self.__progress_bar_canvas_item.sizing.set_fixed_width(500)
-        self.__progress_bar_canvas_item.sizing.set_fixed_height(20)
+        self.__progress_bar_canvas_item.update_sizing(self.__progress_bar_canvas_item.sizing.with_fixed_width(500))
+        self.__progress_bar_canvas_item.update_sizing(self.__progress_bar_canvas_item.sizing.with_fixed_height(20))
         self.canvas_item.add_canvas_item(self.__progress_bar_canvas_item)
 
     def close(self):
@@ -2911,12 +2938,121 @@ class TruncateModeType(enum.IntEnum):
     NONE = 3
 
 
+def _is_exact_json_value(value: typing.Any) -> bool:
+    # subclasses such as numpy.float64 (a float) or bool-derived enums are written as JSON but read back as the base
+    # type; tuples are read back as lists and non-string keys as strings. only exact JSON types round trip unchanged.
+    value_type = type(value)
+    if value_type in (str, int, bool) or value is None:
+        return True
+    if value_type is float:
+        return value == value and value not in (float("inf"), float("-inf"))
+    if value_type is list:
+        return all(_is_exact_json_value(v) for v in value)
+    if value_type is dict:
+        return all(type(k) is str and _is_exact_json_value(v) for k, v in value.items())
+    return False
+
+
+def encode_persistent_object(value: typing.Any) -> str:
+    """Encode an object into a compact persistent string.
+
+    Objects made only of exact JSON types (dict with str keys, list, str, int, finite float, bool, None) are stored as
+    JSON so that they round trip exactly; others are stored as a base64 encoded pickle using the highest protocol.
+    """
+    if _is_exact_json_value(value):
+        return "json:" + json.dumps(value, separators=(",", ":"))
+    return "pickle:" + base64.b64encode(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)).decode("ascii")
+
+
+def decode_persistent_object(value: str) -> typing.Any:
+    """Decode an object encoded with encode_persistent_object, or stored as a hexlified pickle by earlier versions."""
+    if value.startswith("json:"):
+        return json.loads(value[5:])
+    if value.startswith("pickle:"):
+        return pickle.loads(base64.b64decode(value[7:].encode("ascii")))
+    return pickle.loads(binascii.unhexlify(value.encode("utf-8")))
+
+
+class PersistentSettingsCache:
+    """Keep persistent settings in memory and write changes to the backend in batches.
+
+    Values are read from the backend the first time a key is requested and cached afterwards. Changes are written to
+    the backend by `flush`, which happens automatically from `periodic` once the oldest unwritten change is older than
+    write_delay seconds. The owner should call `close` (which flushes) at shutdown.
+
+    Thread safe.
+    """
+
+    def __init__(self, read_fn: typing.Callable[[str], typing.Optional[str]], write_fn: typing.Callable[[str, str], None],
+                 remove_fn: typing.Callable[[str], None], *, write_delay: float = 1.0):
+        self.__read_fn = read_fn
+        self.__write_fn = write_fn
+        self.__remove_fn = remove_fn
+        self.__write_delay = write_delay
+        self.__lock = threading.RLock()
+        self.__values: typing.Dict[str, typing.Optional[str]] = dict()
+        self.__dirty_keys: typing.Dict[str, None] = dict()  # ordered set of keys with unwritten changes
+        self.__dirty_time: typing.Optional[float] = None
+        self.write_count = 0
+
+    def close(self) -> None:
+        self.flush()
+
+    def get(self, key: str) -> typing.Optional[str]:
+        with self.__lock:
+            if key not in self.__values:
+                self.__values[key] = self.__read_fn(key)
+            return self.__values[key]
+
+    def set(self, key: str, value: typing.Optional[str]) -> None:
+        """Set the value for the key. A value of None removes the key."""
+        with self.__lock:
+            if key in self.__values and self.__values[key] == value:
+                return
+            self.__values[key] = value
+            self.__dirty_keys[key] = None
+            if self.__dirty_time is None:
+                self.__dirty_time = time.perf_counter()
+
+    def remove(self, key: str) -> None:
+        self.set(key, None)
+
+    @property
+    def has_pending_writes(self) -> bool:
+        with self.__lock:
+            return bool(self.__dirty_keys)
+
+    def flush(self) -> None:
+        """Write all pending changes to the backend."""
+        with self.__lock:
+            dirty_keys = list(self.__dirty_keys.keys())
+            self.__dirty_keys = dict()
+            self.__dirty_time = None
+            for key in dirty_keys:
+                value = self.__values.get(key)
+                if value is not None:
+                    self.__write_fn(key, value)
+                else:
+                    self.__remove_fn(key)
+                self.write_count += 1
+
+    def periodic(self) -> None:
+        """Flush pending changes if the oldest one is older than the write delay."""
+        with self.__lock:
+            if self.__dirty_time is not None and time.perf_counter() - self.__dirty_time >= self.__write_delay:
+                self.flush()
+
+
 class UserInterface(abc.ABC):
 
     @abc.abstractmethod
     def close(self) -> None:
         ...
 
+    def periodic(self) -> None:
+        """Perform periodic housekeeping, such as writing persistent settings. Called from the application."""
+        pass
+
     # data objects
 
     @abc.abstractmethod
@@ -3021,6 +3157,16 @@ class UserInterface(abc.ABC):
     def load_rgba_data_from_file(self, filename):
         ...
 
+    def load_rgba_data_from_files(self, filenames: typing.Sequence[str], *, read_only: bool = False) -> typing.Iterator[typing.Tuple[str, typing.Any]]:
+        """Load the image files, yielding (filename, data) for each file as it finishes.
+
+        Subclasses may load the files in parallel. Pass read_only=True to allow them to share the data between callers,
+        in which case the data may be read only; otherwise the data can be modified. By default, the files are loaded
+        one at a time with load_rgba_data_from_file.
+        """
+        for filename in filenames:
+            yield filename, self.load_rgba_data_from_file(filename)
+
     @abc.abstractmethod
     def save_rgba_data_to_file(self, data, filename, format):
         ...
@@ -3103,6 +3249,22 @@ class UserInterface(abc.ABC):
     def create_rgba_image(self, drawing_context, width, height):
         ...
 
+    def create_rgba_images(self, jobs: typing.Sequence[typing.Tuple[DrawingContext.DrawingContext, int, int]]) -> typing.List[concurrent.futures.Future]:
+        """Render each (drawing_context, width, height) job to an RGBA image, returning a future for each job.
+
+        Subclasses may render the jobs in parallel; use concurrent.futures.as_completed to handle the images as they
+        finish. By default, the jobs are rendered one at a time with create_rgba_image before returning.
+        """
+        futures = list()
+        for drawing_context, width, height in jobs:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(self.create_rgba_image(drawing_context, width, height))
+            except Exception as e:
+                future.set_exception(e)
+            futures.append(future)
+        return futures
+
     @abc.abstractmethod
     def get_font_metrics(self, font: str, text: str) -> FontMetrics:
         ...
@@ -4,6 +4,8 @@ A library of custom widgets.
 
 # standard libraries
 import copy
+import math
+import threading
 import typing
 
 # third party libraries
@@ -306,11 +308,8 @@ class ListWidget(CompositeWidgetBase):
             # if v_auto_resize is True, ensure the canvas item resizes vertically to its content and the canvas widget
             # resizes vertically to the height of the canvas item content.
 
-            new_sizing = self.__canvas_widget.canvas_item.copy_sizing()
             content_height = self.__list_canvas_item.sizing.maximum_height
-            new_sizing.minimum_height = content_height
-            new_sizing.preferred_height = content_height
-            new_sizing.maximum_height = content_height
+            new_sizing = self.__canvas_widget.canvas_item.sizing.with_fixed_height(content_height)
             self.__canvas_widget.canvas_item.update_sizing(new_sizing)
 
             self.__canvas_widget.set_property("min-height", content_height)
@@ -468,6 +467,210 @@ class TableWidget(CompositeWidgetBase):
             self.__binding = None
 
 
+class VirtualTableWidget(CompositeWidgetBase):
+    """A widget representing a table (column only) that only creates widgets for visible rows.
+
+    All rows must have the same height, given by row_height. Widgets are created with create_list_item_widget for
+    rows scrolled into view. If update_list_item_widget is supplied, existing row widgets are recycled by passing
+    them a new item while scrolling; otherwise rows scrolled out of view are closed and new ones created.
+
+    Insertions and removals from the bound list are collected and applied as a single structural update during the
+    next periodic, so many changes in the same tick only cause one pass over the visible rows.
+    """
+
+    overscan_row_count = 4
+    default_visible_row_count = 20
+
+    def __init__(self, ui, create_list_item_widget, row_height: int, *, update_list_item_widget=None, header_widget=None, header_for_empty_list_widget=None, properties=None):
+        super().__init__(ui.create_column_widget())
+        self.__binding = None
+        self.__row_height = max(int(row_height), 1)
+        self.__entries = list()  # (token, item) pairs, token identifies an entry independent of its position
+        self.__rows = list()  # (token, widget) pairs for the rows currently constructed
+        self.__first_row = 0
+        self.__next_token = 0
+        self.__pending_changes = list()
+        self.__pending_changes_lock = threading.RLock()
+        self.create_list_item_widget = create_list_item_widget
+        self.update_list_item_widget = update_list_item_widget
+        self.header_widget = header_widget
+        self.header_for_empty_list_widget = header_for_empty_list_widget
+        header_column = ui.create_column_widget()
+        if self.header_widget:
+            header_column.add(self.header_widget)
+        if self.header_for_empty_list_widget:
+            header_column.add(self.header_for_empty_list_widget)
+        self.content_widget.add(header_column)
+        self.__top_spacer = ui.create_column_widget()
+        self.__bottom_spacer = ui.create_column_widget()
+        self.content_section = ui.create_column_widget()
+        self.content_section.widget_id = "content_section"
+        content_column = ui.create_column_widget()
+        content_column.add(self.__top_spacer)
+        content_column.add(self.content_section)
+        content_column.add(self.__bottom_spacer)
+        content_column.add_stretch()
+        self.__scroll_area = ui.create_scroll_area_widget(properties=properties)
+        self.__scroll_area.widget_id = "content_scroll_area"
+        self.__scroll_area.content = content_column
+        self.content_widget.add(self.__scroll_area)
+
+        def viewport_changed(viewport):
+            self.__update_rows()
+
+        def size_changed(width, height):
+            self.__update_rows()
+
+        self.__scroll_area.on_viewport_changed = viewport_changed
+        self.__scroll_area.on_size_changed = size_changed
+        self.__set_spacer_heights(0, 0)
+        self.__sync_header()
+
+    def close(self):
+        if self.__binding:
+            self.__binding.close()
+            self.__binding = None
+        self.clear_task("update_rows")
+        with self.__pending_changes_lock:
+            self.__pending_changes = list()
+        self.__entries = list()
+        self.__rows = list()
+        self.content_section = None
+        self.header_widget = None
+        self.header_for_empty_list_widget = None
+        self.create_list_item_widget = None
+        self.update_list_item_widget = None
+        super().close()
+
+    @property
+    def list_items(self):
+        return self.content_section.children
+
+    @property
+    def list_item_count(self):
+        return len(self.__entries)
+
+    @property
+    def visible_range(self) -> typing.Tuple[int, int]:
+        """Return the range of item indexes with constructed row widgets, as (first, last) with last exclusive."""
+        return self.__first_row, self.__first_row + len(self.__rows)
+
+    def insert_item(self, item, before_index):
+        self.__apply_changes([(True, item, before_index)])
+
+    def remove_item(self, index):
+        self.__apply_changes([(False, None, index)])
+
+    def remove_all_items(self):
+        self.__entries = list()
+        self.__update_rows()
+
+    def __make_entry(self, item) -> typing.Tuple[int, typing.Any]:
+        token = self.__next_token
+        self.__next_token += 1
+        return token, item
+
+    def __apply_changes(self, changes) -> None:
+        for is_insert, item, index in changes:
+            if is_insert:
+                self.__entries.insert(index, self.__make_entry(item))
+            else:
+                del self.__entries[index]
+        self.__update_rows()
+
+    def __apply_pending_changes(self) -> None:
+        with self.__pending_changes_lock:
+            pending_changes = self.__pending_changes
+            self.__pending_changes = list()
+        if self.content_section and pending_changes:  # widget may be closed while this call is pending on main thread.
+            self.__apply_changes(pending_changes)
+
+    def __queue_change(self, change) -> None:
+        with self.__pending_changes_lock:
+            needs_task = not self.__pending_changes
+            self.__pending_changes.append(change)
+        if needs_task:
+            self.add_task("update_rows", self.__apply_pending_changes)
+
+    def __set_spacer_heights(self, top_height: int, bottom_height: int) -> None:
+        self.__top_spacer.set_property("height", top_height)
+        self.__bottom_spacer.set_property("height", bottom_height)
+
+    def __calculate_visible_range(self) -> typing.Tuple[int, int]:
+        # qt reports the viewport in floats (divided by the display scaling); rows are counted with ints.
+        (top, left), (height, width) = self.__scroll_area.viewport
+        height = height or self.__scroll_area.height
+        visible_row_count = int(math.ceil(height / self.__row_height)) if height else self.default_visible_row_count
+        entry_count = len(self.__entries)
+        first_row = min(max(int(top) // self.__row_height - self.overscan_row_count, 0), entry_count)
+        last_row = min(first_row + visible_row_count + 2 * self.overscan_row_count, entry_count)
+        return first_row, last_row
+
+    def __update_rows(self) -> None:
+        if not self.content_section:
+            return
+        first_row, last_row = self.__calculate_visible_range()
+        entries = self.__entries[first_row:last_row]
+        if callable(self.update_list_item_widget):
+            # recycle row widgets positionally, only adding or removing widgets at the end.
+            while len(self.__rows) > len(entries):
+                self.__rows.pop()
+                self.content_section.remove(len(self.__rows))
+            for index, (token, item) in enumerate(entries):
+                if index < len(self.__rows):
+                    row_token, row_widget = self.__rows[index]
+                    if row_token != token:
+                        self.update_list_item_widget(row_widget, item)
+                        self.__rows[index] = token, row_widget
+                else:
+                    row_widget = self.create_list_item_widget(item)
+                    self.content_section.add(row_widget)
+                    self.__rows.append((token, row_widget))
+        else:
+            # remove the rows which are no longer visible; the remaining rows retain their relative order, so only
+            # new rows need to be inserted.
+            tokens = {token for token, item in entries}
+            for index in reversed(range(len(self.__rows))):
+                if self.__rows[index][0] not in tokens:
+                    del self.__rows[index]
+                    self.content_section.remove(index)
+            for index, (token, item) in enumerate(entries):
+                if index >= len(self.__rows) or self.__rows[index][0] != token:
+                    row_widget = self.create_list_item_widget(item)
+                    self.content_section.insert(row_widget, index)
+                    self.__rows.insert(index, (token, row_widget))
+        self.__first_row = first_row
+        self.__set_spacer_heights(first_row * self.__row_height, (len(self.__entries) - last_row) * self.__row_height)
+        self.__sync_header()
+
+    def __sync_header(self):
+        # select the right header item
+        has_content = len(self.__entries) > 0
+        if self.header_widget:
+            self.header_widget.visible = has_content
+        if self.header_for_empty_list_widget:
+            self.header_for_empty_list_widget.visible = not has_content
+
+    def bind_items(self, binding):
+        if self.__binding:
+            self.__binding.close()
+            self.__binding = None
+        self.__binding = binding
+        def insert_item(item, before_index):
+            self.__queue_change((True, item, before_index))
+        def remove_item(index):
+            self.__queue_change((False, None, index))
+        self.__binding.inserter = insert_item
+        self.__binding.remover = remove_item
+        self.__entries = [self.__make_entry(item) for item in binding.items]
+        self.__update_rows()
+
+    def unbind_items(self):
+        if self.__binding:
+            self.__binding.close()
+            self.__binding = None
+
+
 class TextButtonCell:
 
     def __init__(self, text: str):
@@ -546,7 +749,7 @@ class TextPushButtonWidget(CompositeWidgetBase):
         font = "normal 11px serif"
         font_metrics = ui.get_font_metrics(font, text)
         text_button_canvas_item = TextButtonCanvasItem(text)
-        text_button_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=font_metrics.height + 6, width=font_metrics.width + 6))
+        text_button_canvas_item.update_sizing(text_button_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=font_metrics.height + 6, width=font_metrics.width + 6)))
 
         def button_clicked():
             if callable(self.on_button_clicked):
@@ -586,20 +586,33 @@ class Window:
 
     def display_report(self, report: Report) -> None:
         from nion.ui import Dialog  # avoid circular reference
+        # mark the records so that they are not displayed again by listen_log_records.
+        extra = {"nionui_report": True}
         if report.type == ReportType.DEBUG:
-            logging.debug(report.message)
+            logging.debug(report.message, extra=extra)
         elif report.type == ReportType.INFO:
-            logging.info(report.message)
+            logging.info(report.message, extra=extra)
         elif report.type == ReportType.WARNING:
-            logging.warning(report.message)
+            logging.warning(report.message, extra=extra)
             Dialog.NotificationDialog(self.ui, message=f"WARNING: {report.message}", parent_window=self).show()
         elif report.type == ReportType.ERROR:
-            logging.error(report.message)
+            logging.error(report.message, extra=extra)
             Dialog.NotificationDialog(self.ui, message=f"ERROR: {report.message}", parent_window=self).show()
 
     def display_log_record(self, record: logging.LogRecord) -> None:
         self.display_report(Report.from_log_record(record))
 
+    def listen_log_records(self, logging_handler, level: int = logging.WARNING) -> Event.EventListener:
+        """Display the records of at least level from an Application.LoggingHandler in this window.
+
+        The records are displayed on the UI thread. Close the returned listener to stop.
+        """
+        def record_logged(record: logging.LogRecord) -> None:
+            if record.levelno >= level and not getattr(record, "nionui_report", False):
+                self.queue_task(functools.partial(self.display_log_record, record))
+
+        return logging_handler.record_event.listen(record_logged)
+
     def _get_menu_item_state(self, command_id: str) -> typing.Optional[UserInterface.MenuItemState]:
         # if there is a specific menu item state for the command_id, use it
         # otherwise, if the handle method exists, return an enabled menu item
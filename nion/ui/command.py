@@ -1,9 +1,11 @@
+import atexit
 import importlib
 import os
-import pkg_resources
 import subprocess
 import sys
 
+from nion.ui import Startup
+
 
 def load_module_as_path(path):
     if os.path.isfile(path):
@@ -67,35 +69,80 @@ def bootstrap_main(args):
     return None, "main"
 
 
+def profile_start(profiler: Startup.StartupProfiler, app) -> None:
+    """Include the application start (which creates the initial windows) in the profile, then report it."""
+    start_fn = app.start
+
+    def start():
+        try:
+            with profiler.step("start"):
+                return start_fn()
+        finally:
+            profiler.uninstall()
+            profiler.report()
+
+    app.start = start
+
+
+def record_command_streams(file_path: str) -> None:
+    """Record the drawing commands of all canvases and save them to file_path when the application exits."""
+    from nion.ui import DrawingContext
+    recorder = DrawingContext.CommandStreamRecorder()
+    DrawingContext.set_command_stream_recorder(recorder)
+    atexit.register(recorder.save, file_path)
+
+
+def log_render_events(file_path: str) -> None:
+    """Write render instrumentation events to file_path as JSON lines."""
+    from nion.ui import Instrumentation
+    sink = Instrumentation.JSONLinesSink(file_path)
+    Instrumentation.add_sink(sink)
+    atexit.register(sink.close)
+
+
 def main():
 
-    # first attempt to launch using nionui-launcher
-    if pkg_resources.Environment()["nionui-tool"]:
+    profiler = Startup.StartupProfiler() if Startup.is_profile_startup_enabled() else None
+    if profiler:
+        profiler.install()
+
+    # set NIONUI_RECORD_DRAWING to a file path to record command streams for replay with DrawingBenchmark.
+    record_drawing_path = os.environ.get("NIONUI_RECORD_DRAWING")
+    if record_drawing_path:
+        record_command_streams(record_drawing_path)
+
+    # set NIONUI_RENDER_LOG to a file path to log render instrumentation events.
+    render_log_path = os.environ.get("NIONUI_RENDER_LOG")
+    if render_log_path:
+        log_render_events(render_log_path)
+
+    # first attempt to launch using nionui-launcher. find_spec only locates the module without importing it, which is
+    # much faster than scanning the installed distributions.
+    if Startup.has_module("nion.nionui_tool"):
+        if profiler:
+            profiler.uninstall()
+            profiler.report()
         from nion.nionui_tool import command
         command.launch(sys.argv)
         return
 
-    success = False
-
-    # next attempt to launch using pyqt
-    try:
-        from PyQt5 import QtCore
-        success = True
-    except ImportError:
-        pass
-
-    # next attempt to launch using pyside2
-    try:
-        from PySide2 import QtCore
-        success = True
-    except ImportError:
-        pass
+    # next attempt to launch using pyqt or pyside2. the backend itself is imported when the user interface is made.
+    success = Startup.has_module("PyQt5") or Startup.has_module("PySide2")
 
     if not success:
         print("Please install either pyqt or PySide2 using pip or conda or use nionui-tool to launch.")
 
     if success:
-        app, error = bootstrap_main(sys.argv)
+        if profiler:
+            with profiler.step("bootstrap"):
+                app, error = bootstrap_main(sys.argv)
+            if app:
+                profile_start(profiler, app)
+            else:
+                profiler.uninstall()
+                profiler.report()
+        else:
+            app, error = bootstrap_main(sys.argv)
 
         if app:
             app.run()
@@ -0,0 +1,84 @@
+# standard libraries
+import contextlib
+import io
+import logging
+import sys
+import threading
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import Application
+
+
+class TestApplicationClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_logging_handler_keeps_recent_records_and_rate_limits_each_logger(self):
+        stream = io.StringIO()
+        logging_handler = Application.LoggingHandler(stream, max_records=50, rate_limit=10)
+        with contextlib.closing(logging_handler):
+            logged_records = list()
+            with contextlib.closing(logging_handler.record_event.listen(logged_records.append)):
+                # records made at the same time, so that the rate limit does not depend on the speed of the test.
+                for i in range(100):
+                    record = logging.LogRecord("nionui.test.noisy", logging.WARNING, __file__, 0, "message %s", (i, ), None)
+                    record.created = 1000.0
+                    logging_handler.handle(record)
+                record = logging.LogRecord("nionui.test.noisy", logging.ERROR, __file__, 0, "error", None, None)
+                record.created = 1000.0
+                logging_handler.handle(record)
+                logging_handler.flush()
+            self.assertEqual({"nionui.test.noisy": 90}, logging_handler.dropped_counts)
+            self.assertEqual(11, len(logged_records))
+            self.assertEqual("error", logged_records[-1].getMessage())
+            lines = stream.getvalue().splitlines()
+            dropped_lines = [line for line in lines if line.endswith(" log records dropped")]
+            self.assertEqual(90, sum(int(line.split()[0]) for line in dropped_lines))
+            self.assertEqual([f"message {i}" for i in range(10)] + ["error"], [line for line in lines if line not in dropped_lines])
+            self.assertEqual(11, len(logging_handler.take_records()))
+            self.assertEqual(0, len(logging_handler.take_records()))
+
+    def test_logging_handler_merges_arguments_and_formats_exceptions_when_emitted(self):
+        stream = io.StringIO()
+        logging_handler = Application.LoggingHandler(stream)
+        with contextlib.closing(logging_handler):
+            values = [1]
+            logging_handler.handle(logging.LogRecord("nionui.test", logging.INFO, __file__, 0, "values %s", (values, ), None))
+            values.append(2)
+            try:
+                raise ValueError("bad value")
+            except ValueError:
+                exc_info = sys.exc_info()
+            logging_handler.handle(logging.LogRecord("nionui.test", logging.ERROR, __file__, 0, "failed", None, exc_info))
+            logging_handler.flush()
+            records = logging_handler.take_records()
+            self.assertEqual(["values [1]", "failed"], [record.msg for record in records])
+            self.assertEqual([None, None], [record.args for record in records])
+            self.assertIsNone(records[1].exc_info)
+            self.assertIn("ValueError: bad value", records[1].exc_text)
+            self.assertIn("ValueError: bad value", stream.getvalue())
+            self.assertTrue(stream.getvalue().startswith("values [1]\n"))
+
+    def test_logging_handler_flush_from_writer_thread_does_not_wait(self):
+        logging_handler = Application.LoggingHandler(io.StringIO())
+        with contextlib.closing(logging_handler):
+            with contextlib.closing(logging_handler.record_event.listen(lambda record: logging_handler.flush())):
+                logging_handler.handle(logging.LogRecord("nionui.test", logging.INFO, __file__, 0, "message", None, None))
+                flush_thread = threading.Thread(target=logging_handler.flush)
+                flush_thread.start()
+                flush_thread.join(5.0)
+                self.assertFalse(flush_thread.is_alive())
+            self.assertEqual(1, len(logging_handler.take_records()))
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
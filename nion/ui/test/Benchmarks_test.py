@@ -0,0 +1,71 @@
+# standard libraries
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import Benchmarks
+from nion.ui import DrawingContext
+
+
+class TestBenchmarksClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_each_benchmark_runs(self):
+        for name, fn in Benchmarks.benchmarks.items():
+            with self.subTest(name=name):
+                fn()()
+
+    def test_compare_results_flags_regressions(self):
+        results = [Benchmarks.BenchmarkResult("a", 10, 0.010), Benchmarks.BenchmarkResult("b", 10, 0.020)]
+        baseline = Benchmarks.make_results([Benchmarks.BenchmarkResult("a", 10, 0.010), Benchmarks.BenchmarkResult("b", 10, 0.010)])
+        output = io.StringIO()
+        self.assertTrue(Benchmarks.compare_results(results, baseline, output, threshold=0.25))
+        lines = output.getvalue().splitlines()
+        self.assertFalse(lines[1].endswith("REGRESSION"))
+        self.assertTrue(lines[2].endswith("REGRESSION"))
+        self.assertFalse(Benchmarks.compare_results(results, baseline, io.StringIO(), threshold=2.0))
+
+    def test_baselines_are_stored_per_machine(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "benchmarks.json")
+            self.assertEqual(dict(), Benchmarks.load_baselines(file_path))
+            results = Benchmarks.make_results([Benchmarks.BenchmarkResult("a", 10, 0.010)])
+            Benchmarks.save_baselines(file_path, {"m1": results})
+            baselines = Benchmarks.load_baselines(file_path)
+            self.assertEqual(["m1"], list(baselines.keys()))
+            self.assertEqual(0.010, baselines["m1"]["benchmarks"][0]["elapsed"])
+
+    def test_recorded_drawing_is_timed_and_compared_like_other_benchmarks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            recording_path = os.path.join(directory, "recording.pickle")
+            baselines_path = os.path.join(directory, "benchmarks.json")
+            DrawingContext.save_command_streams(recording_path, Benchmarks.make_grid_command_streams())
+            benchmarks = dict(Benchmarks.benchmarks)
+            try:
+                argv = ["--recording", recording_path, "--backend", "svg", "--repeat", "1", "--min-time", "0",
+                        "--baseline", baselines_path, "--machine", "m1", "--update-baseline"]
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.assertEqual(0, Benchmarks.main(argv))
+                    self.assertEqual(0, Benchmarks.main(argv + ["--threshold", "1E6"]))
+            finally:
+                Benchmarks.benchmarks.clear()
+                Benchmarks.benchmarks.update(benchmarks)
+            baselines = Benchmarks.load_baselines(baselines_path)
+            self.assertEqual(["replay_svg"], [d["name"] for d in baselines["m1"]["benchmarks"]])
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
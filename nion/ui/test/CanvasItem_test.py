@@ -1,15 +1,19 @@
 # standard libraries
+import concurrent.futures
 import contextlib
 import logging
+import threading
 import time
 import unittest
 
 # third party libraries
-# None
+import numpy
 
 # local libraries
 from nion.ui import CanvasItem
 from nion.ui import DrawingContext
+from nion.ui import ImagePyramid
+from nion.ui import Instrumentation
 from nion.ui import TestUI
 from nion.utils import Geometry
 
@@ -30,6 +34,18 @@ class TestCanvasItem(CanvasItem.AbstractCanvasItem):
         self.key_r = key
 
 
+class ImmediateExecutor(concurrent.futures.Executor):
+    """Run submitted functions on the calling thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
 class TestCanvasItemClass(unittest.TestCase):
 
     def setUp(self):
@@ -96,7 +112,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
-        canvas_item.canvas_items[0].sizing.minimum_aspect_ratio = 2.0
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_aspect_ratio(2.0))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=80))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=640, height=320))
@@ -106,7 +122,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
-        canvas_item.canvas_items[0].sizing.maximum_aspect_ratio = 1.0
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_aspect_ratio(1.0))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=80, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=480, height=480))
@@ -118,7 +134,7 @@ class TestCanvasItemClass(unittest.TestCase):
         child_canvas = CanvasItem.CanvasItemComposition()
         child_canvas.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(child_canvas)
-        child_canvas.sizing.preferred_aspect_ratio = 1.0
+        child_canvas.update_sizing(child_canvas.sizing.with_preferred_aspect_ratio(1.0))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=80, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=480, height=480))
@@ -128,8 +144,8 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout.margins = Geometry.Margins(top=4, bottom=6, left=8, right=10)
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
-        canvas_item.canvas_items[0].sizing.minimum_width = 16
-        canvas_item.canvas_items[0].sizing.maximum_height = 24
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(16))
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_height(24))
         self.assertEqual(canvas_item.layout_sizing.minimum_width, 16 + 8 + 10)
         self.assertEqual(canvas_item.layout_sizing.maximum_height, 24 + 4 + 6)
 
@@ -140,12 +156,12 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"))
-        canvas_item.canvas_items[0].sizing.minimum_width = 16
-        canvas_item.canvas_items[0].sizing.maximum_height = 12
-        canvas_item.canvas_items[1].sizing.minimum_width = 32
-        canvas_item.canvas_items[1].sizing.maximum_height = 24
-        canvas_item.canvas_items[2].sizing.minimum_width = 48
-        canvas_item.canvas_items[2].sizing.maximum_height = 36
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(16))
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_height(12))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_width(32))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_maximum_height(24))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_minimum_width(48))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_maximum_height(36))
         self.assertEqual(canvas_item.layout_sizing.minimum_width, 16 + 32 + 48 + 2 * 7 + 8 + 10)  # includes margins and spacing
         self.assertEqual(canvas_item.layout_sizing.maximum_height, 36 + 4 + 6)  # includes margins only
 
@@ -156,12 +172,12 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"))
-        canvas_item.canvas_items[0].sizing.minimum_width = 16
-        canvas_item.canvas_items[0].sizing.maximum_height = 12
-        canvas_item.canvas_items[1].sizing.minimum_width = 32
-        canvas_item.canvas_items[1].sizing.maximum_height = 24
-        canvas_item.canvas_items[2].sizing.minimum_width = 48
-        canvas_item.canvas_items[2].sizing.maximum_height = 36
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(16))
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_height(12))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_width(32))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_maximum_height(24))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_minimum_width(48))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_maximum_height(36))
         self.assertEqual(canvas_item.layout_sizing.minimum_width, 48 + 8 + 10)  # includes margins only
         self.assertEqual(canvas_item.layout_sizing.maximum_height, 12 + 24 + 36 + 2 * 7 + 4 + 6)  # includes margins and spacing
 
@@ -173,12 +189,12 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"), Geometry.IntPoint(x=1, y=0))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"), Geometry.IntPoint(x=0, y=1))
         #canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#888"), Geometry.IntPoint(x=1, y=1))
-        canvas_item.canvas_items[0].sizing.minimum_width = 16
-        canvas_item.canvas_items[0].sizing.maximum_height = 12
-        canvas_item.canvas_items[1].sizing.minimum_width = 32
-        canvas_item.canvas_items[1].sizing.maximum_height = 24
-        canvas_item.canvas_items[2].sizing.minimum_width = 48
-        canvas_item.canvas_items[2].sizing.maximum_height = 36
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(16))
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_height(12))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_width(32))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_maximum_height(24))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_minimum_width(48))
+        canvas_item.canvas_items[2].update_sizing(canvas_item.canvas_items[2].sizing.with_maximum_height(36))
         self.assertEqual(canvas_item.layout_sizing.minimum_width, 32 + 48 + 1 * 7 + 8 + 10)  # includes margins only
         self.assertEqual(canvas_item.layout_sizing.maximum_height, 24 + 36 + 1 * 7 + 4 + 6)  # includes margins and spacing
 
@@ -238,7 +254,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[0].sizing.minimum_width = 500
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(500))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=500, height=480))
@@ -249,7 +265,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[0].sizing.minimum_height = 300
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_height(300))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=640, height=300))
@@ -262,7 +278,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[1].sizing.minimum_width = 500
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_width(500))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=140, height=480))
@@ -273,7 +289,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[1].sizing.minimum_height = 300
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_height(300))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=640, height=180))
@@ -286,7 +302,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[0].sizing.maximum_width = 100
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_width(100))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=100, height=480))
@@ -299,7 +315,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        canvas_item.canvas_items[1].sizing.maximum_width = 100
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_maximum_width(100))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=540, height=480))
@@ -316,8 +332,8 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"))
-        canvas_item.canvas_items[0].sizing.minimum_width = 230
-        canvas_item.canvas_items[1].sizing.maximum_width = 100
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_width(230))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_maximum_width(100))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         for i, child_canvas_item in enumerate(canvas_item.canvas_items):
             print("{} {} {}".format(i, child_canvas_item.canvas_origin, child_canvas_item.canvas_size))
@@ -332,7 +348,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -343,7 +359,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -354,7 +370,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout(alignment="start")
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -365,7 +381,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout(alignment="end")
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -376,7 +392,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout()
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -387,7 +403,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout(alignment="start")
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -398,7 +414,7 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.layout = CanvasItem.CanvasItemRowLayout(alignment="end")
         canvas_item.add_stretch()
         background_canvas_item = CanvasItem.BackgroundCanvasItem("#F00")
-        background_canvas_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        background_canvas_item.update_sizing(background_canvas_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.add_canvas_item(background_canvas_item)
         canvas_item.add_stretch()
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
@@ -414,8 +430,8 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(row)
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         canvas_item.add_stretch()
-        canvas_item.canvas_items[0].canvas_items[0].sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
-        canvas_item.canvas_items[1].sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        canvas_item.canvas_items[0].canvas_items[0].update_sizing(canvas_item.canvas_items[0].canvas_items[0].sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_items[0].canvas_rect, Geometry.IntRect.from_tlbr(0, 0, 20, 30))
         self.assertEqual(canvas_item.canvas_items[1].canvas_rect, Geometry.IntRect.from_tlbr(20, 305, 40, 335))
@@ -429,8 +445,8 @@ class TestCanvasItemClass(unittest.TestCase):
         row.add_stretch()
         canvas_item.add_canvas_item(row)
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
-        canvas_item.canvas_items[0].canvas_items[0].sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
-        canvas_item.canvas_items[1].sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        canvas_item.canvas_items[0].canvas_items[0].update_sizing(canvas_item.canvas_items[0].canvas_items[0].sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_items[0].canvas_rect, Geometry.IntRect.from_tlbr(0, 0, 20, 30))
         self.assertEqual(canvas_item.canvas_items[1].canvas_rect, Geometry.IntRect.from_tlbr(20, 305, 40, 335))
@@ -442,7 +458,7 @@ class TestCanvasItemClass(unittest.TestCase):
         row.layout = CanvasItem.CanvasItemRowLayout()
         row.add_stretch()
         content_item = CanvasItem.BackgroundCanvasItem("#F00")
-        content_item.sizing.set_fixed_size(Geometry.IntSize(height=20, width=30))
+        content_item.update_sizing(content_item.sizing.with_fixed_size(Geometry.IntSize(height=20, width=30)))
         row.add_canvas_item(content_item)
         row.add_stretch()
         canvas_item.add_canvas_item(row)
@@ -475,8 +491,8 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"), Geometry.IntPoint(x=1, y=0))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#888"), Geometry.IntPoint(x=0, y=1))
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"), Geometry.IntPoint(x=1, y=1))
-        canvas_item.canvas_items[1].sizing.minimum_height = 300
-        canvas_item.canvas_items[1].sizing.minimum_width = 500
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_height(300))
+        canvas_item.canvas_items[1].update_sizing(canvas_item.canvas_items[1].sizing.with_minimum_width(500))
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
         self.assertEqual(canvas_item.canvas_items[0].canvas_size, Geometry.IntSize(width=140, height=300))
@@ -615,8 +631,8 @@ class TestCanvasItemClass(unittest.TestCase):
         composition = CanvasItem.CanvasItemComposition()
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        composition.canvas_items[0].sizing.maximum_height = 40
-        composition.canvas_items[0].sizing.minimum_height = 40
+        composition.canvas_items[0].update_sizing(composition.canvas_items[0].sizing.with_maximum_height(40))
+        composition.canvas_items[0].update_sizing(composition.canvas_items[0].sizing.with_minimum_height(40))
         composition.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(composition.layout_sizing.minimum_height, 40)
         self.assertIsNone(composition.layout_sizing.maximum_height)
@@ -625,8 +641,8 @@ class TestCanvasItemClass(unittest.TestCase):
         composition = CanvasItem.CanvasItemComposition()
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        composition.canvas_items[1].sizing.maximum_height = 40
-        composition.canvas_items[1].sizing.minimum_height = 40
+        composition.canvas_items[1].update_sizing(composition.canvas_items[1].sizing.with_maximum_height(40))
+        composition.canvas_items[1].update_sizing(composition.canvas_items[1].sizing.with_minimum_height(40))
         composition.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(composition.layout_sizing.minimum_height, 40)
         self.assertIsNone(composition.layout_sizing.maximum_height)
@@ -636,8 +652,8 @@ class TestCanvasItemClass(unittest.TestCase):
         composition.layout = CanvasItem.CanvasItemColumnLayout()
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        composition.canvas_items[0].sizing.maximum_height = 40
-        composition.canvas_items[0].sizing.minimum_height = 40
+        composition.canvas_items[0].update_sizing(composition.canvas_items[0].sizing.with_maximum_height(40))
+        composition.canvas_items[0].update_sizing(composition.canvas_items[0].sizing.with_minimum_height(40))
         composition.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(composition.layout_sizing.minimum_height, 40)
         self.assertIsNone(composition.layout_sizing.maximum_height)
@@ -649,10 +665,10 @@ class TestCanvasItemClass(unittest.TestCase):
         grid_canvas.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"), Geometry.IntPoint(x=1, y=0))
         grid_canvas.add_canvas_item(CanvasItem.BackgroundCanvasItem("#888"), Geometry.IntPoint(x=0, y=1))
         grid_canvas.add_canvas_item(CanvasItem.BackgroundCanvasItem("#00F"), Geometry.IntPoint(x=1, y=1))
-        grid_canvas.canvas_items[0].sizing.maximum_height = 40
-        grid_canvas.canvas_items[0].sizing.minimum_height = 40
-        grid_canvas.canvas_items[0].sizing.maximum_width = 40
-        grid_canvas.canvas_items[0].sizing.minimum_width = 40
+        grid_canvas.canvas_items[0].update_sizing(grid_canvas.canvas_items[0].sizing.with_maximum_height(40))
+        grid_canvas.canvas_items[0].update_sizing(grid_canvas.canvas_items[0].sizing.with_minimum_height(40))
+        grid_canvas.canvas_items[0].update_sizing(grid_canvas.canvas_items[0].sizing.with_maximum_width(40))
+        grid_canvas.canvas_items[0].update_sizing(grid_canvas.canvas_items[0].sizing.with_minimum_width(40))
         grid_canvas.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(grid_canvas.layout_sizing.minimum_height, 40)
         self.assertIsNone(grid_canvas.layout_sizing.maximum_height)
@@ -664,14 +680,14 @@ class TestCanvasItemClass(unittest.TestCase):
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
         canvas_item.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
-        canvas_item.canvas_items[0].sizing.maximum_height = 10
-        canvas_item.canvas_items[0].sizing.minimum_height = 10
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_maximum_height(10))
+        canvas_item.canvas_items[0].update_sizing(canvas_item.canvas_items[0].sizing.with_minimum_height(10))
         composition = CanvasItem.CanvasItemComposition()
         composition.layout = CanvasItem.CanvasItemColumnLayout()
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#F00"))
         composition.add_canvas_item(CanvasItem.BackgroundCanvasItem("#0F0"))
-        composition.canvas_items[1].sizing.maximum_height = 40
-        composition.canvas_items[1].sizing.minimum_height = 40
+        composition.canvas_items[1].update_sizing(composition.canvas_items[1].sizing.with_maximum_height(40))
+        composition.canvas_items[1].update_sizing(composition.canvas_items[1].sizing.with_minimum_height(40))
         canvas_item.add_canvas_item(composition)
         canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480))
         self.assertEqual(canvas_item.canvas_items[0].canvas_origin, Geometry.IntPoint(x=0, y=0))
@@ -701,12 +717,12 @@ class TestCanvasItemClass(unittest.TestCase):
         column = CanvasItem.CanvasItemComposition()
         column.layout = CanvasItem.CanvasItemColumnLayout()
         content = CanvasItem.BackgroundCanvasItem("#F00")
-        content.sizing.set_fixed_size(Geometry.IntSize(width=250, height=60))
+        content.update_sizing(content.sizing.with_fixed_size(Geometry.IntSize(width=250, height=60)))
         scroll_area_canvas_item = CanvasItem.ScrollAreaCanvasItem(content)
         scroll_area_canvas_item.auto_resize_contents = True
         right_canvas_item = CanvasItem.ScrollBarCanvasItem(scroll_area_canvas_item)
         bottom_canvas_item = CanvasItem.ScrollBarCanvasItem(scroll_area_canvas_item, CanvasItem.Orientation.Horizontal)
-        bottom_canvas_item.sizing.set_fixed_height(20)
+        bottom_canvas_item.update_sizing(bottom_canvas_item.sizing.with_fixed_height(20))
         canvas_item = CanvasItem.CanvasItemComposition()
         canvas_item.layout = CanvasItem.CanvasItemGridLayout(Geometry.IntSize(width=2, height=2))
         canvas_item.add_canvas_item(scroll_area_canvas_item, Geometry.IntPoint(x=0, y=0))
@@ -723,8 +739,8 @@ class TestCanvasItemClass(unittest.TestCase):
         column.layout = CanvasItem.CanvasItemColumnLayout()
         column.add_spacing(20)
         item = CanvasItem.EmptyCanvasItem()
-        item.sizing.preferred_height = 10
-        item.sizing.minimum_height = 20
+        item.update_sizing(item.sizing.with_preferred_height(10))
+        item.update_sizing(item.sizing.with_minimum_height(20))
         column.add_canvas_item(item)
         column.add_spacing(20)
         column.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=30, height=100))
@@ -987,6 +1003,32 @@ class TestCanvasItemClass(unittest.TestCase):
             self.assertEqual(canvas_item1.canvas_rect, Geometry.IntRect(origin=Geometry.IntPoint(x=0, y=0), size=Geometry.IntSize(width=480, height=480)))
             self.assertEqual(canvas_item2.canvas_rect, Geometry.IntRect(origin=Geometry.IntPoint(x=480, y=0), size=Geometry.IntSize(width=160, height=480)))
 
+    def test_dragging_splitter_with_deferred_layout_moves_indicator_and_lays_out_on_release(self):
+        ui = TestUI.UserInterface()
+        canvas_widget = ui.create_canvas_widget()
+        with contextlib.closing(canvas_widget):
+            canvas_item = canvas_widget.canvas_item
+            splitter = CanvasItem.SplitterCanvasItem()
+            splitter.defer_drag_layout = True
+            canvas_item1 = TestCanvasItem()
+            canvas_item2 = TestCanvasItem()
+            splitter.add_canvas_item(canvas_item1)
+            splitter.add_canvas_item(canvas_item2)
+            canvas_item.add_canvas_item(splitter)
+            canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=640, height=480), immediate=True)
+            modifiers = CanvasItem.KeyboardModifiers()
+            canvas_widget.on_mouse_pressed(320, 240, modifiers)
+            canvas_widget.on_mouse_position_changed(400, 240, modifiers)
+            canvas_widget.on_mouse_position_changed(480, 240, modifiers)
+            self.assertEqual(320, canvas_item1.canvas_rect.width)
+            drawing_context = DrawingContext.DrawingContext()
+            splitter._repaint(drawing_context)
+            self.assertIn(("moveTo", 480.0, 0.0), drawing_context.commands)
+            canvas_widget.on_mouse_released(480, 240, modifiers)
+            self.assertEqual(480, canvas_item1.canvas_rect.width)
+            self.assertEqual(Geometry.IntRect.from_tlhw(0, 480, 480, 160), canvas_item2.canvas_rect)
+            self.assertAlmostEqual(splitter.splits[0], 0.75)
+
     def test_setting_splitter_initial_values_results_in_correct_layout(self):
         # setup canvas
         canvas_item = CanvasItem.CanvasItemComposition()
@@ -1439,7 +1481,7 @@ class TestCanvasItemClass(unittest.TestCase):
             canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
             empty1 = CanvasItem.EmptyCanvasItem()
             empty2 = CanvasItem.EmptyCanvasItem()
-            empty2.sizing.set_fixed_height(40)
+            empty2.update_sizing(empty2.sizing.with_fixed_height(40))
             canvas_item.add_canvas_item(empty1)
             canvas_item.add_canvas_item(empty2)
             canvas_item.update_layout(Geometry.IntPoint(x=0, y=0), Geometry.IntSize(width=100, height=100), immediate=True)
@@ -1460,10 +1502,10 @@ class TestCanvasItemClass(unittest.TestCase):
             canvas_item.layout = CanvasItem.CanvasItemColumnLayout()
             empty1 = CanvasItem.EmptyCanvasItem()
             row = CanvasItem.CanvasItemComposition()
-            row.sizing.collapsible = True
+            row.update_sizing(row.sizing.with_collapsible(True))
             row.layout = CanvasItem.CanvasItemRowLayout()
             empty2 = CanvasItem.EmptyCanvasItem()
-            empty2.sizing.set_fixed_height(40)
+            empty2.update_sizing(empty2.sizing.with_fixed_height(40))
             canvas_item.add_canvas_item(empty1)
             row.add_canvas_item(empty2)
             canvas_item.add_canvas_item(row)
@@ -1623,6 +1665,352 @@ class TestCanvasItemClass(unittest.TestCase):
             time.sleep(test_canvas_item.repaint_delay * 2)
             self.assertEqual(test_canvas_item.repaint_count, 2)
 
+    def test_layer_repaint_sends_changed_children_as_layer_update(self):
+        CanvasItem._threaded_rendering_enabled = True
+        # render each frame on the calling thread as soon as it is requested.
+        executor, CanvasItem.LayerLayoutRenderTrait._executor = CanvasItem.LayerLayoutRenderTrait._executor, ImmediateExecutor()
+        layer = CanvasItem.LayerCanvasItem()
+        with contextlib.closing(layer), contextlib.ExitStack() as exit_stack:
+            exit_stack.callback(setattr, CanvasItem.LayerLayoutRenderTrait, "_executor", executor)
+            layer.frame_pacer.max_fps = 0
+            layer.layout = CanvasItem.CanvasItemRowLayout()
+            children = [CanvasItem.BackgroundCanvasItem("#888") for i in range(10)]
+            for child in children:
+                layer.add_canvas_item(child)
+            layer.update_layout(Geometry.IntPoint(), Geometry.IntSize(width=500, height=50), immediate=True)
+            # render the first frame, then change one child.
+            layer.update()
+            children[3].background_color = "#F00"
+            drawing_context = DrawingContext.DrawingContext()
+            layer._repaint_template(drawing_context, immediate=False)
+            commands = drawing_context.commands
+            command_names = [command[0] for command in commands]
+            begin_index = command_names.index("begin_layer_update")
+            end_index = command_names.index("end_layer_update")
+            # the update covers the changed child, enlarged by a margin, and draws it and its neighbors.
+            self.assertEqual((0.0, 148.0, 50.0, 54.0), commands[begin_index][3:])
+            self.assertEqual(3, command_names[begin_index:end_index].count("rect"))
+            self.assertEqual(10, command_names[end_index:].count("rect"))
+            # backends without layer images skip the update.
+            expected_drawing_context = DrawingContext.DrawingContext()
+            expected_drawing_context.commands = commands[:begin_index] + commands[end_index + 1:]
+            size, viewbox = Geometry.IntSize(50, 500), Geometry.IntRect.from_tlbr(0, 0, 50, 500)
+            self.assertEqual(expected_drawing_context.to_svg(size, viewbox), drawing_context.to_svg(size, viewbox))
+            # an unchanged repaint keeps the layer seed.
+            layer_seed = commands[0][2]
+            children[3].update()
+            drawing_context = DrawingContext.DrawingContext()
+            layer._repaint_template(drawing_context, immediate=False)
+            self.assertEqual(layer_seed, drawing_context.commands[0][2])
+
+    def test_hit_testing_uses_published_geometry_while_layout_runs_on_thread(self):
+        layout_started_event = threading.Event()
+        finish_layout_event = threading.Event()
+
+        class BlockingColumnLayout(CanvasItem.CanvasItemColumnLayout):
+            blocking = False
+
+            def layout(self, canvas_origin, canvas_size, canvas_items, *, immediate=False):
+                super().layout(canvas_origin, canvas_size, canvas_items, immediate=immediate)
+                if self.blocking:
+                    layout_started_event.set()
+                    finish_layout_event.wait(10.0)
+
+        composition = CanvasItem.CanvasItemComposition()
+        with contextlib.closing(composition):
+            layout = BlockingColumnLayout()
+            composition.layout = layout
+            item0 = CanvasItem.EmptyCanvasItem()
+            item1 = CanvasItem.EmptyCanvasItem()
+            composition.add_canvas_item(item0)
+            composition.add_canvas_item(item1)
+            composition.update_layout(Geometry.IntPoint(), Geometry.IntSize(width=100, height=100), immediate=True)
+            self.assertEqual([item1, composition], composition.canvas_items_at_point(50, 75))
+            layout.blocking = True
+            thread = threading.Thread(target=composition._update_layout, args=(Geometry.IntPoint(), Geometry.IntSize(width=100, height=200)))
+            thread.start()
+            self.assertTrue(layout_started_event.wait(10.0))
+            # the children have moved, but hit testing and mapping use the geometry of the last completed layout.
+            self.assertEqual(Geometry.IntPoint(y=100, x=0), item1.canvas_origin)
+            self.assertEqual([item1, composition], composition.canvas_items_at_point(50, 75))
+            self.assertEqual(Geometry.IntPoint(y=50, x=0), item1.map_to_root_container(Geometry.IntPoint()))
+            finish_layout_event.set()
+            thread.join()
+            self.assertEqual([item0, composition], composition.canvas_items_at_point(50, 75))
+            self.assertEqual(Geometry.IntPoint(y=100, x=0), item1.map_to_root_container(Geometry.IntPoint()))
+
+    def test_mouse_events_are_mapped_to_int_coordinates_of_nested_canvas_item(self):
+        ui = TestUI.UserInterface()
+        canvas_widget = ui.create_canvas_widget()
+        with contextlib.closing(canvas_widget):
+            canvas_item = canvas_widget.canvas_item
+            row = CanvasItem.CanvasItemComposition()
+            row.layout = CanvasItem.CanvasItemRowLayout()
+            column = CanvasItem.CanvasItemComposition()
+            column.layout = CanvasItem.CanvasItemColumnLayout()
+            test_canvas_item = TestCanvasItemClass.TestCanvasItem()
+            test_canvas_item.wants_mouse_events = True
+            empty_canvas_item = CanvasItem.EmptyCanvasItem()
+            column.add_canvas_item(empty_canvas_item)
+            column.add_canvas_item(test_canvas_item)
+            row.add_canvas_item(CanvasItem.EmptyCanvasItem())
+            row.add_canvas_item(column)
+            canvas_item.add_canvas_item(row)
+            canvas_item.update_layout(Geometry.IntPoint(), Geometry.IntSize(width=640, height=480), immediate=True)
+            self.assertEqual((320, 240), test_canvas_item._get_root_container_offset())
+            self.assertEqual(Geometry.IntPoint(y=10, x=5), canvas_item.map_to_canvas_item(Geometry.IntPoint(y=250, x=325), test_canvas_item))
+            self.assertEqual(Geometry.IntPoint(y=250, x=325), test_canvas_item.map_to_root_container(Geometry.IntPoint(y=10, x=5)))
+            self.assertEqual([test_canvas_item, column, row, canvas_item], canvas_item.canvas_items_at_point(325.5, 250.5))
+            self.assertEqual([empty_canvas_item, column, row, canvas_item], canvas_item.canvas_items_at_point(325, 239))
+            modifiers = CanvasItem.KeyboardModifiers()
+            canvas_widget.on_mouse_entered()
+            canvas_widget.on_mouse_position_changed(325, 250, modifiers)
+            canvas_widget.on_mouse_pressed(325.5, 250.5, modifiers)
+            self.assertEqual(Geometry.IntPoint(y=10, x=5), test_canvas_item.mouse_pos)
+            self.assertEqual(Geometry.IntPoint(y=10, x=5), test_canvas_item.mouse_pressed_pos)
+            self.assertIsInstance(test_canvas_item.mouse_pressed_pos.x, int)
+            canvas_widget.on_mouse_released(325, 250, modifiers)
+            canvas_widget.on_mouse_exited()
+
+    def test_layout_sizing_is_cached_and_invalidated_up_the_container_chain(self):
+        get_sizing_count = 0
+
+        class CountingColumnLayout(CanvasItem.CanvasItemColumnLayout):
+            def get_sizing(self, canvas_items):
+                nonlocal get_sizing_count
+                get_sizing_count += 1
+                return super().get_sizing(canvas_items)
+
+        outer = CanvasItem.CanvasItemComposition()
+        with contextlib.closing(outer):
+            outer.layout = CountingColumnLayout()
+            inner = CanvasItem.CanvasItemComposition()
+            inner.layout = CountingColumnLayout()
+            sibling = CanvasItem.CanvasItemComposition()
+            sibling.layout = CountingColumnLayout()
+            leaf = CanvasItem.EmptyCanvasItem()
+            leaf.update_sizing(leaf.sizing.with_fixed_height(20))
+            inner.add_canvas_item(leaf)
+            outer.add_canvas_item(inner)
+            outer.add_canvas_item(sibling)
+            self.assertEqual(20, outer.layout_sizing.minimum_height)
+            self.assertEqual(3, get_sizing_count)
+            outer.layout_immediate(Geometry.IntSize(width=100, height=100))
+            self.assertEqual(20, outer.layout_sizing.minimum_height)
+            self.assertEqual(3, get_sizing_count)
+            # changing the leaf recomputes its ancestors, but not the sibling
+            leaf.update_sizing(leaf.sizing.with_fixed_height(30))
+            self.assertEqual(30, outer.layout_sizing.minimum_height)
+            self.assertEqual(5, get_sizing_count)
+            # visibility changes invalidate the container
+            inner.visible = False
+            self.assertIsNone(outer.layout_sizing.minimum_height)
+            inner.visible = True
+            self.assertEqual(30, outer.layout_sizing.minimum_height)
+            # removing a child invalidates the container
+            inner.remove_canvas_item(leaf)
+            self.assertIsNone(outer.layout_sizing.minimum_height)
+
+    def test_changing_layout_margins_or_spacing_invalidates_cached_layout_sizing(self):
+        outer = CanvasItem.CanvasItemComposition()
+        with contextlib.closing(outer):
+            inner = CanvasItem.CanvasItemComposition()
+            inner.layout = CanvasItem.CanvasItemColumnLayout()
+            for i in range(2):
+                child = CanvasItem.EmptyCanvasItem()
+                child.update_sizing(child.sizing.with_fixed_height(20))
+                inner.add_canvas_item(child)
+            outer.add_canvas_item(inner)
+            self.assertEqual(40, outer.layout_sizing.minimum_height)
+            inner.layout.margins = Geometry.Margins(top=10, bottom=10, left=0, right=0)
+            self.assertEqual(60, inner.layout_sizing.minimum_height)
+            self.assertEqual(60, outer.layout_sizing.minimum_height)
+            inner.layout.spacing = 5
+            self.assertEqual(65, outer.layout_sizing.minimum_height)
+            # a replaced layout no longer invalidates the composition
+            old_layout = inner.layout
+            inner.layout = CanvasItem.CanvasItemColumnLayout()
+            self.assertEqual(40, outer.layout_sizing.minimum_height)
+            old_layout.spacing = 50
+            self.assertEqual(40, outer.layout_sizing.minimum_height)
+
+    def test_sizing_is_immutable_and_hashable(self):
+        sizing = CanvasItem.Sizing()
+        fixed_sizing = sizing.with_fixed_size(Geometry.IntSize(width=30, height=20))
+        self.assertIsNone(sizing.preferred_width)
+        self.assertEqual((30, 30, 30), (fixed_sizing.minimum_width, fixed_sizing.preferred_width, fixed_sizing.maximum_width))
+        self.assertEqual(fixed_sizing, CanvasItem.Sizing().with_fixed_width(30).with_fixed_height(20))
+        self.assertEqual(1, len({fixed_sizing, CanvasItem.Sizing().with_fixed_width(30).with_fixed_height(20)}))
+        self.assertNotEqual(fixed_sizing, fixed_sizing.with_collapsible(True))
+        self.assertEqual(sizing, fixed_sizing.with_unconstrained_width().with_unconstrained_height())
+        with self.assertRaises(AttributeError):
+            sizing.minimum_width = 10
+        canvas_item = CanvasItem.EmptyCanvasItem()
+        canvas_item.update_sizing(fixed_sizing)
+        self.assertIs(fixed_sizing, canvas_item.sizing)
+        self.assertEqual(CanvasItem.Constraint(minimum=20, maximum=20, preferred=20), fixed_sizing.get_height_constraint(100))
+
+    def test_copy_sizing_returns_deprecated_mutable_sizing_accepted_by_update_sizing(self):
+        canvas_item = CanvasItem.EmptyCanvasItem()
+        with self.assertWarns(DeprecationWarning):
+            sizing = canvas_item.copy_sizing()
+        sizing.set_fixed_height(20)
+        sizing.minimum_width = 10
+        canvas_item.update_sizing(sizing)
+        self.assertIsInstance(canvas_item.sizing, CanvasItem.Sizing)
+        self.assertEqual(CanvasItem.Sizing().with_fixed_height(20).with_minimum_width(10), canvas_item.sizing)
+        sizing.clear_height_constraint()
+        self.assertEqual(20, canvas_item.sizing.minimum_height)
+        self.assertEqual(CanvasItem.Sizing().with_minimum_width(10), sizing)
+
+    def test_render_instrumentation_reports_layout_record_and_section_latency(self):
+        ui = TestUI.UserInterface()
+        canvas_widget = ui.create_canvas_widget()
+        with contextlib.closing(canvas_widget):
+            root_canvas_item = canvas_widget.canvas_item
+            canvas_item = CanvasItem.BackgroundCanvasItem()
+            root_canvas_item.add_canvas_item(canvas_item)
+            root_canvas_item.layout_immediate(Geometry.IntSize(width=100, height=100))
+            sink = Instrumentation.RingBufferSink()
+            Instrumentation.add_sink(sink)
+            try:
+                root_canvas_item.layout_immediate(Geometry.IntSize(width=100, height=100))
+                canvas_item.update()
+                drawing_context = DrawingContext.DrawingContext()
+                root_canvas_item.repaint_immediate(drawing_context, Geometry.IntSize(width=100, height=100))
+                root_canvas_item._repaint_finished(drawing_context)
+                canvas_widget._behavior.on_section_rendered(0, 0.002, len(drawing_context.commands))
+            finally:
+                Instrumentation.remove_sink(sink)
+            self.assertFalse(Instrumentation.enabled)
+            summaries = sink.summarize()
+            self.assertIn(("layout", "RootCanvasItem"), summaries)
+            self.assertLess(0, summaries[("record", "BackgroundCanvasItem")].command_count)
+            self.assertEqual(len(drawing_context.commands), summaries[("submit", "RootCanvasItem")].command_count)
+            self.assertEqual(0.002, summaries[("raster", "RootCanvasItem")].total)
+            self.assertLessEqual(summaries[("submit", "RootCanvasItem")].total, summaries[("latency", "RootCanvasItem")].total)
+            # no events are collected without a sink
+            canvas_item.update()
+            root_canvas_item.repaint_immediate(DrawingContext.DrawingContext(), Geometry.IntSize(width=100, height=100))
+            self.assertEqual(len(sink.events), sum(summary.count for summary in summaries.values()))
+
+    def test_bitmap_cell_draws_smallest_pyramid_level_covering_display_size(self):
+        rgba_data = numpy.full((512, 1024), 0xFF204080, dtype=numpy.uint32)
+        rgba_data[1::2, :] = 0xFF406080
+        cell = CanvasItem.BitmapCell(rgba_data)
+        rect = Geometry.IntRect.from_tlbr(0, 0, 50, 100)
+        # the pyramid is built once the image is drawn again
+        drawing_context = DrawingContext.DrawingContext()
+        cell.paint_cell(drawing_context, rect, set())
+        self.assertIs(rgba_data, [command for command in drawing_context.commands if command[0] == "image"][0][3])
+        drawing_context = DrawingContext.DrawingContext()
+        cell.paint_cell(drawing_context, rect, set())
+        image_command = [command for command in drawing_context.commands if command[0] == "image"][0]
+        self.assertEqual((128, 256), image_command[3].shape)
+        self.assertEqual([0xFF305080], numpy.unique(image_command[3]).tolist())
+        self.assertEqual((0.0, 0.0, 100.0, 50.0), image_command[5:9])
+        cell.image_pyramid_enabled = False
+        drawing_context = DrawingContext.DrawingContext()
+        cell.paint_cell(drawing_context, rect, set())
+        self.assertIs(rgba_data, [command for command in drawing_context.commands if command[0] == "image"][0][3])
+        data = numpy.ones((100, 60), dtype=numpy.float32)
+        cell.image_pyramid_enabled = True
+        cell.set_data(data, (0, 1), None)
+        for i in range(2):
+            drawing_context = DrawingContext.DrawingContext()
+            cell.paint_cell(drawing_context, Geometry.IntRect.from_tlbr(0, 0, 100, 100), set())
+            self.assertIs(data, [command for command in drawing_context.commands if command[0] == "data"][0][3])
+
+    def test_bitmap_canvas_item_draws_pyramid_level_for_display_scaling_of_window(self):
+        rgba_data = numpy.full((512, 1024), 0xFF204080, dtype=numpy.uint32)
+
+        def get_image_shape(canvas_item):
+            drawing_context = DrawingContext.DrawingContext()
+            canvas_item.repaint_immediate(drawing_context, Geometry.IntSize(width=100, height=50))
+            return [command for command in drawing_context.commands if command[0] == "image"][0][3].shape
+
+        # without a window, the default display scaling is used; the pyramid is built once the image is drawn again
+        canvas_item = CanvasItem.BitmapCanvasItem(rgba_data)
+        canvas_item.update_layout((0, 0), (50, 100))
+        self.assertEqual(CanvasItem.DefaultDisplayScaling, canvas_item.display_scaling)
+        self.assertEqual((512, 1024), get_image_shape(canvas_item))
+        self.assertEqual((128, 256), get_image_shape(canvas_item))
+        for display_scaling, image_shape in ((1.0, (64, 128)), (4.0, (256, 512))):
+            window = TestUI.DocumentWindowX(display_scaling=display_scaling)
+            with contextlib.closing(window):
+                canvas_widget = TestUI.UserInterface().create_canvas_widget()
+                canvas_item = CanvasItem.BitmapCanvasItem(rgba_data)
+                canvas_widget.canvas_item.add_canvas_item(canvas_item)
+                window.attach(canvas_widget)
+                canvas_widget.on_size_changed(100, 50)
+                self.assertEqual(display_scaling, canvas_item.display_scaling)
+                get_image_shape(canvas_item)
+                self.assertEqual(image_shape, get_image_shape(canvas_item))
+                # a display scaling set on the canvas item is used instead of the display scaling of the window
+                canvas_item.display_scaling = 2.0
+                self.assertEqual((128, 256), get_image_shape(canvas_item))
+        window = TestUI.DocumentWindowX(display_scaling=3.0)
+        with contextlib.closing(window):
+            canvas_widget = TestUI.UserInterface().create_canvas_widget()
+            tiled_image_canvas_item = CanvasItem.TiledImageCanvasItem()
+            canvas_widget.canvas_item.add_canvas_item(tiled_image_canvas_item)
+            window.attach(canvas_widget)
+            canvas_widget.on_size_changed(100, 50)
+            self.assertEqual(3.0, tiled_image_canvas_item.display_scaling)
+
+    def test_bitmap_cell_draws_live_data_without_building_pyramid(self):
+        cell = CanvasItem.BitmapCell()
+        rect = Geometry.IntRect.from_tlbr(0, 0, 50, 100)
+        for i in range(3):
+            data = numpy.full((512, 1024), i, dtype=numpy.float32)
+            cell.set_data(data, (0, 1), None)
+            drawing_context = DrawingContext.DrawingContext()
+            cell.paint_cell(drawing_context, rect, set())
+            self.assertIs(data, [command for command in drawing_context.commands if command[0] == "data"][0][3])
+
+    def test_image_pyramid_levels_halve_and_stop_at_minimum_size(self):
+        image_pyramid = ImagePyramid.ImagePyramid(numpy.arange(101 * 64, dtype=numpy.float32).reshape(101, 64))
+        self.assertEqual(3, image_pyramid.level_count)
+        self.assertEqual((51, 32), image_pyramid.get_level(1).shape)
+        self.assertEqual((26, 16), image_pyramid.get_level(5).shape)
+        self.assertEqual(numpy.float32, image_pyramid.get_level(2).dtype)
+        self.assertEqual(1, image_pyramid.get_level_index_for_size(30, 20))
+        self.assertEqual(0, image_pyramid.get_level_index_for_size(200, 20))
+        self.assertEqual(3, ImagePyramid.ImagePyramid(numpy.zeros((4, 4)), minimum_size=1).level_count)
+
+    def test_image_pyramid_downsample_replicates_odd_last_row_and_column(self):
+        data = numpy.arange(15, dtype=numpy.float32).reshape(3, 5)
+        level = ImagePyramid.downsample(data)
+        self.assertEqual((2, 3), level.shape)
+        self.assertEqual([[3.0, 5.0, 6.5], [10.5, 12.5, 14.0]], level.tolist())
+        rgba_data = numpy.full((3, 3), 0xFF204080, dtype=numpy.uint32)
+        rgba_data[2, :] = 0xFF406080
+        self.assertEqual([[0xFF204080, 0xFF204080], [0xFF406080, 0xFF406080]], ImagePyramid.downsample(rgba_data).tolist())
+
+    def test_tiled_image_canvas_item_draws_only_visible_tiles_from_cache(self):
+        image_source = ImagePyramid.TiledImageSource(numpy.ones((4096, 8192), dtype=numpy.uint16), tile_size=256)
+        self.assertEqual(6, image_source.level_count)
+        canvas_item = CanvasItem.TiledImageCanvasItem(image_source)
+        canvas_item.update_layout((0, 0), (100, 200))
+        drawing_context = DrawingContext.DrawingContext()
+        canvas_item.repaint_immediate(drawing_context, Geometry.IntSize(width=200, height=100))
+        data_commands = [command for command in drawing_context.commands if command[0] == "data"]
+        self.assertEqual(1, len(data_commands))
+        self.assertEqual((128, 256), data_commands[0][3].shape)
+        self.assertEqual(numpy.float32, data_commands[0][3].dtype)
+        # zoom so that image pixels are displayed at full resolution, showing part of a single level 0 tile
+        canvas_item.image_rect = Geometry.FloatRect.from_tlhw(-300, -400, 4096, 8192)
+        canvas_item.display_scaling = 1.0
+        drawing_context = DrawingContext.DrawingContext()
+        canvas_item.repaint_immediate(drawing_context, Geometry.IntSize(width=200, height=100))
+        data_commands = [command for command in drawing_context.commands if command[0] == "data"]
+        self.assertEqual(2, len(data_commands))
+        self.assertEqual([(256, 256), (256, 256)], [command[3].shape for command in data_commands])
+        self.assertEqual([(-144.0, -44.0), (112.0, -44.0)], [command[5:7] for command in data_commands])
+        self.assertEqual(3, image_source.cached_tile_count)
+        drawing_context = DrawingContext.DrawingContext()
+        canvas_item.repaint_immediate(drawing_context, Geometry.IntSize(width=200, height=100))
+        self.assertEqual(3, image_source.cached_tile_count)
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)
@@ -0,0 +1,116 @@
+# standard libraries
+import contextlib
+import logging
+import socket
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.ui import CanvasStreaming
+from nion.ui import DrawingContext
+from nion.utils import Geometry
+
+
+class TestCanvasStreamingClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def __make_drawing_context(self, image: numpy.ndarray, x: float) -> DrawingContext.DrawingContext:
+        dc = DrawingContext.DrawingContext()
+        dc.begin_path()
+        dc.rect(0, 0, 100, 100)
+        dc.fill_style = "#888"
+        dc.fill()
+        dc.draw_image(image, 0, 0, 16, 16)
+        dc.begin_path()
+        dc.move_to(x, 0)
+        dc.line_to(x, 100)
+        dc.stroke_style = "red"
+        dc.stroke()
+        dc.fill_text("label", 10, 90)
+        return dc
+
+    def test_encoder_sends_images_once_and_changes_as_deltas(self):
+        image = numpy.arange(256, dtype=numpy.uint32).reshape(16, 16)
+        DrawingContext.image_buffers.register(image)
+        try:
+            canvas_rect = Geometry.IntRect.from_tlhw(0, 0, 100, 100)
+            encoder = CanvasStreaming.CanvasStreamEncoder(compress=True)
+            decoder = CanvasStreaming.CanvasStreamDecoder()
+            for i in range(5):
+                dc = self.__make_drawing_context(image, 10 + i)
+                self.assertEqual([1], decoder.feed(encoder.encode_section(1, dc, canvas_rect)))
+                self.assertEqual(bytes(dc.binary_commands), decoder.sections[1].binary_commands)
+                self.assertEqual(canvas_rect, decoder.sections[1].canvas_rect)
+            # an unchanged drawing sends nothing
+            self.assertEqual(bytes(), encoder.encode_section(1, self.__make_drawing_context(image, 14), canvas_rect))
+            self.assertEqual(1, encoder.statistics.image_count)
+            self.assertEqual(4, encoder.statistics.delta_frame_count)
+            self.assertEqual(1, encoder.statistics.unchanged_frame_count)
+            self.assertEqual(1, len(decoder.images))
+            self.assertTrue(numpy.array_equal(image, list(decoder.images.values())[0]))
+            # removing the section frees the image
+            decoder.feed(encoder.remove_section(1))
+            self.assertEqual(0, len(decoder.sections))
+            self.assertEqual(0, len(decoder.images))
+        finally:
+            DrawingContext.image_buffers.release(image)
+
+    def test_decoder_handles_messages_split_across_reads(self):
+        encoder = CanvasStreaming.CanvasStreamEncoder()
+        decoder = CanvasStreaming.CanvasStreamDecoder()
+        dc = self.__make_drawing_context(numpy.zeros((16, 16), numpy.uint32), 10)
+        data = encoder.encode_section(0, dc, Geometry.IntRect.from_tlhw(0, 0, 100, 100))
+        updated_section_ids = list()
+        for i in range(0, len(data), 7):
+            updated_section_ids.extend(decoder.feed(data[i:i + 7]))
+        self.assertEqual([0], updated_section_ids)
+        self.assertEqual(bytes(dc.binary_commands), decoder.sections[0].binary_commands)
+
+    def test_server_streams_drawing_to_client_and_receives_events(self):
+        server = CanvasStreaming.CanvasStreamServer(width=100, height=100, compress=True)
+        with contextlib.closing(server):
+            image = numpy.zeros((16, 16), numpy.uint32)
+            server.draw(self.__make_drawing_context(image, 10))
+            client = CanvasStreaming.CanvasStreamClient(*server.address)
+            with contextlib.closing(client):
+                # a new client receives the current drawing
+                self.assertTrue(client.wait_for_update_count(1))
+                dc = self.__make_drawing_context(image, 20)
+                server.draw(dc)
+                self.assertTrue(client.wait_for_update_count(2))
+                self.assertEqual(bytes(dc.binary_commands), client.decoder.sections[0].binary_commands)
+                client.send_event({"type": "mouse_down", "x": 10, "y": 20})
+                self.assertEqual({"type": "mouse_down", "x": 10, "y": 20}, server.event_queue.get(timeout=10.0))
+
+    def test_server_drops_malformed_events_and_keeps_receiving(self):
+        server = CanvasStreaming.CanvasStreamServer()
+        with contextlib.closing(server):
+            with contextlib.closing(socket.create_connection(server.address, timeout=10.0)) as sock:
+                with self.assertLogs(level=logging.WARNING) as logs:
+                    sock.sendall(CanvasStreaming.encode_message(b"EVNT", b"{not json"))
+                    sock.sendall(CanvasStreaming.encode_message(b"EVNT", b"\xff\xfe"))
+                    sock.sendall(CanvasStreaming.encode_message(b"EVNT", b"[1, 2]"))
+                    sock.sendall(CanvasStreaming.encode_message(b"EVNT", b'{"type": "key_pressed"}'))
+                    self.assertEqual({"type": "key_pressed"}, server.event_queue.get(timeout=10.0))
+                self.assertEqual(3, len(logs.records))
+                self.assertTrue(server.event_queue.empty())
+                self.assertEqual(1, len(server.connections))
+
+    def test_server_estimates_font_metrics_from_font_size(self):
+        server = CanvasStreaming.CanvasStreamServer()
+        with contextlib.closing(server):
+            font_metrics = server.get_font_metrics("normal 20px serif", "abcd")
+            self.assertEqual(48, font_metrics.width)
+            self.assertEqual(20, font_metrics.height)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
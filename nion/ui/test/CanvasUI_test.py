@@ -0,0 +1,77 @@
+# standard libraries
+import asyncio
+import logging
+import queue
+import threading
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import CanvasUI
+from nion.ui import UserInterface
+
+
+def get_font_metrics(font: str, text: str) -> UserInterface.FontMetrics:
+    return UserInterface.FontMetrics(width=len(text) * 12, height=12, ascent=10, descent=2, leading=0)
+
+
+class TestCanvasUIClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def __make_window(self, ui: CanvasUI.CanvasUserInterface, events: list):
+        document_window = ui.create_document_window()
+        canvas_widget = ui.create_canvas_widget()
+        document_window.attach(canvas_widget)
+        behavior = canvas_widget._behavior
+        behavior.on_mouse_position_changed = lambda x, y, modifiers: events.append(("move", x, y))
+        behavior.on_mouse_pressed = lambda x, y, modifiers: events.append(("down", x, y)) or True
+        behavior.on_periodic = lambda: events.append(("periodic", ))
+        return document_window
+
+    def test_run_coalesces_mouse_moves_and_stops_on_quit(self):
+        ui = CanvasUI.CanvasUserInterface(lambda dc: None, get_font_metrics)
+        events = list()
+        document_window = self.__make_window(ui, events)
+        event_queue = queue.Queue()
+        for i in range(10):
+            event_queue.put({"type": "mouse_move", "x": i, "y": 0})
+        event_queue.put({"type": "mouse_down", "x": 9, "y": 0})
+        event_queue.put({"type": "mouse_move", "x": 10, "y": 0})
+        event_queue.put({"type": "quit"})
+        self.assertEqual(0, ui.run(event_queue))
+        self.assertEqual([("move", 9, 0), ("down", 9, 0), ("move", 10, 0)], [e for e in events if e[0] != "periodic"])
+        document_window.close()
+
+    def test_run_async_calls_periodic_without_events_until_closed(self):
+        ui = CanvasUI.CanvasUserInterface(lambda dc: None, get_font_metrics)
+        events = list()
+        document_window = self.__make_window(ui, events)
+
+        async def run():
+            event_queue = asyncio.Queue()
+            asyncio.get_running_loop().call_later(0.2, ui.close)
+            return await ui.run_async(event_queue, periodic_interval=0.02)
+
+        self.assertEqual(0, asyncio.run(run()))
+        self.assertLessEqual(5, len(events))
+        self.assertTrue(all(e == ("periodic", ) for e in events))
+        document_window.close()
+
+    def test_close_from_another_thread_stops_run(self):
+        ui = CanvasUI.CanvasUserInterface(lambda dc: None, get_font_metrics)
+        timer = threading.Timer(0.1, ui.close)
+        timer.start()
+        self.assertEqual(0, ui.run(queue.Queue()))
+        timer.join()
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
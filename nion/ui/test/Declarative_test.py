@@ -0,0 +1,192 @@
+# standard libraries
+import contextlib
+import logging
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import CanvasItem
+from nion.ui import Declarative
+from nion.ui import TestUI
+from nion.utils import ListModel
+from nion.utils import Model
+from nion.utils import Observable
+
+
+class ItemHandler:
+
+    def __init__(self, item):
+        self.item = item
+        self.label = None
+
+
+class Handler(Observable.Observable):
+
+    def __init__(self, ui_view, resources=None):
+        super().__init__()
+        self.ui_view = ui_view
+        self.resources = resources or dict()
+        self.items = ListModel.ListModel()
+        self.value_model = Model.PropertyModel("abc")
+
+    def create_handler(self, component_id: str, container=None, item=None, **kwargs):
+        return ItemHandler(item)
+
+
+class TestDeclarativeClass(unittest.TestCase):
+
+    def setUp(self):
+        CanvasItem._threaded_rendering_enabled = False
+
+    def tearDown(self):
+        pass
+
+    def test_binding_expression_is_parsed(self):
+        binding_expression = Declarative.parse_binding_expression("@binding(value_model.value, converter=int_converter)")
+        self.assertEqual(("value_model", "value"), binding_expression.property_path)
+        self.assertEqual("value", binding_expression.property_name)
+        self.assertEqual("int_converter", binding_expression.converter_name)
+        self.assertIsNone(Declarative.parse_binding_expression("value_model"))
+        self.assertIsNone(Declarative.parse_binding_expression(None))
+        self.assertIs(binding_expression, Declarative.parse_binding_expression("@binding(value_model.value, converter=int_converter)"))
+
+    def test_compile_description_returns_plan(self):
+        u = Declarative.DeclarativeUI()
+        d = u.create_column(u.create_label(text="a"), u.create_stretch(), width=40)
+        plan = Declarative.compile_description(d)
+        self.assertIs(plan, Declarative.compile_description(plan))
+        self.assertEqual(["text_label", "stretch"], [child.d_type for child in plan.children])
+        self.assertEqual({"width": 40}, plan.properties)
+
+    def test_construct_reflects_changes_to_description(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        d = u.create_column(u.create_label(text="a"))
+        handler = Handler(d)
+        widget = Declarative.construct(ui, None, d, handler)
+        self.assertEqual(1, widget.child_count)
+        d["children"].append(u.create_label(text="b"))
+        widget = Declarative.construct(ui, None, d, handler)
+        self.assertEqual(2, widget.child_count)
+
+    def test_compiled_plan_reuses_component_plan_while_component_is_unchanged(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        component = u.define_component(u.create_label(name="label", text="a"), component_id="item")
+        plan = Declarative.compile_description(u.create_column(u.create_component_instance("item")))
+        handler = Handler(plan, {"item": component})
+        compiled_descriptions = list()
+        compile_description = Declarative.compile_description
+
+        def record_compile_description(d):
+            compiled_descriptions.append(d)
+            return compile_description(d)
+
+        Declarative.compile_description = record_compile_description
+        try:
+            for i in range(2):
+                widget = Declarative.DeclarativeWidget(ui, None, handler)
+                with contextlib.closing(widget):
+                    self.assertEqual("a", widget.content_widget.children[0].children[0].handler.label.text)
+        finally:
+            Declarative.compile_description = compile_description
+        self.assertEqual(1, sum(1 for d in compiled_descriptions if d is component))
+        component_plan = plan.children[0].get_component_plan(component)
+        self.assertIs(component_plan, plan.children[0].get_component_plan(component))
+        changed_component = u.define_component(u.create_label(name="label", text="b"), component_id="item")
+        handler.resources["item"] = changed_component
+        self.assertIsNot(component_plan, plan.children[0].get_component_plan(changed_component))
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            self.assertEqual("b", widget.content_widget.children[0].children[0].handler.label.text)
+
+    def test_connect_items_constructs_component_for_each_item(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        item_component = u.define_component(u.create_label(name="label", text="@binding(item)"), component_id="item")
+        handler = Handler(u.create_column(items="items.items", item_component_id="item"), {"item": item_component})
+        for i in range(8):
+            handler.items.append_item(str(i))
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            column_widget = widget.content_widget.children[0]
+            self.assertEqual(8, column_widget.child_count)
+            self.assertEqual([str(i) for i in range(8)], [child.text for child in column_widget.children])
+            handler.items.insert_item(0, "x")
+            self.assertEqual("x", column_widget.children[0].text)
+            self.assertEqual("x", column_widget.children[0].handler.item)
+
+    def test_binding_to_handler_property_updates_widget(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        handler = Handler(u.create_column(u.create_label(name="label", text="@binding(value_model.value)")))
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            self.assertEqual("abc", handler.label.text)
+            handler.value_model.value = "def"
+            handler.label.run_pending_keyed_tasks()
+            self.assertEqual("def", handler.label.text)
+
+    def test_lazy_tabs_construct_pages_on_first_show(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        tabs = [u.create_tab(str(i), u.create_label(name=f"label{i}", text="@binding(value_model.value)")) for i in range(3)]
+        handler = Handler(u.create_tabs(*tabs, name="tabs", lazy=True))
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            self.assertEqual("abc", handler.label0.text)
+            self.assertFalse(hasattr(handler, "label1"))
+            self.assertFalse(hasattr(handler, "label2"))
+            handler.tabs.current_index = 2
+            self.assertEqual("abc", handler.label2.text)
+            self.assertFalse(hasattr(handler, "label1"))
+            label2 = handler.label2
+            handler.tabs.current_index = 0
+            handler.tabs.current_index = 2
+            self.assertIs(label2, handler.label2)
+
+    def test_lazy_stack_constructs_pages_when_current_index_changes(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        children = [u.create_label(name=f"label{i}", text=str(i)) for i in range(3)]
+        handler = Handler(u.create_stack(*children, name="stack", lazy=True))
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            self.assertEqual("0", handler.label0.text)
+            self.assertFalse(hasattr(handler, "label1"))
+            handler.stack.current_index = 1
+            self.assertEqual("1", handler.label1.text)
+            self.assertFalse(hasattr(handler, "label2"))
+
+    def test_lazy_tabs_construct_page_at_bound_current_index_only(self):
+        ui = TestUI.UserInterface()
+        u = Declarative.DeclarativeUI()
+        tabs = [u.create_tab(str(i), u.create_label(name=f"label{i}", text=str(i))) for i in range(3)]
+        handler = Handler(u.create_tabs(*tabs, name="tabs", lazy=True, current_index="@binding(index_model.value)"))
+        handler.index_model = Model.PropertyModel(2)
+        widget = Declarative.DeclarativeWidget(ui, None, handler)
+        with contextlib.closing(widget):
+            self.assertEqual(2, handler.tabs.current_index)
+            self.assertEqual("2", handler.label2.text)
+            self.assertFalse(hasattr(handler, "label0"))
+            self.assertFalse(hasattr(handler, "label1"))
+
+    def test_stack_current_index_changed_event_fires_only_on_change(self):
+        ui = TestUI.UserInterface()
+        stack = ui.create_stack_widget()
+        with contextlib.closing(stack):
+            stack.add(ui.create_column_widget())
+            stack.add(ui.create_column_widget())
+            indexes = list()
+            with contextlib.closing(stack.current_index_changed_event.listen(indexes.append)):
+                stack.current_index = 1
+                stack.current_index = 1
+                stack.current_index = 0
+            self.assertEqual([1, 0], indexes)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
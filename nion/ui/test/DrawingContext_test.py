@@ -1,10 +1,15 @@
 # standard libraries
+import io
+import os
+import struct
+import tempfile
 import unittest
 
 # third party libraries
 import numpy
 
 # local libraries
+from nion.ui import DrawingBenchmark
 from nion.ui import DrawingContext
 from nion.utils import Geometry
 
@@ -24,3 +29,149 @@ class TestImageClass(unittest.TestCase):
         color_map_data[:] = 0xFF010203
         dc.draw_data(data, 0, 0, 4, 4, 0, 1, color_map_data)
         dc.to_svg(Geometry.IntSize(4, 4), Geometry.IntRect.from_tlbr(0, 0, 4, 4))
+
+    def __make_drawing_context(self) -> DrawingContext.DrawingContext:
+        dc = DrawingContext.DrawingContext()
+        with dc.saver():
+            dc.clip_rect(0, 0, 8, 8)
+            dc.translate(1, 2)
+            dc.begin_path()
+            dc.move_to(0, 0)
+            dc.line_to(4, 4)
+            dc.arc(2, 2, 1, 0, 3)
+            dc.close_path()
+            dc.fill_style = "rgba(255, 0, 0, 0.5)"
+            dc.fill()
+            dc.stroke_style = "blue"
+            dc.line_width = 2
+            dc.stroke()
+            dc.font = "bold 12px serif"
+            dc.text_align = "center"
+            dc.fill_text("a", 2, 2)
+            gradient = dc.create_linear_gradient(8, 8, 0, 0, 8, 0)
+            gradient.add_color_stop(0, "red")
+            dc.fill_style = gradient
+            dc.draw_image(numpy.zeros((2, 2), numpy.uint32), 0, 0, 2, 2)
+            dc.draw_data(numpy.zeros((2, 2), numpy.float32), 0, 0, 2, 2, 0, 1, None)
+            dc.statistics("x")
+        return dc
+
+    def test_commands_are_described_by_opcode_table(self):
+        dc = self.__make_drawing_context()
+        binary_commands = bytes(dc.binary_commands)
+        for command in dc.commands:
+            opcode = DrawingContext.opcodes_by_name[command[0]]
+            self.assertIn(opcode.code, binary_commands)
+            self.assertIs(opcode, DrawingContext.opcodes_by_code[opcode.code])
+        self.assertEqual(len(DrawingContext.opcodes), len(DrawingContext.opcodes_by_code))
+        js = dc.to_js()
+        self.assertEqual(js, DrawingContext.JavaScriptBackend().render(dc.commands))
+        self.assertIn("ctx.fillStyle = 'rgba(255, 0, 0, 0.5)';", js)
+        svg = dc.to_svg(Geometry.IntSize(8, 8), Geometry.IntRect.from_tlbr(0, 0, 8, 8))
+        self.assertIn("fill='rgb(255, 0, 0)' fill-opacity='0.5'", svg)
+
+    def test_binary_commands_are_written_with_opcode_table_formats(self):
+        dc = self.__make_drawing_context()
+        dc.mark_latency()
+        binary_commands = bytes(dc.binary_commands)
+        offset = 0
+        unpacked_commands = list()
+        while offset < len(binary_commands):
+            opcode = DrawingContext.opcodes_by_code[binary_commands[offset:offset + 4]]
+            binary_format = opcode.binary_format
+            struct_format = "4s"
+            if binary_format.startswith("<"):
+                binary_format, struct_format = binary_format[1:], "<4s"
+            for format_char in binary_format:
+                if format_char == "S":
+                    length = struct.unpack_from(struct_format + "i", binary_commands, offset)[-1]
+                    struct_format += "i{}s0i".format(length)
+                else:
+                    struct_format += format_char
+            unpacked_commands.append(struct.unpack_from(struct_format, binary_commands, offset))
+            offset += struct.calcsize(struct_format)
+        self.assertEqual(len(binary_commands), offset)
+        self.assertEqual([command[0] for command in dc.commands], [DrawingContext.opcodes_by_code[c[0]].name for c in unpacked_commands])
+        fill_text_command = unpacked_commands[[command[0] for command in dc.commands].index("fillText")]
+        self.assertEqual((b"text", 1, b"a", 2.0, 2.0, 0.0), fill_text_command)
+
+    def test_command_stream_recorder_discards_oldest_streams_beyond_byte_limit(self):
+        recorder = DrawingContext.CommandStreamRecorder(max_nbytes=80)
+        command_streams = list()
+        for i in range(4):
+            dc = self.__make_drawing_context()
+            recorder.record(dc, 8, 8)
+            command_streams.append(dc.commands)
+        # each stream draws a 2x2 uint32 image and 2x2 float32 data
+        self.assertEqual(64, recorder.nbytes)
+        self.assertEqual(command_streams[2:], [command_stream.commands for command_stream in recorder.command_streams])
+        recorder = DrawingContext.CommandStreamRecorder(max_nbytes=8)
+        recorder.record(self.__make_drawing_context(), 8, 8)
+        self.assertEqual(1, len(recorder.command_streams))
+
+    def test_recorded_command_streams_replay_in_benchmark(self):
+        recorder = DrawingContext.CommandStreamRecorder(max_count=2)
+        for i in range(3):
+            recorder.record(self.__make_drawing_context(), 8, 8)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "streams.pickle")
+            recorder.save(file_path)
+            command_streams = DrawingContext.load_command_streams(file_path)
+        self.assertEqual(2, len(command_streams))
+        self.assertEqual((8, 8), (command_streams[0].width, command_streams[0].height))
+        statistics = DrawingBenchmark.profile_opcodes("svg", DrawingBenchmark.make_svg_backend, command_streams)
+        self.assertEqual(2, statistics.stream_count)
+        self.assertEqual(2 * len(self.__make_drawing_context().commands), statistics.command_count)
+        self.assertEqual(4, statistics.opcodes["save"].count + statistics.opcodes["restore"].count)
+        self.assertGreater(statistics.opcodes["image"].elapsed, 0.0)
+        self.assertGreater(statistics.output_size, 0)
+        output = io.StringIO()
+        statistics.report(output)
+        self.assertTrue(output.getvalue().startswith("svg: 2 streams"))
+        DrawingBenchmark.make_replay_benchmark(DrawingBenchmark.make_js_backend, command_streams)()
+
+    def test_benchmark_skips_layer_updates_as_render_does(self):
+        dc = DrawingContext.DrawingContext()
+        dc.begin_layer(1, 2, 0, 0, 8, 8)
+        dc.begin_layer_update(1, 1, 0, 0, 4, 4)
+        dc.rect(0, 0, 4, 4)
+        dc.end_layer_update(1, 1, 0, 0, 4, 4)
+        dc.rect(0, 0, 8, 8)
+        dc.end_layer(1, 2, 0, 0, 8, 8)
+        command_streams = [DrawingContext.CommandStream(8, 8, list(dc.commands))]
+        statistics = DrawingBenchmark.profile_opcodes("svg", DrawingBenchmark.make_svg_backend, command_streams)
+        self.assertEqual(3, statistics.command_count)
+        self.assertEqual(1, statistics.opcodes["rect"].count)
+        self.assertNotIn("begin_layer_update", statistics.opcodes)
+        self.assertGreater(statistics.opcodes["rect"].elapsed, 0.0)
+
+    def test_registered_image_buffers_keep_image_id_until_released(self):
+        registry = DrawingContext.ImageBufferRegistry()
+        image = numpy.zeros((4, 4), dtype=numpy.uint32)
+        self.assertNotEqual(registry.get_image_id(image), registry.get_image_id(image))
+        image_id = registry.register(image)
+        self.assertEqual(image_id, registry.register(image))
+        self.assertEqual(image_id, registry.get_image_id(image))
+        registry.changed(image)
+        changed_image_id = registry.get_image_id(image)
+        self.assertNotEqual(image_id, changed_image_id)
+        registry.release(image)
+        self.assertEqual(changed_image_id, registry.get_image_id(image))
+        registry.release(image)
+        self.assertEqual(0, len(registry))
+        registry.register(image)
+        image = None
+        self.assertEqual(0, len(registry))
+
+    def test_draw_image_uses_registered_image_id(self):
+        image = numpy.zeros((4, 4), dtype=numpy.uint32)
+        DrawingContext.image_buffers.register(image)
+        try:
+            image_ids = set()
+            for i in range(2):
+                drawing_context = DrawingContext.DrawingContext()
+                drawing_context.draw_image(image, 0, 0, 4, 4)
+                image_ids.add(drawing_context.commands[0][4])
+            self.assertEqual(1, len(image_ids))
+        finally:
+            DrawingContext.image_buffers.release(image)
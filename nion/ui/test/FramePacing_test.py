@@ -0,0 +1,138 @@
+# standard libraries
+import concurrent.futures
+import contextlib
+import logging
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import CanvasItem
+from nion.ui import FramePacing
+from nion.utils import Geometry
+
+
+class ManualFrameTimer:
+    """A clock and frame timer which only advance when told to, so that frame pacing can be tested without sleeping."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.__entries = list()
+
+    def clock(self) -> float:
+        return self.now
+
+    def call_at(self, due_time, fn) -> None:
+        self.__entries.append((due_time, fn))
+
+    @property
+    def pending_count(self) -> int:
+        return len(self.__entries)
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+        due_entries = [entry for entry in self.__entries if entry[0] <= self.now]
+        self.__entries = [entry for entry in self.__entries if entry[0] > self.now]
+        for due_time, fn in sorted(due_entries, key=lambda entry: entry[0]):
+            fn()
+
+
+class ImmediateExecutor(concurrent.futures.Executor):
+    """Run submitted functions on the calling thread."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class TestFramePacingClass(unittest.TestCase):
+
+    def setUp(self):
+        self.frame_timer = ManualFrameTimer()
+
+    def tearDown(self):
+        pass
+
+    def test_frame_pacer_merges_requests_into_frames_at_max_fps(self):
+        frame_times = list()
+        frame_pacer = FramePacing.FramePacer(lambda: frame_times.append(self.frame_timer.now), max_fps=10,
+                                             clock=self.frame_timer.clock, frame_timer=self.frame_timer)
+        for i in range(100):
+            frame_pacer.request_frame()
+        self.assertEqual(1, len(frame_times))
+        self.assertEqual(1, self.frame_timer.pending_count)
+        self.frame_timer.advance(0.05)
+        self.assertEqual(1, len(frame_times))
+        self.frame_timer.advance(0.05)
+        self.assertEqual([100.0, 100.1], frame_times)
+        self.assertEqual(FramePacing.FrameStatistics(2, 98, 2.0), frame_pacer.statistics)
+        frame_pacer.close()
+        frame_pacer.request_frame()
+        self.frame_timer.advance(1.0)
+        self.assertEqual(2, len(frame_times))
+
+    def test_frame_pacer_starts_frame_immediately_once_interval_has_passed(self):
+        frame_times = list()
+        frame_pacer = FramePacing.FramePacer(lambda: frame_times.append(self.frame_timer.now), max_fps=10,
+                                             clock=self.frame_timer.clock, frame_timer=self.frame_timer)
+        frame_pacer.request_frame()
+        self.frame_timer.advance(0.2)
+        frame_pacer.request_frame()
+        self.assertEqual([100.0, 100.2], frame_times)
+        self.assertEqual(0, self.frame_timer.pending_count)
+        # without a maximum frame rate, every request starts a frame
+        frame_pacer.max_fps = 0
+        for i in range(3):
+            frame_pacer.request_frame()
+        self.assertEqual(5, len(frame_times))
+        self.assertEqual(0, frame_pacer.statistics.dropped_count)
+
+    def test_frame_pacer_measures_fps_over_the_last_second(self):
+        frame_pacer = FramePacing.FramePacer(lambda: None, max_fps=10, clock=self.frame_timer.clock, frame_timer=self.frame_timer)
+        for i in range(15):
+            frame_pacer.request_frame()
+            self.frame_timer.advance(0.1)
+        self.assertEqual(FramePacing.FrameStatistics(15, 0, 10.0), frame_pacer.statistics)
+        frame_pacer.reset_statistics()
+        self.assertEqual(FramePacing.FrameStatistics(0, 0, 0.0), frame_pacer.statistics)
+
+    def test_layer_merges_rapid_updates_into_paced_frames(self):
+        # layers make their frame pacer with the default clock and timer and render with the shared executor.
+        default_clock, default_frame_timer = FramePacing.default_clock, FramePacing.default_frame_timer
+        executor = CanvasItem.LayerLayoutRenderTrait._executor
+        threaded_rendering_enabled = CanvasItem._threaded_rendering_enabled
+        FramePacing.default_clock, FramePacing.default_frame_timer = self.frame_timer.clock, self.frame_timer
+        CanvasItem.LayerLayoutRenderTrait._executor = ImmediateExecutor()
+        CanvasItem._threaded_rendering_enabled = True
+        try:
+            layer = CanvasItem.LayerCanvasItem()
+            with contextlib.closing(layer):
+                background_canvas_item = CanvasItem.BackgroundCanvasItem("#888")
+                layer.add_canvas_item(background_canvas_item)
+                layer.update_layout(Geometry.IntPoint(), Geometry.IntSize(width=640, height=480), immediate=True)
+                layer.frame_pacer.max_fps = 10
+                # run the frames for the initial layout, then wait so that the next frame may start immediately.
+                self.frame_timer.advance(1.0)
+                self.frame_timer.advance(1.0)
+                layer.frame_pacer.reset_statistics()
+                for i in range(100):
+                    background_canvas_item.update()
+                self.assertEqual(FramePacing.FrameStatistics(1, 98, 1.0), layer.frame_pacer.statistics)
+                self.assertEqual(1, self.frame_timer.pending_count)
+                self.frame_timer.advance(0.1)
+                self.assertEqual(FramePacing.FrameStatistics(2, 98, 2.0), layer.frame_pacer.statistics)
+                self.assertEqual(0, self.frame_timer.pending_count)
+        finally:
+            FramePacing.default_clock, FramePacing.default_frame_timer = default_clock, default_frame_timer
+            CanvasItem.LayerLayoutRenderTrait._executor = executor
+            CanvasItem._threaded_rendering_enabled = threaded_rendering_enabled
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
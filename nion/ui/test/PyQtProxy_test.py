@@ -0,0 +1,252 @@
+# standard libraries
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.ui import DrawingContext
+from nion.ui import Startup
+
+# the proxy requires Qt; run without a display.
+if Startup.has_module("PyQt5"):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtGui
+    from PyQt5 import QtWidgets
+    from nion.ui import PyQtProxy
+    from nion.ui import QtUserInterface
+else:
+    PyQtProxy = None
+
+proxy = None
+
+
+def setUpModule():
+    global proxy
+    if PyQtProxy:
+        if not PyQtProxy.app:
+            PyQtProxy.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        stdout, stderr = sys.stdout, sys.stderr
+        proxy = PyQtProxy.PyQtProxy()
+        sys.stdout, sys.stderr = stdout, stderr  # the proxy redirects output to logging for the application
+
+
+@unittest.skipUnless(PyQtProxy, "PyQt5 is not available")
+class TestPyQtProxyClass(unittest.TestCase):
+
+    def setUp(self):
+        PyQtProxy.ClearPaintCaches()
+        PyQtProxy.ClearDecodedImageCache()
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        PyQtProxy.ClearPaintCaches()
+        PyQtProxy.ClearDecodedImageCache()
+        self.__directory.cleanup()
+
+    def __write_image(self, name: str, width: int, height: int, color: str, mtime_ns: int = 10 ** 18) -> str:
+        file_path = os.path.join(self.__directory.name, name)
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32)
+        image.fill(QtGui.QColor(color))
+        self.assertTrue(image.save(file_path, "PNG"))
+        # modification times are set explicitly since a rewrite may happen within the file system time resolution.
+        os.utime(file_path, ns=(mtime_ns, mtime_ns))
+        return file_path
+
+    def test_get_font_is_shared_for_the_same_font_string_and_scaling(self):
+        font = PyQtProxy.GetFont("bold 12px sans-serif")
+        self.assertIs(font, PyQtProxy.GetFont("bold 12px sans-serif"))
+        self.assertEqual(12, font.pixelSize())
+        self.assertTrue(font.bold())
+        scaled_font = PyQtProxy.GetFont("bold 12px sans-serif", 2.0)
+        self.assertIsNot(font, scaled_font)
+        self.assertEqual(24, scaled_font.pixelSize())
+        PyQtProxy.ClearPaintCaches()
+        self.assertIsNot(font, PyQtProxy.GetFont("bold 12px sans-serif"))
+
+    def test_parse_color_string_parses_rgb_rgba_and_hex_colors(self):
+        self.assertEqual((1, 2, 3, 255), PyQtProxy.ParseColorString("rgb(1, 2, 3)").getRgb())
+        self.assertEqual((1, 2, 3, 127), PyQtProxy.ParseColorString("rgba(1,2,3,0.5)").getRgb())
+        self.assertEqual((1, 2, 3, 0), PyQtProxy.ParseColorString(" rgba(1, 2, 3, 0) ").getRgb())
+        self.assertEqual((16, 32, 48, 255), PyQtProxy.ParseColorString("#102030").getRgb())
+        self.assertEqual((16, 32, 48, 128), PyQtProxy.ParseColorString("#80102030").getRgb())
+        self.assertEqual((255, 0, 0, 255), PyQtProxy.ParseColorString("red").getRgb())
+        self.assertFalse(PyQtProxy.ParseColorString("not-a-color").isValid())
+        self.assertIs(PyQtProxy.ParseColorString("#102030"), PyQtProxy.ParseColorString("#102030"))
+
+    def test_make_drawing_commands_resolves_styles_to_shared_colors(self):
+        commands = [("fillStyle", "#F00"), ("fillRect", 0, 0, 4, 4), ("strokeStyle", "rgba(0, 0, 255, 0.5)")]
+        drawing_commands = PyQtProxy.MakeDrawingCommands(commands)
+        self.assertEqual(["fillStyle", "fillRect", "strokeStyle"], [c.command for c in drawing_commands])
+        self.assertEqual((0, 0, 4, 4), tuple(drawing_commands[1].args))
+        self.assertEqual((255, 0, 0, 255), drawing_commands[0].args[0].getRgb())
+        self.assertEqual((0, 0, 255, 127), drawing_commands[2].args[0].getRgb())
+        # the same style in later command streams reuses the parsed color
+        later_drawing_commands = PyQtProxy.MakeDrawingCommands(commands)
+        self.assertIs(drawing_commands[0].args[0], later_drawing_commands[0].args[0])
+        self.assertIs(drawing_commands[2].args[0], later_drawing_commands[2].args[0])
+        self.assertEqual(2, PyQtProxy.ParseColorString.cache_info().misses)
+
+    def test_get_text_run_is_keyed_by_font_key_and_text(self):
+        font = PyQtProxy.GetFont("16px sans-serif")
+        text_run = PyQtProxy.GetTextRun(font, "abc")
+        self.assertIs(text_run, PyQtProxy.GetTextRun(font, "abc"))
+        # a separately made font with the same key shares the run
+        self.assertIs(text_run, PyQtProxy.GetTextRun(PyQtProxy.ParseFontString("16px sans-serif"), "abc"))
+        self.assertIsNot(text_run, PyQtProxy.GetTextRun(font, "abd"))
+        self.assertIsNot(text_run, PyQtProxy.GetTextRun(PyQtProxy.GetFont("17px sans-serif"), "abc"))
+        self.assertEqual(3, len(PyQtProxy.text_run_cache))
+
+    def test_get_text_run_evicts_least_recently_used_runs(self):
+        font = PyQtProxy.GetFont("16px sans-serif")
+        text_run_cache_size = PyQtProxy.text_run_cache_size
+        PyQtProxy.text_run_cache_size = 2
+        try:
+            text_run_a = PyQtProxy.GetTextRun(font, "a")
+            text_run_b = PyQtProxy.GetTextRun(font, "b")
+            self.assertIs(text_run_a, PyQtProxy.GetTextRun(font, "a"))  # a is now the most recently used
+            PyQtProxy.GetTextRun(font, "c")
+            self.assertEqual([(font.key(), "a"), (font.key(), "c")], list(PyQtProxy.text_run_cache.keys()))
+            self.assertIs(text_run_a, PyQtProxy.GetTextRun(font, "a"))
+            self.assertIsNot(text_run_b, PyQtProxy.GetTextRun(font, "b"))
+            self.assertEqual(2, len(PyQtProxy.text_run_cache))
+        finally:
+            PyQtProxy.text_run_cache_size = text_run_cache_size
+
+    def test_get_text_run_metrics_match_font_metrics(self):
+        font = PyQtProxy.GetFont("16px sans-serif")
+        text_run = PyQtProxy.GetTextRun(font, "MMMM")
+        font_metrics = QtGui.QFontMetrics(font)
+        self.assertEqual((font_metrics.width("MMMM"), font_metrics.ascent(), font_metrics.height(), font_metrics.xHeight()),
+                         (text_run.width, text_run.ascent, text_run.height, text_run.x_height))
+        self.assertEqual(font_metrics.boundingRect("MMMM").left(), int(text_run.path.boundingRect().left()))
+
+    def __get_text_bounds(self, text_align: str, text_baseline: str):
+        commands = [("font", "16px sans-serif"), ("fillStyle", "#000"), ("textAlign", text_align),
+                    ("textBaseline", text_baseline), ("fillText", "MMMM", 60, 40, 0)]
+        ys, xs = numpy.nonzero(PyQtProxy.PaintRGBA(commands, 120, 80))
+        return xs.min(), ys.min()
+
+    def test_fill_text_alignment_offsets_by_text_run_metrics(self):
+        text_run = PyQtProxy.GetTextRun(PyQtProxy.GetFont("16px sans-serif"), "MMMM")
+        left, alphabetic = self.__get_text_bounds("left", "alphabetic")
+        self.assertEqual((left, alphabetic), self.__get_text_bounds("start", "ideographic"))
+        self.assertAlmostEqual(left - text_run.width * 0.5, self.__get_text_bounds("center", "alphabetic")[0], delta=1)
+        self.assertEqual(left - text_run.width, self.__get_text_bounds("right", "alphabetic")[0])
+        self.assertEqual(left - text_run.width, self.__get_text_bounds("end", "alphabetic")[0])
+        self.assertEqual(alphabetic + text_run.ascent, self.__get_text_bounds("left", "top")[1])
+        self.assertEqual(alphabetic + 2 * text_run.ascent - text_run.height, self.__get_text_bounds("left", "hanging")[1])
+        self.assertAlmostEqual(alphabetic + text_run.x_height * 0.5, self.__get_text_bounds("left", "middle")[1], delta=1)
+        self.assertEqual(alphabetic + text_run.ascent - text_run.height, self.__get_text_bounds("left", "bottom")[1])
+
+    def test_create_rgba_images_paints_on_the_worker_pool_and_decodes_the_results(self):
+        ui = QtUserInterface.QtUserInterface(proxy)
+        jobs = list()
+        for i in range(4):
+            drawing_context = DrawingContext.DrawingContext()
+            drawing_context.begin_path()
+            drawing_context.rect(0, 0, i + 1, 2)
+            drawing_context.fill_style = "#F00"
+            drawing_context.fill()
+            jobs.append((drawing_context, 8 + i, 4))
+        paint_threads = list()
+        display_scaling_threads = list()
+        decoded_images = list()
+        paint_rgba, get_display_scaling = PyQtProxy.PaintRGBA, PyQtProxy.GetDisplayScaling
+
+        def paint_rgba_on_thread(*args):
+            paint_threads.append(threading.current_thread())
+            return paint_rgba(*args)
+
+        def get_display_scaling_on_thread():
+            display_scaling_threads.append(threading.current_thread())
+            return 1.0
+
+        def decode_data(data):
+            decoded_images.append(data)
+            return data
+
+        PyQtProxy.PaintRGBA, PyQtProxy.GetDisplayScaling = paint_rgba_on_thread, get_display_scaling_on_thread
+        proxy.decode_data = decode_data
+        try:
+            futures = ui.create_rgba_images(jobs)
+            images = [future.result(timeout=10.0) for future in futures]
+        finally:
+            PyQtProxy.PaintRGBA, PyQtProxy.GetDisplayScaling = paint_rgba, get_display_scaling
+            del proxy.decode_data
+        self.assertEqual(4, len(paint_threads))
+        self.assertNotIn(threading.current_thread(), paint_threads)
+        self.assertEqual({threading.current_thread()}, set(display_scaling_threads))
+        self.assertEqual(4, len(decoded_images))
+        for i, image in enumerate(images):
+            self.assertEqual((4, 8 + i), image.shape)
+            self.assertEqual(2 * (i + 1), numpy.count_nonzero(image))
+            self.assertTrue(any(image is decoded_image for decoded_image in decoded_images))
+
+    def test_paint_rgba_and_read_image_keep_the_image_alive_behind_the_array(self):
+        image_array = PyQtProxy.PaintRGBA([("fillStyle", "#F00"), ("rect", 0, 0, 2, 2), ("fill", )], 4, 3)
+        self.assertIsInstance(image_array.base, PyQtProxy.QImageArrayBase)
+        self.assertEqual((3, 4), image_array.shape)
+        self.assertEqual([0xFFFF0000] * 2 + [0] * 2, list(image_array[0]))
+        image_array = PyQtProxy.ReadImage(self.__write_image("a.png", 5, 2, "#00F"))
+        self.assertIsInstance(image_array.base, PyQtProxy.QImageArrayBase)
+        self.assertTrue(image_array.flags.writeable)
+        self.assertEqual({0xFF0000FF}, set(image_array.flat))
+
+    def test_get_decoded_image_is_shared_read_only_until_file_changes(self):
+        file_path = self.__write_image("a.png", 4, 4, "#F00")
+        image_array = PyQtProxy.GetDecodedImage(file_path)
+        self.assertFalse(image_array.flags.writeable)
+        self.assertEqual({0xFFFF0000}, set(image_array.flat))
+        self.assertIs(image_array, PyQtProxy.GetDecodedImage(file_path))
+        self.assertIsNone(PyQtProxy.GetDecodedImage(os.path.join(self.__directory.name, "missing.png")))
+        self.__write_image("a.png", 4, 4, "#0F0", mtime_ns=2 * 10 ** 18)
+        changed_image_array = PyQtProxy.GetDecodedImage(file_path)
+        self.assertIsNot(image_array, changed_image_array)
+        self.assertEqual({0xFF00FF00}, set(changed_image_array.flat))
+        self.assertEqual(1, len(PyQtProxy.decoded_image_cache))
+        self.assertEqual(changed_image_array.nbytes, PyQtProxy.decoded_image_cache_nbytes)
+
+    def test_get_decoded_image_evicts_least_recently_used_images_over_the_size_limit(self):
+        file_paths = [self.__write_image(f"{i}.png", 4, 4, "#F00") for i in range(3)]
+        decoded_image_cache_size_limit = PyQtProxy.decoded_image_cache_size_limit
+        PyQtProxy.decoded_image_cache_size_limit = 2 * 4 * 4 * 4
+        try:
+            image_array_0 = PyQtProxy.GetDecodedImage(file_paths[0])
+            image_array_1 = PyQtProxy.GetDecodedImage(file_paths[1])
+            self.assertIs(image_array_0, PyQtProxy.GetDecodedImage(file_paths[0]))  # 0 is now the most recently used
+            PyQtProxy.GetDecodedImage(file_paths[2])
+            self.assertEqual([file_paths[0], file_paths[2]], list(PyQtProxy.decoded_image_cache.keys()))
+            self.assertEqual(2 * 4 * 4 * 4, PyQtProxy.decoded_image_cache_nbytes)
+            self.assertIs(image_array_0, PyQtProxy.GetDecodedImage(file_paths[0]))
+            self.assertIsNot(image_array_1, PyQtProxy.GetDecodedImage(file_paths[1]))
+            # images larger than the limit are not cached
+            large_file_path = self.__write_image("large.png", 16, 16, "#F00")
+            self.assertIsNot(PyQtProxy.GetDecodedImage(large_file_path), PyQtProxy.GetDecodedImage(large_file_path))
+            self.assertNotIn(large_file_path, PyQtProxy.decoded_image_cache)
+        finally:
+            PyQtProxy.decoded_image_cache_size_limit = decoded_image_cache_size_limit
+
+    def test_load_rgba_data_from_files_copies_shared_images_unless_read_only(self):
+        ui = QtUserInterface.QtUserInterface(proxy)
+        file_paths = [self.__write_image(f"{i}.png", 4, 2, "#F00") for i in range(3)]
+        results = dict(ui.load_rgba_data_from_files(file_paths))
+        self.assertEqual(set(file_paths), set(results.keys()))
+        for file_path, image_array in results.items():
+            self.assertTrue(image_array.flags.writeable)
+            self.assertIsNot(PyQtProxy.GetDecodedImage(file_path), image_array)
+            self.assertEqual((2, 4), image_array.shape)
+        results = dict(ui.load_rgba_data_from_files(file_paths, read_only=True))
+        for file_path, image_array in results.items():
+            self.assertFalse(image_array.flags.writeable)
+            self.assertIs(PyQtProxy.GetDecodedImage(file_path), image_array)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,126 @@
+# standard libraries
+import builtins
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+# third party libraries
+# None
+
+# local libraries
+from nion.ui import Startup
+from nion.ui import command
+
+
+class TestStartupClass(unittest.TestCase):
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.__directory.name)
+        # modules made by the tests record their execution in this module.
+        self.__log_module = types.ModuleType("startup_test_log")
+        self.__log_module.executed = list()
+        sys.modules["startup_test_log"] = self.__log_module
+        self.__module_names = ["startup_test_log"]
+
+    def tearDown(self):
+        for module_name in self.__module_names:
+            sys.modules.pop(module_name, None)
+        sys.path.remove(self.__directory.name)
+        self.__directory.cleanup()
+
+    def make_module(self, module_name: str, source: str = str()) -> None:
+        with open(os.path.join(self.__directory.name, module_name + ".py"), "w") as f:
+            f.write("import startup_test_log\n")
+            f.write(source)
+            f.write("\nstartup_test_log.executed.append(__name__)\nvalue = 42\n")
+        self.__module_names.append(module_name)
+
+    def test_lazy_import_defers_execution_until_attribute_access(self):
+        self.make_module("startup_test_lazy")
+        module = Startup.lazy_import("startup_test_lazy")
+        self.assertIs(module, sys.modules["startup_test_lazy"])
+        self.assertEqual(list(), self.__log_module.executed)
+        self.assertEqual(42, module.value)
+        self.assertEqual(["startup_test_lazy"], self.__log_module.executed)
+        self.assertIs(types.ModuleType, type(module))
+        self.assertEqual(42, module.value)
+        self.assertEqual(["startup_test_lazy"], self.__log_module.executed)
+        self.assertIs(module, Startup.lazy_import("startup_test_lazy"))
+
+    def test_lazy_import_of_missing_module_raises_import_error(self):
+        with self.assertRaises(ImportError):
+            Startup.lazy_import("startup_test_missing")
+
+    def test_lazy_module_first_accessed_on_several_threads_is_executed_once(self):
+        self.make_module("startup_test_slow", "import time\ntime.sleep(0.2)\n")
+        module = Startup.lazy_import("startup_test_slow")
+        values = list()
+        threads = [threading.Thread(target=lambda: values.append(module.value)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([42] * 4, values)
+        self.assertEqual(["startup_test_slow"], self.__log_module.executed)
+
+    def test_has_module_does_not_import_the_module(self):
+        self.make_module("startup_test_available")
+        self.assertTrue(Startup.has_module("startup_test_available"))
+        self.assertNotIn("startup_test_available", sys.modules)
+        self.assertFalse(Startup.has_module("startup_test_missing"))
+        self.assertFalse(Startup.has_module("startup_test_missing.child"))
+        self.assertTrue(Startup.has_module("json"))
+
+    def test_startup_profiler_reports_imports_and_steps(self):
+        self.make_module("startup_test_profiled")
+        original_import = builtins.__import__
+        with Startup.StartupProfiler() as profiler:
+            with profiler.step("init"):
+                __import__("startup_test_profiled")
+        self.assertIs(original_import, builtins.__import__)
+        self.assertEqual([("step", "init", 0), ("import", "startup_test_profiled", 1)],
+                         [(entry.kind, entry.name, entry.depth) for entry in profiler.entries])
+        step_entry, import_entry = profiler.entries
+        self.assertGreaterEqual(step_entry.elapsed, import_entry.elapsed)
+        self.assertLessEqual(step_entry.self_elapsed, step_entry.elapsed - import_entry.elapsed + 1E-6)
+        output = io.StringIO()
+        profiler.report(output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[1].endswith("[init]"))
+        self.assertTrue(lines[2].endswith("  startup_test_profiled"))
+        self.assertTrue(lines[-1].startswith("startup total"))
+
+    def test_profile_start_includes_application_start_and_reports(self):
+
+        class Application:
+            def start(self):
+                __import__("startup_test_started")
+                return True
+
+        self.make_module("startup_test_started")
+        app = Application()
+        original_import = builtins.__import__
+        profiler = Startup.StartupProfiler()
+        profiler.install()
+        original_start = app.start
+        command.profile_start(profiler, app)
+        self.assertIsNot(original_start, app.start)
+        output = io.StringIO()
+        with contextlib.redirect_stderr(output):
+            self.assertTrue(app.start())
+        self.assertIs(original_import, builtins.__import__)
+        self.assertEqual([("step", "start"), ("import", "startup_test_started")],
+                         [(entry.kind, entry.name) for entry in profiler.entries])
+        self.assertIn("[start]", output.getvalue())
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,146 @@
+# standard libraries
+import binascii
+import concurrent.futures
+import logging
+import pickle
+import unittest
+
+# third party libraries
+import numpy
+
+# local libraries
+from nion.ui import DrawingContext
+from nion.ui import QtUserInterface
+from nion.ui import TestUI
+from nion.ui import UserInterface
+
+
+class TestUserInterfaceClass(unittest.TestCase):
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_persistent_settings_cache_reads_backend_once_and_batches_writes(self):
+        backend = {"a": "1"}
+        reads = list()
+        def read(key):
+            reads.append(key)
+            return backend.get(key)
+        def write(key, value):
+            backend[key] = value
+        def remove(key):
+            backend.pop(key, None)
+        settings = UserInterface.PersistentSettingsCache(read, write, remove, write_delay=3600)
+        self.assertEqual("1", settings.get("a"))
+        self.assertEqual("1", settings.get("a"))
+        self.assertIsNone(settings.get("b"))
+        self.assertIsNone(settings.get("b"))
+        self.assertEqual(["a", "b"], reads)
+        for i in range(100):
+            settings.set("b", str(i))
+        settings.remove("a")
+        settings.periodic()
+        self.assertTrue(settings.has_pending_writes)
+        self.assertEqual({"a": "1"}, backend)
+        self.assertEqual("99", settings.get("b"))
+        settings.close()
+        self.assertFalse(settings.has_pending_writes)
+        self.assertEqual({"b": "99"}, backend)
+        self.assertEqual(2, settings.write_count)
+
+    def test_persistent_object_encoding_round_trips_and_reads_legacy_format(self):
+        for value in ({"a": [1, 2]}, (1, 2), {1: "x"}, "abc", 3.5, [1, (2, 3)]):
+            encoded = UserInterface.encode_persistent_object(value)
+            decoded = UserInterface.decode_persistent_object(encoded)
+            self.assertEqual(value, decoded)
+            self.assertEqual(type(value), type(decoded))
+        self.assertTrue(UserInterface.encode_persistent_object({"a": [1, 2]}).startswith("json:"))
+        for value in (numpy.float64(1.5), [True, numpy.int64(2)], {"a": float("nan")}, {"a": (1, 2)}):
+            encoded = UserInterface.encode_persistent_object(value)
+            self.assertTrue(encoded.startswith("pickle:"))
+            decoded = UserInterface.decode_persistent_object(encoded)
+            self.assertEqual(repr(value), repr(decoded))
+        legacy = binascii.hexlify(pickle.dumps((4, 5), 0)).decode("utf-8")
+        self.assertEqual((4, 5), UserInterface.decode_persistent_object(legacy))
+
+    def test_qt_window_writes_pending_settings_from_its_timer_and_when_closing(self):
+
+        class Proxy:
+            def __init__(self):
+                self.settings = dict()
+
+            def Settings_getString(self, key):
+                return self.settings.get(key)
+
+            def Settings_setString(self, key, value):
+                self.settings[key] = value
+
+            def Settings_remove(self, key):
+                self.settings.pop(key, None)
+
+            def __getattr__(self, name):
+                return lambda *args: None
+
+        proxy = Proxy()
+        settings = UserInterface.PersistentSettingsCache(proxy.Settings_getString, proxy.Settings_setString, proxy.Settings_remove, write_delay=0)
+        window = QtUserInterface.QtWindow(proxy, None, "title", persistent_settings=settings)
+        settings.set("a", "1")
+        self.assertEqual(dict(), proxy.settings)
+        window.periodic()
+        self.assertEqual({"a": "1"}, proxy.settings)
+        settings = UserInterface.PersistentSettingsCache(proxy.Settings_getString, proxy.Settings_setString, proxy.Settings_remove, write_delay=3600)
+        window = QtUserInterface.QtWindow(proxy, None, "title", persistent_settings=settings)
+        window.on_about_to_close = lambda geometry, state: settings.set("geometry", geometry)
+        window.periodic()
+        self.assertNotIn("geometry", proxy.settings)
+        window.aboutToClose("g", "s")
+        self.assertEqual("g", proxy.settings["geometry"])
+
+    def test_qt_keyboard_modifiers_and_keys_are_shared_for_the_same_raw_values(self):
+        shift_modifiers = QtUserInterface.get_keyboard_modifiers(0x02000000)
+        self.assertIs(shift_modifiers, QtUserInterface.get_keyboard_modifiers(0x02000000))
+        self.assertIsNot(shift_modifiers, QtUserInterface.get_keyboard_modifiers(0))
+        self.assertTrue(shift_modifiers.only_shift)
+        with self.assertRaises(AttributeError):
+            shift_modifiers.raw_modifiers = 0
+        key = QtUserInterface.get_key("a", 0x41, 0x02000000)
+        self.assertIs(key, QtUserInterface.get_key("a", 0x41, 0x02000000))
+        self.assertIsNot(key, QtUserInterface.get_key("a", 0x41, 0))
+        self.assertIs(shift_modifiers, key.modifiers)
+        self.assertEqual("a", key.text)
+
+    def test_create_rgba_images_returns_a_future_for_each_job(self):
+        ui = TestUI.UserInterface()
+        drawing_context = DrawingContext.DrawingContext()
+        futures = ui.create_rgba_images([(drawing_context, 8, 6), (drawing_context, 3, 2)])
+        self.assertEqual(2, len(futures))
+        self.assertEqual({(6, 8), (2, 3)}, {future.result().shape for future in concurrent.futures.as_completed(futures)})
+        self.assertEqual((6, 8), futures[0].result().shape)
+
+    def test_load_rgba_data_from_files_yields_data_for_each_file(self):
+        ui = TestUI.UserInterface()
+        results = dict(ui.load_rgba_data_from_files(["a.png", "b.png"]))
+        self.assertEqual({"a.png", "b.png"}, set(results.keys()))
+        self.assertEqual((20, 20), results["a.png"].shape)
+
+    def test_map_future_applies_function_to_result_and_forwards_cancellation(self):
+        future = concurrent.futures.Future()
+        mapped_future = QtUserInterface.map_future(future, lambda x: x * 2)
+        future.set_result(21)
+        self.assertEqual(42, mapped_future.result(timeout=0))
+        future = concurrent.futures.Future()
+        mapped_future = QtUserInterface.map_future(future, lambda x: x * 2)
+        self.assertTrue(mapped_future.cancel())
+        self.assertTrue(future.cancelled())
+        future = concurrent.futures.Future()
+        mapped_future = QtUserInterface.map_future(future, lambda x: x * 2)
+        future.set_exception(ValueError())
+        self.assertIsInstance(mapped_future.exception(timeout=0), ValueError)
+
+
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.DEBUG)
+    unittest.main()
@@ -58,6 +58,91 @@ class TestCanvasItemClass(unittest.TestCase):
         self.assertEqual(0, len(widget.pending_queued_tasks))
         widget.run_pending_keyed_tasks()
 
+    def test_virtual_table_widget_only_creates_visible_rows(self):
+        from nion.ui import Widgets
+        ui = TestUI.UserInterface()
+        created_items = list()
+        def create_item(item):
+            created_items.append(item)
+            return ui.create_label_widget(str(item))
+        widget = Widgets.VirtualTableWidget(ui, create_item, 20)
+        list_model = ListModel.ListModel(items=list(range(10000)))
+        scroll_area = widget.find_widget_by_id("content_scroll_area")
+        scroll_area._behavior.on_viewport_changed(((0, 0), (200, 300)))
+        widget.bind_items(Binding.ListBinding(list_model, "items"))
+        with contextlib.closing(widget):
+            self.assertEqual(10000, widget.list_item_count)
+            self.assertEqual((0, 18), widget.visible_range)
+            self.assertEqual(18, len(widget.list_items))
+            self.assertEqual(list(range(18)), created_items)
+            # scroll down a page; only the new rows are created
+            created_items.clear()
+            scroll_area._behavior.on_viewport_changed(((200, 0), (200, 300)))
+            self.assertEqual((6, 24), widget.visible_range)
+            self.assertEqual(list(range(18, 24)), created_items)
+            self.assertEqual(["6", "7"], [row.text for row in widget.list_items[:2]])
+
+    def test_virtual_table_widget_recycles_rows_when_scrolling(self):
+        from nion.ui import Widgets
+        ui = TestUI.UserInterface()
+        created_items = list()
+        def create_item(item):
+            created_items.append(item)
+            return ui.create_label_widget(str(item))
+        def update_item(row_widget, item):
+            row_widget.text = str(item)
+        widget = Widgets.VirtualTableWidget(ui, create_item, 20, update_list_item_widget=update_item)
+        list_model = ListModel.ListModel(items=list(range(1000)))
+        scroll_area = widget.find_widget_by_id("content_scroll_area")
+        scroll_area._behavior.on_viewport_changed(((0, 0), (200, 300)))
+        widget.bind_items(Binding.ListBinding(list_model, "items"))
+        with contextlib.closing(widget):
+            first_rows = list(widget.list_items)
+            scroll_area._behavior.on_viewport_changed(((4000, 0), (200, 300)))
+            self.assertEqual(first_rows, widget.list_items[:len(first_rows)])
+            self.assertEqual(str(196), widget.list_items[0].text)
+            self.assertEqual(18, len(created_items))
+
+    def test_virtual_table_widget_handles_float_viewport(self):
+        from nion.ui import Widgets
+        ui = TestUI.UserInterface()
+        def create_item(item): return ui.create_label_widget(str(item))
+        widget = Widgets.VirtualTableWidget(ui, create_item, 20)
+        list_model = ListModel.ListModel(items=list(range(1000)))
+        scroll_area = widget.find_widget_by_id("content_scroll_area")
+        # record the spacer heights given to the top and bottom spacers of the content column.
+        spacer_heights = dict()
+        for index in (0, 2):
+            spacer = scroll_area.content.children[index]
+            spacer._behavior.set_property = lambda key, value, index=index: spacer_heights.__setitem__(index, value)
+        scroll_area._behavior.on_viewport_changed(((0.0, 0.0), (200.0, 300.0)))
+        widget.bind_items(Binding.ListBinding(list_model, "items"))
+        with contextlib.closing(widget):
+            self.assertEqual((0, 18), widget.visible_range)
+            scroll_area._behavior.on_viewport_changed(((210.5, 0.0), (190.5, 300.0)))
+            self.assertEqual((6, 24), widget.visible_range)
+            self.assertEqual(["6", "7"], [row.text for row in widget.list_items[:2]])
+            self.assertEqual({0: 120, 2: 19520}, spacer_heights)
+            self.assertEqual({int}, {type(height) for height in spacer_heights.values()})
+
+    def test_virtual_table_widget_batches_binding_changes(self):
+        from nion.ui import Widgets
+        ui = TestUI.UserInterface()
+        def create_item(item): return ui.create_label_widget(item)
+        widget = Widgets.VirtualTableWidget(ui, create_item, 20)
+        list_model = ListModel.ListModel()
+        widget.bind_items(Binding.ListBinding(list_model, "items"))
+        with contextlib.closing(widget):
+            list_model.insert_item(0, "abc")
+            list_model.insert_item(1, "def")
+            list_model.insert_item(2, "ghi")
+            list_model.remove_item(0)
+            self.assertEqual(1, len(widget.pending_keyed_tasks))
+            self.assertEqual(0, widget.list_item_count)
+            widget.run_pending_keyed_tasks()
+            self.assertEqual(2, widget.list_item_count)
+            self.assertEqual(["def", "ghi"], [row.text for row in widget.list_items])
+
 
 if __name__ == '__main__':
     logging.getLogger().setLevel(logging.DEBUG)